@@ -0,0 +1,583 @@
+"""
+fs.aio
+======
+
+An asyncio interface to FS objects.
+
+:class:`AsyncFS` wraps any filesystem, and has methods that return awaitable
+futures in place of blocking.  The calls are made by the worker threads of the
+filesystem's executor (see :meth:`~fs.base.FS.getexecutor`).  No more calls
+are handed to the executor than it has workers, and the rest wait in the event
+loop, so even a large burst of calls never blocks the loop::
+
+    from fs.aio import wrap
+
+    async def show_tree(fs):
+        async_fs = wrap(fs)
+        async for dir_path, files in async_fs.walk():
+            for name in files:
+                info = await async_fs.getinfo(pathjoin(dir_path, name))
+                print(name, info['size'])
+
+:func:`wrap` uses a non-blocking implementation for the filesystems that
+have one.  At present that is :class:`~fs.httpfs.HTTPFS`: its requests are
+made over asyncio connections, so any number of them can be in progress
+without a thread for each.
+
+This module requires Python 3.5 or later.
+
+"""
+
+import codecs
+import collections
+from functools import partial
+from urlparse import urlsplit, urljoin
+from datetime import datetime
+
+try:
+    import asyncio
+except ImportError:
+    raise ImportError("fs.aio requires asyncio (Python 3.5 or later)")
+
+from fs.errors import (ResourceNotFoundError, UnsupportedError,
+                       RemoteConnectionError)
+from fs.executor import method_caller
+from fs.httpfs import HTTPFS
+
+__all__ = ['AsyncFS',
+           'AsyncFile',
+           'AsyncHTTPFS',
+           'wrap']
+
+
+def wrap(fs, loop=None):
+    """Get an asynchronous interface to a filesystem, which is non-blocking
+    if this module has an implementation for it.
+
+    :param fs: the filesystem to wrap
+    :param loop: the event loop to use, defaults to the current loop
+    :rtype: :class:`AsyncFS`
+
+    """
+    if isinstance(fs, HTTPFS):
+        return AsyncHTTPFS(fs, loop=loop)
+    return AsyncFS(fs, loop=loop)
+
+
+def _then(loop, future, func):
+    """Get a future for ``func(<result of future>)``."""
+    result = loop.create_future()
+
+    def done(future):
+        if result.cancelled():
+            return
+        if future.cancelled():
+            result.cancel()
+        elif future.exception() is not None:
+            result.set_exception(future.exception())
+        else:
+            try:
+                result.set_result(func(future.result()))
+            except Exception as e:
+                result.set_exception(e)
+
+    future.add_done_callback(done)
+    result.add_done_callback(lambda result: result.cancelled() and future.cancel())
+    return result
+
+
+def _flatten(loop, future):
+    """Get a future for the result of a future whose result is a future."""
+    result = loop.create_future()
+
+    def inner_done(inner):
+        if result.done():
+            return
+        if inner.cancelled():
+            result.cancel()
+        elif inner.exception() is not None:
+            result.set_exception(inner.exception())
+        else:
+            result.set_result(inner.result())
+
+    def outer_done(outer):
+        if outer.cancelled() or outer.exception() is not None:
+            inner_done(outer)
+        else:
+            outer.result().add_done_callback(inner_done)
+
+    future.add_done_callback(outer_done)
+    return result
+
+
+def _resolved(loop, value=None, exception=None):
+    """Get a future that is already done."""
+    future = loop.create_future()
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(value)
+    return future
+
+
+def _next_item(fs, iterator):
+    for item in iterator:
+        return (False, item)
+    return (True, None)
+
+
+def _call_file(fs, f, method_name, *args):
+    return getattr(f, method_name)(*args)
+
+
+def _async_method(method_name):
+    def method(self, *args, **kwargs):
+        return self._call(method_caller(method_name), *args, **kwargs)
+    method.__name__ = method_name
+    method.__doc__ = "Like :meth:`fs.base.FS.%s`, returns a future for the result." % method_name
+    return method
+
+
+class _AsyncIterator(object):
+    """Iterates over a blocking iterator in the worker threads."""
+
+    def __init__(self, async_fs, iterator):
+        self.async_fs = async_fs
+        self._iterator = iterator
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return _then(self.async_fs.loop,
+                     self.async_fs._call(_next_item, self._iterator),
+                     self._item)
+
+    @staticmethod
+    def _item(result):
+        finished, item = result
+        if finished:
+            raise StopAsyncIteration
+        return item
+
+
+class AsyncFS(object):
+    """Makes the calls to an FS object in worker threads, for use from an
+    asyncio event loop.
+
+    Cancelling a future stops the call if it hasn't been started yet.
+
+    :param fs: the filesystem to wrap
+    :param loop: the event loop to use, defaults to the current loop at the
+        time of the first call
+
+    """
+
+    def __init__(self, fs, loop=None):
+        self.fs = fs
+        self._loop = loop
+        self._pending = collections.deque()
+        self._running = 0
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self.fs)
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def _call(self, func, *args, **kwargs):
+        """Queue ``func(fs, *args, **kwargs)`` for a worker of the filesystem,
+        and get a future for the result."""
+        future = self.loop.create_future()
+        self._pending.append((future, func, args, kwargs))
+        self._start_pending()
+        return future
+
+    def _start_pending(self):
+        #  Only give the executor as many calls as it has workers, so that
+        #  submitting never has to wait for its queue
+        max_running = self.fs.getexecutor().max_workers
+        while self._pending and self._running < max_running:
+            future, func, args, kwargs = self._pending.popleft()
+            if future.cancelled():
+                continue
+            self._running += 1
+            fs_future = self.fs._submit(func, *args, **kwargs)
+            future.add_done_callback(lambda future, fs_future=fs_future: future.cancelled() and fs_future.cancel())
+            fs_future.add_done_callback(partial(self._notify, future))
+
+    def _notify(self, future, fs_future):
+        #  Called by the worker thread
+        self.loop.call_soon_threadsafe(self._finished, future, fs_future)
+
+    def _finished(self, future, fs_future):
+        self._running -= 1
+        if not future.cancelled():
+            if fs_future.cancelled():
+                future.cancel()
+            elif fs_future.exception() is not None:
+                future.set_exception(fs_future.exception())
+            else:
+                future.set_result(fs_future.result())
+        self._start_pending()
+
+    def open(self, path, mode="r", **kwargs):
+        """Open a file, returns a future for an :class:`AsyncFile`.
+
+        Takes the same arguments as :meth:`fs.base.FS.open`.
+
+        """
+        return _then(self.loop,
+                     self._call(method_caller("open"), path, mode, **kwargs),
+                     partial(AsyncFile, self))
+
+    def walk(self, *args, **kwargs):
+        """Like :meth:`fs.base.FS.walk`, but returns an asynchronous iterator.
+        Each directory listing is fetched in a worker thread."""
+        return _AsyncIterator(self, self.fs.walk(*args, **kwargs))
+
+    def walkfiles(self, *args, **kwargs):
+        """Like :meth:`fs.base.FS.walkfiles`, but returns an asynchronous
+        iterator."""
+        return _AsyncIterator(self, self.fs.walkfiles(*args, **kwargs))
+
+    copy = _async_method("copy")
+    exists = _async_method("exists")
+    getcontents = _async_method("getcontents")
+    gethash = _async_method("gethash")
+    getinfo = _async_method("getinfo")
+    getsize = _async_method("getsize")
+    isdir = _async_method("isdir")
+    isfile = _async_method("isfile")
+    listdir = _async_method("listdir")
+    listdirinfo = _async_method("listdirinfo")
+    makedir = _async_method("makedir")
+    move = _async_method("move")
+    remove = _async_method("remove")
+    removedir = _async_method("removedir")
+    rename = _async_method("rename")
+    setcontents = _async_method("setcontents")
+
+
+class AsyncFile(object):
+    """A file opened with :meth:`AsyncFS.open`, with methods that return
+    futures.  Only one call should be made at a time.
+
+    An AsyncFile can be used with ``async with``, and is closed at the end of
+    the block.
+
+    """
+
+    def __init__(self, async_fs, f):
+        self.async_fs = async_fs
+        self.f = f
+
+    def __repr__(self):
+        return "<AsyncFile %r>" % (self.f,)
+
+    def _call(self, method_name, *args):
+        return self.async_fs._call(_call_file, self.f, method_name, *args)
+
+    def __aenter__(self):
+        return _resolved(self.async_fs.loop, self)
+
+    def __aexit__(self, exc_type, exc_value, traceback):
+        return self.close()
+
+    def read(self, size=-1):
+        """Read up to `size` bytes, or the rest of the file."""
+        return self._call("read", size)
+
+    def write(self, data):
+        return self._call("write", data)
+
+    def seek(self, offset, whence=0):
+        return self._call("seek", offset, whence)
+
+    def tell(self):
+        return self._call("tell")
+
+    def flush(self):
+        return self._call("flush")
+
+    def close(self):
+        return self._call("close")
+
+
+class _HTTPResponse(asyncio.Protocol):
+    """Reads an HTTP/1.0 response from a connection.
+
+    Reading is paused while more than `buffer_size` bytes of the body are
+    waiting to be read, so a slow reader doesn't fill up memory.
+
+    """
+
+    max_header_size = 64 * 1024
+    buffer_size = 256 * 1024
+
+    def __init__(self, loop, request):
+        self.loop = loop
+        self.request = request
+        self.headers_received = loop.create_future()
+        self.status = None
+        self.headers = {}
+        self.transport = None
+        self._head = b""
+        self._buffer = bytearray()
+        self._eof = False
+        self._error = None
+        self._waiter = None
+        self._paused = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.write(self.request)
+
+    def data_received(self, data):
+        if not self.headers_received.done():
+            self._head += data
+            end = self._head.find(b"\r\n\r\n")
+            if end == -1:
+                if len(self._head) > self.max_header_size:
+                    self.close()
+                    self.headers_received.set_exception(RemoteConnectionError(msg="Response headers too long"))
+                return
+            data = self._head[end + 4:]
+            try:
+                self._parse_head(self._head[:end])
+            except (ValueError, IndexError):
+                self.close()
+                self.headers_received.set_exception(RemoteConnectionError(msg="Invalid HTTP response"))
+                return
+            self._head = b""
+            self.headers_received.set_result(self)
+        self._buffer.extend(data)
+        if len(self._buffer) > self.buffer_size and not self._paused:
+            self._paused = True
+            self.transport.pause_reading()
+        self._wake()
+
+    def _parse_head(self, head):
+        lines = head.decode("latin-1").split("\r\n")
+        self.status = int(lines[0].split(None, 2)[1])
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            self.headers[name.strip().lower()] = value.strip()
+
+    def eof_received(self):
+        self._finish(None)
+
+    def connection_lost(self, exc):
+        self._finish(exc)
+
+    def _finish(self, exc):
+        self._eof = True
+        if self._error is None:
+            self._error = exc
+        if not self.headers_received.done():
+            self.headers_received.set_exception(RemoteConnectionError(msg="Connection closed", details=exc))
+        self._wake()
+
+    def _wake(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _resume_reading(self):
+        if self._paused and len(self._buffer) <= self.buffer_size:
+            self._paused = False
+            self.transport.resume_reading()
+
+    def read(self, size=-1):
+        """Read up to `size` bytes of the body, or all of the rest of it if
+        `size` is negative; returns a future for the data."""
+        result = self.loop.create_future()
+        chunks = []
+
+        def attempt(waiter=None):
+            if result.done():
+                return
+            if self._buffer and size >= 0:
+                data = bytes(self._buffer[:size])
+                del self._buffer[:size]
+            elif self._eof:
+                data = bytes(self._buffer)
+                del self._buffer[:]
+                if not data and not chunks and self._error is not None:
+                    result.set_exception(RemoteConnectionError(msg="Connection lost", details=self._error))
+                    return
+            else:
+                if self._buffer:
+                    chunks.append(bytes(self._buffer))
+                    del self._buffer[:]
+                self._resume_reading()
+                self._waiter = self.loop.create_future()
+                self._waiter.add_done_callback(attempt)
+                return
+            self._resume_reading()
+            chunks.append(data)
+            result.set_result(b"".join(chunks))
+
+        attempt()
+        return result
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+
+class AsyncHTTPFile(AsyncFile):
+    """A file opened with :meth:`AsyncHTTPFS.open`, which reads the response
+    as it arrives rather than in a worker thread.  Only `read` and `close`
+    are supported; in text mode, `size` is a number of bytes."""
+
+    def __init__(self, async_fs, response, encoding=None, errors=None):
+        super(AsyncHTTPFile, self).__init__(async_fs, None)
+        self.response = response
+        self._decoder = None
+        if encoding is not None:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors or "strict")
+
+    def __repr__(self):
+        return "<AsyncHTTPFile %s>" % (self.response.headers.get("content-location", ""),)
+
+    def _decode(self, data):
+        if self._decoder is None:
+            return data
+        return self._decoder.decode(data, final=not data)
+
+    def _call(self, method_name, *args):
+        return _resolved(self.async_fs.loop, exception=UnsupportedError(method_name))
+
+    def read(self, size=-1):
+        return _then(self.async_fs.loop, self.response.read(size), self._decode)
+
+    def close(self):
+        self.response.close()
+        return _resolved(self.async_fs.loop)
+
+
+class AsyncHTTPFS(AsyncFS):
+    """Non-blocking access to an :class:`~fs.httpfs.HTTPFS`.
+
+    Files are fetched over asyncio connections, without using worker
+    threads.  Methods that don't have a non-blocking version here are run in
+    worker threads as for :class:`AsyncFS`.
+
+    """
+
+    #: Maximum number of redirects followed for a request
+    max_redirects = 5
+
+    def _request(self, path, method="GET"):
+        """Request a path, following any redirects.  Returns a future for
+        the response, once its headers have arrived."""
+        result = self.loop.create_future()
+
+        def attempt(url, redirects):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                result.set_exception(UnsupportedError(msg="Unsupported URL: %s" % url))
+                return
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+            request = ("%s %s HTTP/1.0\r\nHost: %s\r\nConnection: close\r\n\r\n"
+                       % (method, target, parts.netloc)).encode("utf-8")
+            response = _HTTPResponse(self.loop, request)
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            connect = self.loop.create_task(self.loop.create_connection(lambda: response,
+                                                                        parts.hostname,
+                                                                        port,
+                                                                        ssl=parts.scheme == "https" or None))
+
+            def connected(connect):
+                if result.cancelled():
+                    if not connect.cancelled() and connect.exception() is None:
+                        response.close()
+                    return
+                if connect.exception() is not None:
+                    result.set_exception(ResourceNotFoundError(path, details=connect.exception()))
+                    return
+                response.headers_received.add_done_callback(received)
+
+            def received(headers_received):
+                if result.cancelled():
+                    response.close()
+                    return
+                if headers_received.exception() is not None:
+                    result.set_exception(ResourceNotFoundError(path, details=headers_received.exception()))
+                    return
+                status = response.status
+                location = response.headers.get("location")
+                if status in (301, 302, 303, 307, 308) and location and redirects < self.max_redirects:
+                    response.close()
+                    attempt(urljoin(url, location), redirects + 1)
+                elif status >= 400:
+                    response.close()
+                    result.set_exception(ResourceNotFoundError(path, msg="HTTP %i for %%(path)s" % status))
+                else:
+                    result.set_result(response)
+
+            result.add_done_callback(lambda result: result.cancelled() and connect.cancel())
+            connect.add_done_callback(connected)
+
+        attempt(self.fs._make_url(path), 0)
+        return result
+
+    def open(self, path, mode="r", encoding=None, errors=None, **kwargs):
+        if '+' in mode or 'w' in mode or 'a' in mode:
+            return _resolved(self.loop, exception=UnsupportedError('write'))
+        if 'b' not in mode and encoding is None:
+            encoding = "utf-8"
+        elif 'b' in mode:
+            encoding = None
+        return _then(self.loop,
+                     self._request(path),
+                     lambda response: AsyncHTTPFile(self, response, encoding, errors))
+
+    def getcontents(self, path, mode="rb", encoding=None, errors=None, newline=None):
+        def read_all(f):
+            return _then(self.loop, f.read(), lambda data: (f.close(), data)[1])
+        opened = self.open(path, mode, encoding=encoding, errors=errors)
+        return _flatten(self.loop, _then(self.loop, opened, read_all))
+
+    def getinfo(self, path):
+        def info(response):
+            response.close()
+            info = dict(response.headers)
+            if 'content-length' in info:
+                info['size'] = int(info['content-length'])
+            if 'last-modified' in info:
+                try:
+                    info['modified_time'] = datetime.strptime(info['last-modified'],
+                                                              "%a, %d %b %Y %H:%M:%S %Z")
+                except ValueError:
+                    pass
+            return info
+        return _then(self.loop, self._request(path, "HEAD"), info)
+
+    def isfile(self, path):
+        result = self.loop.create_future()
+
+        def done(request):
+            if result.cancelled():
+                return
+            if request.exception() is None:
+                request.result().close()
+                result.set_result(True)
+            elif isinstance(request.exception(), ResourceNotFoundError):
+                result.set_result(False)
+            else:
+                result.set_exception(request.exception())
+
+        self._request(path, "HEAD").add_done_callback(done)
+        return result
+
+    exists = isfile
+
+    def isdir(self, path):
+        return _resolved(self.loop, False)
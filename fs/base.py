@@ -37,6 +37,12 @@ except ImportError:
 from fs.path import *
 from fs.errors import *
 from fs.local_functools import wraps
+from fs.iotools import copyfile_syspath, copy_file_to_fs, hash_stream
+from fs.executor import FSExecutor, method_caller
+from fs.hashcache import hash_stamp
+from fs.globbing import compile_glob, compile_wildcard
+from fs.scan import scan_batches
+from fs import trace
 
 import six
 from six import b
@@ -137,6 +143,14 @@ class NullFile(object):
         pass
 
 
+def _defining_class(cls, name):
+    """Get the class in the MRO of `cls` that defines the attribute `name`."""
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass
+    return object
+
+
 def synchronize(func):
     """Decorator to synchronize a method on self._lock."""
     @wraps(func)
@@ -157,6 +171,21 @@ class FS(object):
 
     _meta = {}
 
+    #: Number of bytes copied per chunk when data has to be streamed
+    #: through Python, used whenever a chunk_size of None is given
+    copy_chunk_size = 64 * 1024
+
+    #: Number of worker threads that run the ``*_async`` methods
+    async_workers = 4
+
+    #: Number of ``*_async`` calls that may wait for a worker before further
+    #: calls block
+    async_queue_size = 64
+
+    #: Cache used by `gethash` to remember digests, or None to work them out
+    #: every time (see `fs.hashcache`)
+    hash_cache = None
+
     def __init__(self, thread_synchronize=True):
         """The base class for Filesystem objects.
 
@@ -208,6 +237,9 @@ class FS(object):
         are no longer required.
 
         """
+        executor = self.__dict__.pop("_executor", None)
+        if executor is not None:
+            executor.shutdown()
         self.closed = True
 
     def __getstate__(self):
@@ -215,9 +247,11 @@ class FS(object):
         #  type of lock that should be there.  None == no lock,
         #  True == a proper lock, False == a dummy lock.
         state = self.__dict__.copy()
+        #  Worker threads belong to this object, not to copies of it
+        state.pop("_executor", None)
         lock = state.get("_lock", None)
         if lock is not None:
-            if isinstance(lock, threading._RLock):
+            if not isinstance(lock, DummyLock):
                 state["_lock"] = True
             else:
                 state["_lock"] = False
@@ -232,6 +266,45 @@ class FS(object):
             else:
                 self._lock = DummyLock()
 
+    def _worker_clone(self):
+        """Returns an FS object that may be used by a worker thread concurrently
+        with this one.
+
+        The default returns this object, which is appropriate for filesystems
+        that can service several threads at once.  Filesystems that serialize
+        every operation over a single connection should return an independent
+        copy with its own connection.  The caller is responsible for closing
+        the returned object if it is not this one.
+
+        """
+        return self
+
+    def getexecutor(self):
+        """Get the executor that runs the ``*_async`` methods of this
+        filesystem, creating it on first use.
+
+        The executor has `async_workers` worker threads and lets up to
+        `async_queue_size` calls wait for them; set these attributes before
+        the first asynchronous call to configure it.  The executor is shut
+        down when the filesystem is closed.
+
+        :rtype: `fs.executor.FSExecutor`
+
+        """
+        with self._lock:
+            executor = self.__dict__.get("_executor")
+            if executor is None:
+                executor = FSExecutor(self,
+                                      max_workers=self.async_workers,
+                                      max_queued=self.async_queue_size)
+                self._executor = executor
+            return executor
+
+    def _submit(self, func, *args, **kwargs):
+        """Queue ``func(fs, *args, **kwargs)`` on the executor, where `fs` is
+        this filesystem or a worker's clone of it, and return a future."""
+        return self.getexecutor().submit(func, *args, **kwargs)
+
     def getmeta(self, meta_name, default=NoDefaultMeta):
         """Retrieve a meta value associated with an FS object.
 
@@ -560,9 +633,7 @@ class FS(object):
             raise ValueError("dirs_only and files_only can not both be True")
 
         if wildcard is not None:
-            if not callable(wildcard):
-                wildcard_re = re.compile(fnmatch.translate(wildcard))
-                wildcard = lambda fn: bool(wildcard_re.match(fn))
+            wildcard = compile_wildcard(wildcard)
             entries = [p for p in entries if wildcard(p)]
 
         if dirs_only:
@@ -728,6 +799,9 @@ class FS(object):
          * "accessed_time" - A datetime object containing the time the resource was last accessed
          * "modified_time" - A datetime object containing the time the resource was modified
 
+        Some implementations return an :class:`~fs.info.Info` object, which
+        behaves like a dictionary but only works out values when they are read.
+
         :param path: a path to retrieve information for
         :type path: string
 
@@ -756,6 +830,47 @@ class FS(object):
         info = self.getinfo(path)
         return dict((k, info[k]) for k in keys if k in info)
 
+    def getinfo_many(self, paths):
+        """Returns information for several paths at once, as a list of info
+        dictionaries (see `getinfo`) in the same order as the paths.
+
+        The default implementation calls `getinfo` for each path, but
+        filesystems may override it to fetch the information with fewer
+        round trips.
+
+        :param paths: an iterable of paths to retrieve information for
+
+        :rtype: list of dicts, with None for any path that does not exist
+
+        """
+        infos = []
+        for path in paths:
+            try:
+                infos.append(self.getinfo(path))
+            except ResourceNotFoundError:
+                infos.append(None)
+        return infos
+
+    def exists_many(self, paths):
+        """Check if several paths reference valid resources.
+
+        :param paths: an iterable of paths in the filesystem
+
+        :rtype: list of bools, in the same order as the paths
+
+        """
+        return [self.exists(path) for path in paths]
+
+    def isdir_many(self, paths):
+        """Check if several paths reference directories.
+
+        :param paths: an iterable of paths in the filesystem
+
+        :rtype: list of bools, in the same order as the paths
+
+        """
+        return [self.isdir(path) for path in paths]
+
     def desc(self, path):
         """Returns short descriptive text regarding a path. Intended mainly as
         a debugging aid.
@@ -786,24 +901,28 @@ class FS(object):
         """
         if 'r' not in mode:
             raise ValueError("mode must contain 'r' to be readable")
-        f = None
-        try:
-            f = self.open(path, mode=mode, encoding=encoding, errors=errors, newline=newline)
-            contents = f.read()
-            return contents
-        finally:
-            if f is not None:
-                f.close()
+        with trace.span(self, "getcontents", path) as span:
+            f = None
+            try:
+                f = self.open(path, mode=mode, encoding=encoding, errors=errors, newline=newline)
+                contents = f.read()
+                span.add_bytes(len(contents))
+                return contents
+            finally:
+                if f is not None:
+                    f.close()
 
     def _setcontents(self,
                      path,
                      data,
                      encoding=None,
                      errors=None,
-                     chunk_size=1024 * 64,
+                     chunk_size=None,
                      progress_callback=None,
                      finished_callback=None):
         """Does the work of setcontents. Factored out, so that `setcontents_async` can use it"""
+        if chunk_size is None:
+            chunk_size = self.copy_chunk_size
         if progress_callback is None:
             progress_callback = lambda bytes_written: None
         if finished_callback is None:
@@ -819,21 +938,13 @@ class FS(object):
         progress_callback(0)
 
         if hasattr(data, 'read'):
-            read = data.read
-            chunk = read(chunk_size)
-            if isinstance(chunk, six.text_type):
-                f = self.open(path, 'wt', encoding=encoding, errors=errors)
-            else:
-                f = self.open(path, 'wb')
-            write = f.write
-            try:
-                while chunk:
-                    write(chunk)
-                    bytes_written += len(chunk)
-                    progress_callback(bytes_written)
-                    chunk = read(chunk_size)
-            finally:
-                f.close()
+            bytes_written = copy_file_to_fs(data,
+                                            self,
+                                            path,
+                                            encoding=encoding,
+                                            errors=errors,
+                                            progress_callback=progress_callback,
+                                            chunk_size=chunk_size)
         else:
             if isinstance(data, six.text_type):
                 with self.open(path, 'wt', encoding=encoding, errors=errors) as f:
@@ -848,66 +959,104 @@ class FS(object):
         finished_callback()
         return bytes_written
 
-    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=1024 * 64):
+    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=None):
         """A convenience method to create a new file from a string or file-like object
 
         :param path: a path of the file to create
         :param data: a string or bytes object containing the contents for the new file
         :param encoding: if `data` is a file open in text mode, or a text string, then use this `encoding` to write to the destination file
         :param errors: if `data` is a file open in text mode or a text string, then use `errors` when opening the destination file
-        :param chunk_size: Number of bytes to read in a chunk, if the implementation has to resort to a read / copy loop
+        :param chunk_size: Number of bytes to read in a chunk, if the implementation has to resort to a read / copy loop,
+            or None to use the `copy_chunk_size` of this filesystem
 
         """
-        return self._setcontents(path, data, encoding=encoding, errors=errors, chunk_size=1024 * 64)
+        with trace.span(self, "setcontents", path) as span:
+            bytes_written = self._setcontents(path, data, encoding=encoding, errors=errors, chunk_size=chunk_size)
+            span.add_bytes(bytes_written)
+            return bytes_written
 
     def setcontents_async(self,
                           path,
                           data,
                           encoding=None,
                           errors=None,
-                          chunk_size=1024 * 64,
+                          chunk_size=None,
                           progress_callback=None,
                           finished_callback=None,
                           error_callback=None):
         """Create a new file from a string or file-like object asynchronously
 
-        This method returns a ``threading.Event`` object. Call the ``wait`` method on the event object
-        to block until all data has been written, or simply ignore it.
+        The file is written by one of the worker threads of this filesystem's
+        executor (see :meth:`getexecutor`).  Call the ``wait`` method of the
+        returned future to block until all data has been written, or its
+        ``result`` method to also get the number of bytes written and see any
+        error that occurred.
 
         :param path: a path of the file to create
         :param data: a string or a file-like object containing the contents for the new file
         :param encoding: if `data` is a file open in text mode, or a text string, then use this `encoding` to write to the destination file
         :param errors: if `data` is a file open in text mode or a text string, then use `errors` when opening the destination file
-        :param chunk_size: Number of bytes to read and write in a chunk
+        :param chunk_size: Number of bytes to read and write in a chunk, or None to use the `copy_chunk_size` of this filesystem
         :param progress_callback: A function that is called periodically
             with the number of bytes written.
         :param finished_callback: A function that is called when all data has been written
         :param error_callback: A function that is called with an exception
             object if any error occurs during the copy process.
-        :returns: An event object that is set when the copy is complete, call
-            the `wait` method of this object to block until the data is written
+        :returns: a `fs.executor.Future` for the number of bytes written
 
         """
 
-        finished_event = threading.Event()
-
-        def do_setcontents():
+        def do_setcontents(fs):
             try:
-                self._setcontents(path,
-                                  data,
-                                  encoding=encoding,
-                                  errors=errors,
-                                  chunk_size=1024 * 64,
-                                  progress_callback=progress_callback,
-                                  finished_callback=finished_callback)
+                return fs._setcontents(path,
+                                       data,
+                                       encoding=encoding,
+                                       errors=errors,
+                                       chunk_size=chunk_size,
+                                       progress_callback=progress_callback,
+                                       finished_callback=finished_callback)
             except Exception, e:
                 if error_callback is not None:
                     error_callback(e)
-            finally:
-                finished_event.set()
+                raise
+
+        return self._submit(do_setcontents)
+
+    def getcontents_async(self, path, mode="rb", encoding=None, errors=None, newline=None):
+        """Read the contents of a file asynchronously
+
+        Takes the same arguments as :meth:`getcontents`.
 
-        threading.Thread(target=do_setcontents).start()
-        return finished_event
+        :returns: a `fs.executor.Future` for the file contents
+
+        """
+        return self._submit(method_caller("getcontents"), path, mode, encoding=encoding, errors=errors, newline=newline)
+
+    def copy_async(self, src, dst, overwrite=False, chunk_size=None):
+        """Copy a file asynchronously
+
+        Takes the same arguments as :meth:`copy`.
+
+        :returns: a `fs.executor.Future` that is done when the copy is complete
+
+        """
+        return self._submit(method_caller("copy"), src, dst, overwrite=overwrite, chunk_size=chunk_size)
+
+    def remove_async(self, path):
+        """Remove a file asynchronously
+
+        :returns: a `fs.executor.Future` that is done when the file has been removed
+
+        """
+        return self._submit(method_caller("remove"), path)
+
+    def getinfo_async(self, path):
+        """Get the info for a path asynchronously
+
+        :returns: a `fs.executor.Future` for the info dictionary
+
+        """
+        return self._submit(method_caller("getinfo"), path)
 
     def createfile(self, path, wipe=False):
         """Creates an empty file if it doesn't exist
@@ -944,95 +1093,108 @@ class FS(object):
             raise ResourceInvalidError("path should reference a directory")
         return SubFS(self, path)
 
-    def walk(self,
-             path="/",
-             wildcard=None,
-             dir_wildcard=None,
-             search="breadth",
-             ignore_errors=False):
-        """Walks a directory tree and yields the root path and contents.
-        Yields a tuple of the path of each directory and a list of its file
-        contents.
-
-        :param path: root path to start walking
-        :type path: string
-        :param wildcard: if given, only return files that match this wildcard
-        :type wildcard: a string containing a wildcard (e.g. `*.txt`) or a callable that takes the file path and returns a boolean
-        :param dir_wildcard: if given, only walk directories that match the wildcard
-        :type dir_wildcard: a string containing a wildcard (e.g. `*.txt`) or a callable that takes the directory name and returns a boolean
-        :param search: a string identifying the method used to walk the directories. There are two such methods:
+    def _listdir_split(self, path, info=False):
+        """Lists a directory once and splits its contents in to directories and files.
 
-             * ``"breadth"`` yields paths in the top directories first
-             * ``"depth"`` yields the deepest paths first
-
-        :param ignore_errors: ignore any errors reading the directory
-        :type ignore_errors: bool
+        Returns a tuple of two lists, the directories and the files, each
+        containing a tuple of (name, info).  If `info` is False the info
+        values may be None.  This is the per-directory work done by the walk
+        methods, and may be overridden by filesystems that can distinguish
+        files from directories more cheaply.
 
-        :rtype: iterator of (current_path, paths)
+        :param path: path of the directory to list
+        :param info: if True, info dicts are required for each entry
 
         """
+        from fs.utils import isdir as info_isdir
+        dirs = []
+        files = []
+        #  Only use listdirinfo if it is implemented at least as specifically
+        #  as listdir.  The default implementation calls getinfo for every
+        #  entry, which is no cheaper than an isdir call, and a listdirinfo
+        #  inherited by a class that filters listdir would bypass the filter.
+        cls = self.__class__
+        if issubclass(_defining_class(cls, 'listdirinfo'), _defining_class(cls, 'listdir')):
+            entries = self.listdirinfo(path)
+        else:
+            entries = ((name, None) for name in self.listdir(path))
+        for name, name_info in entries:
+            name_path = pathcombine(path, name)
+            if info and name_info is None:
+                try:
+                    name_info = self.getinfo(name_path)
+                except FSError:
+                    name_info = {}
+            if info_isdir(self, name_path, name_info):
+                dirs.append((name, name_info))
+            else:
+                files.append((name, name_info))
+        return dirs, files
+
+    def _walk(self,
+              path="/",
+              wildcard=None,
+              dir_wildcard=None,
+              search="breadth",
+              ignore_errors=False,
+              info=False):
+        """The walk engine used by the walk methods.
+
+        Yields a tuple of (directory path, directories, files) for each
+        directory, where directories and files are lists of (name, info)
+        tuples.  Each directory is listed exactly once.
 
+        """
         path = normpath(path)
 
         if not self.exists(path):
             raise ResourceNotFoundError(path)
 
-        def listdir(path, *args, **kwargs):
-            if ignore_errors:
-                try:
-                    return self.listdir(path, *args, **kwargs)
-                except:
-                    return []
-            else:
-                return self.listdir(path, *args, **kwargs)
+        def listdir(dir_path):
+            try:
+                return self._listdir_split(dir_path, info=info)
+            except ResourceNotFoundError:
+                # Could happen if another thread / process deletes something whilst we are walking
+                return [], []
+            except Exception:
+                if ignore_errors:
+                    return [], []
+                raise
 
         if wildcard is None:
             wildcard = lambda f: True
-        elif not callable(wildcard):
-            wildcard_re = re.compile(fnmatch.translate(wildcard))
-            wildcard = lambda fn: bool(wildcard_re.match(fn))
+        else:
+            wildcard = compile_wildcard(wildcard)
 
         if dir_wildcard is None:
             dir_wildcard = lambda f: True
-        elif not callable(dir_wildcard):
-            dir_wildcard_re = re.compile(fnmatch.translate(dir_wildcard))
-            dir_wildcard = lambda fn: bool(dir_wildcard_re.match(fn))
+        else:
+            dir_wildcard = compile_wildcard(dir_wildcard)
 
         if search == "breadth":
             dirs = [path]
             dirs_append = dirs.append
             dirs_pop = dirs.pop
-            isdir = self.isdir
             while dirs:
                 current_path = dirs_pop()
-                paths = []
-                paths_append = paths.append
-                try:
-                    for filename in listdir(current_path):
-                        path = pathcombine(current_path, filename)
-                        if isdir(path):
-                            if dir_wildcard(path):
-                                dirs_append(path)
-                        else:
-                            if wildcard(filename):
-                                paths_append(filename)
-                except ResourceNotFoundError:
-                    # Could happen if another thread / process deletes something whilst we are walking
-                    pass
-
-                yield (current_path, paths)
+                sub_dirs, files = listdir(current_path)
+                sub_dirs = [(name, name_info) for name, name_info in sub_dirs
+                            if dir_wildcard(pathcombine(current_path, name))]
+                for name, _name_info in sub_dirs:
+                    dirs_append(pathcombine(current_path, name))
+                files = [(name, name_info) for name, name_info in files if wildcard(name)]
+                yield (current_path, sub_dirs, files)
 
         elif search == "depth":
 
             def recurse(recurse_path):
-                try:
-                    for path in listdir(recurse_path, wildcard=dir_wildcard, full=True, dirs_only=True):
-                        for p in recurse(path):
-                            yield p
-                except ResourceNotFoundError:
-                    # Could happen if another thread / process deletes something whilst we are walking
-                    pass
-                yield (recurse_path, listdir(recurse_path, wildcard=wildcard, files_only=True))
+                sub_dirs, files = listdir(recurse_path)
+                sub_dirs = [(name, name_info) for name, name_info in sub_dirs if dir_wildcard(name)]
+                for name, _name_info in sub_dirs:
+                    for p in recurse(pathcombine(recurse_path, name)):
+                        yield p
+                files = [(name, name_info) for name, name_info in files if wildcard(name)]
+                yield (recurse_path, sub_dirs, files)
 
             for p in recurse(path):
                 yield p
@@ -1040,6 +1202,64 @@ class FS(object):
         else:
             raise ValueError("Search should be 'breadth' or 'depth'")
 
+    def walk(self,
+             path="/",
+             wildcard=None,
+             dir_wildcard=None,
+             search="breadth",
+             ignore_errors=False):
+        """Walks a directory tree and yields the root path and contents.
+        Yields a tuple of the path of each directory and a list of its file
+        contents.
+
+        :param path: root path to start walking
+        :type path: string
+        :param wildcard: if given, only return files that match this wildcard
+        :type wildcard: a string containing a wildcard (e.g. `*.txt`) or a callable that takes the file path and returns a boolean
+        :param dir_wildcard: if given, only walk directories that match the wildcard
+        :type dir_wildcard: a string containing a wildcard (e.g. `*.txt`) or a callable that takes the directory name and returns a boolean
+        :param search: a string identifying the method used to walk the directories. There are two such methods:
+
+             * ``"breadth"`` yields paths in the top directories first
+             * ``"depth"`` yields the deepest paths first
+
+        :param ignore_errors: ignore any errors reading the directory
+        :type ignore_errors: bool
+
+        :rtype: iterator of (current_path, paths)
+
+        """
+        for dir_path, _dirs, files in self._walk(path, wildcard, dir_wildcard, search, ignore_errors):
+            yield (dir_path, [name for name, _info in files])
+
+    def walkinfo(self,
+                 path="/",
+                 wildcard=None,
+                 dir_wildcard=None,
+                 search="breadth",
+                 ignore_errors=False):
+        """Like the 'walk' method, but yields a tuple of (path, info) for every
+        directory and file beneath `path`.
+
+        Info is taken from the directory listings where the filesystem supports
+        it, so this is typically much cheaper than calling
+        :py:meth:`~fs.base.FS.getinfo` for every path.
+
+        :param path: root path to start walking
+        :param wildcard: if given, only return files that match this wildcard
+        :param dir_wildcard: if given, only walk directories that match the wildcard
+        :param search: ``"breadth"`` or ``"depth"``, as for :py:meth:`~fs.base.FS.walk`
+        :param ignore_errors: ignore any errors reading the directory
+
+        :rtype: iterator of (path, info)
+
+        """
+        for dir_path, dirs, files in self._walk(path, wildcard, dir_wildcard, search, ignore_errors, info=True):
+            for name, info in dirs:
+                yield (pathcombine(dir_path, name), info)
+            for name, info in files:
+                yield (pathcombine(dir_path, name), info)
+
     def walkfiles(self,
                   path="/",
                   wildcard=None,
@@ -1069,6 +1289,28 @@ class FS(object):
             for f in files:
                 yield pathcombine(path, f)
 
+    def walkfilesinfo(self,
+                      path="/",
+                      wildcard=None,
+                      dir_wildcard=None,
+                      search="breadth",
+                      ignore_errors=False):
+        """Like the 'walkfiles' method, but yields a tuple of (path, info) for
+        each file.
+
+        :param path: root path to start walking
+        :param wildcard: if given, only return files that match this wildcard
+        :param dir_wildcard: if given, only walk directories that match the wildcard
+        :param search: ``"breadth"`` or ``"depth"``, as for :py:meth:`~fs.base.FS.walk`
+        :param ignore_errors: ignore any errors reading the directory
+
+        :rtype: iterator of (path, info)
+
+        """
+        for dir_path, _dirs, files in self._walk(path, wildcard, dir_wildcard, search, ignore_errors, info=True):
+            for name, info in files:
+                yield (pathcombine(dir_path, name), info)
+
     def walkdirs(self,
                  path="/",
                  wildcard=None,
@@ -1094,6 +1336,106 @@ class FS(object):
         for p, _files in self.walk(path, dir_wildcard=wildcard, search=search, ignore_errors=ignore_errors):
             yield p
 
+    def scan(self,
+             path="/",
+             fields=("size", "mtime", "mode"),
+             wildcard=None,
+             batch_size=10000,
+             ignore_errors=False,
+             use_numpy=None):
+        """Scans the files beneath a directory, yielding columns of values for
+        batches of files rather than an info dictionary for each file.
+
+        Each :class:`~fs.scan.ScanBatch` has a list of paths and an array of
+        values for each field, which may be "size", "mtime", "atime", "ctime"
+        or "mode" (see :mod:`fs.scan`).  The files are found with
+        :py:meth:`~fs.base.FS.walkfilesinfo`.
+
+        :param path: root path to start scanning
+        :param fields: a sequence of the fields to include
+        :param wildcard: if given, only include files that match this wildcard
+        :param batch_size: the maximum number of files in a batch
+        :param ignore_errors: ignore any errors reading the directory
+        :param use_numpy: True to return columns as NumPy arrays, False for
+            arrays from the `array` module, or None to use NumPy if it is
+            installed
+
+        :rtype: iterator of :class:`~fs.scan.ScanBatch`
+
+        """
+        return scan_batches(self.walkfilesinfo(path, wildcard=wildcard, ignore_errors=ignore_errors),
+                            fields,
+                            batch_size,
+                            use_numpy)
+
+    def glob(self, pattern, path="/"):
+        """Returns the paths of the files and directories that match a glob
+        pattern, such as ``src/**/test_*.py``.
+
+        Components of the pattern may contain the wildcards ``*``, ``?`` and
+        ``[...]``, and a component of ``**`` matches any number of
+        directories (see :mod:`fs.globbing`).  Only the directories that
+        could contain a match are read.
+
+        :param pattern: a glob pattern, relative to `path`
+        :type pattern: string
+        :param path: the directory to search in
+        :type path: string
+
+        :rtype: list of absolute paths
+
+        """
+        return list(self.iglob(pattern, path))
+
+    def iglob(self, pattern, path="/"):
+        """Generator yielding the paths that match a glob pattern.
+
+        This method behaves identically to :py:meth:`fs.base.FS.glob` but
+        returns a generator instead of a list.
+
+        """
+        return self._iglob(compile_glob(pattern), abspath(normpath(path)))
+
+    def _iglob(self, pattern, path):
+        """Yields the paths under a directory that match a compiled glob
+        pattern.  Filesystems that can select paths by their prefix may
+        override this, using `pattern.prefix` and `pattern.match`.
+
+        :param pattern: a :class:`~fs.globbing.GlobPattern`
+        :param path: the absolute, normalized path of the directory to search
+
+        """
+        todo = [(path, pattern.start())]
+        while todo:
+            dir_path, states = todo.pop()
+            name = pattern.next_literal(states)
+            if name is not None:
+                #  Only one name can match, so check for it rather than
+                #  listing the whole directory
+                name_path = pathcombine(dir_path, name)
+                if self.isdir(name_path):
+                    entries = [(name, True)]
+                elif self.isfile(name_path):
+                    entries = [(name, False)]
+                else:
+                    entries = []
+            else:
+                try:
+                    dirs, files = self._listdir_split(dir_path)
+                except (ResourceNotFoundError, ResourceInvalidError):
+                    continue
+                entries = [(name, True) for name, _info in dirs]
+                entries.extend((name, False) for name, _info in files)
+            for name, is_dir in entries:
+                name_states = pattern.advance(states, name)
+                if not name_states:
+                    continue
+                name_path = pathcombine(dir_path, name)
+                if pattern.is_match(name_states):
+                    yield name_path
+                if is_dir and pattern.can_descend(name_states):
+                    todo.append((name_path, name_states))
+
     def getsize(self, path):
         """Returns the size (in bytes) of a resource.
 
@@ -1110,7 +1452,51 @@ class FS(object):
             raise OperationFailedError("get size of resource", path)
         return size
 
-    def copy(self, src, dst, overwrite=False, chunk_size=1024 * 64):
+    def gethash(self, path, algorithm="md5"):
+        """Returns a digest of the contents of a file.
+
+        Filesystems that store digests, or can have a server work them out,
+        return those; otherwise the file is read once.  If `hash_cache` is
+        set, digests are kept there along with the size and modification time
+        of the file, and reused for as long as these stay the same.
+
+        :param path: a path to a file
+        :param algorithm: name of a hash algorithm supported by `hashlib`,
+            e.g. "md5" or "sha256"
+        :returns: the digest as a string of hex digits
+        :rtype: string
+
+        :raises ValueError: if the algorithm isn't supported
+        :raises `fs.errors.ResourceInvalidError`: if the path is a directory
+        :raises `fs.errors.ResourceNotFoundError`: if the path does not exist
+
+        """
+        algorithm = algorithm.lower()
+        cache = self.hash_cache
+        if cache is not None:
+            stamp = hash_stamp(self.getinfo(path))
+            if stamp is not None:
+                path = abspath(normpath(path))
+                size, mtime = stamp
+                digest = cache.get(path, algorithm, size, mtime)
+                if digest is None:
+                    digest = self._gethash(path, algorithm)
+                    cache.set(path, algorithm, size, mtime, digest)
+                return digest
+        return self._gethash(path, algorithm)
+
+    def _gethash(self, path, algorithm):
+        """Works out a digest for `gethash`, which takes care of caching.
+        Filesystems that can get a digest without reading the file should
+        override this method."""
+        f = self.open(path, 'rb')
+        try:
+            return hash_stream(f, algorithm, self.copy_chunk_size)
+        finally:
+            f.close()
+
+    @trace.traced()
+    def copy(self, src, dst, overwrite=False, chunk_size=None):
         """Copies a file from src to dst.
 
         :param src: the source path
@@ -1122,8 +1508,8 @@ class FS(object):
             will be raised.
         :type overwrite: bool
         :param chunk_size: size of chunks to use if a simple copy is required
-            (defaults to 64K).
-        :type chunk_size: bool
+            (defaults to the `copy_chunk_size` of this filesystem).
+        :type chunk_size: integer
 
         """
         with self._lock:
@@ -1155,9 +1541,9 @@ class FS(object):
     @convert_os_errors
     def _shutil_copyfile(cls, src_syspath, dst_syspath):
         try:
-            shutil.copyfile(src_syspath, dst_syspath)
-        except IOError, e:
-            #  shutil reports ENOENT when a parent directory is missing
+            copyfile_syspath(src_syspath, dst_syspath)
+        except EnvironmentError, e:
+            #  open() reports ENOENT when a parent directory is missing
             if getattr(e, "errno", None) == errno.ENOENT:
                 if not os.path.exists(dirname(dst_syspath)):
                     raise ParentDirectoryMissingError(dst_syspath)
@@ -1166,10 +1552,21 @@ class FS(object):
     @classmethod
     @convert_os_errors
     def _shutil_movefile(cls, src_syspath, dst_syspath):
-        shutil.move(src_syspath, dst_syspath)
+        try:
+            os.rename(src_syspath, dst_syspath)
+        except OSError, e:
+            if e.errno != errno.EXDEV:
+                shutil.move(src_syspath, dst_syspath)
+                return
+            #  Across devices, copy with the zero-copy path instead of
+            #  the buffered copy that shutil.move falls back to.
+            copyfile_syspath(src_syspath, dst_syspath)
+            shutil.copystat(src_syspath, dst_syspath)
+            os.remove(src_syspath)
 
 
-    def move(self, src, dst, overwrite=False, chunk_size=16384):
+    @trace.traced()
+    def move(self, src, dst, overwrite=False, chunk_size=None):
         """moves a file from one location to another.
 
         :param src: source path
@@ -1208,7 +1605,8 @@ class FS(object):
             self.copy(src, dst, overwrite=overwrite, chunk_size=chunk_size)
             self.remove(src)
 
-    def movedir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384):
+    @trace.traced()
+    def movedir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=None, workers=1):
         """moves a directory from one location to another.
 
         :param src: source directory path
@@ -1224,6 +1622,11 @@ class FS(object):
         :param chunk_size: size of chunks to use when copying, if a simple copy
             is required
         :type chunk_size: integer
+        :param workers: number of files to move at once; if more than one,
+            files are moved by a pool of threads (see
+            :func:`fs.utils.copydir_parallel`) and any errors are raised
+            once every file has been tried
+        :type workers: integer
 
         :raise `fs.errors.DestinationExistsError`: if destination exists and `overwrite` is False
 
@@ -1246,6 +1649,22 @@ class FS(object):
                 except OSError:
                     pass
 
+        if workers > 1:
+            #  The lock mustn't be held here, or the workers couldn't use it
+            from fs.utils import copydir_parallel
+            if dst:
+                self.makedir(dst, allow_recreate=overwrite)
+            errors = copydir_parallel((self, src), (self, dst),
+                                      overwrite=overwrite,
+                                      workers=workers,
+                                      chunk_size=chunk_size,
+                                      move=True)
+            if errors and not ignore_errors:
+                raise errors[0][1]
+            return
+
+        with self._lock:
+
             def movefile_noerrors(src, dst, **kwargs):
                 try:
                     return self.move(src, dst, **kwargs)
@@ -1276,7 +1695,8 @@ class FS(object):
 
                 self.removedir(dirname)
 
-    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384):
+    @trace.traced()
+    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=None, workers=1):
         """copies a directory from one location to another.
 
         :param src: source directory path
@@ -1289,9 +1709,30 @@ class FS(object):
         :param ignore_errors: if True, exceptions when copying will be ignored
         :type ignore_errors: bool
         :param chunk_size: size of chunks to use when copying, if a simple copy
-            is required (defaults to 16K)
+            is required (defaults to the `copy_chunk_size` of this filesystem)
+        :param workers: number of files to copy at once; if more than one,
+            files are copied by a pool of threads (see
+            :func:`fs.utils.copydir_parallel`) and any errors are raised
+            once every file has been tried
+        :type workers: integer
 
         """
+        if workers > 1:
+            from fs.utils import copydir_parallel
+            with self._lock:
+                if not self.isdir(src):
+                    raise ResourceInvalidError(src, msg="Source is not a directory: %(path)s")
+                if not overwrite and self.exists(dst):
+                    raise DestinationExistsError(dst)
+            #  The lock mustn't be held here, or the workers couldn't use it
+            errors = copydir_parallel((self, src), (self, dst),
+                                      overwrite=overwrite,
+                                      workers=workers,
+                                      chunk_size=chunk_size)
+            if errors and not ignore_errors:
+                raise errors[0][1]
+            return
+
         with self._lock:
             if not self.isdir(src):
                 raise ResourceInvalidError(src, msg="Source is not a directory: %(path)s")
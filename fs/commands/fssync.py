@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+from fs.utils import sync
+from fs.errors import ResourceNotFoundError
+from fs.memoryfs import MemoryFS
+from fs.commands.runner import Command
+import sys
+
+
+class FSsync(Command):
+
+    usage = """fssync [OPTION]... [SOURCE] [DESTINATION]
+Synchronise DESTINATION with SOURCE, copying only new or changed files"""
+
+    def get_optparse(self):
+        optparse = super(FSsync, self).get_optparse()
+        optparse.add_option('-d', '--delete', dest='delete', action="store_true", default=False,
+                            help="delete files in DESTINATION that are not in SOURCE")
+        optparse.add_option('-n', '--dry-run', dest='dry_run', action="store_true", default=False,
+                            help="show what would be done, without changing anything")
+        optparse.add_option('-c', '--checksum', dest='checksum', action="store_true", default=False,
+                            help="compare the contents of files rather than their modification times")
+        optparse.add_option('-s', '--size-only', dest='size_only', action="store_true", default=False,
+                            help="compare only the size of files")
+        optparse.add_option('-t', '--threads', dest='threads', action="store", default=1,
+                            help="number of threads to use", type="int", metavar="THREAD_COUNT")
+        return optparse
+
+    def do_run(self, options, args):
+
+        if len(args) != 2:
+            self.error("a source and a destination are required\n")
+            return 1
+
+        src_fs, src_path = self.open_fs(args[0])
+        src_path = src_path or '/'
+        if not src_fs.isdir(src_path):
+            self.error('Source must be a directory\n')
+            return 1
+
+        if options.dry_run:
+            #  A dry run mustn't create the destination; if it doesn't exist
+            #  yet, everything would be copied to an empty directory
+            try:
+                dst_fs, dst_path = self.open_fs(args[1], writeable=True)
+            except ResourceNotFoundError:
+                dst_fs, dst_path = MemoryFS(), None
+        else:
+            dst_fs, dst_path = self.open_fs(args[1], writeable=True, create_dir=True)
+        dst_path = dst_path or '/'
+        if dst_fs.isfile(dst_path):
+            self.error('Destination must be a directory\n')
+            return 1
+
+        if options.checksum:
+            compare = "hash"
+        elif options.size_only:
+            compare = "size"
+        else:
+            compare = "mtime"
+
+        try:
+            plan = sync((src_fs, src_path),
+                        (dst_fs, dst_path),
+                        compare=compare,
+                        delete=options.delete,
+                        dry_run=options.dry_run,
+                        workers=options.threads)
+        finally:
+            dst_fs.close()
+
+        if options.dry_run or options.verbose:
+            for action, path in plan:
+                self.output("%s %s\n" % (action.ljust(9), path))
+
+
+def run():
+    return FSsync().run()
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -684,7 +684,7 @@ class DAVFS(FS):
             raise ResourceInvalidError(src, msg=msg)
         self._copy(src,dst,overwrite=overwrite)
 
-    def copydir(self,src,dst,overwrite=False,ignore_errors=False,chunk_size=0):
+    def copydir(self,src,dst,overwrite=False,ignore_errors=False,chunk_size=0,workers=1):
         if self.isfile(src):
             msg = "Source is not a directory: %(path)s"
             raise ResourceInvalidError(src, msg=msg)
@@ -711,7 +711,7 @@ class DAVFS(FS):
             raise ResourceInvalidError(src, msg=msg)
         self._move(src,dst,overwrite=overwrite)
 
-    def movedir(self,src,dst,overwrite=False,ignore_errors=False,chunk_size=0):
+    def movedir(self,src,dst,overwrite=False,ignore_errors=False,chunk_size=0,workers=1):
         if self.isfile(src):
             msg = "Source is not a directory: %(path)s"
             raise ResourceInvalidError(src, msg=msg)
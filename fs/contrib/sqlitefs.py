@@ -10,12 +10,14 @@ http://www.opensource.org/licenses/bsd-license.php
 
 import tempfile
 import datetime
+import hashlib
 
 from fs.path import iteratepath, normpath,dirname,forcedir
 from fs.path import frombase, basename,pathjoin
 from fs.base import *
 from fs.errors import *
 from fs import _thread_synchronize_default
+from fs import trace
 import apsw
 
 def fetchone(cursor):
@@ -180,6 +182,9 @@ class SqliteFS(FS):
     TODO : Need an open files table or a flag in sqlite database. To avoid
     opening the file twice. (even from the different process or thread)
     '''
+
+    #maximum number of parameters bound to a single query
+    _max_query_params = 500
     
     def __init__(self, sqlite_filename):
         super(SqliteFS, self).__init__()
@@ -235,6 +240,7 @@ class SqliteFS(FS):
         cur.execute("CREATE TABLE IF NOT EXISTS FsFileTable(type text, compression text, author TEXT, \
                     created timestamp, last_modified timestamp, last_accessed timestamp, \
                     locked BOOL, size INTEGER, contents BLOB)")
+        cur.execute("CREATE TABLE IF NOT EXISTS FsFileDigests(contentid INTEGER, algorithm TEXT, digest TEXT)")
         
         #if the root directory name is created
         rootid = self._get_dir_id('/')
@@ -307,14 +313,38 @@ class SqliteFS(FS):
         '''
         extract the data from stream and write it as blob.
         '''
-        size = stream.tell()
-        last_modified = datetime.datetime.now().isoformat()
-        self._updatecur.execute('UPDATE FsFileTable SET size=?, last_modified=?, contents=? where rowid=?',
-                (size, last_modified, apsw.zeroblob(size), fileid))
-        blob_stream=self.dbcon.blobopen("main", "FsFileTable", "contents", fileid, True) # 1 is for read/write
-        stream.seek(0)
-        blob_stream.write(stream.read())
-        blob_stream.close()        
+        with trace.span(self, "writeblob") as span:
+            size = stream.tell()
+            last_modified = datetime.datetime.now().isoformat()
+            with trace.phase("update"):
+                self._updatecur.execute('UPDATE FsFileTable SET size=?, last_modified=?, contents=? where rowid=?',
+                        (size, last_modified, apsw.zeroblob(size), fileid))
+            with trace.phase("blob"):
+                blob_stream=self.dbcon.blobopen("main", "FsFileTable", "contents", fileid, True) # 1 is for read/write
+                stream.seek(0)
+                data = stream.read()
+                blob_stream.write(data)
+                blob_stream.close()
+            span.add_bytes(size)
+            #the md5 digest is stored now, while the data is at hand.
+            with trace.phase("digest"):
+                self._updatecur.execute('DELETE FROM FsFileDigests where contentid=?',(fileid,))
+                self._set_digest(fileid, 'md5', hashlib.md5(data).hexdigest())
+
+    def _set_digest(self, contentid, algorithm, digest):
+        self._updatecur.execute('INSERT INTO FsFileDigests(contentid, algorithm, digest) \
+                    VALUES(?,?,?)',(contentid, algorithm, digest))
+
+    def _get_digest(self, contentid, algorithm):
+        '''
+        return the stored digest of the file contents, or None.
+        '''
+        self._querycur.execute('SELECT digest FROM FsFileDigests where contentid=? and algorithm=?',
+                               (contentid, algorithm))
+        row = fetchone(self._querycur)
+        if( row ):
+            return str(row[0])
+        return None
         
     def _on_close(self, fileobj):        
         #Unlock file on close.
@@ -454,6 +484,9 @@ class SqliteFS(FS):
                         FROM FsFileTable where rowid=?',(contentid,))
         row = fetchone(self._querycur)
         assert(row != None)
+        return self._file_row_info(row)
+
+    def _file_row_info(self, row):
         info = dict()
         info['author'] = row[0]
         info['size'] = row[1]
@@ -462,6 +495,55 @@ class SqliteFS(FS):
         info['last_accessed'] = row[4]
         info['st_mode'] = 0666
         return(info)
+
+    def _dir_key(self, path):
+        '''
+        normalise a directory path the same way as _get_dir_id
+        '''
+        dirpath = remove_end_slash(normpath(path))
+        if( len(dirpath)==0):
+            dirpath = '/'
+        return dirpath
+
+    def _get_dir_set(self, paths):
+        '''
+        return the set of the given directory paths which exist, using an
+        IN (...) query for each batch of paths rather than a query per path.
+        '''
+        dirpaths = list(set(self._dir_key(path) for path in paths))
+        found = set()
+        for start in xrange(0, len(dirpaths), self._max_query_params):
+            batch = dirpaths[start:start+self._max_query_params]
+            self._querycur.execute('SELECT fullpath FROM FsDirMetaData where fullpath IN (%s)'
+                                   % ','.join('?'*len(batch)), batch)
+            found.update(row[0] for row in self._querycur)
+        return found
+
+    def _get_file_rows(self, paths):
+        '''
+        return a dict mapping (directory path, file name) to the info row for
+        each of the given file paths which exist.
+        '''
+        keys = list(set((self._dir_key(dirname(normpath(path))), basename(normpath(path)))
+                        for path in paths))
+        rows = dict()
+        batch_size = self._max_query_params // 2
+        for start in xrange(0, len(keys), batch_size):
+            batch = keys[start:start+batch_size]
+            dirpaths = list(set(k[0] for k in batch))
+            names = list(set(k[1] for k in batch))
+            self._querycur.execute('SELECT FsDirMetaData.fullpath, FsFileMetaData.name, \
+                FsFileTable.author, FsFileTable.size, FsFileTable.created, \
+                FsFileTable.last_modified, FsFileTable.last_accessed \
+                FROM FsFileMetaData, FsDirMetaData, FsFileTable \
+                where FsFileMetaData.parent=FsDirMetaData.ROWID \
+                    and FsFileMetaData.fileid=FsFileTable.ROWID \
+                    and FsDirMetaData.fullpath IN (%s) and FsFileMetaData.name IN (%s)'
+                % (','.join('?'*len(dirpaths)), ','.join('?'*len(names))),
+                dirpaths + names)
+            for row in self._querycur:
+                rows[(row[0], row[1])] = row[2:]
+        return rows
         
     def _isfile(self,path):
         path = normpath(path)
@@ -601,6 +683,7 @@ class SqliteFS(FS):
         row = fetchone(self._querycur)
         if( row == None or row[0] == 0):
             self._updatecur.execute("DELETE FROM FsFileTable where ROWID=?",(content_id,))            
+            self._updatecur.execute("DELETE FROM FsFileDigests where contentid=?",(content_id,))
     
     @synchronize
     def removedir(self,path, recursive=False, force=False):
@@ -653,6 +736,80 @@ class SqliteFS(FS):
             info= self._get_file_info(path)
         return(info)
 
+    @synchronize
+    def _gethash(self, path, algorithm):
+        self._initdb()
+        path = normpath(path)
+        if not self._isfile(path):
+            if self._isdir(path):
+                raise ResourceInvalidError(path)
+            raise ResourceNotFoundError(path)
+        dirid = self._get_dir_id(dirname(path))
+        content_id = self._get_file_contentid(self._get_file_id(dirid, basename(path)))
+        digest = self._get_digest(content_id, algorithm)
+        if( digest is None):
+            digest = super(SqliteFS, self)._gethash(path, algorithm)
+            self._set_digest(content_id, algorithm, digest)
+        return digest
+
+    @synchronize
+    def getinfo_many(self, paths):
+        self._initdb()
+        paths = list(paths)
+        dirs = self._get_dir_set(paths)
+        files = self._get_file_rows(paths)
+        infos = []
+        for path in paths:
+            path = normpath(path)
+            row = files.get((self._dir_key(dirname(path)), basename(path)))
+            if self._dir_key(path) in dirs:
+                infos.append(self._get_dir_info(path))
+            elif row is not None:
+                infos.append(self._file_row_info(row))
+            else:
+                infos.append(None)
+        return infos
+
+    @synchronize
+    def _iglob(self, pattern, path):
+        '''
+        find the matches with a LIKE query on the literal prefix of the
+        pattern, rather than by listing each directory.
+        '''
+        self._initdb()
+        base = self._dir_key(path)
+        like = pathjoin(base, pattern.prefix)
+        like = like.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        self._querycur.execute("SELECT fullpath FROM FsDirMetaData where fullpath LIKE ? ESCAPE '\\'",
+                               (like,))
+        fullpaths = [row[0] for row in self._querycur]
+        self._querycur.execute("SELECT FsDirMetaData.fullpath, FsFileMetaData.name \
+            FROM FsFileMetaData, FsDirMetaData where FsFileMetaData.parent=FsDirMetaData.ROWID \
+                and (CASE FsDirMetaData.fullpath WHEN '/' THEN '/' || FsFileMetaData.name \
+                     ELSE FsDirMetaData.fullpath || '/' || FsFileMetaData.name END) LIKE ? ESCAPE '\\'",
+                               (like,))
+        fullpaths.extend(pathjoin(row[0], row[1]) for row in self._querycur)
+        if base == '/':
+            base_prefix = '/'
+        else:
+            base_prefix = base + '/'
+        matches = []
+        for fullpath in fullpaths:
+            if fullpath.startswith(base_prefix) and pattern.match(fullpath[len(base_prefix):]):
+                matches.append(fullpath)
+        return iter(sorted(matches))
+
+    @synchronize
+    def exists_many(self, paths):
+        return [info is not None for info in self.getinfo_many(paths)]
+
+    @synchronize
+    def isdir_many(self, paths):
+        self._initdb()
+        paths = list(paths)
+        dirs = self._get_dir_set(paths)
+        return [self._dir_key(path) in dirs for path in paths]
+
 #import msvcrt # built-in module
 #
 #def kbfunc():
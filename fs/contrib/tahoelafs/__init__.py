@@ -331,12 +331,12 @@ class _TahoeLAFS(FS):
         # FIXME: Workaround because isfile() not exists on _TahoeLAFS
         FS.copy(self, src, dst, overwrite, chunk_size)
         
-    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384):
+    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384, workers=1):
         if self.getmeta("read_only"):
             raise errors.UnsupportedError('read only filesystem')
         # FIXME: this is out of date; how to do native tahoe copy?
         # FIXME: Workaround because isfile() not exists on _TahoeLAFS
-        FS.copydir(self, src, dst, overwrite, ignore_errors, chunk_size)
+        FS.copydir(self, src, dst, overwrite, ignore_errors, chunk_size, workers)
        
     
     def _log(self, level, message):
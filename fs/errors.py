@@ -20,6 +20,7 @@ __all__ = ['FSError',
            'PermissionDeniedError',
            'FSClosedError',
            'OperationTimeoutError',
+           'OperationCancelledError',
            'RemoveRootError',
            'ResourceError',
            'NoSysPathError',
@@ -138,6 +139,10 @@ class OperationTimeoutError(OperationFailedError):
     default_message = "Unable to %(opname)s: operation timed out"
 
 
+class OperationCancelledError(OperationFailedError):
+    default_message = "Unable to %(opname)s: operation was cancelled"
+
+
 class RemoveRootError(OperationFailedError):
     default_message = "Can't remove root dir"
 
@@ -0,0 +1,363 @@
+"""
+fs.executor
+===========
+
+A bounded pool of worker threads that runs filesystem calls in the
+background.  This is what the ``*_async`` methods of FS objects use, e.g.
+:meth:`~fs.base.FS.getcontents_async` and :meth:`~fs.base.FS.setcontents_async`.
+
+Every FS object has at most one executor, created the first time it is
+needed; wrappers such as the SubFS returned by `opendir` share the executor
+of the filesystem they wrap.  Calls are queued for a fixed number of worker
+threads, and the queue has a limited size: once it is full, submitting another
+call blocks until a worker has caught up.  This stops a large batch of calls from holding all of
+their arguments (e.g. file contents) in memory at once.
+
+Each call returns a :class:`Future`, which can be used to wait for the
+result, or to cancel the call if it hasn't started yet::
+
+    >>> from fs.memoryfs import MemoryFS
+    >>> mem_fs = MemoryFS()
+    >>> futures = [mem_fs.setcontents_async("%i.txt" % i, b"data") for i in xrange(100)]
+    >>> sizes = [future.result() for future in futures]
+
+"""
+
+import sys
+import logging
+import weakref
+import threading
+import Queue as queue
+
+from fs.errors import FSClosedError, OperationTimeoutError, OperationCancelledError
+
+__all__ = ['Future',
+           'FSExecutor']
+
+log = logging.getLogger("fs.executor")
+
+
+class Future(object):
+    """The eventual result of a call that runs in the background.
+
+    :param opname: name of the operation, used in error messages
+
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    CANCELLED = "cancelled"
+    FINISHED = "finished"
+
+    def __init__(self, opname=""):
+        self.opname = opname
+        self._condition = threading.Condition()
+        self._state = self.PENDING
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def __repr__(self):
+        return "<Future %s %s>" % (self.opname, self._state)
+
+    def cancel(self):
+        """Cancel the call if it hasn't started yet.
+
+        :returns: True if the call was (or already had been) cancelled,
+            False if it is running or has finished
+
+        """
+        with self._condition:
+            if self._state in (self.RUNNING, self.FINISHED):
+                return False
+            if self._state == self.CANCELLED:
+                return True
+            self._state = self.CANCELLED
+            self._condition.notify_all()
+        self._run_callbacks()
+        return True
+
+    def cancelled(self):
+        """Check if the call was cancelled."""
+        return self._state == self.CANCELLED
+
+    def running(self):
+        """Check if the call is running now."""
+        return self._state == self.RUNNING
+
+    def done(self):
+        """Check if the call has finished or was cancelled."""
+        return self._state in (self.CANCELLED, self.FINISHED)
+
+    def wait(self, timeout=None):
+        """Block until the call has finished or was cancelled.
+
+        :param timeout: maximum number of seconds to wait, or None to wait
+            as long as it takes
+        :returns: True if the call is done, False if the timeout expired
+
+        """
+        with self._condition:
+            if not self.done():
+                self._condition.wait(timeout)
+            return self.done()
+
+    def result(self, timeout=None):
+        """Get the return value of the call, waiting for it if necessary.
+
+        If the call raised an exception, the same exception is raised here.
+
+        :param timeout: maximum number of seconds to wait, or None to wait
+            as long as it takes
+
+        :raises `fs.errors.OperationTimeoutError`: if the timeout expires
+        :raises `fs.errors.OperationCancelledError`: if the call was cancelled
+
+        """
+        if not self.wait(timeout):
+            raise OperationTimeoutError(self.opname)
+        if self._state == self.CANCELLED:
+            raise OperationCancelledError(self.opname)
+        if self._exc_info is not None:
+            exc_type, exc_value, tb = self._exc_info
+            raise exc_type, exc_value, tb
+        return self._result
+
+    def exception(self, timeout=None):
+        """Get the exception raised by the call, or None if it succeeded.
+
+        Waits for the call and raises in the same way as :meth:`result`.
+
+        """
+        if not self.wait(timeout):
+            raise OperationTimeoutError(self.opname)
+        if self._state == self.CANCELLED:
+            raise OperationCancelledError(self.opname)
+        if self._exc_info is not None:
+            return self._exc_info[1]
+        return None
+
+    def add_done_callback(self, callback):
+        """Add a function to be called with this future once it is done.
+
+        If the future is already done, the function is called immediately.
+        Otherwise it is called from the worker thread that ran the call.
+
+        """
+        with self._condition:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        self._call(callback)
+
+    def _start(self):
+        """Mark the call as running, returns False if it was cancelled."""
+        with self._condition:
+            if self._state == self.CANCELLED:
+                return False
+            self._state = self.RUNNING
+            return True
+
+    def _finish(self, result=None, exc_info=None):
+        with self._condition:
+            self._result = result
+            self._exc_info = exc_info
+            self._state = self.FINISHED
+            self._condition.notify_all()
+        self._run_callbacks()
+
+    def _run_callbacks(self):
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._call(callback)
+
+    def _call(self, callback):
+        try:
+            callback(self)
+        except Exception:
+            log.exception("exception in done callback of %r", self)
+
+
+def method_caller(method_name):
+    """Make a function that calls a named method of the FS it is given, for
+    use with :meth:`FSExecutor.submit`."""
+    def call(fs, *args, **kwargs):
+        return getattr(fs, method_name)(*args, **kwargs)
+    call.__name__ = method_name
+    return call
+
+
+class FSExecutor(object):
+    """Runs calls on a filesystem in a bounded pool of worker threads.
+
+    Worker threads are started as work is submitted, up to `max_workers`.
+    Each worker uses the object returned by the filesystem's `_worker_clone`
+    method, so filesystems that need a connection per thread get one.  If
+    that fails, calls that no other worker can take are failed with the same
+    error.
+
+    The executor only keeps a weak reference to the filesystem, so that a
+    filesystem that is no longer used is closed (which shuts down its
+    executor) even if its workers are still waiting for calls.
+
+    :param fs: the filesystem that calls are made on
+    :param max_workers: maximum number of worker threads
+    :param max_queued: maximum number of calls that may wait for a worker
+        before :meth:`submit` blocks, defaults to 16 times `max_workers`
+
+    """
+
+    def __init__(self, fs, max_workers=4, max_queued=None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_queued is None:
+            max_queued = max_workers * 16
+        self._fs_ref = weakref.ref(fs)
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._queue = queue.Queue(max_queued)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._shutdown = False
+
+    def __repr__(self):
+        return "<FSExecutor for %s (%i workers)>" % (self.fs, self.max_workers)
+
+    @property
+    def fs(self):
+        """The filesystem that calls are made on, or None if it no longer
+        exists."""
+        return self._fs_ref()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a call to ``func(fs, *args, **kwargs)``, where `fs` is the
+        filesystem that the worker uses.
+
+        If the queue is full, this blocks until a worker is free to take on
+        a call.
+
+        :returns: a :class:`Future` for the return value of `func`
+        :raises `fs.errors.FSClosedError`: if the executor has been shut down
+
+        """
+        future = Future(getattr(func, "__name__", ""))
+        with self._lock:
+            if self._shutdown:
+                raise FSClosedError("submit")
+        self._queue.put((future, func, args, kwargs))
+        #  Start a worker after queueing the call, so that a worker that
+        #  exits in the meantime is replaced
+        with self._lock:
+            if not self._shutdown and len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._worker)
+                thread.setDaemon(True)
+                self._threads.append(thread)
+                thread.start()
+        return future
+
+    def submit_call(self, method_name, *args, **kwargs):
+        """Queue a call to the named method of the filesystem.
+
+        :returns: a :class:`Future` for the return value of the method
+
+        """
+        return self.submit(method_caller(method_name), *args, **kwargs)
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """Stop the worker threads once the queued calls have been made.
+
+        :param wait: if True, block until the workers have finished
+        :param cancel_pending: if True, calls that haven't started yet are
+            cancelled rather than made
+
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = self._threads[:]
+        current = threading.currentThread()
+        #  A worker that shuts down its own executor (e.g. by dropping the
+        #  last reference to the filesystem) can't wait for the calls queued
+        #  behind it, nor for room in the queue
+        if cancel_pending or current in threads:
+            self._cancel_queued()
+        for thread in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                if thread is not current:
+                    thread.join()
+            #  Calls that were queued as the executor shut down never run
+            self._cancel_queued()
+
+    def _cancel_queued(self):
+        #  Workers that are still to stop need their None back
+        stops = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stops += 1
+            else:
+                item[0].cancel()
+        for i in xrange(stops):
+            self._queue.put(None)
+
+    def _fail_queued(self, exc_info):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[0]._start():
+                item[0]._finish(exc_info=exc_info)
+
+    def _worker(self):
+        try:
+            fs = self.fs
+            if fs is None:
+                raise FSClosedError("submit")
+            fs = fs._worker_clone()
+        except Exception:
+            exc_info = sys.exc_info()
+            with self._lock:
+                self._threads.remove(threading.currentThread())
+                last_worker = not self._threads
+            #  Calls left for other workers are made by them, but nothing
+            #  would make them if this was the only worker
+            if last_worker:
+                self._fail_queued(exc_info)
+            return
+        #  Don't keep the filesystem alive while waiting for calls, unless
+        #  the worker has a clone of its own
+        if fs is self.fs:
+            fs_ref = weakref.ref(fs)
+            fs = None
+        else:
+            fs_ref = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                future, func, args, kwargs = item
+                #  Don't hold on to the arguments while waiting for more work
+                del item
+                if future._start():
+                    try:
+                        worker_fs = fs if fs_ref is None else fs_ref()
+                        if worker_fs is None:
+                            raise FSClosedError(future.opname)
+                        result = func(worker_fs, *args, **kwargs)
+                    except Exception:
+                        future._finish(exc_info=sys.exc_info())
+                    else:
+                        future._finish(result)
+                    worker_fs = result = None
+                del future, func, args, kwargs
+        finally:
+            if fs is not None:
+                fs.close()
@@ -200,6 +200,7 @@ class RPCFSServer(SimpleXMLRPCServer):
         self.serve_more_requests = True
         SimpleXMLRPCServer.__init__(self, addr, **kwds)
         self.register_instance(RPCFSInterface(fs))
+        self.register_multicall_functions()
 
     def serve_forever(self):
         """Override serve_forever to allow graceful shutdown."""
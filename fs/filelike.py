@@ -415,6 +415,15 @@ class FileLikeBase(object):
         self._assert_mode("r-")
         return self._do_read(size)
 
+    def readinto(self,b):
+        """Read at most len(b) bytes into the writable buffer 'b'.
+
+        The number of bytes read is returned, which is zero at EOF.
+        """
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
     def _do_read(self,size):
         """Private method to read from the file.
 
@@ -655,6 +664,21 @@ class FileWrapper(FileLikeBase):
         if not self.__closing and hasattr(self.wrapped_file,"flush"):
             self.wrapped_file.flush()
 
+    def readinto(self,b):
+        """Read at most len(b) bytes into the writable buffer 'b'.
+
+        If nothing is buffered and _read() has not been overridden, this
+        reads straight into 'b' from the wrapped file where it supports it.
+        """
+        readinto = getattr(self.wrapped_file,"readinto",None)
+        buffered = self._rbuffer or self._sbuffer or self._soffset or \
+                   self._wbuffer is not None
+        if readinto is None or buffered or self.closed or \
+           self.__class__._read != FileWrapper._read:
+            return super(FileWrapper,self).readinto(b)
+        self._assert_mode("r-")
+        return readinto(b)
+
     def _read(self,sizehint=-1):
         data = self.wrapped_file.read(sizehint)
         if data == b(""):
@@ -15,6 +15,7 @@ from fs.base import *
 from fs.errors import *
 from fs.path import pathsplit, abspath, dirname, recursepath, normpath, pathjoin, isbase
 from fs import iotools
+from fs import trace
 
 from ftplib import FTP, error_perm, error_temp, error_proto, error_reply
 
@@ -24,6 +25,7 @@ except ImportError:
     _GLOBAL_DEFAULT_TIMEOUT = object()
 
 import threading
+import copy
 import datetime
 import calendar
 
@@ -599,16 +601,19 @@ def _skip(s, i, c):
 
 
 def fileftperrors(f):
+    operation = "file." + f.__name__
     @wraps(f)
     def deco(self, *args, **kwargs):
-        self._lock.acquire()
-        try:
+        with trace.span(self.ftpfs, operation, self.path):
+            with trace.phase("wait"):
+                self._lock.acquire()
             try:
-                ret = f(self, *args, **kwargs)
-            except Exception, e:
-                self.ftpfs._translate_exception(args[0] if args else '', e)
-        finally:
-            self._lock.release()
+                try:
+                    ret = f(self, *args, **kwargs)
+                except Exception, e:
+                    self.ftpfs._translate_exception(args[0] if args else '', e)
+            finally:
+                self._lock.release()
         return ret
     return deco
 
@@ -641,17 +646,18 @@ class _FTPFile(object):
     def _start_file(self, mode, path):
         self.read_pos = 0
         self.write_pos = 0
-        if 'r' in mode:
-            self.ftp.voidcmd('TYPE I')
-            self.conn = self.ftp.transfercmd('RETR ' + path, None)
-
-        else:#if 'w' in mode or 'a' in mode:
-            self.ftp.voidcmd('TYPE I')
-            if 'a' in mode:
-                self.write_pos = self.file_size
-                self.conn = self.ftp.transfercmd('APPE ' + path)
-            else:
-                self.conn = self.ftp.transfercmd('STOR ' + path)
+        with trace.phase("connect"):
+            if 'r' in mode:
+                self.ftp.voidcmd('TYPE I')
+                self.conn = self.ftp.transfercmd('RETR ' + path, None)
+
+            else:#if 'w' in mode or 'a' in mode:
+                self.ftp.voidcmd('TYPE I')
+                if 'a' in mode:
+                    self.write_pos = self.file_size
+                    self.conn = self.ftp.transfercmd('APPE ' + path)
+                else:
+                    self.conn = self.ftp.transfercmd('STOR ' + path)
 
     @fileftperrors
     def read(self, size=None):
@@ -669,7 +675,9 @@ class _FTPFile(object):
                     break
                 chunks.append(data)
                 self.read_pos += len(data)
-            return b('').join(chunks)
+            data = b('').join(chunks)
+            trace.add_bytes(len(data))
+            return data
 
         remaining_bytes = size
         while remaining_bytes:
@@ -684,7 +692,30 @@ class _FTPFile(object):
             self.read_pos += len(data)
             remaining_bytes -= len(data)
 
-        return b('').join(chunks)
+        data = b('').join(chunks)
+        trace.add_bytes(len(data))
+        return data
+
+    @fileftperrors
+    def readinto(self, b):
+        if self.conn is None:
+            return 0
+
+        view = memoryview(b)
+        size = len(view)
+        bytes_read = 0
+        while bytes_read < size:
+            read_size = min(size - bytes_read, self.blocksize)
+            count = self.conn.recv_into(view[bytes_read:], read_size)
+            if not count:
+                self.conn.close()
+                self.conn = None
+                self.ftp.voidresp()
+                break
+            bytes_read += count
+        self.read_pos += bytes_read
+        trace.add_bytes(bytes_read)
+        return bytes_read
 
     @fileftperrors
     def write(self, data):
@@ -698,6 +729,7 @@ class _FTPFile(object):
             data_pos += chunk_size
             remaining_data -= chunk_size
             self.write_pos += chunk_size
+        trace.add_bytes(len(data))
 
 
     def __enter__(self):
@@ -817,18 +849,25 @@ class _FTPFile(object):
 def ftperrors(f):
     @wraps(f)
     def deco(self, *args, **kwargs):
-        self._lock.acquire()
-        try:
-            self._enter_dircache()
+        path = None
+        if args and isinstance(args[0], basestring):
+            path = args[0]
+        with trace.span(self, f.__name__, path):
+            #  Waiting for the lock is waiting for the connection, which
+            #  only one thread can use at a time
+            with trace.phase("wait"):
+                self._lock.acquire()
             try:
+                self._enter_dircache()
                 try:
-                    ret = f(self, *args, **kwargs)
-                except Exception, e:
-                    self._translate_exception(args[0] if args else '', e)
+                    try:
+                        ret = f(self, *args, **kwargs)
+                    except Exception, e:
+                        self._translate_exception(args[0] if args else '', e)
+                finally:
+                    self._leave_dircache()
             finally:
-                self._leave_dircache()
-        finally:
-            self._lock.release()
+                self._lock.release()
         return ret
     return deco
 
@@ -842,14 +881,17 @@ class _DirCache(dict):
     def __init__(self):
         super(_DirCache, self).__init__()
         self.count = 0
+        self._count_lock = threading.Lock()
 
     def addref(self):
-        self.count += 1
-        return self.count
+        with self._count_lock:
+            self.count += 1
+            return self.count
 
     def decref(self):
-        self.count -= 1
-        return self.count
+        with self._count_lock:
+            self.count -= 1
+            return self.count
 
 class FTPFS(FS):
 
@@ -867,6 +909,8 @@ class FTPFS(FS):
               'file.read_and_write' : False,
               }
 
+    copy_chunk_size = 1024 * 1024
+
     def __init__(self, host='', user='', passwd='', acct='', timeout=_GLOBAL_DEFAULT_TIMEOUT, port=21, dircache=True, follow_symlinks=False):
         """Connect to a FTP server.
 
@@ -1078,11 +1122,13 @@ class FTPFS(FS):
     def _open_ftp(self):
         try:
             ftp = FTP()
-            if self.default_timeout or sys.version_info < (2,6,):
-                ftp.connect(self.host, self.port)
-            else:
-                ftp.connect(self.host, self.port, self.timeout)
-            ftp.login(self.user, self.passwd, self.acct)
+            with trace.phase("connect"):
+                if self.default_timeout or sys.version_info < (2,6,):
+                    ftp.connect(self.host, self.port)
+                else:
+                    ftp.connect(self.host, self.port, self.timeout)
+            with trace.phase("login"):
+                ftp.login(self.user, self.passwd, self.acct)
         except socket_error, e:
             raise RemoteConnectionError(str(e), details=e)
         return ftp
@@ -1091,6 +1137,7 @@ class FTPFS(FS):
         state = super(FTPFS, self).__getstate__()
         del state['_lock']
         state.pop('_ftp', None)
+        state.pop('dircache', None)
         return state
 
     def __setstate__(self,state):
@@ -1100,6 +1147,15 @@ class FTPFS(FS):
         #self._ftp = None
         #self.ftp
 
+    def _worker_clone(self):
+        #  An FTP connection can only do one thing at a time, so give each
+        #  worker a copy with its own (lazily opened) connection.  The
+        #  directory cache is shared, so that changes made by the workers
+        #  are seen here.
+        clone = copy.copy(self)
+        clone.dircache = self.dircache
+        return clone
+
     def __str__(self):
         return '<FTPFS %s>' % self.host
 
@@ -1171,18 +1227,26 @@ class FTPFS(FS):
         return f
 
     @ftperrors
-    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=1024*64):
+    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=None):
+        if chunk_size is None:
+            chunk_size = self.copy_chunk_size
         path = normpath(path)
         data = iotools.make_bytes_io(data, encoding=encoding, errors=errors)
         self.refresh_dircache(dirname(path))
-        self.ftp.storbinary('STOR %s' % _encode(path), data, blocksize=chunk_size)
+        ftp = self.ftp
+        with trace.phase("transfer"):
+            ftp.storbinary('STOR %s' % _encode(path), data, blocksize=chunk_size,
+                           callback=lambda block: trace.add_bytes(len(block)))
 
     @ftperrors
     def getcontents(self, path, mode="rb", encoding=None, errors=None, newline=None):
         path = normpath(path)
         contents = StringIO()
-        self.ftp.retrbinary('RETR %s' % _encode(path), contents.write, blocksize=1024*64)
-        data = contents.getvalue()
+        ftp = self.ftp
+        with trace.phase("transfer"):
+            ftp.retrbinary('RETR %s' % _encode(path), contents.write, blocksize=1024*64)
+            data = contents.getvalue()
+            trace.add_bytes(len(data))
         if 'b' in data:
             return data
         return iotools.decode_binary(data, encoding=encoding, errors=errors)
@@ -1388,7 +1452,7 @@ class FTPFS(FS):
         return dirlist[fname].get('raw_line', 'No description available')
 
     @ftperrors
-    def move(self, src, dst, overwrite=False, chunk_size=16384):
+    def move(self, src, dst, overwrite=False, chunk_size=None):
         if not overwrite and self.exists(dst):
             raise DestinationExistsError(dst)
         #self.refresh_dircache(dirname(src), dirname(dst))
@@ -1401,7 +1465,9 @@ class FTPFS(FS):
             self.refresh_dircache(src, dirname(src), dst, dirname(dst))
 
     @ftperrors
-    def copy(self, src, dst, overwrite=False, chunk_size=1024*64):
+    def copy(self, src, dst, overwrite=False, chunk_size=None):
+        if chunk_size is None:
+            chunk_size = self.copy_chunk_size
         if not self.isfile(src):
             if self.isdir(src):
                 raise ResourceInvalidError(src, msg="Source is not a file: %(path)s")
@@ -1423,14 +1489,14 @@ class FTPFS(FS):
 
 
     @ftperrors
-    def movedir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384):
+    def movedir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=None, workers=1):
         self.clear_dircache(dirname(src), dirname(dst))
-        super(FTPFS, self).movedir(src, dst, overwrite, ignore_errors, chunk_size)
+        super(FTPFS, self).movedir(src, dst, overwrite, ignore_errors, chunk_size, workers)
 
     @ftperrors
-    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384):
+    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=None, workers=1):
         self.clear_dircache(dirname(dst))
-        super(FTPFS, self).copydir(src, dst, overwrite, ignore_errors, chunk_size)
+        super(FTPFS, self).copydir(src, dst, overwrite, ignore_errors, chunk_size, workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+"""
+fs.globbing
+===========
+
+Compiled glob patterns, used by :meth:`~fs.base.FS.glob`.
+
+A glob pattern is a path whose components may contain the wildcards
+understood by the `fnmatch` module (``*``, ``?`` and ``[...]``), which match
+within a single component.  A component of ``**`` matches any number of
+directories, including none.  For example, ``src/**/test_*.py`` matches
+``src/test_a.py`` and ``src/a/b/test_b.py``.
+
+Patterns are matched one path component at a time, so that a directory
+walk can work out after each directory whether anything below it could
+possibly match, and skip those that can't.  Compiled patterns (and the
+wildcards used by `listdir` and the walk methods) are cached, so matching
+against the same pattern repeatedly doesn't compile it repeatedly.
+
+"""
+
+import re
+import fnmatch
+
+import six
+
+from fs.path import iteratepath
+
+__all__ = ['GlobPattern',
+           'compile_glob',
+           'compile_wildcard']
+
+#  Kinds of pattern component
+_LITERAL = 0
+_WILDCARD = 1
+_RECURSIVE = 2
+
+_MAX_CACHE = 100
+_glob_cache = {}
+_wildcard_cache = {}
+
+
+def _has_wildcard(name):
+    return '*' in name or '?' in name or '[' in name
+
+
+def _literal_prefix(name):
+    """Get the characters at the start of a pattern component that come
+    before the first wildcard."""
+    for i, c in enumerate(name):
+        if c in '*?[':
+            return name[:i]
+    return name
+
+
+class GlobPattern(object):
+    """A glob pattern compiled for matching against paths.
+
+    Matching works on sets of 'states', each the index of the next pattern
+    component to match.  :meth:`start` gives the states before any path
+    components have been matched, and :meth:`advance` the states after
+    matching a further component; a path matches if its states include
+    the end of the pattern.
+
+    :param pattern: the glob pattern, relative to the directory being
+        searched
+
+    """
+
+    def __init__(self, pattern):
+        if isinstance(pattern, six.binary_type):
+            pattern = pattern.decode('utf-8')
+        self.pattern = pattern
+        segments = []
+        for name in iteratepath(pattern):
+            if name == '**':
+                if segments and segments[-1][0] == _RECURSIVE:
+                    continue
+                segments.append((_RECURSIVE, None))
+            elif _has_wildcard(name):
+                segments.append((_WILDCARD, re.compile(fnmatch.translate(name)).match))
+            else:
+                segments.append((_LITERAL, name))
+        self._segments = segments
+        self._end = len(segments)
+
+        #  The literal text that every matching path starts with.  It doesn't
+        #  end with a separator, as a directory may match a following ``**``.
+        literal_parts = []
+        for name in iteratepath(pattern):
+            if _has_wildcard(name):
+                literal_parts.append(_literal_prefix(name))
+                break
+            literal_parts.append(name)
+        self.prefix = '/'.join(literal_parts).rstrip('/')
+
+    def __repr__(self):
+        return "<GlobPattern %r>" % self.pattern
+
+    def _closure(self, states):
+        segments = self._segments
+        todo = list(states)
+        states = set(states)
+        while todo:
+            i = todo.pop()
+            if i < self._end and segments[i][0] == _RECURSIVE and i + 1 not in states:
+                states.add(i + 1)
+                todo.append(i + 1)
+        return frozenset(states)
+
+    def start(self):
+        """Get the states before any path components have been matched."""
+        if not self._segments:
+            return frozenset()
+        return self._closure((0,))
+
+    def advance(self, states, name):
+        """Get the states after matching a further path component.
+
+        :param states: the states before the component
+        :param name: the name of the component
+        :returns: the new states, which are empty if neither the path nor
+            anything below it can match
+
+        """
+        segments = self._segments
+        end = self._end
+        next_states = set()
+        for i in states:
+            if i == end:
+                continue
+            kind, value = segments[i]
+            if kind == _RECURSIVE:
+                next_states.add(i)
+            elif kind == _LITERAL:
+                if name == value:
+                    next_states.add(i + 1)
+            elif value(name):
+                next_states.add(i + 1)
+        if not next_states:
+            return frozenset()
+        return self._closure(next_states)
+
+    def is_match(self, states):
+        """Check if a path with the given states matches the pattern."""
+        return self._end in states
+
+    def can_descend(self, states):
+        """Check if paths below a directory with the given states could match
+        the pattern."""
+        for i in states:
+            if i < self._end:
+                return True
+        return False
+
+    def next_literal(self, states):
+        """Get the name that the next path component must have, or None if it
+        could match more than one name.
+
+        If this returns a name, a directory can be searched by checking for
+        that name rather than by listing the directory.
+
+        """
+        if len(states) != 1:
+            return None
+        for i in states:
+            if i < self._end and self._segments[i][0] == _LITERAL:
+                return self._segments[i][1]
+        return None
+
+    def match(self, path):
+        """Check if a path matches the pattern.
+
+        :param path: a path relative to the directory being searched
+
+        """
+        states = self.start()
+        for name in iteratepath(path):
+            states = self.advance(states, name)
+            if not states:
+                return False
+        return self.is_match(states)
+
+
+def compile_glob(pattern):
+    """Get a compiled :class:`GlobPattern`, reusing a previous compilation of
+    the same pattern if possible.
+
+    :param pattern: a glob pattern, or a GlobPattern which is returned as is
+
+    """
+    if isinstance(pattern, GlobPattern):
+        return pattern
+    try:
+        return _glob_cache[pattern]
+    except KeyError:
+        pass
+    if len(_glob_cache) >= _MAX_CACHE:
+        _glob_cache.clear()
+    compiled = _glob_cache[pattern] = GlobPattern(pattern)
+    return compiled
+
+
+def compile_wildcard(wildcard):
+    """Get a function that checks if a name matches a wildcard, reusing a
+    previous compilation of the same wildcard if possible.
+
+    :param wildcard: a wildcard such as ``*.txt``, or a callable that takes a
+        name and returns a boolean, which is returned as is
+
+    """
+    if callable(wildcard):
+        return wildcard
+    try:
+        return _wildcard_cache[wildcard]
+    except KeyError:
+        pass
+    if len(_wildcard_cache) >= _MAX_CACHE:
+        _wildcard_cache.clear()
+    match = re.compile(fnmatch.translate(wildcard)).match
+    matcher = _wildcard_cache[wildcard] = lambda name: match(name) is not None
+    return matcher
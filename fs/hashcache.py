@@ -0,0 +1,182 @@
+"""
+fs.hashcache
+============
+
+Caches for the digests returned by :meth:`~fs.base.FS.gethash`.
+
+Working out the digest of a file normally means reading all of it, so a
+filesystem may be given a cache to remember digests in::
+
+    >>> from fs.osfs import OSFS
+    >>> from fs.hashcache import SqliteHashCache
+    >>> home_fs = OSFS('~/')
+    >>> home_fs.hash_cache = SqliteHashCache('~/.cache/digests.db')
+
+Each digest is stored along with the size and modification time of the file
+it was calculated from, and is only used while these stay the same; checking
+the digest of a file that hasn't changed costs no more than a `getinfo`.
+A cache may hold back the digests it is given and store them in batches, so
+call its `flush` or `close` method once the digests have been worked out.
+
+A cache can be any object with the methods of :class:`HashCache`.  Cached
+entries are matched on the path alone, so a cache should not be shared
+between filesystems.
+
+"""
+
+import os
+import datetime
+import threading
+from itertools import count
+
+__all__ = ['HashCache',
+           'SqliteHashCache',
+           'hash_stamp']
+
+
+def hash_stamp(info):
+    """Get the (size, mtime) that the digest of a file is cached with, from
+    its info dictionary.  The mtime is given as a string.
+
+    :returns: a tuple of (size, mtime), or None if the info doesn't have them
+
+    """
+    size = info.get('size')
+    mtime = info.get('st_mtime')
+    if mtime is None:
+        mtime = info.get('modified_time')
+    if size is None or mtime is None:
+        return None
+    if isinstance(mtime, datetime.datetime):
+        return (size, mtime.isoformat())
+    return (size, repr(mtime))
+
+
+class HashCache(object):
+    """Keeps digests in memory.
+
+    :param max_entries: the number of digests to keep; once there are more
+        than this the least recently used quarter of them are forgotten.
+        None for no limit
+
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._ticks = count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path, algorithm, size, mtime):
+        """Get a stored digest.
+
+        :param path: path of the file
+        :param algorithm: name of the hash algorithm
+        :param size: size of the file now
+        :param mtime: modification time of the file now, as a string
+        :returns: the digest, or None if there isn't one for this version of
+            the file
+
+        """
+        key = (path, algorithm)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[:2] != [size, mtime]:
+                return None
+            entry[3] = next(self._ticks)
+            return entry[2]
+
+    def set(self, path, algorithm, size, mtime, digest):
+        """Store the digest of a file, replacing any previous digest."""
+        key = (path, algorithm)
+        with self._lock:
+            self._entries[key] = [size, mtime, digest, next(self._ticks)]
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                by_use = sorted(self._entries, key=lambda k: self._entries[k][3])
+                for key in by_use[:len(by_use) - self.max_entries * 3 // 4]:
+                    del self._entries[key]
+
+    def clear(self):
+        """Forget all stored digests."""
+        with self._lock:
+            self._entries.clear()
+
+    def flush(self):
+        """Store any digests that have been held back."""
+        pass
+
+    def close(self):
+        """Store any digests that have been held back, and free any
+        resources used by the cache."""
+        pass
+
+
+class SqliteHashCache(HashCache):
+    """Keeps digests in an SQLite database, so they are remembered between
+    runs.
+
+    :param filename: path of the database file in the local filesystem,
+        which is created if it doesn't exist
+    :param commit_every: the number of digests to store in each
+        transaction; the rest are stored by `flush` or `close`
+
+    """
+
+    def __init__(self, filename, commit_every=1000):
+        import sqlite3
+        self.filename = os.path.expanduser(filename)
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.filename, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS digests("
+                         "path TEXT, algorithm TEXT, size INTEGER, mtime TEXT, digest TEXT, "
+                         "PRIMARY KEY (path, algorithm))")
+        self._db.commit()
+
+    def __repr__(self):
+        return "<SqliteHashCache %s>" % self.filename
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def get(self, path, algorithm, size, mtime):
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime, digest FROM digests "
+                                   "WHERE path=? AND algorithm=?",
+                                   (path, algorithm)).fetchone()
+        if row is None or (row[0], row[1]) != (size, mtime):
+            return None
+        return str(row[2])
+
+    def set(self, path, algorithm, size, mtime, digest):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)",
+                             (path, algorithm, size, mtime, digest))
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self._commit()
+
+    def _commit(self):
+        self._db.commit()
+        self._uncommitted = 0
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM digests")
+            self._commit()
+
+    def flush(self):
+        with self._lock:
+            if self._uncommitted:
+                self._commit()
+
+    def close(self):
+        with self._lock:
+            if self._uncommitted:
+                self._commit()
+            self._db.close()
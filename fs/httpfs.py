@@ -34,6 +34,7 @@ class HTTPFS(FS):
         :param url: The base URL
 
         """
+        super(HTTPFS, self).__init__()
         self.root_url = url
 
     def _make_url(self, path):
@@ -0,0 +1,309 @@
+"""
+fs.info
+=======
+
+Info objects returned by :meth:`~fs.base.FS.getinfo` and friends.
+
+Filesystems that get their resource information from a structure such as
+the result of ``os.stat`` may return an :class:`Info` that wraps it, rather
+than copying every field in to a new dictionary.  The keys of an Info are
+worked out from the wrapped structure when they are read, so that the cost
+of getting the info for a file is little more than the cost of the stat
+call; this matters when walking large directory trees.
+
+An Info can be used in place of an info dictionary::
+
+    >>> info = my_fs.getinfo('foo.txt')
+    >>> info['size']
+    1024
+    >>> info.get('modified_time')
+    datetime.datetime(2012, 2, 28, 13, 20, 10)
+    >>> dict(info)
+    {...}
+
+and may be modified in the same way, without changing the wrapped
+structure.  Pickling an Info produces a plain dictionary.
+
+"""
+
+import stat
+import datetime
+
+__all__ = ['Info',
+           'StatInfo',
+           'ZipInfoInfo']
+
+_MISSING = object()
+_DELETED = object()
+
+
+class Info(object):
+    """A dictionary of resource information computed on demand from a raw
+    structure.
+
+    Subclasses define `_getters`, a dictionary that maps each key on to a
+    function that takes the raw structure and returns the value for the key
+    (or raises KeyError if it doesn't have one), and `_keys`, which returns
+    the keys available for a raw structure.
+
+    :param raw: the structure to get information from
+
+    """
+
+    __slots__ = ('raw', '_values')
+
+    _getters = {}
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._values = None
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, dict(self))
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def _keys(self):
+        return list(self._getters)
+
+    def __getitem__(self, key):
+        values = self._values
+        if values is not None:
+            value = values.get(key, _MISSING)
+            if value is not _MISSING:
+                if value is _DELETED:
+                    raise KeyError(key)
+                return value
+        try:
+            getter = self._getters[key]
+        except KeyError:
+            raise KeyError(key)
+        value = getter(self.raw)
+        if values is None:
+            values = self._values = {}
+        values[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if self._values is None:
+            self._values = {}
+        self._values[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self[key] = _DELETED
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    has_key = __contains__
+
+    def __iter__(self):
+        values = self._values or {}
+        for key in self._keys():
+            if values.get(key) is not _DELETED and key in self:
+                yield key
+        for key, value in values.iteritems():
+            if value is not _DELETED and key not in self._getters:
+                yield key
+
+    iterkeys = __iter__
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (dict, Info)):
+            return dict(self) == dict(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, (dict, Info)):
+            return dict(self) != dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(iter(self))
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def itervalues(self):
+        return iter(self.values())
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def copy(self):
+        """Get a copy of the info as a dictionary."""
+        return dict(self)
+
+    def pop(self, key, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    def setdefault(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+            return default
+
+    def update(self, *args, **kwds):
+        for key, value in dict(*args, **kwds).iteritems():
+            self[key] = value
+
+
+def _attribute(name):
+    def getter(raw):
+        try:
+            return getattr(raw, name)
+        except AttributeError:
+            raise KeyError(name)
+    return getter
+
+
+def _timestamp(name):
+    fromtimestamp = datetime.datetime.fromtimestamp
+
+    def getter(raw):
+        t = getattr(raw, name, None)
+        if t is None:
+            raise KeyError(name)
+        return fromtimestamp(t)
+    return getter
+
+
+class StatInfo(Info):
+    """Info from the result of a stat call, such as an ``os.stat_result`` or
+    a paramiko ``SFTPAttributes``.
+
+    The ``st_*`` attributes of the result are given along with 'size' and
+    the 'created_time', 'accessed_time' and 'modified_time' datetimes.
+    Note that 'created_time' is taken from st_ctime, which on Unix is the
+    time of the last metadata change.
+
+    :param raw: the stat result
+    :param attributes: names of the stat attributes to include, or None to
+        include all the ``st_*`` attributes of the result
+
+    """
+
+    __slots__ = ('attributes',)
+
+    _getters = {'size': _attribute('st_size'),
+                'created_time': _timestamp('st_ctime'),
+                'accessed_time': _timestamp('st_atime'),
+                'modified_time': _timestamp('st_mtime')}
+
+    #  Maps stat result types on to their st_* attribute names
+    _type_attributes = {}
+
+    def __init__(self, raw, attributes=None):
+        super(StatInfo, self).__init__(raw)
+        self.attributes = attributes
+
+    def _attributes(self):
+        attributes = self.attributes
+        if attributes is None:
+            raw_type = type(self.raw)
+            attributes = self._type_attributes.get(raw_type)
+            if attributes is None:
+                attributes = [k for k in dir(self.raw) if k.startswith('st_')]
+                self._type_attributes[raw_type] = attributes
+        return attributes
+
+    def _keys(self):
+        return ['size',
+                'created_time',
+                'accessed_time',
+                'modified_time'] + list(self._attributes())
+
+    def __getitem__(self, key):
+        if key.startswith('st_') and (self._values is None or key not in self._values):
+            if key not in self._attributes():
+                raise KeyError(key)
+            return getattr(self.raw, key)
+        return super(StatInfo, self).__getitem__(key)
+
+
+def _zip_created_time(zi):
+    if zi is None:
+        raise KeyError('created_time')
+    return datetime.datetime(*zi.date_time)
+
+
+def _zip_mode(zi):
+    if zi is None:
+        return stat.S_IFDIR | 0755
+    #  Archivers on Unix keep the file mode in the high bits
+    mode = zi.external_attr >> 16
+    if not mode:
+        raise KeyError('st_mode')
+    return mode
+
+
+class ZipInfoInfo(Info):
+    """Info from a ``zipfile.ZipInfo``, or None for a directory that has
+    no entry of its own in the archive.
+
+    The public attributes of the ZipInfo are given along with 'size', a
+    'created_time' datetime made from its date_time and, if the archive
+    recorded one, the 'st_mode' of the file.
+
+    """
+
+    __slots__ = ()
+
+    _getters = {'size': lambda zi: zi.file_size if zi is not None else 0,
+                'created_time': _zip_created_time,
+                'st_mode': _zip_mode}
+
+    _zipinfo_attributes = None
+
+    def _attributes(self):
+        if self.raw is None:
+            return ['file_size']
+        attributes = ZipInfoInfo._zipinfo_attributes
+        if attributes is None:
+            attributes = [k for k in type(self.raw).__slots__ if not k.startswith('_')]
+            ZipInfoInfo._zipinfo_attributes = attributes
+        return attributes
+
+    def _keys(self):
+        return ['size', 'created_time', 'st_mode'] + list(self._attributes())
+
+    def __getitem__(self, key):
+        if (self._values is None or key not in self._values) and key not in self._getters:
+            if key not in self._attributes():
+                raise KeyError(key)
+            if self.raw is None:
+                return 0
+            try:
+                return getattr(self.raw, key)
+            except AttributeError:
+                raise KeyError(key)
+        return super(ZipInfoInfo, self).__getitem__(key)
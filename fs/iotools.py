@@ -4,10 +4,21 @@ from __future__ import print_function
 from fs import SEEK_SET, SEEK_CUR, SEEK_END
 
 import io
+import os
+import sys
+import stat
+import errno
+import shutil
+import hashlib
 from functools import wraps
 
 import six
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 
 class RawWrapper(object):
     """Convert a Python 2 style file-like object in to a IO object"""
@@ -86,13 +97,18 @@ class RawWrapper(object):
         return self._f.read()
 
     def readinto(self, b):
-        if self.is_io:
+        if self.is_io or hasattr(self._f, 'readinto'):
             return self._f.readinto(b)
         data = self._f.read(len(b))
         bytes_read = len(data)
         b[:len(data)] = data
         return bytes_read
 
+    def pread(self, size, offset):
+        """Read at an offset without moving the file position (only if the
+        wrapped file has a `pread` method)."""
+        return self._f.pread(size, offset)
+
     def readline(self, limit=-1):
         return self._f.readline(limit)
 
@@ -188,29 +204,297 @@ def make_bytes_io(data, encoding=None, errors=None):
     return io.BytesIO(data)
 
 
+def _write_copies(f):
+    """Check if the write method of a file copies the data it is given, so
+    the caller may reuse the buffer as soon as write returns."""
+    if isinstance(f, io.IOBase):
+        return True
+    return isinstance(f, RawWrapper) and f.is_io
+
+
+#  Size of the buffer that files are first read in to, so that copying or
+#  hashing a small file doesn't allocate a whole chunk
+_FIRST_BUFFER_SIZE = 64 * 1024
+
+
+def _read_chunks(readinto, chunk_size):
+    """Yield memoryviews of the data read with a readinto method.
+
+    The data is read in to one reused buffer, so each view is only valid
+    until the next one is yielded.  The buffer starts small, and only grows
+    to `chunk_size` once a read fills it.
+
+    """
+    buf = bytearray(min(chunk_size, _FIRST_BUFFER_SIZE))
+    view = memoryview(buf)
+    while True:
+        bytes_read = readinto(buf)
+        if not bytes_read:
+            return
+        yield view[:bytes_read]
+        if bytes_read == len(buf) < chunk_size:
+            buf = bytearray(chunk_size)
+            view = memoryview(buf)
+
+
+def copy_stream(src, dst, chunk_size=64 * 1024, progress_callback=None):
+    """Copy the remaining contents of one open file to another.
+
+    If `src` supports readinto, every chunk is read in to the same buffer
+    (which is only as big as `chunk_size` if the file is bigger than 64K),
+    and if `dst` is an io object that buffer is written out without being
+    copied in to a new bytes object.  Otherwise this falls back to a simple
+    read / write loop.
+
+    :param src: an open file to read from
+    :param dst: an open file to write to
+    :param chunk_size: number of bytes to copy in each chunk
+    :param progress_callback: a function called with the number of bytes
+        copied so far, after each chunk
+    :returns: the number of bytes copied
+
+    """
+    if progress_callback is None:
+        progress_callback = lambda bytes_written: None
+    write = dst.write
+    bytes_written = 0
+    readinto = getattr(src, 'readinto', None)
+    if readinto is None:
+        read = src.read
+        chunk = read(chunk_size)
+        while chunk:
+            write(chunk)
+            bytes_written += len(chunk)
+            progress_callback(bytes_written)
+            chunk = read(chunk_size)
+        return bytes_written
+
+    write_view = _write_copies(dst)
+    for data in _read_chunks(readinto, chunk_size):
+        bytes_read = len(data)
+        if write_view:
+            chunk = data
+            while chunk:
+                chunk_written = write(chunk)
+                if chunk_written is None or chunk_written >= len(chunk):
+                    break
+                chunk = chunk[chunk_written:]
+        else:
+            #  The file may hold on to what it is given, so it must
+            #  have its own copy of the data.
+            write(data.tobytes())
+        bytes_written += bytes_read
+        progress_callback(bytes_written)
+    return bytes_written
+
+
+def hash_stream(f, algorithm="md5", chunk_size=64 * 1024):
+    """Get the hex digest of the remaining contents of an open file.
+
+    Like :func:`copy_stream`, this reads in to a single reused buffer if the
+    file supports readinto.
+
+    :param f: an open file to read from
+    :param algorithm: name of a hash algorithm supported by `hashlib`
+    :param chunk_size: number of bytes to read at a time
+    :returns: the digest as a string of hex digits
+
+    """
+    digest = hashlib.new(algorithm)
+    readinto = getattr(f, 'readinto', None)
+    if readinto is None:
+        read = f.read
+        chunk = read(chunk_size)
+        while chunk:
+            digest.update(chunk)
+            chunk = read(chunk_size)
+        return digest.hexdigest()
+
+    for data in _read_chunks(readinto, chunk_size):
+        digest.update(data)
+    return digest.hexdigest()
+
+
 def copy_file_to_fs(f, fs, path, encoding=None, errors=None, progress_callback=None, chunk_size=64 * 1024):
     """Copy an open file to a path on an FS"""
     if progress_callback is None:
         progress_callback = lambda bytes_written: None
-    read = f.read
-    chunk = read(chunk_size)
+    if chunk_size is None:
+        chunk_size = fs.copy_chunk_size
+    chunk = f.read(chunk_size)
     if isinstance(chunk, six.text_type):
-        f = fs.open(path, 'wt', encoding=encoding, errors=errors)
+        dst_file = fs.open(path, 'wt', encoding=encoding, errors=errors)
     else:
-        f = fs.open(path, 'wb')
-    write = f.write
+        dst_file = fs.open(path, 'wb')
     bytes_written = 0
     try:
-        while chunk:
-            write(chunk)
-            bytes_written += len(chunk)
+        if chunk:
+            dst_file.write(chunk)
+            bytes_written = len(chunk)
             progress_callback(bytes_written)
-            chunk = read(chunk_size)
+            first_chunk_size = bytes_written
+            bytes_written += copy_stream(f,
+                                         dst_file,
+                                         chunk_size,
+                                         lambda copied: progress_callback(first_chunk_size + copied))
     finally:
-        f.close()
+        dst_file.close()
     return bytes_written
 
 
+#  ioctl request number for FICLONE, _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+#  Largest request handed to the kernel in a single copy call
+_KERNEL_COPY_MAX = 1024 * 1024 * 1024
+
+
+def _load_libc():
+    """Load the C library for the kernel copy calls missing from the os
+    module on older Pythons.  Returns None if it is not available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        return ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except (ImportError, OSError):
+        return None
+
+_libc = None
+if not hasattr(os, "copy_file_range") or not hasattr(os, "sendfile"):
+    _libc = _load_libc()
+
+
+def _libc_call(func):
+    """Wrap a ctypes libc function so that failures raise OSError."""
+    import ctypes
+
+    def call(*args):
+        result = func(*args)
+        if result < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return result
+    return call
+
+
+def _kernel_copiers():
+    """Build the list of (name, copier) pairs that can copy between file
+    descriptors in the kernel.  Each copier is called as copier(src_fd,
+    dst_fd, count), advances both file offsets and returns the number of
+    bytes copied."""
+    copiers = []
+    if hasattr(os, "copy_file_range"):
+        copiers.append(("copy_file_range",
+                        lambda src_fd, dst_fd, count: os.copy_file_range(src_fd, dst_fd, count)))
+    elif _libc is not None and hasattr(_libc, "copy_file_range"):
+        import ctypes
+        func = _libc.copy_file_range
+        func.restype = ctypes.c_ssize_t
+        func.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int,
+                         ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint]
+        copy_file_range = _libc_call(func)
+        copiers.append(("copy_file_range",
+                        lambda src_fd, dst_fd, count: copy_file_range(src_fd, None, dst_fd, None, count, 0)))
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        copiers.append(("sendfile",
+                        lambda src_fd, dst_fd, count: os.sendfile(dst_fd, src_fd, None, count)))
+    elif _libc is not None and hasattr(_libc, "sendfile"):
+        import ctypes
+        func = _libc.sendfile
+        func.restype = ctypes.c_ssize_t
+        func.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t]
+        sendfile = _libc_call(func)
+        copiers.append(("sendfile",
+                        lambda src_fd, dst_fd, count: sendfile(dst_fd, src_fd, None, count)))
+    return copiers
+
+_copiers = _kernel_copiers()
+
+
+def _reflink(src_fd, dst_fd):
+    """Try to share the data blocks of src_fd with dst_fd, which only works
+    on copy-on-write filesystems such as btrfs and XFS.  Returns True on
+    success."""
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def copyfile_syspath(src_syspath, dst_syspath, chunk_size=64 * 1024):
+    """Copy the contents of one OS file to another, without passing the data
+    through Python where the platform allows it.
+
+    The copy first tries a reflink (FICLONE), then copy_file_range, then
+    sendfile, and only then falls back to reading and writing chunks of
+    `chunk_size` bytes.  A kernel method that fails part way through hands
+    over to the next one at the current offset.  Returns the name of the
+    method that completed the copy.
+
+    :param src_syspath: system path of the file to copy
+    :param dst_syspath: system path of the destination, which is truncated
+        if it exists
+    :param chunk_size: size of chunks used by the buffered fallback
+
+    """
+    try:
+        same_file = os.path.samefile(src_syspath, dst_syspath)
+    except OSError:
+        same_file = False
+    #  Raised outside the try, as shutil.Error is an OSError on Python 3
+    if same_file:
+        raise shutil.Error("`%s` and `%s` are the same file" % (src_syspath, dst_syspath))
+    binary = getattr(os, "O_BINARY", 0)
+    src_fd = os.open(src_syspath, os.O_RDONLY | binary)
+    try:
+        #  A directory can be opened for reading on some platforms, so check
+        #  what src is before the destination is truncated
+        src_mode = os.fstat(src_fd).st_mode
+        if stat.S_ISDIR(src_mode):
+            raise IOError(errno.EISDIR, os.strerror(errno.EISDIR), src_syspath)
+        if not stat.S_ISREG(src_mode):
+            raise shutil.SpecialFileError("`%s` is not a regular file" % src_syspath)
+        dst_fd = os.open(dst_syspath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o666)
+        try:
+            if _reflink(src_fd, dst_fd):
+                return "reflink"
+            copied = 0
+            for name, copier in _copiers:
+                try:
+                    count = copier(src_fd, dst_fd, _KERNEL_COPY_MAX)
+                except OSError:
+                    continue
+                if not count and not copied:
+                    #  Some files (e.g. in /proc) report no data to the
+                    #  kernel copy calls, so let the next method try.
+                    continue
+                while count:
+                    copied += count
+                    try:
+                        count = copier(src_fd, dst_fd, _KERNEL_COPY_MAX)
+                    except OSError:
+                        break
+                else:
+                    return name
+            read = os.read
+            write = os.write
+            chunk = read(src_fd, chunk_size)
+            while chunk:
+                while chunk:
+                    chunk = chunk[write(dst_fd, chunk):]
+                chunk = read(src_fd, chunk_size)
+            return "buffered"
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+
 def line_iterator(f, size=None):
     """A not terribly efficient char by char line iterator"""
     read = f.read
@@ -5,21 +5,64 @@ fs.memoryfs
 
 A Filesystem that exists in memory only. Which makes them extremely fast, but non-permanent.
 
-If you open a file from a `memoryfs` you will get back a StringIO object from the standard library.
+Files are kept as `DirEntry` objects, which hold the contents of a file in a
+single buffer along with its size, so finding the size of a file doesn't
+depend on how big it is.  Entries are kept small, so that a MemoryFS can hold
+a great many files.
+
+A MemoryFS can be cloned in constant time, however much it holds: the clone
+shares its directories and files with the original, and each of them copies
+an entry before changing it.  For example, to give each request a workspace
+made from a template::
+
+    >>> template = MemoryFS()
+    >>> template.setcontents("config.ini", "[main]\n")
+    >>> workspace = template.clone()
+    >>> workspace.setcontents("config.ini", "[changed]\n")
+    >>> template.getcontents("config.ini")
+    '[main]\n'
+
+Methods that change the directory tree hold the lock of the FS, but methods
+that only read it don't wait for the lock: they find the entries they want
+without it, and start again with the lock only if the tree was changed while
+they did.  Reads from different files can go on at the same time, and
+`MemoryFile.pread` reads from a file without moving its position.
+
+A MemoryFS can be saved to an *image*, a single file holding the contents of
+every file followed by an index of the tree, and loaded from it again::
+
+    >>> cache.save_image("cache.img")
+    >>> cache = MemoryFS.load_image("cache.img")
+
+Loading an image only reads the index.  The rest of the image is mapped in
+to memory, and the contents of each file are read from it the first time
+they're used, so loading takes time in proportion to the number of files
+rather than their size.  Images are a cache rather than an archive: they
+can only be loaded by the version of Python that saved them.
 
 
 """
 
+import os
+import sys
+import time
+import errno
 import datetime
 import stat
+import mmap
+import struct
+import marshal
+import tempfile
 from fs.path import iteratepath, pathsplit, normpath
+from fs.local_functools import wraps
 from fs.base import *
 from fs.errors import *
 from fs import _thread_synchronize_default
-from fs.filelike import StringIO
 from fs import iotools
-from os import SEEK_END
+from fs.info import Info
+from fs.wrapfs.readonlyfs import ReadOnlyFS
 import threading
+import weakref
 
 import six
 from six import b
@@ -32,48 +75,99 @@ def _check_mode(mode, mode_chars):
     return True
 
 
-class MemoryFile(object):
+def _to_datetime(t):
+    """Get a time stored in a DirEntry as a datetime."""
+    if isinstance(t, datetime.datetime):
+        return t
+    return datetime.datetime.fromtimestamp(t)
+
+
+def _changes_tree(func):
+    """Decorator for MemoryFS methods that change the directory tree.
+
+    The method is called with the lock held, and the FS's `_changes` count
+    is incremented before and after the outermost such call, so that it's
+    odd while the tree is being changed.
 
-    def seek_and_lock(f):
-        def deco(self, *args, **kwargs):
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        self._lock.acquire()
+        try:
+            self._changing += 1
+            if self._changing == 1:
+                self._changes += 1
             try:
-                self._lock.acquire()
-                self.mem_file.seek(self.pos)
-                ret = f(self, *args, **kwargs)
-                self.pos = self.mem_file.tell()
-                return ret
+                return func(self, *args, **kwargs)
             finally:
-                self._lock.release()
-        return deco
+                self._changing -= 1
+                if not self._changing:
+                    self._changes += 1
+        finally:
+            self._lock.release()
+    return wrapper
+
+
+def _reads_tree(func):
+    """Decorator for MemoryFS methods that only read the directory tree.
+
+    The method is first called without the lock.  If the tree is changed
+    while it runs, whatever it returned or raised is thrown away and it's
+    called again with the lock held.  Each dictionary lookup is atomic, so
+    at worst the method sees the tree part way through a change, which the
+    check afterwards catches.
+
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        changes = self._changes
+        if not changes & 1:
+            try:
+                result = func(self, *args, **kwargs)
+            except Exception:
+                if self._changes == changes:
+                    raise
+            else:
+                if self._changes == changes:
+                    return result
+        self._lock.acquire()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self._lock.release()
+    return wrapper
+
+
+class MemoryFile(object):
+    """A file opened from a MemoryFS.
+
+    Reads and writes go straight to the contents of the file's `DirEntry`,
+    at a position kept by each open file.
+
+    """
 
-    def __init__(self, path, memory_fs, mem_file, mode, lock):
+    def __init__(self, path, memory_fs, dir_entry, mode, lock):
         self.closed = False
         self.path = path
         self.memory_fs = memory_fs
-        self.mem_file = mem_file
+        self.dir_entry = dir_entry
         self.mode = mode
         self._lock = lock
+        self._readable = 'r' in mode or '+' in mode
+        self._writeable = 'r' not in mode or '+' in mode
 
         self.pos = 0
 
         if _check_mode(mode, 'a'):
-            lock.acquire()
-            try:
-                self.mem_file.seek(0, SEEK_END)
-                self.pos = self.mem_file.tell()
-            finally:
-                lock.release()
+            self.pos = dir_entry.size
 
         elif _check_mode(mode, 'w'):
             lock.acquire()
             try:
-                self.mem_file.seek(0)
-                self.mem_file.truncate()
+                dir_entry.truncate(0)
             finally:
                 lock.release()
 
-        assert self.mem_file is not None, "self.mem_file should have a value"
-
     def __str__(self):
         return "<MemoryFile in %s %s>" % (self.memory_fs, self.path)
 
@@ -83,82 +177,134 @@ class MemoryFile(object):
     def __unicode__(self):
         return u"<MemoryFile in %s %s>" % (self.memory_fs, self.path)
 
-    def __del__(self):
-        if not self.closed:
-            self.close()
+    def _check_readable(self):
+        if not self._readable:
+            raise IOError("File not open for reading")
+
+    def _check_writeable(self):
+        if not self._writeable:
+            raise IOError("File not open for writing")
+
+    def _lock_for_write(self):
+        """Acquire the lock and get the entry to write to, first giving the
+        file an entry of its own if it shares one with a clone of the FS."""
+        while True:
+            self._lock.acquire()
+            dir_entry = self.dir_entry
+            if dir_entry._owner is self.memory_fs._owner:
+                return dir_entry
+            #  The FS lock is taken before entry locks, so release this first
+            self._lock.release()
+            self.memory_fs._own_file(self)
 
     def flush(self):
         pass
 
     def __iter__(self):
-        if 'r' not in self.mode and '+' not in self.mode:
-            raise IOError("File not open for reading")
-        self.mem_file.seek(self.pos)
-        for line in self.mem_file:
+        self._check_readable()
+        while True:
+            line = self.readline()
+            if not line:
+                break
             yield line
 
-    @seek_and_lock
     def next(self):
-        if 'r' not in self.mode and '+' not in self.mode:
-            raise IOError("File not open for reading")
-        return self.mem_file.next()
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
 
-    @seek_and_lock
-    def readline(self, *args, **kwargs):
-        if 'r' not in self.mode and '+' not in self.mode:
-            raise IOError("File not open for reading")
-        return self.mem_file.readline(*args, **kwargs)
+    def readline(self, size=-1):
+        self._check_readable()
+        self._lock.acquire()
+        try:
+            line = self.dir_entry.readline(self.pos, size)
+            self.pos += len(line)
+            return line
+        finally:
+            self._lock.release()
 
     def close(self):
-        do_close = False
+        self.closed = True
+
+    def read(self, size=None):
+        self._check_readable()
         self._lock.acquire()
         try:
-            do_close = not self.closed and self.mem_file is not None
-            if do_close:
-                self.closed = True
+            pos = self.pos
+            end = self.dir_entry.size
+            if size is not None and size >= 0:
+                end = min(end, pos + size)
+            self.pos = max(end, pos)
+            return self.dir_entry.read(pos, end)
         finally:
             self._lock.release()
-        if do_close:
-            self.memory_fs._on_close_memory_file(self, self.path)
 
-    @seek_and_lock
-    def read(self, size=None):
-        if 'r' not in self.mode and '+' not in self.mode:
-            raise IOError("File not open for reading")
-        if size is None:
-            size = -1
-        return self.mem_file.read(size)
+    def pread(self, size, offset):
+        """Read up to `size` bytes from an offset in the file, without using
+        or moving the position of the file.  Contents that haven't been
+        written to since they were set are read without a lock."""
+        self._check_readable()
+        if offset < 0:
+            raise IOError(errno.EINVAL, "Invalid argument")
+        data = self.dir_entry.data
+        if isinstance(data, six.binary_type):
+            return data[offset:offset + size]
+        self._lock.acquire()
+        try:
+            return self.dir_entry.read(offset, offset + size)
+        finally:
+            self._lock.release()
 
-    @seek_and_lock
-    def seek(self, *args, **kwargs):
-        return self.mem_file.seek(*args, **kwargs)
+    def readinto(self, buf):
+        self._check_readable()
+        self._lock.acquire()
+        try:
+            count = self.dir_entry.readinto(self.pos, buf)
+            self.pos += count
+            return count
+        finally:
+            self._lock.release()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._lock.acquire()
+        try:
+            if whence == os.SEEK_CUR:
+                offset += self.pos
+            elif whence == os.SEEK_END:
+                offset += self.dir_entry.size
+            if offset < 0:
+                raise IOError(errno.EINVAL, "Invalid argument")
+            self.pos = offset
+            return offset
+        finally:
+            self._lock.release()
 
-    @seek_and_lock
     def tell(self):
         return self.pos
 
-    @seek_and_lock
-    def truncate(self, *args, **kwargs):
-        if 'r' in self.mode and '+' not in self.mode:
-            raise IOError("File not open for writing")
-        return self.mem_file.truncate(*args, **kwargs)
+    def truncate(self, size=None):
+        self._check_writeable()
+        dir_entry = self._lock_for_write()
+        try:
+            if size is None:
+                size = self.pos
+            dir_entry.truncate(size)
+        finally:
+            self._lock.release()
 
-    #@seek_and_lock
     def write(self, data):
-        if 'r' in self.mode and '+' not in self.mode:
-            raise IOError("File not open for writing")
-        self.memory_fs._on_modify_memory_file(self.path)
-        self._lock.acquire()
+        self._check_writeable()
+        dir_entry = self._lock_for_write()
         try:
-            self.mem_file.seek(self.pos)
-            self.mem_file.write(data)
-            self.pos = self.mem_file.tell()
+            dir_entry.write(self.pos, data)
+            self.pos += len(data)
         finally:
             self._lock.release()
 
-    @seek_and_lock
-    def writelines(self, *args, **kwargs):
-        return self.mem_file.writelines(*args, **kwargs)
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
 
     def __enter__(self):
         return self
@@ -168,19 +314,39 @@ class MemoryFile(object):
         return False
 
 
+#  Held while the lock of an entry is created, which may happen in more than
+#  one thread at once
+_entry_lock_lock = threading.Lock()
+
+
 class DirEntry(object):
+    """A file or directory in a MemoryFS.
 
-    def sync(f):
-        def deco(self, *args, **kwargs):
-            if self.lock is not None:
-                try:
-                    self.lock.acquire()
-                    return f(self, *args, **kwargs)
-                finally:
-                    self.lock.release()
-            else:
-                return f(self, *args, **kwargs)
-        return deco
+    The contents of a file are kept in `data`, either as an immutable
+    string (as given to `setcontents`) or as a bytearray once it has been
+    written to, with the size kept in `size`.  Times are kept as timestamps
+    until they are set to a datetime.  The lock, used by open files, and the
+    extended attributes are only created when they are needed.
+
+    An entry may be shared by clones of a MemoryFS.  Each FS only changes the
+    entries it owns, those with an `_owner` of the FS's `_owner`, and copies
+    the rest before changing them.  A copy shares its contents with the entry
+    it was copied from until they're written to.
+
+    """
+
+    __slots__ = ('type',
+                 'name',
+                 'contents',
+                 'data',
+                 'size',
+                 '_created_time',
+                 '_modified_time',
+                 '_accessed_time',
+                 '_xattrs',
+                 '_lock',
+                 '_owner',
+                 '_shared_data')
 
     def __init__(self, type, name, contents=None):
 
@@ -192,27 +358,165 @@ class DirEntry(object):
         if contents is None and type == "dir":
             contents = {}
 
-        self.open_files = []
         self.contents = contents
-        self.mem_file = None
-        self.created_time = datetime.datetime.now()
-        self.modified_time = self.created_time
-        self.accessed_time = self.created_time
-
-        self.xattrs = {}
-
-        self.lock = None
+        self.data = None
+        self.size = 0
+        now = time.time()
+        self._created_time = now
+        self._modified_time = now
+        self._accessed_time = now
+        self._xattrs = None
+        self._lock = None
+        self._owner = None
+        self._shared_data = False
         if self.type == 'file':
-            self.mem_file = StringIO()
-            self.lock = threading.RLock()
+            self.data = b('')
+
+    def _get_created_time(self):
+        return _to_datetime(self._created_time)
+    def _set_created_time(self, t):
+        self._created_time = t
+    created_time = property(_get_created_time, _set_created_time)
+
+    def _get_modified_time(self):
+        return _to_datetime(self._modified_time)
+    def _set_modified_time(self, t):
+        self._modified_time = t
+    modified_time = property(_get_modified_time, _set_modified_time)
+
+    def _get_accessed_time(self):
+        return _to_datetime(self._accessed_time)
+    def _set_accessed_time(self, t):
+        self._accessed_time = t
+    accessed_time = property(_get_accessed_time, _set_accessed_time)
+
+    @property
+    def xattrs(self):
+        if self._xattrs is None:
+            self._xattrs = {}
+        return self._xattrs
+
+    @property
+    def lock(self):
+        """The lock for the contents of a file."""
+        if self._lock is None and self.type == 'file':
+            _entry_lock_lock.acquire()
+            try:
+                if self._lock is None:
+                    self._lock = threading.RLock()
+            finally:
+                _entry_lock_lock.release()
+        return self._lock
 
     def get_value(self):
-        self.lock.acquire()
-        try:
-            return self.mem_file.getvalue()
-        finally:
-            self.lock.release()
-    data = property(get_value)
+        """Get the contents of a file as a string."""
+        data = self.data
+        if isinstance(data, six.binary_type):
+            return data
+        #  Copied in one step, as this may be called without the lock
+        return six.binary_type(data)
+
+    def set_value(self, data):
+        """Replace the contents of a file.  A string is kept as it is,
+        until the file is next written to."""
+        if not isinstance(data, six.binary_type):
+            data = bytearray(data)
+        self.data = data
+        self.size = len(data)
+        self._shared_data = False
+        self._modified_time = time.time()
+
+    def read(self, start, end):
+        """Get the data between two offsets as a string."""
+        if start >= end:
+            return b('')
+        data = self.data
+        if isinstance(data, six.binary_type):
+            return data[start:end]
+        return memoryview(data)[start:end].tobytes()
+
+    def readline(self, start, size=-1):
+        """Get the line starting at an offset, or at most `size` bytes of it
+        if `size` isn't negative."""
+        data = self.data
+        end = data.find(b('\n'), start) + 1 or len(data)
+        if size is not None and size >= 0:
+            end = min(end, start + size)
+        return self.read(start, end)
+
+    def readinto(self, start, buf):
+        """Copy data at an offset in to a writeable buffer.
+
+        :returns: the number of bytes copied
+
+        """
+        count = max(min(len(buf), self.size - start), 0)
+        if count:
+            buf[:count] = memoryview(self.data)[start:start + count]
+        return count
+
+    def _writeable_data(self):
+        data = self.data
+        if self._shared_data or not isinstance(data, bytearray):
+            data = self.data = bytearray(data)
+            self._shared_data = False
+        return data
+
+    def write(self, pos, data):
+        """Write data at an offset, padding the file with nulls if the offset
+        is past the end."""
+        buf = self._writeable_data()
+        size = len(buf)
+        if pos > size:
+            buf.extend(b('\0') * (pos - size))
+        if pos >= size:
+            buf.extend(data)
+        else:
+            buf[pos:pos + len(data)] = data
+        self.size = len(buf)
+        self._modified_time = time.time()
+
+    def truncate(self, size):
+        """Cut or extend (with nulls) the file to a given size."""
+        if size == self.size:
+            return
+        if size == 0:
+            self.data = b('')
+            self._shared_data = False
+        else:
+            buf = self._writeable_data()
+            if size < len(buf):
+                del buf[size:]
+            else:
+                buf.extend(b('\0') * (size - len(buf)))
+        self.size = size
+        self._modified_time = time.time()
+
+    def copy(self, owner=None):
+        """Get a copy of the entry, with the given owner, that shares its
+        contents with this one.  Only the dictionary of a directory's
+        entries is copied, so this doesn't depend on the size of a file."""
+        entry = object.__new__(self.__class__)
+        entry.type = self.type
+        entry.name = self.name
+        if self.contents is not None:
+            entry.contents = self.contents.copy()
+        else:
+            entry.contents = None
+        entry.data = self.data
+        entry.size = self.size
+        entry._created_time = self._created_time
+        entry._modified_time = self._modified_time
+        entry._accessed_time = self._accessed_time
+        if self._xattrs:
+            entry._xattrs = self._xattrs.copy()
+        else:
+            entry._xattrs = None
+        #  Files opened before the copy move to it, so they keep the lock
+        entry._lock = self._lock
+        entry._owner = owner
+        entry._shared_data = isinstance(self.data, bytearray)
+        return entry
 
     def desc_contents(self):
         if self.isfile():
@@ -229,24 +533,151 @@ class DirEntry(object):
     def __str__(self):
         return "%s: %s" % (self.name, self.desc_contents())
 
-    @sync
     def __getstate__(self):
-        state = self.__dict__.copy()
-        state.pop('lock')
-        if self.mem_file is not None:
-            state['mem_file'] = self.data
+        state = dict((name, getattr(self, name)) for name in DirEntry.__slots__)
+        del state['_lock']
+        del state['_owner']
+        del state['_shared_data']
+        if self.type == 'file':
+            state['data'] = self.get_value()
         return state
 
     def __setstate__(self, state):
-        self.__dict__.update(state)
-        if self.type == 'file':
-            self.lock = threading.RLock()
-        else:
-            self.lock = None
-        if self.mem_file is not None:
-            data = self.mem_file
-            self.mem_file = StringIO()
-            self.mem_file.write(data)
+        if 'mem_file' in state:
+            #  Pickled before entries had slots
+            state = state.copy()
+            state['data'] = state.pop('mem_file')
+            state['size'] = len(state['data'] or b(''))
+            for name in ('created_time', 'modified_time', 'accessed_time', 'xattrs'):
+                state['_' + name] = state.pop(name)
+        for name in DirEntry.__slots__:
+            setattr(self, name, state.get(name))
+        self._shared_data = False
+        if self.type == 'file' and self.data is None:
+            self.data = b('')
+
+
+class _ImageEntry(DirEntry):
+    """A file loaded from an image, whose contents are read from the mapped
+    image the first time they're used.
+
+    Until then, `data` is None and the contents are at `_image_offset` in
+    `_image`.  They're read with the entry's lock held, so they're read
+    only once, and never over contents set since.
+
+    """
+
+    __slots__ = ('_image', '_image_offset')
+
+    def _load(self):
+        if self.data is None:
+            with self.lock:
+                if self.data is None:
+                    offset = self._image_offset
+                    self.data = self._image[offset:offset + self.size]
+                    self._image = None
+
+    def get_value(self):
+        self._load()
+        return DirEntry.get_value(self)
+
+    def set_value(self, data):
+        with self.lock:
+            DirEntry.set_value(self, data)
+            self._image = None
+
+    def read(self, start, end):
+        self._load()
+        return DirEntry.read(self, start, end)
+
+    def readline(self, start, size=-1):
+        self._load()
+        return DirEntry.readline(self, start, size)
+
+    def readinto(self, start, buf):
+        self._load()
+        return DirEntry.readinto(self, start, buf)
+
+    def _writeable_data(self):
+        self._load()
+        return DirEntry._writeable_data(self)
+
+    def truncate(self, size):
+        self._load()
+        DirEntry.truncate(self, size)
+
+    def copy(self, owner=None):
+        entry = DirEntry.copy(self, owner)
+        entry._image = self._image
+        entry._image_offset = self._image_offset
+        return entry
+
+    def __setstate__(self, state):
+        DirEntry.__setstate__(self, state)
+        self._image = None
+        self._image_offset = 0
+
+
+#  An image starts with a header of a magic string, the version of the image
+#  format and of the Python that saved it (as marshal's format may change
+#  between Python versions), and the offset and size of the index, which
+#  follows the contents of the files
+_IMAGE_HEADER = struct.Struct("<8sHBBQQ")
+_IMAGE_MAGIC = b("PYFSIMG1")
+_IMAGE_VERSION = 1
+
+
+def _pack_image_header(index_offset, index_size):
+    return _IMAGE_HEADER.pack(_IMAGE_MAGIC, _IMAGE_VERSION,
+                              sys.version_info[0], sys.version_info[1],
+                              index_offset, index_size)
+
+
+def _image_xattrs(xattrs):
+    """Get the extended attributes of an entry that can be saved in an
+    image, leaving out any whose values can't be marshalled."""
+    if not xattrs:
+        return None
+    saved = {}
+    for key, value in xattrs.iteritems():
+        try:
+            marshal.dumps((key, value), 2)
+        except ValueError:
+            continue
+        saved[key] = value
+    return saved or None
+
+
+def _timestamp(t):
+    """Get a time stored in a DirEntry as a timestamp."""
+    if isinstance(t, datetime.datetime):
+        return time.mktime(t.timetuple()) + t.microsecond / 1000000.0
+    return t
+
+
+def _entry_size(raw):
+    if raw[1] is None:
+        raise KeyError('size')
+    return raw[1]
+
+
+class _EntryInfo(Info):
+    """Info for a DirEntry, from a tuple of its mode, size (None for a
+    directory) and times, so that the times are only made in to datetimes
+    when they are read."""
+
+    __slots__ = ()
+
+    _getters = {'st_mode': lambda raw: raw[0],
+                'size': _entry_size,
+                'created_time': lambda raw: _to_datetime(raw[2]),
+                'modified_time': lambda raw: _to_datetime(raw[3]),
+                'accessed_time': lambda raw: _to_datetime(raw[4])}
+
+    def _keys(self):
+        if self.raw[1] is None:
+            return ['st_mode', 'created_time', 'modified_time', 'accessed_time']
+        return ['st_mode', 'size', 'created_time', 'modified_time', 'accessed_time']
 
 
 class MemoryFS(FS):
@@ -266,8 +697,13 @@ class MemoryFS(FS):
              'atomic.rename': True,
              'atomic.setcontents': False}
 
+    #  Data is already in memory, so large chunks only waste allocations
+    copy_chunk_size = 16 * 1024
+
     def _make_dir_entry(self, *args, **kwargs):
-        return self.dir_entry_factory(*args, **kwargs)
+        dir_entry = self.dir_entry_factory(*args, **kwargs)
+        dir_entry._owner = self._owner
+        return dir_entry
 
     def __init__(self, file_factory=None):
         super(MemoryFS, self).__init__(thread_synchronize=_thread_synchronize_default)
@@ -277,8 +713,31 @@ class MemoryFS(FS):
         if not callable(self.file_factory):
             raise ValueError("file_factory should be callable")
 
+        #  The entries this FS may change have this owner.  Until the FS is
+        #  cloned, no other FS has its entries, so they're all owned by None
+        self._owner = None
+        self._open_files = weakref.WeakKeyDictionary()
+        #  See _changes_tree
+        self._changes = 0
+        self._changing = 0
         self.root = self._make_dir_entry('dir', 'root')
 
+    def __getstate__(self):
+        state = super(MemoryFS, self).__getstate__()
+        del state['_owner']
+        del state['_open_files']
+        del state['_changes']
+        del state['_changing']
+        return state
+
+    def __setstate__(self, state):
+        super(MemoryFS, self).__setstate__(state)
+        #  Unpickled entries aren't shared, and have no owner
+        self._owner = None
+        self._open_files = weakref.WeakKeyDictionary()
+        self._changes = 0
+        self._changing = 0
+
     def __str__(self):
         return "<MemoryFS>"
 
@@ -288,7 +747,207 @@ class MemoryFS(FS):
     def __unicode__(self):
         return "<MemoryFS>"
 
-    @synchronize
+    @_changes_tree
+    def clone(self):
+        """Get a copy of this FS.
+
+        The copy is made in constant time, by sharing the entries of this FS.
+        Each FS copies an entry (but not the contents of a file) the first
+        time it changes it, so changes to one aren't seen by the other.
+        Files already open stay with this FS.
+
+        :rtype: MemoryFS
+
+        """
+        fs = self.__class__.__new__(self.__class__)
+        super(MemoryFS, fs).__setstate__(self.__getstate__())
+        fs._open_files = weakref.WeakKeyDictionary()
+        fs._changes = 0
+        fs._changing = 0
+        #  Neither FS owns the shared entries, so both copy them as needed
+        fs._owner = object()
+        self._owner = object()
+        return fs
+
+    def snapshot(self):
+        """Get a read-only view of the FS as it is now, which later changes
+        to this FS don't affect.  The view is a clone of the FS (see
+        `clone`), so taking a snapshot is just as quick.
+
+        Writes made by other threads, through files that are already open,
+        while the snapshot is taken may or may not be seen by it.
+
+        :rtype: `fs.wrapfs.readonlyfs.ReadOnlyFS`
+
+        """
+        return ReadOnlyFS(self.clone())
+
+    def save_image(self, path):
+        """Save the FS to an image, which `load_image` loads.
+
+        The image is written to a temporary file, which then replaces `path`,
+        so an FS loaded from an earlier image at the same path can still read
+        from it.  Extended attributes are saved too, apart from those whose
+        values can't be marshalled (e.g. instances of classes), which are
+        left out.  The image can only be loaded by the same version of Python.
+
+        :param path: the system path of the image
+
+        """
+        image_dir = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix=".image", dir=image_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_pack_image_header(0, 0))
+                offset = _IMAGE_HEADER.size
+                #  Each entry is numbered by its place in the index, and gives
+                #  the number of the directory it's in
+                entries = [(None, u'', self.root)]
+                index = []
+                with self._lock:
+                    for parent, name, dir_entry in entries:
+                        number = len(index)
+                        if dir_entry.isdir():
+                            data_offset = size = 0
+                            entries.extend((number, child_name, child)
+                                           for child_name, child in dir_entry.contents.iteritems())
+                        else:
+                            data = dir_entry.get_value()
+                            f.write(data)
+                            data_offset = offset
+                            size = len(data)
+                            offset += size
+                        index.append((parent,
+                                      name,
+                                      dir_entry.isfile(),
+                                      data_offset,
+                                      size,
+                                      _timestamp(dir_entry._created_time),
+                                      _timestamp(dir_entry._modified_time),
+                                      _timestamp(dir_entry._accessed_time),
+                                      _image_xattrs(dir_entry._xattrs)))
+                index = marshal.dumps(index, 2)
+                f.write(index)
+                f.seek(0)
+                f.write(_pack_image_header(offset, len(index)))
+            if os.path.exists(path) and os.name == "nt":
+                os.remove(path)
+            os.rename(temp_path, path)
+        except:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load_image(cls, path):
+        """Load a MemoryFS from an image saved by `save_image`.
+
+        Only the index of the image is read; the contents of each file are
+        read from the mapped image the first time they're used.
+
+        :param path: the system path of the image
+        :rtype: MemoryFS
+
+        :raises `fs.errors.ResourceInvalidError`: if the file isn't an image,
+            or was saved by another version of Python
+
+        """
+        with open(path, "rb") as f:
+            header = f.read(_IMAGE_HEADER.size)
+            if len(header) < _IMAGE_HEADER.size or header[:len(_IMAGE_MAGIC)] != _IMAGE_MAGIC:
+                raise ResourceInvalidError(path, msg="Not a MemoryFS image: %(path)s")
+            magic, version, py_major, py_minor, index_offset, index_size = _IMAGE_HEADER.unpack(header)
+            if (version, py_major, py_minor) != (_IMAGE_VERSION,) + tuple(sys.version_info[:2]):
+                raise ResourceInvalidError(path, msg="MemoryFS image from another version: %(path)s")
+            f.seek(index_offset)
+            index = marshal.loads(f.read(index_size))
+            image = None
+            if index_offset > _IMAGE_HEADER.size:
+                image = mmap.mmap(f.fileno(), index_offset, access=mmap.ACCESS_READ)
+
+        fs = cls()
+        entries = []
+        for parent, name, is_file, data_offset, size, created_time, modified_time, accessed_time, xattrs in index:
+            if parent is None:
+                dir_entry = fs.root
+            else:
+                dir_entry = object.__new__(_ImageEntry if is_file else DirEntry)
+                dir_entry.type = "file" if is_file else "dir"
+                dir_entry.name = name
+                dir_entry.contents = None if is_file else {}
+                dir_entry.size = size
+                if size:
+                    dir_entry.data = None
+                    dir_entry._image = image
+                    dir_entry._image_offset = data_offset
+                elif is_file:
+                    dir_entry.data = b('')
+                    dir_entry._image = None
+                    dir_entry._image_offset = 0
+                else:
+                    dir_entry.data = None
+                dir_entry._lock = None
+                dir_entry._owner = fs._owner
+                dir_entry._shared_data = False
+                entries[parent].contents[name] = dir_entry
+            dir_entry._created_time = created_time
+            dir_entry._modified_time = modified_time
+            dir_entry._accessed_time = accessed_time
+            dir_entry._xattrs = xattrs
+            entries.append(dir_entry)
+        return fs
+
+    def _own_entry(self, parent_dir_entry, name):
+        """Get an entry in a directory owned by this FS, first copying the
+        entry if it isn't owned by this FS too."""
+        dir_entry = parent_dir_entry.contents.get(name, None)
+        if dir_entry is not None and dir_entry._owner is not self._owner:
+            shared_entry = dir_entry
+            dir_entry = shared_entry.copy(self._owner)
+            parent_dir_entry.contents[name] = dir_entry
+            if dir_entry.isfile():
+                self._move_open_files(shared_entry, dir_entry)
+        return dir_entry
+
+    def _move_open_files(self, old_entry, new_entry):
+        for open_file in self._open_files.keys():
+            if open_file.dir_entry is old_entry:
+                open_file.dir_entry = new_entry
+
+    @_changes_tree
+    def _get_writeable_dir_entry(self, dirpath):
+        """Get an entry to change, like `_get_dir_entry`.  The entry, and the
+        directories it is in, are copied first if they're shared with a
+        clone."""
+        current_dir = self.root
+        if current_dir._owner is not self._owner:
+            current_dir = self.root = current_dir.copy(self._owner)
+        for path_component in iteratepath(normpath(dirpath)):
+            if current_dir.contents is None:
+                return None
+            current_dir = self._own_entry(current_dir, path_component)
+            if current_dir is None:
+                return None
+        return current_dir
+
+    @_changes_tree
+    def _own_file(self, mem_file):
+        """Give an open file an entry owned by this FS."""
+        shared_entry = mem_file.dir_entry
+        if shared_entry._owner is self._owner:
+            return
+        path = normpath(mem_file.path)
+        if self._get_dir_entry(path) is shared_entry:
+            dirpath, filename = pathsplit(path)
+            dir_entry = self._own_entry(self._get_writeable_dir_entry(dirpath), filename)
+        else:
+            #  The file has been removed, so just keep it apart from clones
+            dir_entry = shared_entry.copy(self._owner)
+            self._move_open_files(shared_entry, dir_entry)
+        mem_file.dir_entry = dir_entry
+
     def _get_dir_entry(self, dirpath):
         dirpath = normpath(dirpath)
         current_dir = self.root
@@ -301,14 +960,20 @@ class MemoryFS(FS):
             current_dir = dir_entry
         return current_dir
 
-    @synchronize
     def _dir_entry(self, path):
         dir_entry = self._get_dir_entry(path)
         if dir_entry is None:
             raise ResourceNotFoundError(path)
         return dir_entry
 
-    @synchronize
+    @_changes_tree
+    def _writeable_dir_entry(self, path):
+        dir_entry = self._get_writeable_dir_entry(path)
+        if dir_entry is None:
+            raise ResourceNotFoundError(path)
+        return dir_entry
+
+    @_reads_tree
     def desc(self, path):
         if self.isdir(path):
             return "Memory dir"
@@ -317,7 +982,7 @@ class MemoryFS(FS):
         else:
             return "No description available"
 
-    @synchronize
+    @_reads_tree
     def isdir(self, path):
         path = normpath(path)
         if path in ('', '/'):
@@ -327,7 +992,7 @@ class MemoryFS(FS):
             return False
         return dir_item.isdir()
 
-    @synchronize
+    @_reads_tree
     def isfile(self, path):
         path = normpath(path)
         if path in ('', '/'):
@@ -337,14 +1002,14 @@ class MemoryFS(FS):
             return False
         return dir_item.isfile()
 
-    @synchronize
+    @_reads_tree
     def exists(self, path):
         path = normpath(path)
         if path in ('', '/'):
             return True
         return self._get_dir_entry(path) is not None
 
-    @synchronize
+    @_changes_tree
     def makedir(self, dirname, recursive=False, allow_recreate=False):
         if not dirname and not allow_recreate:
             raise PathError(dirname)
@@ -374,9 +1039,9 @@ class MemoryFS(FS):
                     raise ResourceInvalidError(dirname, msg="Can not create a directory, because path references a file: %(path)s")
                 current_dir = dir_item
 
-            current_dir = self.root
+            current_dir = self._get_writeable_dir_entry('/')
             for path_component in iteratepath(dirpath):
-                dir_item = current_dir.contents.get(path_component, None)
+                dir_item = self._own_entry(current_dir, path_component)
                 if dir_item is None:
                     new_dir = self._make_dir_entry("dir", path_component)
                     current_dir.contents[path_component] = new_dir
@@ -387,7 +1052,7 @@ class MemoryFS(FS):
             parent_dir = current_dir
 
         else:
-            parent_dir = self._get_dir_entry(dirpath)
+            parent_dir = self._get_writeable_dir_entry(dirpath)
             if parent_dir is None:
                 raise ParentDirectoryMissingError(dirname, msg="Could not make dir, as parent dir does not exist: %(path)s")
 
@@ -409,12 +1074,27 @@ class MemoryFS(FS):
     #        f.close()
 
 
-    @synchronize
     @iotools.filelike_to_stream
     def open(self, path, mode='r', buffering=-1, encoding=None, errors=None, newline=None, line_buffering=False, **kwargs):
         path = normpath(path)
+        if 'r' not in mode or '+' in mode:
+            return self._open_writeable(path, mode)
+        return self._open_readable(path, mode)
+
+    @_reads_tree
+    def _open_readable(self, path, mode):
+        return self._open(path, mode, False)
+
+    @_changes_tree
+    def _open_writeable(self, path, mode):
+        return self._open(path, mode, True)
+
+    def _open(self, path, mode, writeable):
         filepath, filename = pathsplit(path)
-        parent_dir_entry = self._get_dir_entry(filepath)
+        if writeable:
+            parent_dir_entry = self._get_writeable_dir_entry(filepath)
+        else:
+            parent_dir_entry = self._get_dir_entry(filepath)
 
         if parent_dir_entry is None or not parent_dir_entry.isdir():
             raise ResourceNotFoundError(path)
@@ -423,33 +1103,42 @@ class MemoryFS(FS):
             if filename not in parent_dir_entry.contents:
                 raise ResourceNotFoundError(path)
 
-            file_dir_entry = parent_dir_entry.contents[filename]
+            if writeable:
+                file_dir_entry = self._own_entry(parent_dir_entry, filename)
+            else:
+                file_dir_entry = parent_dir_entry.contents[filename]
             if file_dir_entry.isdir():
                 raise ResourceInvalidError(path)
 
-            file_dir_entry.accessed_time = datetime.datetime.now()
+            #  Reading a file shared with a clone doesn't copy its entry, so
+            #  the access time is left as it was
+            if file_dir_entry._owner is self._owner:
+                file_dir_entry.accessed_time = time.time()
 
-            mem_file = self.file_factory(path, self, file_dir_entry.mem_file, mode, file_dir_entry.lock)
-            file_dir_entry.open_files.append(mem_file)
-            return mem_file
+            return self._open_file(path, file_dir_entry, mode)
 
         elif 'w' in mode:
             if filename not in parent_dir_entry.contents:
                 file_dir_entry = self._make_dir_entry("file", filename)
                 parent_dir_entry.contents[filename] = file_dir_entry
             else:
-                file_dir_entry = parent_dir_entry.contents[filename]
+                file_dir_entry = self._own_entry(parent_dir_entry, filename)
 
-            file_dir_entry.accessed_time = datetime.datetime.now()
+            file_dir_entry.accessed_time = time.time()
 
-            mem_file = self.file_factory(path, self, file_dir_entry.mem_file, mode, file_dir_entry.lock)
-            file_dir_entry.open_files.append(mem_file)
-            return mem_file
+            return self._open_file(path, file_dir_entry, mode)
 
         if parent_dir_entry is None:
             raise ResourceNotFoundError(path)
 
-    @synchronize
+    def _open_file(self, path, file_dir_entry, mode):
+        mem_file = self.file_factory(path, self, file_dir_entry, mode, file_dir_entry.lock)
+        #  Kept so that the file can be moved to the copy of its entry, if
+        #  the entry is copied
+        self._open_files[mem_file] = True
+        return mem_file
+
+    @_changes_tree
     def remove(self, path):
         dir_entry = self._get_dir_entry(path)
 
@@ -460,10 +1149,10 @@ class MemoryFS(FS):
             raise ResourceInvalidError(path, msg="That's a directory, not a file: %(path)s")
 
         pathname, dirname = pathsplit(path)
-        parent_dir = self._get_dir_entry(pathname)
+        parent_dir = self._get_writeable_dir_entry(pathname)
         del parent_dir.contents[dirname]
 
-    @synchronize
+    @_changes_tree
     def removedir(self, path, recursive=False, force=False):
         path = normpath(path)
         if path in ('', '/'):
@@ -482,7 +1171,7 @@ class MemoryFS(FS):
             rpathname = path
             while rpathname:
                 rpathname, dirname = pathsplit(rpathname)
-                parent_dir = self._get_dir_entry(rpathname)
+                parent_dir = self._get_writeable_dir_entry(rpathname)
                 if not dirname:
                     raise RemoveRootError(path)
                 del parent_dir.contents[dirname]
@@ -491,12 +1180,12 @@ class MemoryFS(FS):
                     break
         else:
             pathname, dirname = pathsplit(path)
-            parent_dir = self._get_dir_entry(pathname)
+            parent_dir = self._get_writeable_dir_entry(pathname)
             if not dirname:
                 raise RemoveRootError(path)
             del parent_dir.contents[dirname]
 
-    @synchronize
+    @_changes_tree
     def rename(self, src, dst):
         src = normpath(src)
         dst = normpath(dst)
@@ -504,55 +1193,42 @@ class MemoryFS(FS):
         src_entry = self._get_dir_entry(src)
         if src_entry is None:
             raise ResourceNotFoundError(src)
-        open_files = src_entry.open_files[:]
-        for f in open_files:
-            f.flush()
-            f.path = dst
-
         dst_dir,dst_name = pathsplit(dst)
         dst_entry = self._get_dir_entry(dst)
         if dst_entry is not None:
             raise DestinationExistsError(dst)
 
-        src_dir_entry = self._get_dir_entry(src_dir)
-        src_xattrs = src_dir_entry.xattrs.copy()
-        dst_dir_entry = self._get_dir_entry(dst_dir)
-        if dst_dir_entry is None:
+        if self._get_dir_entry(dst_dir) is None:
             raise ParentDirectoryMissingError(dst)
-        dst_dir_entry.contents[dst_name] = src_dir_entry.contents[src_name]
-        dst_dir_entry.contents[dst_name].name = dst_name
-        dst_dir_entry.xattrs.update(src_xattrs)
+        src_dir_entry = self._get_writeable_dir_entry(src_dir)
+        src_xattrs = src_dir_entry._xattrs
+        src_entry = self._own_entry(src_dir_entry, src_name)
+        dst_dir_entry = self._get_writeable_dir_entry(dst_dir)
+        dst_dir_entry.contents[dst_name] = src_entry
+        src_entry.name = dst_name
+        for open_file in self._open_files.keys():
+            if open_file.dir_entry is src_entry:
+                open_file.path = dst
+        if src_xattrs:
+            dst_dir_entry.xattrs.update(src_xattrs)
         del src_dir_entry.contents[src_name]
 
-    @synchronize
+    @_changes_tree
     def settimes(self, path, accessed_time=None, modified_time=None):
-        now = datetime.datetime.now()
+        now = time.time()
         if accessed_time is None:
             accessed_time = now
         if modified_time is None:
             modified_time = now
 
-        dir_entry = self._get_dir_entry(path)
+        dir_entry = self._get_writeable_dir_entry(path)
         if dir_entry is not None:
             dir_entry.accessed_time = accessed_time
             dir_entry.modified_time = modified_time
             return True
         return False
 
-    @synchronize
-    def _on_close_memory_file(self, open_file, path):
-        dir_entry = self._get_dir_entry(path)
-        if dir_entry is not None:
-            dir_entry.open_files.remove(open_file)
-
-
-    @synchronize
-    def _on_modify_memory_file(self, path):
-        dir_entry = self._get_dir_entry(path)
-        if dir_entry is not None:
-            dir_entry.modified_time = datetime.datetime.now()
-
-    @synchronize
+    @_reads_tree
     def listdir(self, path="/", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
         dir_entry = self._get_dir_entry(path)
         if dir_entry is None:
@@ -565,130 +1241,157 @@ class MemoryFS(FS):
                 paths[i] = unicode(p)
         return self._listdir_helper(path, paths, wildcard, full, absolute, dirs_only, files_only)
 
-    @synchronize
+    @_reads_tree
     def getinfo(self, path):
         dir_entry = self._get_dir_entry(path)
 
         if dir_entry is None:
             raise ResourceNotFoundError(path)
 
-        info = {}
-        info['created_time'] = dir_entry.created_time
-        info['modified_time'] = dir_entry.modified_time
-        info['accessed_time'] = dir_entry.accessed_time
+        return self._entry_info(dir_entry)
 
-        if dir_entry.isdir():
-            info['st_mode'] = 0755 | stat.S_IFDIR
-        else:
-            info['size'] = len(dir_entry.data or b(''))
-            info['st_mode'] = 0666 | stat.S_IFREG
+    @_reads_tree
+    def getinfo_many(self, paths):
+        infos = []
+        for path in paths:
+            dir_entry = self._get_dir_entry(path)
+            if dir_entry is None:
+                infos.append(None)
+            else:
+                infos.append(self._entry_info(dir_entry))
+        return infos
 
-        return info
+    @_reads_tree
+    def exists_many(self, paths):
+        return [self.exists(path) for path in paths]
 
-    @synchronize
-    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=1024*64):
-        src_dir_entry = self._get_dir_entry(src)
-        if src_dir_entry is None:
-            raise ResourceNotFoundError(src)
-        src_xattrs = src_dir_entry.xattrs.copy()
-        super(MemoryFS, self).copydir(src, dst, overwrite, ignore_errors=ignore_errors, chunk_size=chunk_size)
-        dst_dir_entry = self._get_dir_entry(dst)
-        if dst_dir_entry is not None:
-            dst_dir_entry.xattrs.update(src_xattrs)
+    @_reads_tree
+    def isdir_many(self, paths):
+        return [self.isdir(path) for path in paths]
 
-    @synchronize
-    def movedir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=1024*64):
-        src_dir_entry = self._get_dir_entry(src)
-        if src_dir_entry is None:
-            raise ResourceNotFoundError(src)
-        src_xattrs = src_dir_entry.xattrs.copy()
-        super(MemoryFS, self).movedir(src, dst, overwrite, ignore_errors=ignore_errors, chunk_size=chunk_size)
-        dst_dir_entry = self._get_dir_entry(dst)
-        if dst_dir_entry is not None:
-            dst_dir_entry.xattrs.update(src_xattrs)
-
-    @synchronize
-    def copy(self, src, dst, overwrite=False, chunk_size=1024*64):
+    def _entry_info(self, dir_entry):
+        if dir_entry.isdir():
+            return _EntryInfo((0755 | stat.S_IFDIR,
+                               None,
+                               dir_entry._created_time,
+                               dir_entry._modified_time,
+                               dir_entry._accessed_time))
+        return _EntryInfo((0666 | stat.S_IFREG,
+                           dir_entry.size,
+                           dir_entry._created_time,
+                           dir_entry._modified_time,
+                           dir_entry._accessed_time))
+
+    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=None, workers=1):
+        with self._lock:
+            src_dir_entry = self._get_dir_entry(src)
+            if src_dir_entry is None:
+                raise ResourceNotFoundError(src)
+            src_xattrs = dict(src_dir_entry._xattrs or {})
+        super(MemoryFS, self).copydir(src, dst, overwrite, ignore_errors=ignore_errors, chunk_size=chunk_size, workers=workers)
+        self._update_xattrs(dst, src_xattrs)
+
+    def movedir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=None, workers=1):
+        with self._lock:
+            src_dir_entry = self._get_dir_entry(src)
+            if src_dir_entry is None:
+                raise ResourceNotFoundError(src)
+            src_xattrs = dict(src_dir_entry._xattrs or {})
+        super(MemoryFS, self).movedir(src, dst, overwrite, ignore_errors=ignore_errors, chunk_size=chunk_size, workers=workers)
+        self._update_xattrs(dst, src_xattrs)
+
+    @_changes_tree
+    def _update_xattrs(self, path, xattrs):
+        dir_entry = self._get_writeable_dir_entry(path)
+        if dir_entry is not None and xattrs:
+            dir_entry.xattrs.update(xattrs)
+
+    @_changes_tree
+    def copy(self, src, dst, overwrite=False, chunk_size=None):
         src_dir_entry = self._get_dir_entry(src)
         if src_dir_entry is None:
             raise ResourceNotFoundError(src)
-        src_xattrs = src_dir_entry.xattrs.copy()
+        src_xattrs = dict(src_dir_entry._xattrs or {})
         super(MemoryFS, self).copy(src, dst, overwrite, chunk_size)
-        dst_dir_entry = self._get_dir_entry(dst)
-        if dst_dir_entry is not None:
+        dst_dir_entry = self._get_writeable_dir_entry(dst)
+        if dst_dir_entry is not None and src_xattrs:
             dst_dir_entry.xattrs.update(src_xattrs)
 
-    @synchronize
-    def move(self, src, dst, overwrite=False, chunk_size=1024*64):
+    @_changes_tree
+    def move(self, src, dst, overwrite=False, chunk_size=None):
         src_dir_entry = self._get_dir_entry(src)
         if src_dir_entry is None:
             raise ResourceNotFoundError(src)
-        src_xattrs = src_dir_entry.xattrs.copy()
+        src_xattrs = dict(src_dir_entry._xattrs or {})
         super(MemoryFS, self).move(src, dst, overwrite, chunk_size)
-        dst_dir_entry = self._get_dir_entry(dst)
-        if dst_dir_entry is not None:
+        dst_dir_entry = self._get_writeable_dir_entry(dst)
+        if dst_dir_entry is not None and src_xattrs:
             dst_dir_entry.xattrs.update(src_xattrs)
 
-    @synchronize
+    @_reads_tree
     def getcontents(self, path, mode="rb", encoding=None, errors=None, newline=None):
         dir_entry = self._get_dir_entry(path)
         if dir_entry is None:
             raise ResourceNotFoundError(path)
         if not dir_entry.isfile():
             raise ResourceInvalidError(path, msg="not a file: %(path)s")
-        data = dir_entry.data or b('')
+        data = dir_entry.get_value()
         if 'b' not in mode:
             return iotools.decode_binary(data, encoding=encoding, errors=errors, newline=newline)
         return data
 
-    @synchronize
-    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=1024*64):
+    @_changes_tree
+    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=None):
         if isinstance(data, six.binary_type):
-            if not self.exists(path):
-                self.open(path, 'wb').close()
-            dir_entry = self._get_dir_entry(path)
-            if not dir_entry.isfile():
-                raise ResourceInvalidError('Not a directory %(path)s', path)
-            new_mem_file = StringIO()
-            new_mem_file.write(data)
-            dir_entry.mem_file = new_mem_file
+            path = normpath(path)
+            dirpath, filename = pathsplit(path)
+            parent_dir_entry = self._get_writeable_dir_entry(dirpath)
+            if parent_dir_entry is None or not parent_dir_entry.isdir():
+                raise ResourceNotFoundError(path)
+            dir_entry = self._own_entry(parent_dir_entry, filename)
+            if dir_entry is None:
+                dir_entry = self._make_dir_entry("file", filename)
+                parent_dir_entry.contents[filename] = dir_entry
+            elif not dir_entry.isfile():
+                raise ResourceInvalidError(path, msg="That's a directory, not a file: %(path)s")
+            #  The string is immutable, so it can be kept without a copy
+            lock = dir_entry._lock
+            if lock is None:
+                dir_entry.set_value(data)
+            else:
+                with lock:
+                    dir_entry.set_value(data)
             return len(data)
 
         return super(MemoryFS, self).setcontents(path, data=data, encoding=encoding, errors=errors, chunk_size=chunk_size)
 
-        # if isinstance(data, six.text_type):
-        #     return super(MemoryFS, self).setcontents(path, data, encoding=encoding, errors=errors, chunk_size=chunk_size)
-        # if not self.exists(path):
-        #     self.open(path, 'wb').close()
-
-        # dir_entry = self._get_dir_entry(path)
-        # if not dir_entry.isfile():
-        #     raise ResourceInvalidError('Not a directory %(path)s', path)
-        # new_mem_file = StringIO()
-        # new_mem_file.write(data)
-        # dir_entry.mem_file = new_mem_file
-
-    @synchronize
+    @_changes_tree
     def setxattr(self, path, key, value):
-        dir_entry = self._dir_entry(path)
+        dir_entry = self._writeable_dir_entry(path)
         key = unicode(key)
         dir_entry.xattrs[key] = value
 
-    @synchronize
+    @_reads_tree
     def getxattr(self, path, key, default=None):
         key = unicode(key)
         dir_entry = self._dir_entry(path)
-        return dir_entry.xattrs.get(key, default)
+        if not dir_entry._xattrs:
+            return default
+        return dir_entry._xattrs.get(key, default)
 
-    @synchronize
+    @_changes_tree
     def delxattr(self, path, key):
-        dir_entry = self._dir_entry(path)
+        dir_entry = self._writeable_dir_entry(path)
         try:
             del dir_entry.xattrs[key]
         except KeyError:
             pass
+        if not dir_entry._xattrs:
+            dir_entry._xattrs = None
 
-    @synchronize
+    @_reads_tree
     def listxattrs(self, path):
         dir_entry = self._dir_entry(path)
-        return dir_entry.xattrs.keys()
+        if not dir_entry._xattrs:
+            return []
+        return dir_entry._xattrs.keys()
@@ -312,7 +312,7 @@ class MountFS(FS):
         return fs.open(delegate_path, mode, **kwargs)
 
     @synchronize
-    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=64*1024):
+    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=None):
         obj = self.mount_tree.get(path, None)
         if type(obj) is MountFS.FileMount:
             return super(MountFS, self).setcontents(path,
@@ -380,10 +380,12 @@ class MountFS(FS):
         else:
             super(MountFS,self).move(src,dst,**kwds)
 
-    @synchronize
     def movedir(self,src,dst,**kwds):
-        fs1, _mount_path1, delegate_path1 = self._delegate(src)
-        fs2, _mount_path2, delegate_path2 = self._delegate(dst)
+        #  Not synchronized throughout, so that any worker threads can use
+        #  the lock while the copy is in progress.
+        with self._lock:
+            fs1, _mount_path1, delegate_path1 = self._delegate(src)
+            fs2, _mount_path2, delegate_path2 = self._delegate(dst)
         if fs1 is fs2 and fs1 is not self:
             fs1.movedir(delegate_path1,delegate_path2,**kwds)
         else:
@@ -398,10 +400,18 @@ class MountFS(FS):
         else:
             super(MountFS,self).copy(src,dst,**kwds)
 
-    @synchronize
+    def _gethash(self, path, algorithm):
+        fs, _mount_path, delegate_path = self._delegate(path)
+        if fs is self or fs is None:
+            return super(MountFS,self)._gethash(path, algorithm)
+        return fs.gethash(delegate_path, algorithm)
+
     def copydir(self,src,dst,**kwds):
-        fs1, _mount_path1, delegate_path1 = self._delegate(src)
-        fs2, _mount_path2, delegate_path2 = self._delegate(dst)
+        #  Not synchronized throughout, so that any worker threads can use
+        #  the lock while the copy is in progress.
+        with self._lock:
+            fs1, _mount_path1, delegate_path1 = self._delegate(src)
+            fs2, _mount_path2, delegate_path2 = self._delegate(dst)
         if fs1 is fs2 and fs1 is not self:
             fs1.copydir(delegate_path1,delegate_path2,**kwds)
         else:
@@ -10,6 +10,11 @@ For example, to print all the files and directories in the OS root::
     >>> home_fs = OSFS('/')
     >>> print home_fs.listdir()
 
+Looking up the same paths over and over can be sped up by wrapping an OSFS in
+a `fs.wrapfs.statcachefs.StatCacheFS`, which caches info and directory
+listings, and drops them as inotify reports changes, if pyinotify is
+installed.
+
 """
 
 
@@ -26,11 +31,20 @@ import shutil
 from fs.base import *
 from fs.path import *
 from fs.errors import *
+from fs.info import StatInfo
 from fs import _thread_synchronize_default
 
 from fs.osfs.xattrs import OSFSXAttrMixin
 from fs.osfs.watch import OSFSWatchMixin
 
+try:
+    from os import scandir as _scandir
+except ImportError:
+    try:
+        from scandir import scandir as _scandir
+    except ImportError:
+        _scandir = None
+
 
 @convert_os_errors
 def _os_stat(path):
@@ -38,6 +52,11 @@ def _os_stat(path):
     return os.stat(path)
 
 
+def _stat_to_info(stats):
+    """Get the info for the result of a stat call."""
+    return StatInfo(stats)
+
+
 @convert_os_errors
 def _os_mkdir(name, mode=0777):
     """Replacement for os.mkdir that raises FSError subclasses."""
@@ -229,7 +248,7 @@ class OSFS(OSFSXAttrMixin, OSFSWatchMixin, FS):
             raise
 
     @convert_os_errors
-    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=64 * 1024):
+    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=None):
         return super(OSFS, self).setcontents(path, data, encoding=encoding, errors=errors, chunk_size=chunk_size)
 
     @convert_os_errors
@@ -246,12 +265,83 @@ class OSFS(OSFSXAttrMixin, OSFSWatchMixin, FS):
 
     @convert_os_errors
     def listdir(self, path="./", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        if (dirs_only or files_only) and _scandir is not None:
+            entries = self._scan_entries(path, dirs_only, files_only)
+            return self._listdir_helper(path, list(entries), wildcard, full, absolute)
         _decode_path = self._decode_path
         sys_path = self.getsyspath(path)
         listing = os.listdir(sys_path)
         paths = [_decode_path(p) for p in listing]
         return self._listdir_helper(path, paths, wildcard, full, absolute, dirs_only, files_only)
 
+    def _scan_entries(self, path, dirs_only=False, files_only=False):
+        """Read a directory with scandir, returning a dict that maps names on
+        to DirEntry objects.
+
+        The dirs_only and files_only filters are applied using the file type
+        reported by the directory read, so no stat is required on platforms
+        that supply it.
+
+        """
+        if dirs_only and files_only:
+            raise ValueError("dirs_only and files_only can not both be True")
+        _decode_path = self._decode_path
+        sys_path = self.getsyspath(path)
+        entries = {}
+        for entry in _scandir(sys_path):
+            if dirs_only and not entry.is_dir():
+                continue
+            if files_only and not entry.is_file():
+                continue
+            entries[_decode_path(entry.name)] = entry
+        return entries
+
+    @convert_os_errors
+    def _listdir_split(self, path, info=False):
+        if _scandir is None:
+            return super(OSFS, self)._listdir_split(path, info=info)
+        dirs = []
+        files = []
+        for name, entry in self._scan_entries(path).iteritems():
+            name_info = None
+            if info:
+                name_info = self._entry_info(entry)
+            if entry.is_dir():
+                dirs.append((name, name_info))
+            else:
+                files.append((name, name_info))
+        return dirs, files
+
+    def listdirinfo(self, path="./", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        if _scandir is None:
+            return super(OSFS, self).listdirinfo(path, wildcard, full, absolute, dirs_only, files_only)
+        return list(self.ilistdirinfo(path, wildcard, full, absolute, dirs_only, files_only))
+
+    @convert_os_errors
+    def ilistdirinfo(self, path="./", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        if _scandir is None:
+            return super(OSFS, self).ilistdirinfo(path, wildcard, full, absolute, dirs_only, files_only)
+        entries = self._scan_entries(path, dirs_only, files_only)
+        paths = self._listdir_helper(path, list(entries), wildcard, full, absolute)
+
+        def iter_info():
+            #  The stat is deferred until each entry is consumed, and reuses
+            #  any stat information the directory read already supplied.
+            for p in paths:
+                yield (p, self._entry_info(entries[basename(p)]))
+        return iter_info()
+
+    @convert_os_errors
+    def _entry_info(self, entry):
+        """Get the info for an entry from `_scan_entries`.  A symlink whose
+        target can't be read gets the info of the link itself."""
+        try:
+            return _stat_to_info(entry.stat())
+        except OSError:
+            if not entry.is_symlink():
+                raise
+            return _stat_to_info(entry.stat(follow_symlinks=False))
+
     @convert_os_errors
     def makedir(self, path, recursive=False, allow_recreate=False):
         sys_path = self.getsyspath(path)
@@ -335,21 +425,7 @@ class OSFS(OSFSXAttrMixin, OSFSWatchMixin, FS):
 
     @convert_os_errors
     def getinfo(self, path):
-        stats = self._stat(path)
-        info = dict((k, getattr(stats, k)) for k in dir(stats) if k.startswith('st_'))
-        info['size'] = info['st_size']
-        #  TODO: this doesn't actually mean 'creation time' on unix
-        fromtimestamp = datetime.datetime.fromtimestamp
-        ct = info.get('st_ctime', None)
-        if ct is not None:
-            info['created_time'] = fromtimestamp(ct)
-        at = info.get('st_atime', None)
-        if at is not None:
-            info['accessed_time'] = fromtimestamp(at)
-        mt = info.get('st_mtime', None)
-        if mt is not None:
-            info['modified_time'] = fromtimestamp(mt)
-        return info
+        return _stat_to_info(self._stat(path))
 
     @convert_os_errors
     def getinfokeys(self, path, *keys):
@@ -35,6 +35,7 @@ from fs.errors import *
 from fs.local_functools import wraps
 from fs.filelike import StringIO, SpooledTemporaryFile, FileWrapper
 from fs import SEEK_SET, SEEK_CUR, SEEK_END
+from fs import trace
 
 
 _SENTINAL = object()
@@ -137,27 +138,29 @@ class RemoteFileBuffer(FileWrapper):
         """Read data from the remote file into the local buffer."""
         chunklen = 1024 * 256
         bytes_read = 0
-        while True:
-            toread = chunklen
-            if length is not None and length - bytes_read < chunklen:
-                toread = length - bytes_read
-            if not toread:
-                break
-
-            data = self._rfile.read(toread)
-            datalen = len(data)
-            if not datalen:
-                self._eof = True
-                break
-
-            bytes_read += datalen
-            self.wrapped_file.write(data)
-
-            if datalen < toread:
-                # We reached EOF,
-                # no more reads needed
-                self._eof = True
-                break
+        with trace.span(self.fs, "download", self.path) as span:
+            while True:
+                toread = chunklen
+                if length is not None and length - bytes_read < chunklen:
+                    toread = length - bytes_read
+                if not toread:
+                    break
+
+                data = self._rfile.read(toread)
+                datalen = len(data)
+                if not datalen:
+                    self._eof = True
+                    break
+
+                bytes_read += datalen
+                self.wrapped_file.write(data)
+
+                if datalen < toread:
+                    # We reached EOF,
+                    # no more reads needed
+                    self._eof = True
+                    break
+            span.add_bytes(bytes_read)
 
         if self._eof and self._rfile is not None:
             self._rfile.close()
@@ -259,10 +262,12 @@ class RemoteFileBuffer(FileWrapper):
             self._fillbuffer()
 
         if "w" in self.mode or "a" in self.mode or "+" in self.mode:
-            pos = self.wrapped_file.tell()
-            self.wrapped_file.seek(0)
-            self.fs.setcontents(self.path, self.wrapped_file)
-            self.wrapped_file.seek(pos)
+            with trace.span(self.fs, "upload", self.path) as span:
+                pos = self.wrapped_file.tell()
+                self.wrapped_file.seek(0)
+                self.fs.setcontents(self.path, self.wrapped_file)
+                span.add_bytes(self.wrapped_file.tell())
+                self.wrapped_file.seek(pos)
 
     def close(self):
         with self._lock:
@@ -317,7 +322,7 @@ class ConnectionManagerFS(LazyFS):
         self._poll_sleeper = threading.Event()
         self.connected = connected
 
-    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=64*1024):
+    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=None):
         return self.wrapped_fs.setcontents(path, data, encoding=encoding, errors=errors, chunk_size=chunk_size)
 
     def __getstate__(self):
@@ -672,7 +677,7 @@ class CacheFSMixin(FS):
     def getsize(self,path):
         return self.getinfo(path)["size"]
 
-    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=64*1024):
+    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=None):
         supsc = super(CacheFSMixin, self).setcontents
         res = supsc(path, data, encoding=None, errors=None, chunk_size=chunk_size)
         with self.__cache_lock:
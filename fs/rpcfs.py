@@ -11,6 +11,7 @@ class from the :mod:`fs.expose.xmlrpc` module.
 import xmlrpclib
 import socket
 import base64
+import copy
 
 from fs.base import *
 from fs.errors import *
@@ -105,6 +106,9 @@ class RPCFS(FS):
              'network' : True,
               }
 
+    #  Maximum number of calls to send in each multicall request
+    multicall_size = 500
+
     def __init__(self, uri, transport=None):
         """Constructor for RPCFS objects.
 
@@ -118,6 +122,7 @@ class RPCFS(FS):
         super(RPCFS, self).__init__(thread_synchronize=True)
         self.uri = uri
         self._transport = transport
+        self._multicall_supported = True
         self.proxy = self._make_proxy()
         self.isdir('/')
 
@@ -151,6 +156,11 @@ class RPCFS(FS):
         super(RPCFS, self).__setstate__(state)
         self.proxy = self._make_proxy()
 
+    def _worker_clone(self):
+        #  The XML-RPC proxy is shared by every call, so give each worker a
+        #  copy with its own proxy.
+        return copy.copy(self)
+
     def encode_path(self, path):
         """Encode a filesystem path for sending over the wire.
 
@@ -235,16 +245,68 @@ class RPCFS(FS):
         f.truncate = newtruncate
         return f
 
+    @synchronize
+    def _multicall(self, method, paths):
+        """Call a remote method for each of the given paths.
+
+        The calls are sent in batches using XML-RPC multicall.  Returns a
+        list with the result of each call, or the exception it raised; or
+        None if the server doesn't support multicall.
+        """
+        if not self._multicall_supported:
+            return None
+        results = []
+        for start in xrange(0, len(paths), self.multicall_size):
+            multicall = xmlrpclib.MultiCall(self.proxy._obj)
+            for path in paths[start:start + self.multicall_size]:
+                getattr(multicall, method)(self.encode_path(path))
+            try:
+                batch = multicall()
+            except xmlrpclib.Fault:
+                self._multicall_supported = False
+                return None
+            except socket.error, e:
+                raise RemoteConnectionError(str(e), details=e)
+            get_result = re_raise_faults(batch.__getitem__)
+            for i in xrange(len(batch.results)):
+                try:
+                    results.append(get_result(i))
+                except Exception, e:
+                    results.append(e)
+        return results
+
     @synchronize
     def exists(self, path):
         path = self.encode_path(path)
         return self.proxy.exists(path)
 
+    @synchronize
+    def exists_many(self, paths):
+        paths = list(paths)
+        results = self._multicall("exists", paths)
+        if results is None:
+            return super(RPCFS, self).exists_many(paths)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
     @synchronize
     def isdir(self, path):
         path = self.encode_path(path)
         return self.proxy.isdir(path)
 
+    @synchronize
+    def isdir_many(self, paths):
+        paths = list(paths)
+        results = self._multicall("isdir", paths)
+        if results is None:
+            return super(RPCFS, self).isdir_many(paths)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
     @synchronize
     def isfile(self, path):
         path = self.encode_path(path)
@@ -308,6 +370,22 @@ class RPCFS(FS):
         info = self.proxy.getinfo(path)
         return info
 
+    @synchronize
+    def getinfo_many(self, paths):
+        paths = list(paths)
+        results = self._multicall("getinfo", paths)
+        if results is None:
+            return super(RPCFS, self).getinfo_many(paths)
+        infos = []
+        for result in results:
+            if isinstance(result, ResourceNotFoundError):
+                infos.append(None)
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                infos.append(result)
+        return infos
+
     @synchronize
     def desc(self, path):
         path = self.encode_path(path)
@@ -349,13 +427,14 @@ class RPCFS(FS):
         return self.proxy.move(src, dst, overwrite, chunk_size)
 
     @synchronize
-    def movedir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384):
+    def movedir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384, workers=1):
+        #  The server does the move itself, so workers makes no difference
         src = self.encode_path(src)
         dst = self.encode_path(dst)
         return self.proxy.movedir(src, dst, overwrite, ignore_errors, chunk_size)
 
     @synchronize
-    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384):
+    def copydir(self, src, dst, overwrite=False, ignore_errors=False, chunk_size=16384, workers=1):
         src = self.encode_path(src)
         dst = self.encode_path(dst)
         return self.proxy.copydir(src, dst, overwrite, ignore_errors, chunk_size)
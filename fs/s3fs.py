@@ -27,6 +27,7 @@ from fs.errors import *
 from fs.remote import *
 from fs.filelike import LimitBytesFile
 from fs import iotools
+from fs import trace
 
 import six
 
@@ -72,6 +73,9 @@ class S3FS(FS):
              'atomic.setcontents': True
              }
 
+    #  Each chunk may cost a request, so copy in large pieces
+    copy_chunk_size = 8 * 1024 * 1024
+
     class meta:
         PATH_MAX = None
         NAME_MAX = None
@@ -222,26 +226,31 @@ class S3FS(FS):
         """Synchronously set the contents of a key."""
         if isinstance(key,basestring):
             key = self._s3bukt.new_key(key)
-        if isinstance(contents,basestring):
-            key.set_contents_from_string(contents)
-        elif hasattr(contents,"md5"):
-            hexmd5 = contents.md5
-            b64md5 = hexmd5.decode("hex").encode("base64").strip()
-            key.set_contents_from_file(contents,md5=(hexmd5,b64md5))
-        else:
-            try:
-                contents.seek(0)
-            except (AttributeError,EnvironmentError):
-                tf = tempfile.TemporaryFile()
-                data = contents.read(524288)
-                while data:
-                    tf.write(data)
-                    data = contents.read(524288)
-                tf.seek(0)
-                key.set_contents_from_file(tf)
-            else:
-                key.set_contents_from_file(contents)
-        return self._sync_key(key)
+        with trace.span(self, "put", key.name) as span:
+            with trace.phase("upload"):
+                if isinstance(contents,basestring):
+                    key.set_contents_from_string(contents)
+                elif hasattr(contents,"md5"):
+                    hexmd5 = contents.md5
+                    b64md5 = hexmd5.decode("hex").encode("base64").strip()
+                    key.set_contents_from_file(contents,md5=(hexmd5,b64md5))
+                else:
+                    try:
+                        contents.seek(0)
+                    except (AttributeError,EnvironmentError):
+                        tf = tempfile.TemporaryFile()
+                        data = contents.read(524288)
+                        while data:
+                            tf.write(data)
+                            data = contents.read(524288)
+                        tf.seek(0)
+                        key.set_contents_from_file(tf)
+                    else:
+                        key.set_contents_from_file(contents)
+            span.add_bytes(key.size or 0)
+            #  Wait until the new contents can be read back
+            with trace.phase("sync"):
+                return self._sync_key(key)
 
     def makepublic(self, path):
         """Mark given path as publicly accessible using HTTP(S)"""
@@ -564,6 +573,56 @@ class S3FS(FS):
                     raise ResourceNotFoundError(path)
         return self._get_key_info(k,path)
 
+    def _get_keys_many(self,paths):
+        """Get the key for each of the given paths, or None if it doesn't exist.
+
+        Paths are grouped by their parent directory, and each directory
+        is listed once; this is much quicker than looking up each key
+        individually when there are several paths in the same directory.
+        """
+        keys = [None] * len(paths)
+        by_dir = {}
+        for (i,path) in enumerate(paths):
+            path = abspath(normpath(path))
+            if not isinstance(path,unicode):
+                path = path.decode("utf8")
+            if path == "/":
+                keys[i] = Prefix(bucket=self._s3bukt,name="/")
+            else:
+                by_dir.setdefault(dirname(path),[]).append((i,basename(path)))
+        for (dir_path,entries) in by_dir.iteritems():
+            if len(entries) == 1:
+                #  A single listing request for the key itself is cheaper
+                #  than listing its whole directory.
+                (i,name) = entries[0]
+                s3path = self._s3path(pathjoin(dir_path,name))
+                ks = self._s3bukt.list(prefix=s3path,delimiter=self._separator)
+                dir_keys = {}
+                for k in ks:
+                    if _eq_utf8(k.name,s3path) or _eq_utf8(k.name,s3path + self._separator):
+                        dir_keys[name] = k
+            else:
+                try:
+                    dir_keys = dict(self._iter_keys(dir_path))
+                except (ResourceNotFoundError,ResourceInvalidError):
+                    continue
+            for (i,name) in entries:
+                keys[i] = dir_keys.get(name)
+        return keys
+
+    def getinfo_many(self,paths):
+        paths = list(paths)
+        keys = self._get_keys_many(paths)
+        return [k if k is None else self._get_key_info(k,path)
+                for (path,k) in zip(paths,keys)]
+
+    def exists_many(self,paths):
+        return [k is not None for k in self._get_keys_many(list(paths))]
+
+    def isdir_many(self,paths):
+        return [k is not None and self._key_is_dir(k)
+                for k in self._get_keys_many(list(paths))]
+
     def _get_key_info(self,key,name=None):
         info = {}
         if name is not None:
@@ -591,6 +650,17 @@ class S3FS(FS):
                 pass
         return info
 
+    def _gethash(self,path,algorithm):
+        #  The ETag of a key that wasn't uploaded in parts is its MD5 digest;
+        #  multipart ETags have a "-<parts>" suffix.
+        if algorithm == "md5":
+            k = self._s3bukt.get_key(self._s3path(path))
+            if k is not None and not self._key_is_dir(k):
+                etag = self._get_key_info(k,path).get("etag")
+                if etag and "-" not in etag:
+                    return etag
+        return super(S3FS,self)._gethash(path,algorithm)
+
     def desc(self,path):
         return "No description available"
 
@@ -683,8 +753,8 @@ class S3FS(FS):
               ignore_errors=False ):
         if search != "breadth" or dir_wildcard is not None:
             args = (wildcard,dir_wildcard,search,ignore_errors)
-            for item in super(S3FS,self).walkfiles(path,*args):
-                yield (item,self.getinfo(item))
+            for item in super(S3FS,self).walkinfo(path,*args):
+                yield item
         else:
             prefix = self._s3path(path)
             for k in self._s3bukt.list(prefix=prefix):
@@ -710,8 +780,8 @@ class S3FS(FS):
               ignore_errors=False ):
         if search != "breadth" or dir_wildcard is not None:
             args = (wildcard,dir_wildcard,search,ignore_errors)
-            for item in super(S3FS,self).walkfiles(path,*args):
-                yield (item,self.getinfo(item))
+            for item in super(S3FS,self).walkfilesinfo(path,*args):
+                yield item
         else:
             prefix = self._s3path(path)
             for k in self._s3bukt.list(prefix=prefix):
@@ -729,6 +799,34 @@ class S3FS(FS):
                                     continue
                         yield (pathjoin(path,name),self._get_key_info(k,name))
 
+    def _iglob(self,pattern,path):
+        #  Every match starts with the literal prefix of the pattern, so a
+        #  single listing of the keys with that prefix finds them all.
+        base = self._s3path(path)
+        if base:
+            base = base + self._separator
+        prefix = pattern.prefix.replace("/",self._separator)
+        if isinstance(prefix,unicode):
+            prefix = prefix.encode("utf8")
+        matches = set()
+        for k in self._s3bukt.list(prefix=base+prefix):
+            name = self._uns3path(k.name,base)
+            if not isinstance(name,unicode):
+                name = name.decode("utf8")
+            #  Directories are implied by the keys below them, so check
+            #  each directory on the way to the key.
+            names = [n for n in name.split(self._separator) if n]
+            states = pattern.start()
+            for i,n in enumerate(names):
+                states = pattern.advance(states,n)
+                if not states:
+                    break
+                if pattern.is_match(states):
+                    match = "/".join(names[:i+1])
+                    if match not in matches:
+                        matches.add(match)
+                        yield pathjoin(path,match)
+
 
 
 def _eq_utf8(name1,name2):
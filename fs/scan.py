@@ -0,0 +1,191 @@
+"""
+fs.scan
+=======
+
+Columnar results for :meth:`~fs.base.FS.scan`.
+
+Scanning a large tree with `walkinfo` creates an info dictionary for every
+file.  :meth:`~fs.base.FS.scan` instead yields :class:`ScanBatch` objects,
+each holding the paths of up to a fixed number of files and a column of
+values for each requested field, stored in an `array` (or a NumPy array, if
+NumPy is installed).  Memory use is bounded by the batch size however many
+files there are, and columns can be summed or sorted without creating a
+Python object per value::
+
+    >>> total = 0
+    >>> for batch in my_fs.scan(fields=('size',)):
+    ...     total += sum(batch['size'])
+
+The fields that can be requested are:
+
+ * "size" - the size of the file in bytes
+ * "mtime" - the modified time, in seconds since the epoch
+ * "atime" - the accessed time, in seconds since the epoch
+ * "ctime" - the created time (or on Unix, the metadata change time)
+ * "mode" - the ``st_mode`` of the file
+
+Values that a filesystem doesn't supply are given as -1 for size and mode,
+and as NaN for times.
+
+"""
+
+import time
+import datetime
+from array import array
+
+from fs.info import StatInfo
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ['ScanBatch',
+           'SCAN_FIELDS',
+           'scan_batches']
+
+try:
+    array('q')
+    _INT_TYPECODE = 'q'
+except ValueError:
+    #  Python 2 has no 64 bit typecode, but 'l' is 64 bits on most platforms
+    _INT_TYPECODE = 'l'
+
+_NAN = float('nan')
+
+
+def _timestamp(value):
+    if isinstance(value, datetime.datetime):
+        return time.mktime(value.timetuple()) + value.microsecond / 1000000.0
+    return float(value)
+
+
+def _info_int(stat_key, info_key):
+    def get(info):
+        value = info.get(info_key)
+        if value is None:
+            value = info.get(stat_key)
+        if value is None:
+            return -1
+        return value
+    return get
+
+
+def _info_time(stat_key, info_key):
+    def get(info):
+        value = info.get(stat_key)
+        if value is None:
+            value = info.get(info_key)
+        if value is None:
+            return _NAN
+        try:
+            return _timestamp(value)
+        except (TypeError, ValueError):
+            return _NAN
+    return get
+
+
+#  Maps each field on to the typecode of its column, the attribute of a
+#  stat result that holds it, the value if the attribute is missing, and a
+#  function that gets it from an info dict
+SCAN_FIELDS = {'size': (_INT_TYPECODE, 'st_size', -1, _info_int('st_size', 'size')),
+               'mtime': ('d', 'st_mtime', _NAN, _info_time('st_mtime', 'modified_time')),
+               'atime': ('d', 'st_atime', _NAN, _info_time('st_atime', 'accessed_time')),
+               'ctime': ('d', 'st_ctime', _NAN, _info_time('st_ctime', 'created_time')),
+               'mode': (_INT_TYPECODE, 'st_mode', -1, _info_int('st_mode', 'st_mode'))}
+
+
+class ScanBatch(object):
+    """The results for a batch of files from a scan.
+
+    The column for a field is found by indexing the batch with the name of
+    the field; the value at each position of a column is for the path at
+    the same position of `paths`.
+
+    :param paths: a list of the paths of the files
+    :param fields: a list of the fields
+    :param columns: a list of the columns, in the same order as `fields`
+
+    """
+
+    def __init__(self, paths, fields, columns):
+        self.paths = paths
+        self.fields = fields
+        self.columns = dict(zip(fields, columns))
+
+    def __repr__(self):
+        return "<ScanBatch of %i files>" % len(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def rows(self):
+        """Yields a tuple of the path and the value of each field, in the
+        order of `fields`, for each file in the batch."""
+        columns = [self.columns[field] for field in self.fields]
+        for i, path in enumerate(self.paths):
+            yield (path,) + tuple(column[i] for column in columns)
+
+
+def _to_numpy(column):
+    return numpy.frombuffer(column, dtype=column.typecode)
+
+
+def scan_batches(items, fields=("size", "mtime", "mode"), batch_size=10000, use_numpy=None):
+    """Get an iterator of :class:`ScanBatch` objects for an iterable of
+    (path, info) tuples, such as the one returned by `walkfilesinfo`.
+
+    :param items: an iterable of (path, info) tuples
+    :param fields: a sequence of the fields to include
+    :param batch_size: the maximum number of files in a batch
+    :param use_numpy: True to return columns as NumPy arrays, False for
+        arrays from the `array` module, or None (the default) to use NumPy
+        if it is installed
+
+    """
+    fields = tuple(fields)
+    for field in fields:
+        if field not in SCAN_FIELDS:
+            raise ValueError("unknown scan field: %r" % (field,))
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    elif use_numpy and numpy is None:
+        raise ImportError("use_numpy requires NumPy")
+    specs = [SCAN_FIELDS[field] for field in fields]
+    stat_getters = [(spec[1], spec[2]) for spec in specs]
+    info_getters = [spec[3] for spec in specs]
+
+    def new_batch():
+        return [], [array(spec[0]) for spec in specs]
+
+    def make_batch(paths, columns):
+        if use_numpy:
+            columns = [_to_numpy(column) for column in columns]
+        return ScanBatch(paths, list(fields), columns)
+
+    def iter_batches():
+        paths, columns = new_batch()
+        appends = [column.append for column in columns]
+        for path, info in items:
+            paths.append(path)
+            if isinstance(info, StatInfo) and info._values is None:
+                #  Read straight from the stat result, skipping the info lookups
+                raw = info.raw
+                for append, (attribute, missing) in zip(appends, stat_getters):
+                    value = getattr(raw, attribute, None)
+                    append(missing if value is None else value)
+            else:
+                for append, get in zip(appends, info_getters):
+                    append(get(info))
+            if len(paths) >= batch_size:
+                yield make_batch(paths, columns)
+                paths, columns = new_batch()
+                appends = [column.append for column in columns]
+        if paths:
+            yield make_batch(paths, columns)
+    return iter_batches()
@@ -8,23 +8,28 @@ Filesystem accessing an SFTP server (via paramiko)
 
 """
 
-import datetime
 import stat as statinfo
 import threading
 import os
 import paramiko
 from getpass import getuser
 import errno
+import copy
+import binascii
 
 from fs.base import *
 from fs.path import *
 from fs.errors import *
+from fs.info import StatInfo
 from fs.utils import isdir, isfile
 from fs import iotools
 
 
 ENOENT = errno.ENOENT
 
+#  Hash algorithms that may be supported by the "check-file" extension
+_CHECK_FILE_ALGORITHMS = ('md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512')
+
 
 class WrongHostKeyError(RemoteConnectionError):
     pass
@@ -77,6 +82,13 @@ class SFTPFS(FS):
               'atomic.setcontents' : False
               }
 
+    #  Large chunks keep the SFTP request pipeline full
+    copy_chunk_size = 2 * 1024 * 1024
+
+    #  Whether the server has the "check-file" extension, which gives file
+    #  digests without downloading them; None until it has been tried
+    _check_file = None
+
     def __init__(self,
                  connection,
                  root_path="/",
@@ -274,6 +286,14 @@ class SFTPFS(FS):
             self._transport = paramiko.Transport(self._transport)
             self._transport.connect(**self._credentials)
 
+    def _worker_clone(self):
+        #  Every operation holds the lock, so workers need a copy with a
+        #  transport of their own.  That's only possible if we created the
+        #  transport in the first place.
+        if not self._owns_transport:
+            return self
+        return copy.copy(self)
+
     @property
     @synchronize
     def client(self):
@@ -480,7 +500,7 @@ class SFTPFS(FS):
             info = attrs_map.get(resourcename)
             if info is None:
                 return self.getinfo(pathjoin(path, p))
-            return self._extract_info(info.__dict__)
+            return self._extract_info(info)
 
         return [(p, getinfo(p)) for p in
                     self._listdir_helper(path, paths, wildcard, full, absolute, False, False)]
@@ -592,7 +612,7 @@ class SFTPFS(FS):
 
     @synchronize
     @convert_os_errors
-    def movedir(self,src,dst,overwrite=False,ignore_errors=False,chunk_size=16384):
+    def movedir(self,src,dst,overwrite=False,ignore_errors=False,chunk_size=16384,workers=1):
         nsrc = self._normpath(src)
         ndst = self._normpath(dst)
         if overwrite and self.isdir(dst):
@@ -611,37 +631,36 @@ class SFTPFS(FS):
     _info_vars = frozenset('st_size st_uid st_gid st_mode st_atime st_mtime'.split())
     @classmethod
     def _extract_info(cls, stats):
-        fromtimestamp = datetime.datetime.fromtimestamp
-        info = dict((k, v) for k, v in stats.iteritems() if k in cls._info_vars and not k.startswith('_'))
-        info['size'] = info['st_size']
-        ct = info.get('st_ctime')
-        if ct is not None:
-            info['created_time'] = fromtimestamp(ct)
-        at = info.get('st_atime')
-        if at is not None:
-            info['accessed_time'] = fromtimestamp(at)
-        mt = info.get('st_mtime')
-        if mt is not None:
-            info['modified_time'] = fromtimestamp(mt)
-        return info
+        return StatInfo(stats, cls._info_vars)
 
     @synchronize
     @convert_os_errors
     def getinfo(self, path):
         npath = self._normpath(path)
         stats = self.client.stat(npath)
-        info = dict((k, getattr(stats, k)) for k in dir(stats) if not k.startswith('_'))
-        info['size'] = info['st_size']
-        ct = info.get('st_ctime', None)
-        if ct is not None:
-            info['created_time'] = datetime.datetime.fromtimestamp(ct)
-        at = info.get('st_atime', None)
-        if at is not None:
-            info['accessed_time'] = datetime.datetime.fromtimestamp(at)
-        mt = info.get('st_mtime', None)
-        if mt is not None:
-            info['modified_time'] = datetime.datetime.fromtimestamp(mt)
-        return info
+        return StatInfo(stats)
+
+    @synchronize
+    @convert_os_errors
+    def _gethash(self, path, algorithm):
+        if self._check_file is not False and algorithm in _CHECK_FILE_ALGORITHMS:
+            npath = self._normpath(path)
+            if self.isdir(path):
+                msg = "that's a directory: %(path)s"
+                raise ResourceInvalidError(path, msg=msg)
+            f = self.client.open(npath, 'rb')
+            try:
+                digest = f.check(algorithm)
+            except IOError:
+                #  Either the extension or the algorithm isn't supported
+                if self._check_file is None:
+                    self._check_file = False
+            else:
+                self._check_file = True
+                return binascii.hexlify(digest)
+            finally:
+                f.close()
+        return super(SFTPFS, self)._gethash(path, algorithm)
 
     @synchronize
     @convert_os_errors
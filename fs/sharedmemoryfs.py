@@ -0,0 +1,734 @@
+"""
+fs.sharedmemoryfs
+=================
+
+A filesystem in shared memory, that several processes can use at once.
+
+SharedMemoryFS keeps its files in an *arena*: a file, by default under
+/dev/shm, mapped in to the memory of each process that uses it.  Pickling a
+SharedMemoryFS doesn't copy the files, but attaches the unpickled FS to the
+same arena, so a SharedMemoryFS can be passed to the workers of a
+`multiprocessing` pool and every worker reads the same copy of the data::
+
+    >>> from fs.sharedmemoryfs import SharedMemoryFS
+    >>> data = SharedMemoryFS(size=4 * 1024 ** 3)
+    >>> fs.utils.copydir((OSFS("reference"), "/"), (data, "/"))
+    >>> pool.map(process, [(data, path) for path in data.walkfiles()])
+
+`getview` gets the contents of a file without copying them.  An arena can
+also be attached to by its path::
+
+    >>> data = SharedMemoryFS("/dev/shm/reference", read_only=True)
+
+Files are never changed in place.  Writing a file adds its new contents to
+the end of the arena, and changes to the directory tree are added to a log
+which each process reads to bring its own index of the files up to date.
+So reading doesn't lock the arena, while changes are made under a lock shared
+by the processes.  The space used by files that are replaced or removed
+isn't reused, and `StorageSpaceError` is raised when the arena is full.
+
+The arena is locked with `fcntl.flock`, so SharedMemoryFS is only available
+on POSIX systems.
+
+"""
+
+from __future__ import with_statement
+
+import os
+import io
+import mmap
+import stat
+import time
+import errno
+import fcntl
+import struct
+import marshal
+import tempfile
+
+from fs.base import *
+from fs.errors import *
+from fs.path import *
+from fs import iotools
+from fs import _thread_synchronize_default
+from fs.local_functools import wraps
+from fs.memoryfs import _EntryInfo
+
+import six
+from six import b
+
+__all__ = ['SharedMemoryFS']
+
+
+#  The header of the arena: a magic string, the size of the arena, the end of
+#  the space used, and the offset of the last record of the log
+_HEADER = struct.Struct("<8sQQQ")
+_MAGIC = b("PYFSSHM1")
+#  Each record of the log: the offset of the next record (0 until there is
+#  one), and the size of the data of the record that follows this header
+_RECORD = struct.Struct("<QI")
+_NEXT = struct.Struct("<Q")
+#  The first record of the log is an empty one just after the header
+_FIRST_RECORD = _HEADER.size
+_DATA_START = _FIRST_RECORD + _RECORD.size
+
+_MARSHAL_VERSION = 2
+
+
+def _default_dir():
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    return None
+
+
+def _changes_arena(func):
+    """Decorator for the methods that change the arena.  They're called with
+    both the FS lock and the lock of the arena held, and with the index
+    brought up to date."""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.read_only:
+            raise UnsupportedError("write")
+        self._lock.acquire()
+        try:
+            self._check_process()
+            self._lock_depth += 1
+            if self._lock_depth == 1:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                return func(self, *args, **kwargs)
+            finally:
+                self._lock_depth -= 1
+                if not self._lock_depth:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._lock.release()
+    return wrapper
+
+
+def _reads_arena(func):
+    """Decorator for the methods that read the arena, bringing the index up
+    to date first."""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        self._lock.acquire()
+        try:
+            self._check_process()
+            self._refresh()
+            return func(self, *args, **kwargs)
+        finally:
+            self._lock.release()
+    return wrapper
+
+
+class _Entry(object):
+    """A file or directory in the index of a SharedMemoryFS."""
+
+    __slots__ = ('isdir', 'offset', 'size', 'created_time', 'modified_time', 'accessed_time')
+
+    def __init__(self, isdir, offset, size, t):
+        self.isdir = isdir
+        self.offset = offset
+        self.size = size
+        self.created_time = t
+        self.modified_time = t
+        self.accessed_time = t
+
+
+class SharedMemoryFile(object):
+    """A file opened for reading from a SharedMemoryFS.
+
+    The contents of a file in the arena never change, so the file reads them
+    without a lock, and keeps reading the same contents if the file is
+    replaced.
+
+    """
+
+    def __init__(self, path, mm, offset, size):
+        self.path = path
+        self.closed = False
+        self._mm = mm
+        self._start = offset
+        self._end = offset + size
+        self.pos = offset
+
+    def __repr__(self):
+        return "<SharedMemoryFile %s>" % self.path
+
+    def _check_open(self):
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+
+    def close(self):
+        self.closed = True
+
+    def flush(self):
+        pass
+
+    def read(self, size=-1):
+        self._check_open()
+        start = self.pos
+        end = self._end
+        if size is not None and size >= 0:
+            end = min(start + size, end)
+        if start >= end:
+            return b('')
+        self.pos = end
+        return self._mm[start:end]
+
+    def pread(self, size, offset):
+        """Read up to `size` bytes from an offset in the file, without using
+        or moving the position of the file."""
+        self._check_open()
+        if offset < 0:
+            raise IOError(errno.EINVAL, "Invalid argument")
+        start = self._start + offset
+        end = min(start + size, self._end)
+        if start >= end:
+            return b('')
+        return self._mm[start:end]
+
+    def readinto(self, buf):
+        data = self.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+    def readline(self, size=-1):
+        self._check_open()
+        start = self.pos
+        if start >= self._end:
+            return b('')
+        end = self._mm.find(b('\n'), start, self._end) + 1 or self._end
+        if size is not None and size >= 0:
+            end = min(end, start + size)
+        self.pos = end
+        return self._mm[start:end]
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                break
+            yield line
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._check_open()
+        if whence == os.SEEK_CUR:
+            offset += self.pos - self._start
+        elif whence == os.SEEK_END:
+            offset += self._end - self._start
+        if offset < 0:
+            raise IOError(errno.EINVAL, "Invalid argument")
+        self.pos = self._start + offset
+        return offset
+
+    def tell(self):
+        return self.pos - self._start
+
+    def write(self, data):
+        raise IOError("File not open for writing")
+
+    def truncate(self, size=None):
+        raise IOError("File not open for writing")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class SharedMemoryWriteFile(io.BytesIO):
+    """A file opened for writing to a SharedMemoryFS.
+
+    The file is written in memory, and its contents are added to the arena
+    when it's flushed or closed.
+
+    """
+
+    def __init__(self, fs, path, data=b(''), append=False):
+        super(SharedMemoryWriteFile, self).__init__(data)
+        self.fs = fs
+        self.path = path
+        self._changed = False
+        if append:
+            self.seek(0, os.SEEK_END)
+
+    def write(self, data):
+        self._changed = True
+        return super(SharedMemoryWriteFile, self).write(data)
+
+    def writelines(self, lines):
+        self._changed = True
+        return super(SharedMemoryWriteFile, self).writelines(lines)
+
+    def truncate(self, size=None):
+        self._changed = True
+        if size is None:
+            size = self.tell()
+        end = len(self.getvalue())
+        if size > end:
+            pos = self.tell()
+            self.seek(end)
+            super(SharedMemoryWriteFile, self).write(b('\0') * (size - end))
+            self.seek(pos)
+        return super(SharedMemoryWriteFile, self).truncate(size)
+
+    def flush(self):
+        super(SharedMemoryWriteFile, self).flush()
+        if self._changed:
+            self.fs._store(self.path, self.getvalue())
+            self._changed = False
+
+    def close(self):
+        if not self.closed:
+            try:
+                self.flush()
+            finally:
+                super(SharedMemoryWriteFile, self).close()
+
+
+class SharedMemoryFS(FS):
+    """A filesystem in an arena of memory shared between processes.
+
+    :param path: the path of the arena; if it doesn't exist it is made.  If
+        this is None, a new arena is made in a temporary file, which is
+        removed when the FS that made it is closed
+    :param size: the size of a new arena, in bytes.  The arena is made as a
+        sparse file, so only the space that's used takes up memory
+    :param read_only: if True, the arena is attached to read-only
+
+    """
+
+    _meta = {'thread_safe': True,
+             'network': False,
+             'virtual': False,
+             'read_only': False,
+             'unicode_paths': True,
+             'case_insensitive_paths': False,
+             'atomic.move': True,
+             'atomic.copy': False,
+             'atomic.makedir': True,
+             'atomic.rename': True,
+             'atomic.setcontents': True}
+
+    def __init__(self, path=None, size=1024 ** 3, read_only=False, thread_synchronize=_thread_synchronize_default):
+        super(SharedMemoryFS, self).__init__(thread_synchronize=thread_synchronize)
+        self._remove_on_close = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="SharedMemoryFS", dir=_default_dir())
+            os.close(fd)
+        self.arena_path = path
+        self.read_only = read_only
+        if read_only:
+            self._meta = dict(self._meta, read_only=True)
+        self._mm = None
+        self._fd = None
+        self._attach(size)
+
+    def __str__(self):
+        return "<SharedMemoryFS: %s>" % self.arena_path
+
+    __repr__ = __str__
+
+    def __unicode__(self):
+        return u"<SharedMemoryFS: %s>" % self.arena_path
+
+    def __getstate__(self):
+        state = super(SharedMemoryFS, self).__getstate__()
+        #  The arena is attached to again when unpickled, rather than copied
+        for name in ('_mm', '_fd', '_pid', '_entries', '_children', '_last_record', '_lock_depth'):
+            state.pop(name, None)
+        state['_remove_on_close'] = False
+        return state
+
+    def __setstate__(self, state):
+        super(SharedMemoryFS, self).__setstate__(state)
+        self._attach()
+
+    def _attach(self, size=None):
+        """Map the arena, making it first if it doesn't exist."""
+        flags = os.O_RDONLY if self.read_only else os.O_RDWR
+        try:
+            fd = os.open(self.arena_path, flags)
+        except OSError, e:
+            if e.errno != errno.ENOENT or self.read_only or size is None:
+                raise ResourceNotFoundError(self.arena_path, details=e)
+            fd = os.open(self.arena_path, flags | os.O_CREAT, 0600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if not self.read_only else fcntl.LOCK_SH)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    if self.read_only:
+                        raise ResourceInvalidError(self.arena_path, msg="Arena is empty: %(path)s")
+                    if size < _DATA_START:
+                        raise ValueError("size is too small for an arena")
+                    os.ftruncate(fd, size)
+                    mm = mmap.mmap(fd, size)
+                    _HEADER.pack_into(mm, 0, _MAGIC, size, _DATA_START, _FIRST_RECORD)
+                    _RECORD.pack_into(mm, _FIRST_RECORD, 0, 0)
+                elif self.read_only:
+                    mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+                else:
+                    mm = mmap.mmap(fd, 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except:
+            os.close(fd)
+            raise
+        if len(mm) < _DATA_START or mm[:len(_MAGIC)] != _MAGIC:
+            mm.close()
+            os.close(fd)
+            raise ResourceInvalidError(self.arena_path, msg="Not a SharedMemoryFS arena: %(path)s")
+        self._fd = fd
+        self._mm = mm
+        self._pid = os.getpid()
+        self._lock_depth = 0
+        now = time.time()
+        self._entries = {u'/': _Entry(True, 0, 0, now)}
+        self._children = {u'/': set()}
+        self._last_record = _FIRST_RECORD
+
+    def _check_process(self):
+        #  A forked process shares the open file of the arena, and with it
+        #  the lock, so it needs a file of its own
+        if self._pid != os.getpid():
+            os.close(self._fd)
+            self._attach()
+
+    @property
+    def arena_size(self):
+        """The size of the arena, in bytes."""
+        return _HEADER.unpack_from(self._mm, 0)[1]
+
+    @property
+    def arena_used(self):
+        """The space in the arena used so far, in bytes."""
+        return _HEADER.unpack_from(self._mm, 0)[2]
+
+    def _refresh(self):
+        """Apply the records added to the log since it was last read."""
+        mm = self._mm
+        offset = _NEXT.unpack_from(mm, self._last_record)[0]
+        while offset:
+            next_offset, length = _RECORD.unpack_from(mm, offset)
+            start = offset + _RECORD.size
+            self._apply(marshal.loads(mm[start:start + length]))
+            self._last_record = offset
+            offset = next_offset
+
+    def _apply(self, record):
+        op = record[0]
+        entries = self._entries
+        if op == 'd':
+            _op, path, t = record
+            entries[path] = _Entry(True, 0, 0, t)
+            self._children[path] = set()
+            self._add_child(path)
+        elif op == 'f':
+            _op, path, offset, size, t = record
+            entry = entries.get(path)
+            if entry is None:
+                entries[path] = _Entry(False, offset, size, t)
+                self._add_child(path)
+            else:
+                entry.offset = offset
+                entry.size = size
+                entry.modified_time = entry.accessed_time = t
+        elif op == 'r':
+            _op, path = record
+            self._remove_child(path)
+            for subpath in self._subtree(path):
+                del entries[subpath]
+                self._children.pop(subpath, None)
+        elif op == 'm':
+            _op, src, dst = record
+            self._remove_child(src)
+            for subpath in self._subtree(src):
+                new_path = dst + subpath[len(src):]
+                entries[new_path] = entries.pop(subpath)
+                if subpath in self._children:
+                    self._children[new_path] = self._children.pop(subpath)
+            self._add_child(dst)
+        elif op == 't':
+            _op, path, accessed_time, modified_time = record
+            entry = entries[path]
+            entry.accessed_time = accessed_time
+            entry.modified_time = modified_time
+
+    def _add_child(self, path):
+        dirpath, name = pathsplit(path)
+        self._children[dirpath].add(name)
+
+    def _remove_child(self, path):
+        dirpath, name = pathsplit(path)
+        self._children[dirpath].discard(name)
+
+    def _subtree(self, path):
+        """Get the paths of an entry and everything in it."""
+        paths = [path]
+        for subpath in paths:
+            children = self._children.get(subpath)
+            if children:
+                paths.extend(pathjoin(subpath, name) for name in children)
+        return paths
+
+    def _allocate(self, size):
+        """Allocate space at the end of the arena, 8 byte aligned."""
+        mm = self._mm
+        magic, arena_size, used, last = _HEADER.unpack_from(mm, 0)
+        offset = (used + 7) & ~7
+        if offset + size > arena_size:
+            raise StorageSpaceError("write", msg="The arena is full")
+        _HEADER.pack_into(mm, 0, magic, arena_size, offset + size, last)
+        return offset
+
+    def _log(self, *record):
+        """Add a record to the log, and apply it."""
+        mm = self._mm
+        data = marshal.dumps(record, _MARSHAL_VERSION)
+        offset = self._allocate(_RECORD.size + len(data))
+        _RECORD.pack_into(mm, offset, 0, len(data))
+        start = offset + _RECORD.size
+        mm[start:start + len(data)] = data
+        magic, arena_size, used, last = _HEADER.unpack_from(mm, 0)
+        #  Linking the record in to the log makes it visible to readers,
+        #  which don't take the lock, so this is done once it is written
+        _NEXT.pack_into(mm, last, offset)
+        _HEADER.pack_into(mm, 0, magic, arena_size, used, offset)
+        self._refresh()
+
+    def _entry(self, path):
+        return self._entries.get(abspath(normpath(path)))
+
+    def _parent(self, path):
+        """Get the directory an entry goes in, checking that it exists."""
+        dirpath = pathsplit(path)[0]
+        parent = self._entries.get(dirpath)
+        if parent is None:
+            raise ParentDirectoryMissingError(path)
+        if not parent.isdir:
+            raise ResourceInvalidError(path, msg="Parent is not a directory: %(path)s")
+        return dirpath
+
+    def getsyspath(self, path, allow_none=False):
+        if allow_none:
+            return None
+        raise NoSysPathError(path)
+
+    @_reads_arena
+    def isdir(self, path):
+        entry = self._entry(path)
+        return entry is not None and entry.isdir
+
+    @_reads_arena
+    def isfile(self, path):
+        entry = self._entry(path)
+        return entry is not None and not entry.isdir
+
+    @_reads_arena
+    def exists(self, path):
+        return self._entry(path) is not None
+
+    @_reads_arena
+    def listdir(self, path="./", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        entry = self._entry(path)
+        if entry is None:
+            raise ResourceNotFoundError(path)
+        if not entry.isdir:
+            raise ResourceInvalidError(path, msg="not a directory: %(path)s")
+        names = [unicode(name) for name in self._children[abspath(normpath(path))]]
+        return self._listdir_helper(path, names, wildcard, full, absolute, dirs_only, files_only)
+
+    @_reads_arena
+    def getinfo(self, path):
+        entry = self._entry(path)
+        if entry is None:
+            raise ResourceNotFoundError(path)
+        if entry.isdir:
+            return _EntryInfo((0755 | stat.S_IFDIR, None,
+                               entry.created_time, entry.modified_time, entry.accessed_time))
+        return _EntryInfo((0444 | stat.S_IFREG if self.read_only else 0666 | stat.S_IFREG,
+                           entry.size,
+                           entry.created_time, entry.modified_time, entry.accessed_time))
+
+    @_reads_arena
+    def getview(self, path):
+        """Get the contents of a file without copying them.
+
+        The view (a memoryview, or a buffer on Python 2) is of the arena
+        itself, so it's read-only, and stays the same if the file is
+        replaced.
+
+        """
+        entry = self._entry(path)
+        if entry is None:
+            raise ResourceNotFoundError(path)
+        if entry.isdir:
+            raise ResourceInvalidError(path, msg="not a file: %(path)s")
+        if six.PY3:
+            return memoryview(self._mm)[entry.offset:entry.offset + entry.size]
+        return buffer(self._mm, entry.offset, entry.size)
+
+    @_reads_arena
+    def getcontents(self, path, mode="rb", encoding=None, errors=None, newline=None):
+        entry = self._entry(path)
+        if entry is None:
+            raise ResourceNotFoundError(path)
+        if entry.isdir:
+            raise ResourceInvalidError(path, msg="not a file: %(path)s")
+        data = self._mm[entry.offset:entry.offset + entry.size]
+        if 'b' not in mode:
+            return iotools.decode_binary(data, encoding=encoding, errors=errors, newline=newline)
+        return data
+
+    @iotools.filelike_to_stream
+    def open(self, path, mode='r', buffering=-1, encoding=None, errors=None, newline=None, line_buffering=False, **kwargs):
+        path = abspath(normpath(path))
+        if 'r' in mode and '+' not in mode:
+            return self._open_readable(path)
+        return self._open_writeable(path, mode)
+
+    @_reads_arena
+    def _open_readable(self, path):
+        entry = self._entries.get(path)
+        if entry is None:
+            raise ResourceNotFoundError(path)
+        if entry.isdir:
+            raise ResourceInvalidError(path)
+        return SharedMemoryFile(path, self._mm, entry.offset, entry.size)
+
+    @_changes_arena
+    def _open_writeable(self, path, mode):
+        self._parent(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry.isdir:
+            raise ResourceInvalidError(path)
+        if 'w' in mode:
+            #  The file is made straight away, so that it can be seen
+            self._store(path, b(''))
+            return SharedMemoryWriteFile(self, path)
+        if entry is None:
+            raise ResourceNotFoundError(path)
+        data = self._mm[entry.offset:entry.offset + entry.size]
+        return SharedMemoryWriteFile(self, path, data, append='a' in mode)
+
+    @_changes_arena
+    def _store(self, path, data):
+        path = abspath(normpath(path))
+        self._parent(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry.isdir:
+            raise ResourceInvalidError(path, msg="That's a directory, not a file: %(path)s")
+        offset = self._allocate(len(data))
+        self._mm[offset:offset + len(data)] = data
+        self._log('f', path, offset, len(data), time.time())
+
+    def setcontents(self, path, data=b(''), encoding=None, errors=None, chunk_size=None):
+        if isinstance(data, six.binary_type):
+            self._store(path, data)
+            return len(data)
+        return super(SharedMemoryFS, self).setcontents(path, data, encoding=encoding, errors=errors, chunk_size=chunk_size)
+
+    @_changes_arena
+    def makedir(self, path, recursive=False, allow_recreate=False):
+        if not path and not allow_recreate:
+            raise PathError(path)
+        path = abspath(normpath(path))
+        entry = self._entries.get(path)
+        if entry is not None:
+            if not entry.isdir:
+                raise ResourceInvalidError(path, msg="Can not create a directory, because path references a file: %(path)s")
+            if not allow_recreate:
+                raise DestinationExistsError(path)
+            return
+        if recursive:
+            for dirpath in recursepath(path)[1:]:
+                entry = self._entries.get(dirpath)
+                if entry is None:
+                    self._log('d', dirpath, time.time())
+                elif not entry.isdir:
+                    raise ResourceInvalidError(path, msg="Can not create a directory, because path references a file: %(path)s")
+        else:
+            try:
+                self._parent(path)
+            except ResourceInvalidError:
+                raise ResourceInvalidError(path, msg="Can not create a directory, because path references a file: %(path)s")
+            self._log('d', path, time.time())
+
+    @_changes_arena
+    def remove(self, path):
+        path = abspath(normpath(path))
+        entry = self._entries.get(path)
+        if entry is None:
+            raise ResourceNotFoundError(path)
+        if entry.isdir:
+            raise ResourceInvalidError(path, msg="That's a directory, not a file: %(path)s")
+        self._log('r', path)
+
+    @_changes_arena
+    def removedir(self, path, recursive=False, force=False):
+        path = abspath(normpath(path))
+        if path == '/':
+            raise RemoveRootError(path)
+        entry = self._entries.get(path)
+        if entry is None:
+            raise ResourceNotFoundError(path)
+        if not entry.isdir:
+            raise ResourceInvalidError(path, msg="Can't remove resource, its not a directory: %(path)s")
+        if self._children[path] and not force:
+            raise DirectoryNotEmptyError(path)
+        self._log('r', path)
+        if recursive:
+            #  Remove the parent directories that are left empty
+            dirpath = pathsplit(path)[0]
+            while dirpath != '/' and not self._children[dirpath]:
+                self._log('r', dirpath)
+                dirpath = pathsplit(dirpath)[0]
+
+    @_changes_arena
+    def rename(self, src, dst):
+        src = abspath(normpath(src))
+        dst = abspath(normpath(dst))
+        if src not in self._entries:
+            raise ResourceNotFoundError(src)
+        if dst in self._entries:
+            raise DestinationExistsError(dst)
+        if isprefix(src, dst):
+            raise ResourceInvalidError(dst, msg="Can't move a directory in to itself: %(path)s")
+        self._parent(dst)
+        self._log('m', src, dst)
+
+    @_changes_arena
+    def settimes(self, path, accessed_time=None, modified_time=None):
+        path = abspath(normpath(path))
+        if path not in self._entries:
+            raise ResourceNotFoundError(path)
+        now = time.time()
+        if accessed_time is None:
+            accessed_time = now
+        elif not isinstance(accessed_time, (int, long, float)):
+            accessed_time = time.mktime(accessed_time.timetuple())
+        if modified_time is None:
+            modified_time = now
+        elif not isinstance(modified_time, (int, long, float)):
+            modified_time = time.mktime(modified_time.timetuple())
+        self._log('t', path, accessed_time, modified_time)
+
+    def close(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                #  Views of the arena are still in use; the arena is unmapped
+                #  once they've gone
+                pass
+            os.close(self._fd)
+            self._mm = None
+            if self._remove_on_close:
+                try:
+                    os.remove(self.arena_path)
+                except OSError:
+                    pass
+        super(SharedMemoryFS, self).close()
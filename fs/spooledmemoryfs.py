@@ -0,0 +1,456 @@
+"""
+fs.spooledmemoryfs
+==================
+
+A MemoryFS with a limit on the memory its files may use.
+
+SpooledMemoryFS keeps files in memory like a MemoryFS, until the contents of
+its large files add up to more than a limit.  It then moves the contents of
+the large files used least recently to another FS (a TempFS, by default),
+and moves them back in to memory when they're used again.  For example::
+
+    >>> from fs.spooledmemoryfs import SpooledMemoryFS
+    >>> scratch = SpooledMemoryFS(memory_limit=256 * 1024 * 1024)
+    >>> scratch.setcontents("output.bin", data)
+    >>> scratch.resident_bytes, scratch.spilled_bytes
+    (268435456, 1073741824)
+
+Only files of at least `spill_size` bytes are moved, or counted against the
+limit, so small files always stay in memory.  A file larger than the limit
+doesn't fit in memory at all, so it stays in the other FS and is read and
+written there.
+
+"""
+
+from __future__ import with_statement
+
+import time
+import itertools
+import threading
+import weakref
+
+from fs.errors import *
+from fs.memoryfs import MemoryFS, DirEntry
+from fs.tempfs import TempFS
+
+from six import b
+
+__all__ = ['SpooledMemoryFS']
+
+
+class SpooledDirEntry(DirEntry):
+    """A DirEntry whose contents may be spilled to the backing FS.
+
+    The `data` of a spilled file is None; its size is still kept in `size`.
+    All of the methods that use the contents are called with the entry's
+    lock held, if it has one, and a file's entry is given a lock before its
+    contents are spilled.
+
+    """
+
+    __slots__ = ('_spool', '__weakref__')
+
+    def _in_memory(self):
+        """Move the contents back in to memory if they're spilled and will
+        fit, and return False if they have to be used where they are."""
+        if self.data is None:
+            return self._spool.page_in(self)
+        self._spool.touch(self)
+        return True
+
+    def get_value(self):
+        lock = self._lock
+        if lock is None:
+            #  Files are given a lock before they're spilled
+            return DirEntry.get_value(self)
+        with lock:
+            if self._in_memory():
+                return DirEntry.get_value(self)
+            return self._spool.read_spilled(self, 0, self.size)
+
+    def set_value(self, data):
+        self._spool.discard(self)
+        DirEntry.set_value(self, data)
+        self._spool.resized(self)
+
+    def read(self, start, end):
+        if self._in_memory():
+            return DirEntry.read(self, start, end)
+        return self._spool.read_spilled(self, start, end)
+
+    def readline(self, start, size=-1):
+        if self._in_memory():
+            return DirEntry.readline(self, start, size)
+        return self._spool.readline_spilled(self, start, size)
+
+    def readinto(self, start, buf):
+        if self._in_memory():
+            return DirEntry.readinto(self, start, buf)
+        data = self._spool.read_spilled(self, start, start + len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+    def write(self, pos, data):
+        if self._in_memory():
+            DirEntry.write(self, pos, data)
+            self._spool.resized(self)
+        else:
+            self._spool.write_spilled(self, pos, data)
+
+    def truncate(self, size):
+        if size == 0:
+            self._spool.discard(self)
+        if self._in_memory():
+            DirEntry.truncate(self, size)
+            self._spool.resized(self)
+        else:
+            self._spool.truncate_spilled(self, size)
+
+
+class _SpoolRecord(object):
+    """What the spool knows of a large file: a weak reference to its entry,
+    its size, when it was last used and, if it's spilled, its path in the
+    backing FS."""
+
+    __slots__ = ('ref', 'size', 'tick', 'path')
+
+    def __init__(self, ref):
+        self.ref = ref
+        self.size = 0
+        self.tick = 0
+        self.path = None
+
+
+class _Spool(object):
+    """Keeps track of the large files of a SpooledMemoryFS, and moves them
+    to and from the backing FS.
+
+    This is kept apart from the FS, so that the entries can refer to it
+    without making a reference cycle with the FS (which has a `__del__`).
+
+    """
+
+    def __init__(self, memory_limit, spill_size, backing_fs=None):
+        self.memory_limit = memory_limit
+        self.spill_size = spill_size
+        self.backing_fs = backing_fs
+        self.own_backing_fs = backing_fs is None
+        self.resident_bytes = 0
+        self.spilled_bytes = 0
+        self.spills = 0
+        self.page_ins = 0
+        self._records = {}
+        self._lock = threading.RLock()
+        self._ticks = itertools.count()
+        self._names = itertools.count()
+
+    def _get_backing_fs(self):
+        if self.backing_fs is None:
+            self.backing_fs = TempFS(identifier="SpooledMemoryFS")
+        return self.backing_fs
+
+    def _freed(self, key, ref):
+        with self._lock:
+            record = self._records.get(key)
+            if record is None or record.ref is not ref:
+                return
+            del self._records[key]
+            if record.path is None:
+                self.resident_bytes -= record.size
+            else:
+                self.spilled_bytes -= record.size
+                self._remove(record.path)
+
+    def _remove(self, path):
+        try:
+            self.backing_fs.remove(path)
+        except FSError:
+            pass
+
+    def touch(self, entry):
+        """Mark a file as just used."""
+        record = self._records.get(id(entry))
+        if record is not None:
+            record.tick = next(self._ticks)
+
+    def resized(self, entry):
+        """Update the spool after the contents of a file in memory changed,
+        spilling other files if the limit is exceeded."""
+        key = id(entry)
+        size = entry.size
+        if size < self.spill_size and key not in self._records:
+            return
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                if size < self.spill_size:
+                    return
+                #  Make sure the entry has a lock for _spill to take
+                entry.lock
+                ref = weakref.ref(entry, lambda ref, key=key: self._freed(key, ref))
+                record = self._records[key] = _SpoolRecord(ref)
+            self.resident_bytes += size - record.size
+            record.size = size
+            record.tick = next(self._ticks)
+            if size < self.spill_size:
+                del self._records[key]
+                self.resident_bytes -= size
+            else:
+                self._enforce_limit(entry)
+
+    def _enforce_limit(self, current=None):
+        """Spill the least recently used files until the files in memory fit
+        in the limit.  The file being used is only spilled if it's too big
+        to ever fit."""
+        if self.resident_bytes <= self.memory_limit:
+            return
+        #  Spilling other files wouldn't make room for a file that's too big,
+        #  so that goes first
+        if current is not None and current.size > self.memory_limit:
+            record = self._records.get(id(current))
+            if record is not None and record.path is None:
+                self._spill(current, record)
+        resident = sorted((record.tick, key, record)
+                          for key, record in self._records.iteritems()
+                          if record.path is None)
+        for _tick, _key, record in resident:
+            if self.resident_bytes <= self.memory_limit:
+                return
+            entry = record.ref()
+            if entry is not None and entry is not current:
+                self._spill(entry, record)
+
+    def _spill(self, entry, record):
+        #  Files in use by other threads are passed over, rather than waited
+        #  for, as they may be waiting for the spool
+        lock = entry._lock
+        if not lock.acquire(False):
+            return
+        try:
+            data = entry.data
+            if data is None:
+                return
+            path = "%x.spill" % next(self._names)
+            f = self._get_backing_fs().open(path, "wb")
+            try:
+                f.write(data)
+            finally:
+                f.close()
+            entry.data = None
+            entry._shared_data = False
+            record.path = path
+            self.resident_bytes -= record.size
+            self.spilled_bytes += record.size
+            self.spills += 1
+        finally:
+            lock.release()
+
+    def page_in(self, entry):
+        """Move the contents of a spilled file back in to memory, if the file
+        fits in the limit.
+
+        :returns: True if the contents are in memory
+
+        """
+        with self._lock:
+            if entry.data is not None:
+                return True
+            if entry.size > self.memory_limit:
+                return False
+            record = self._records[id(entry)]
+            entry.data = self.backing_fs.getcontents(record.path, "rb")
+            self._remove(record.path)
+            record.path = None
+            record.tick = next(self._ticks)
+            self.spilled_bytes -= record.size
+            self.resident_bytes += record.size
+            self.page_ins += 1
+            self._enforce_limit(entry)
+            return True
+
+    def discard(self, entry):
+        """Forget the spilled contents of a file that's being replaced."""
+        if entry.data is not None:
+            return
+        with self._lock:
+            record = self._records[id(entry)]
+            self._remove(record.path)
+            self.spilled_bytes -= record.size
+            record.path = None
+            record.size = 0
+            entry.data = b('')
+            entry.size = 0
+
+    def _open_spilled(self, entry, mode):
+        return self.backing_fs.open(self._records[id(entry)].path, mode)
+
+    def read_spilled(self, entry, start, end):
+        if start >= end:
+            return b('')
+        f = self._open_spilled(entry, "rb")
+        try:
+            f.seek(start)
+            return f.read(end - start)
+        finally:
+            f.close()
+
+    def readline_spilled(self, entry, start, size=-1):
+        f = self._open_spilled(entry, "rb")
+        try:
+            f.seek(start)
+            return f.readline(size)
+        finally:
+            f.close()
+
+    def _spilled_resized(self, entry, size):
+        with self._lock:
+            record = self._records[id(entry)]
+            self.spilled_bytes += size - record.size
+            record.size = size
+            record.tick = next(self._ticks)
+        entry.size = size
+        entry._modified_time = time.time()
+
+    def write_spilled(self, entry, pos, data):
+        f = self._open_spilled(entry, "r+b")
+        try:
+            #  Seeking past the end pads the file with nulls
+            f.seek(pos)
+            f.write(data)
+        finally:
+            f.close()
+        self._spilled_resized(entry, max(entry.size, pos + len(data)))
+
+    def truncate_spilled(self, entry, size):
+        f = self._open_spilled(entry, "r+b")
+        try:
+            f.truncate(size)
+        finally:
+            f.close()
+        self._spilled_resized(entry, size)
+
+    def close(self):
+        with self._lock:
+            records = self._records
+            self._records = {}
+            if self.backing_fs is None:
+                return
+            if self.own_backing_fs:
+                self.backing_fs.close()
+                self.backing_fs = None
+            else:
+                for record in records.itervalues():
+                    if record.path is not None:
+                        self._remove(record.path)
+
+
+class SpooledMemoryFS(MemoryFS):
+    """A MemoryFS that moves the contents of large files to another FS, to
+    keep the memory they use below a limit.
+
+    :param memory_limit: the most memory, in bytes, that the contents of
+        large files may use
+    :param spill_size: the size, in bytes, of the smallest file whose
+        contents may be moved
+    :param backing_fs: the FS to move the contents of files to; by default a
+        TempFS is made when it's first needed, and closed with this FS
+    :param file_factory: as for MemoryFS
+
+    SpooledMemoryFS objects can't be cloned, as their entries can't be
+    shared.
+
+    """
+
+    def __init__(self, memory_limit=64 * 1024 * 1024, spill_size=64 * 1024, backing_fs=None, file_factory=None):
+        self._spool = _Spool(memory_limit, spill_size, backing_fs)
+        super(SpooledMemoryFS, self).__init__(file_factory=file_factory)
+        self.dir_entry_factory = SpooledDirEntry
+
+    def __str__(self):
+        return "<SpooledMemoryFS>"
+
+    def __repr__(self):
+        return "SpooledMemoryFS(memory_limit=%i, spill_size=%i)" % (self.memory_limit, self.spill_size)
+
+    def __unicode__(self):
+        return u"<SpooledMemoryFS>"
+
+    def __getstate__(self):
+        state = super(SpooledMemoryFS, self).__getstate__()
+        spool = state.pop('_spool')
+        if spool.own_backing_fs:
+            backing_fs = None
+        else:
+            backing_fs = spool.backing_fs
+        state['_spool_args'] = (spool.memory_limit, spool.spill_size, backing_fs)
+        return state
+
+    def __setstate__(self, state):
+        state = state.copy()
+        spool = self._spool = _Spool(*state.pop('_spool_args'))
+        super(SpooledMemoryFS, self).__setstate__(state)
+        #  The contents were pickled in full, so are all in memory to start
+        for dir_entry in self._iter_entries(self.root):
+            if isinstance(dir_entry, SpooledDirEntry):
+                dir_entry._spool = spool
+                spool.resized(dir_entry)
+
+    def _iter_entries(self, dir_entry):
+        for child in dir_entry.contents.itervalues():
+            yield child
+            if child.isdir():
+                for descendant in self._iter_entries(child):
+                    yield descendant
+
+    def _make_dir_entry(self, *args, **kwargs):
+        dir_entry = super(SpooledMemoryFS, self)._make_dir_entry(*args, **kwargs)
+        if isinstance(dir_entry, SpooledDirEntry):
+            dir_entry._spool = self._spool
+        return dir_entry
+
+    @property
+    def memory_limit(self):
+        """The most memory that the contents of large files may use."""
+        return self._spool.memory_limit
+
+    @property
+    def spill_size(self):
+        """The size of the smallest file that may be moved out of memory."""
+        return self._spool.spill_size
+
+    @property
+    def resident_bytes(self):
+        """The size of the large files that are in memory."""
+        return self._spool.resident_bytes
+
+    @property
+    def spilled_bytes(self):
+        """The size of the files that have been moved out of memory."""
+        return self._spool.spilled_bytes
+
+    def getusage(self):
+        """Get a dictionary of the memory used by large files.
+
+        The dictionary has the keys `resident_bytes` and `spilled_bytes`, the
+        number of times files have been moved out of memory (`spills`) and
+        back (`page_ins`), and `memory_limit`.
+
+        """
+        spool = self._spool
+        with spool._lock:
+            return {"memory_limit": spool.memory_limit,
+                    "resident_bytes": spool.resident_bytes,
+                    "spilled_bytes": spool.spilled_bytes,
+                    "spills": spool.spills,
+                    "page_ins": spool.page_ins}
+
+    def clone(self):
+        raise UnsupportedError("clone")
+
+    @classmethod
+    def load_image(cls, path):
+        raise UnsupportedError("load_image")
+
+    def close(self):
+        super(SpooledMemoryFS, self).close()
+        self._spool.close()
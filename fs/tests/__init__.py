@@ -25,6 +25,7 @@ import os.path
 import pickle
 import random
 import copy
+import io
 
 import time
 try:
@@ -189,6 +190,53 @@ class FSTestCases(object):
         self.assertEquals(self.fs.getcontents(
             "hello", "rb"), b("to you, good sir!"))
 
+    def test_async_calls(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        future = self.fs.getcontents_async("a.txt")
+        self.assertEquals(future.result(), b("hello"))
+        self.assertTrue(future.done())
+        self.fs.copy_async("a.txt", "b.txt").result()
+        self.assertEquals(self.fs.getinfo_async("b.txt").result()["size"], 5)
+        self.fs.remove_async("a.txt").result()
+        self.assertFalse(self.fs.exists("a.txt"))
+        future = self.fs.getcontents_async("a.txt")
+        self.assertRaises(FSError, future.result)
+        self.assertTrue(isinstance(future.exception(), FSError))
+        futures = [self.fs.setcontents_async("f%i" % i, b("x") * i) for i in xrange(20)]
+        self.assertEquals([f.result() for f in futures], range(20))
+
+    def test_setcontents_readinto(self):
+        #  Files that support readinto are copied through a reused buffer
+        data = b("").join(b(chr(i % 256)) for i in xrange(100 * 1024))
+        self.fs.setcontents("hello", io.BytesIO(data), chunk_size=1000)
+        self.assertEquals(self.fs.getcontents("hello", "rb"), data)
+        self.fs.setcontents("hello", io.BytesIO(data))
+        self.assertEquals(self.fs.getcontents("hello", "rb"), data)
+        with self.fs.open("hello", "rb") as f:
+            buf = bytearray(1000)
+            self.assertEquals(f.readinto(buf), 1000)
+            self.assertEquals(bytes(buf), data[:1000])
+
+    def test_gethash(self):
+        import hashlib
+        from fs.hashcache import HashCache
+        data = b("hello world") * 1000
+        self.fs.setcontents("a.txt", data)
+        self.assertEquals(self.fs.gethash("a.txt"), hashlib.md5(data).hexdigest())
+        self.assertEquals(self.fs.gethash("a.txt", "SHA1"), hashlib.sha1(data).hexdigest())
+        self.assertRaises(ValueError, self.fs.gethash, "a.txt", "nosuchhash")
+        self.assertRaises(ResourceNotFoundError, self.fs.gethash, "b.txt")
+        self.fs.makedir("dir1")
+        self.assertRaises(ResourceInvalidError, self.fs.gethash, "dir1")
+        self.fs.hash_cache = HashCache()
+        try:
+            self.assertEquals(self.fs.gethash("a.txt"), hashlib.md5(data).hexdigest())
+            self.assertEquals(self.fs.gethash("/a.txt"), hashlib.md5(data).hexdigest())
+            self.fs.setcontents("a.txt", b("changed"))
+            self.assertEquals(self.fs.gethash("a.txt"), hashlib.md5(b("changed")).hexdigest())
+        finally:
+            self.fs.hash_cache = None
+
     def test_isdir_isfile(self):
         self.assertFalse(self.fs.exists("dir1"))
         self.assertFalse(self.fs.isdir("dir1"))
@@ -389,6 +437,58 @@ class FSTestCases(object):
         self.assertEquals(sorted(self.fs.walkfiles(
             wildcard="*.txt")), ["/bar/a.txt"])
 
+    def test_scan(self):
+        self.fs.setcontents('a.txt', b('hello'))
+        self.fs.makeopendir('foo').setcontents('b.txt', b('hi'))
+        self.fs.setcontents('foo/c', b(''))
+        batches = list(self.fs.scan(batch_size=2, use_numpy=False))
+        self.assertEquals([len(batch) for batch in batches], [2, 1])
+        sizes = {}
+        for batch in batches:
+            self.assertEquals(batch.fields, ['size', 'mtime', 'mode'])
+            sizes.update(zip(batch.paths, batch['size']))
+        self.assertEquals(sizes, {'/a.txt': 5, '/foo/b.txt': 2, '/foo/c': 0})
+        batches = list(self.fs.scan('/foo', fields=('size',), wildcard='*.txt', use_numpy=False))
+        self.assertEquals([list(batch.rows()) for batch in batches], [[('/foo/b.txt', 2)]])
+        self.assertRaises(ValueError, self.fs.scan, fields=('nope',))
+
+    def test_glob(self):
+        self.fs.makedir('src/a/b', recursive=True)
+        self.fs.makedir('docs')
+        self.fs.setcontents('src/test_top.py', b('1'))
+        self.fs.setcontents('src/a/test_a.py', b('2'))
+        self.fs.setcontents('src/a/b/test_b.py', b('3'))
+        self.fs.setcontents('src/a/b/other.py', b('4'))
+        self.fs.setcontents('docs/test_doc.py', b('5'))
+        self.assertEquals(sorted(self.fs.glob('src/**/test_*.py')),
+                          ['/src/a/b/test_b.py', '/src/a/test_a.py', '/src/test_top.py'])
+        self.assertEquals(sorted(self.fs.glob('*/test_*.py')),
+                          ['/docs/test_doc.py', '/src/test_top.py'])
+        self.assertEquals(sorted(self.fs.glob('src/*')), ['/src/a', '/src/test_top.py'])
+        self.assertEquals(sorted(self.fs.glob('**/b')), ['/src/a/b'])
+        self.assertEquals(self.fs.glob('src/a/b/other.py'), ['/src/a/b/other.py'])
+        self.assertEquals(sorted(self.fs.glob('*.py', 'src/a/b')),
+                          ['/src/a/b/other.py', '/src/a/b/test_b.py'])
+        self.assertEquals(self.fs.glob('nope/*'), [])
+        self.assertEquals(self.fs.glob('src/test_top.py/*'), [])
+        self.assertEquals(sorted(self.fs.iglob('**/test_[ab].py')),
+                          ['/src/a/b/test_b.py', '/src/a/test_a.py'])
+
+    def test_walkinfo(self):
+        self.fs.setcontents('a.txt', b('hello'))
+        self.fs.makeopendir('foo').setcontents('c', b('123'))
+        self.fs.makeopendir('foo/bar').setcontents('d.txt', b('4567'))
+        for search in ("breadth", "depth"):
+            walked = dict(self.fs.walkinfo(search=search))
+            self.assertEquals(sorted(walked),
+                              ["/a.txt", "/foo", "/foo/bar", "/foo/bar/d.txt", "/foo/c"])
+            self.assertEquals(walked["/foo/bar/d.txt"].get("size", 4), 4)
+            files = dict(self.fs.walkfilesinfo(search=search))
+            self.assertEquals(sorted(files), ["/a.txt", "/foo/bar/d.txt", "/foo/c"])
+            self.assertEquals(files["/a.txt"].get("size", 5), 5)
+        self.assertEquals(sorted(p for p, info in self.fs.walkfilesinfo(wildcard="*.txt")),
+                          ["/a.txt", "/foo/bar/d.txt"])
+
     def test_walkdirs(self):
         self.fs.makeopendir('bar').setcontents('a.txt', b('123'))
         self.fs.makeopendir('foo').makeopendir(
@@ -535,6 +635,24 @@ class FSTestCases(object):
         self.assertEqual(self.fs.getinfokeys('info.txt', 'size', 'modified_time'), test_info)
         self.assertEqual(self.fs.getinfokeys('info.txt', 'thiscantpossiblyexistininfo'), {})
 
+    def test_info_many(self):
+        test_str = b("Hello, World!")
+        self.fs.setcontents("info.txt", test_str)
+        self.fs.makedir("dir")
+        self.fs.setcontents("dir/a.txt", b("a"))
+        paths = ["info.txt", "dir", "notafile", "dir/a.txt", "dir/notafile"]
+        infos = self.fs.getinfo_many(paths)
+        self.assertEqual(len(infos), len(paths))
+        self.assertEqual(infos[0]['size'], len(test_str))
+        self.assertEqual(infos[3]['size'], 1)
+        self.assertEqual(infos[2], None)
+        self.assertEqual(infos[4], None)
+        self.assertEqual(self.fs.exists_many(paths),
+                         [True, True, False, True, False])
+        self.assertEqual(self.fs.isdir_many(paths),
+                         [False, True, False, False, False])
+        self.assertEqual(self.fs.getinfo_many([]), [])
+
     def test_getsize(self):
         test_str = b("*") * 23
         self.fs.setcontents("info.txt", test_str)
@@ -704,6 +822,25 @@ class FSTestCases(object):
         self.assert_(check("b/foo/bar/baz.txt"))
         checkcontents("b/1.txt")
 
+    def test_copydir_workers(self):
+        check = self.check
+        contents = b("Now is better than never.")
+        self.fs.makedir("a/foo/bar", recursive=True)
+        self.fs.makedir("a/empty")
+        for path in ("a/1.txt", "a/2.txt", "a/foo/3.txt", "a/foo/bar/4.txt"):
+            self.fs.setcontents(path, contents)
+
+        self.fs.copydir("a", "b", workers=3)
+        for path in ("1.txt", "2.txt", "foo/3.txt", "foo/bar/4.txt"):
+            self.assert_(check(pathjoin("a", path)))
+            self.assertEqual(self.fs.getcontents(pathjoin("b", path)), contents)
+        self.assert_(self.fs.isdir("b/empty"))
+        self.assertRaises(DestinationExistsError, self.fs.copydir, "a", "b", workers=3)
+
+        self.fs.movedir("b", "c", workers=3)
+        self.assert_(not check("b"))
+        self.assertEqual(self.fs.getcontents("c/foo/bar/4.txt"), contents)
+
     def test_copydir_with_dotfile(self):
         check = self.check
         contents = b(
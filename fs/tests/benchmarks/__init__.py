@@ -0,0 +1,21 @@
+"""
+
+  fs.tests.benchmarks:  benchmarks for the FS implementations
+
+Each benchmark case (see `fs.tests.benchmarks.cases`) is timed against each
+available backend (see `fs.tests.benchmarks.backends`), including the
+network filesystems talking to the `fs.expose` servers on localhost.  Run
+them with::
+
+    python -m fs.tests.benchmarks.runner -o results.json
+
+and compare a later run against those results, reporting any case that has
+become more than 10% slower, with::
+
+    python -m fs.tests.benchmarks.runner -o new.json -c results.json -t 0.1
+
+The data each case works on is generated deterministically, so runs on the
+same machine are comparable.  Use --scale to change the amount of data, and
+--help for the other options.
+
+"""
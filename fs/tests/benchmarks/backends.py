@@ -0,0 +1,286 @@
+"""
+
+  fs.tests.benchmarks.backends:  the filesystems that benchmarks run against
+
+A backend creates a filesystem for each benchmark case, and cleans up after
+it.  Backends whose dependencies aren't installed report the reason from
+`unavailable` and are skipped.
+
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+from fs.memoryfs import MemoryFS
+from fs.osfs import OSFS
+from fs.tempfs import TempFS
+from fs.mountfs import MountFS
+from fs.multifs import MultiFS
+from fs.utils import copydir
+
+
+class Backend(object):
+    """A kind of filesystem to run benchmarks against.
+
+    Subclasses implement `make_fs`, and may implement `cleanup` to free
+    anything it created beyond the FS itself.
+
+    """
+
+    name = None
+
+    #: True if the filesystem can't be written to once it has been set up
+    read_only = False
+
+    def unavailable(self):
+        """Get the reason the backend can't be used, or None if it can."""
+        return None
+
+    def make_fs(self):
+        raise NotImplementedError
+
+    def cleanup(self):
+        pass
+
+    def open(self, setup=None):
+        """Create a filesystem for a benchmark.
+
+        :param setup: a callable that adds the data needed by the benchmark
+            to the filesystem
+
+        """
+        fs = self.make_fs()
+        if setup is not None:
+            setup(fs)
+        return fs
+
+    def close(self, fs):
+        """Close a filesystem created by `open`."""
+        try:
+            fs.close()
+        finally:
+            self.cleanup()
+
+
+class MemoryBackend(Backend):
+    name = "memory"
+
+    def make_fs(self):
+        return MemoryFS()
+
+
+class OSBackend(Backend):
+    name = "osfs"
+
+    def make_fs(self):
+        self.temp_dir = tempfile.mkdtemp(u"fsbenchmark")
+        return OSFS(self.temp_dir)
+
+    def cleanup(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+class TempBackend(Backend):
+    name = "tempfs"
+
+    def make_fs(self):
+        return TempFS()
+
+
+class ZipBackend(Backend):
+    """Zip files can't be read until they have been written, so the data is
+    set up in a zip file which is then opened for reading."""
+
+    name = "zipfs"
+    read_only = True
+
+    def open(self, setup=None):
+        from fs.zipfs import ZipFS
+        fd, self.zip_path = tempfile.mkstemp(".zip")
+        os.close(fd)
+        source_fs = MemoryFS()
+        try:
+            if setup is not None:
+                setup(source_fs)
+            zip_fs = ZipFS(self.zip_path, "w")
+            try:
+                copydir(source_fs, zip_fs)
+            finally:
+                zip_fs.close()
+        finally:
+            source_fs.close()
+        return ZipFS(self.zip_path, "r")
+
+    def cleanup(self):
+        os.remove(self.zip_path)
+
+
+class SqliteBackend(Backend):
+    name = "sqlitefs"
+
+    def unavailable(self):
+        try:
+            import apsw
+        except ImportError:
+            return "requires apsw"
+        return None
+
+    def make_fs(self):
+        from fs.contrib.sqlitefs import SqliteFS
+        fd, self.db_path = tempfile.mkstemp(".db")
+        os.close(fd)
+        return SqliteFS(self.db_path)
+
+    def cleanup(self):
+        os.remove(self.db_path)
+
+
+class MountBackend(Backend):
+    """A MountFS with a MemoryFS mounted at the root, so every call goes
+    through the mount lookup."""
+
+    name = "mountfs"
+
+    def make_fs(self):
+        fs = MountFS()
+        fs.mountdir("/", MemoryFS())
+        return fs
+
+
+class MultiBackend(Backend):
+    """A MultiFS that writes to a MemoryFS, over an empty lower layer."""
+
+    name = "multifs"
+
+    def make_fs(self):
+        fs = MultiFS()
+        fs.addfs("lower", MemoryFS())
+        fs.addfs("upper", MemoryFS(), write=True)
+        return fs
+
+
+class ServerBackend(Backend):
+    """A network filesystem talking to a server on localhost, which serves
+    a MemoryFS from a background thread."""
+
+    def make_server(self, served_fs, addr):
+        raise NotImplementedError
+
+    def make_client(self, addr):
+        raise NotImplementedError
+
+    def serve(self):
+        while self.serving:
+            self.server.handle_request()
+
+    def make_fs(self):
+        self.served_fs = MemoryFS()
+        self.server = self.make_server(self.served_fs, ("127.0.0.1", 0))
+        self.server.timeout = 0.1
+        self.serving = True
+        self.server_thread = threading.Thread(target=self.serve)
+        self.server_thread.setDaemon(True)
+        self.server_thread.start()
+        return self.make_client(self.server.server_address)
+
+    def cleanup(self):
+        self.serving = False
+        self.server_thread.join()
+        self.server.server_close()
+        self.served_fs.close()
+
+
+class RPCBackend(ServerBackend):
+    name = "rpcfs"
+
+    def make_server(self, served_fs, addr):
+        from fs.expose.xmlrpc import RPCFSServer
+        return RPCFSServer(served_fs, addr, logRequests=False)
+
+    def make_client(self, addr):
+        from fs.rpcfs import RPCFS
+        return RPCFS("http://%s:%d" % addr)
+
+
+class SFTPBackend(ServerBackend):
+    name = "sftpfs"
+
+    def unavailable(self):
+        try:
+            import paramiko
+        except ImportError:
+            return "requires paramiko"
+        return None
+
+    def make_server(self, served_fs, addr):
+        from fs.expose.sftp import BaseSFTPServer
+        return BaseSFTPServer(addr, served_fs)
+
+    def make_client(self, addr):
+        from fs.sftpfs import SFTPFS
+        return SFTPFS(addr, no_auth=True)
+
+
+class FTPBackend(Backend):
+    """FTPFS talking to the pyftpdlib server from `fs.expose.ftp`."""
+
+    name = "ftpfs"
+
+    def unavailable(self):
+        try:
+            from fs.expose import ftp
+        except ImportError:
+            return "requires pyftpdlib"
+        return None
+
+    def make_fs(self):
+        from pyftpdlib import ftpserver
+        from fs.expose.ftp import FTPFSHandler, FTPFSFactory
+        from fs.ftpfs import FTPFS
+        self.served_fs = MemoryFS()
+
+        class Handler(FTPFSHandler):
+            authorizer = ftpserver.DummyAuthorizer()
+            abstracted_fs = FTPFSFactory(self.served_fs)
+        Handler.authorizer.add_anonymous("/", perm="elradfmw")
+
+        self.server = ftpserver.FTPServer(("127.0.0.1", 0), Handler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever,
+                                              kwargs=dict(timeout=0.1))
+        self.server_thread.setDaemon(True)
+        self.server_thread.start()
+        host, port = self.server.socket.getsockname()
+        return FTPFS(host, port=port, timeout=5.0)
+
+    def cleanup(self):
+        self.server.close_all()
+        self.server_thread.join()
+        self.served_fs.close()
+
+
+#: All the backends, in the order they are run
+BACKENDS = [MemoryBackend(),
+            OSBackend(),
+            TempBackend(),
+            ZipBackend(),
+            SqliteBackend(),
+            MountBackend(),
+            MultiBackend(),
+            RPCBackend(),
+            SFTPBackend(),
+            FTPBackend()]
+
+
+def get_backends(names=None):
+    """Get the backends with the given names, or all of them."""
+    if names is None:
+        return list(BACKENDS)
+    by_name = dict((backend.name, backend) for backend in BACKENDS)
+    backends = []
+    for name in names:
+        if name not in by_name:
+            raise ValueError("unknown backend: %s" % name)
+        backends.append(by_name[name])
+    return backends
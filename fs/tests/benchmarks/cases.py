@@ -0,0 +1,235 @@
+"""
+
+  fs.tests.benchmarks.cases:  the operations that are benchmarked
+
+Each case sets up the data it needs in a filesystem, untimed, and then times
+`run` a number of times.  The amounts of data are multiplied by the scale
+given to the case, and the data is the same on every run.
+
+"""
+
+import random
+
+from fs.path import pathjoin
+from fs.utils import find_duplicates
+
+
+def _count(n, scale):
+    return max(1, int(n * scale))
+
+
+def _data(size, seed):
+    """Get `size` bytes of repeatable, incompressible data."""
+    rand = random.Random(seed)
+    chunk = bytes(bytearray(rand.randint(0, 255) for _ in xrange(min(size, 4096))))
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+def _make_tree(fs, path, dirs, files, file_size=64):
+    """Create a two level tree of `dirs` directories each with `dirs`
+    subdirectories, and `files` files in each subdirectory."""
+    data = _data(file_size, 0)
+    for i in xrange(dirs):
+        for j in xrange(dirs):
+            dir_path = pathjoin(path, "d%i" % i, "s%i" % j)
+            fs.makedir(dir_path, recursive=True, allow_recreate=True)
+            for k in xrange(files):
+                fs.setcontents(pathjoin(dir_path, "f%i.dat" % k), data)
+
+
+class Case(object):
+    """A benchmark.
+
+    :param scale: multiplies the amount of data the benchmark uses
+
+    """
+
+    name = None
+
+    #: True if the case writes to the filesystem while it is timed
+    writes = False
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+
+    def setup(self, fs):
+        """Add the data the benchmark needs to the filesystem (untimed)."""
+        pass
+
+    def before_run(self, fs):
+        """Prepare for the next run (untimed)."""
+        pass
+
+    def run(self, fs):
+        """The operations to time."""
+        raise NotImplementedError
+
+
+class ListDir(Case):
+    name = "listdir"
+
+    def setup(self, fs):
+        fs.makedir("list")
+        for i in xrange(_count(500, self.scale)):
+            fs.setcontents("list/f%i.txt" % i, b"x")
+
+    def run(self, fs):
+        for _ in xrange(10):
+            fs.listdir("list")
+
+
+class ListDirInfo(ListDir):
+    name = "listdirinfo"
+
+    def run(self, fs):
+        for _ in xrange(10):
+            fs.listdirinfo("list")
+
+
+class Walk(Case):
+    name = "walk"
+
+    def setup(self, fs):
+        _make_tree(fs, "tree", _count(10, self.scale ** 0.5), 10)
+
+    def run(self, fs):
+        for _ in fs.walk("tree"):
+            pass
+
+
+class GetInfo(ListDir):
+    name = "getinfo"
+
+    def run(self, fs):
+        getinfo = fs.getinfo
+        for path in fs.listdir("list", full=True):
+            getinfo(path)
+
+
+class SmallWrite(Case):
+    name = "small_write"
+    writes = True
+
+    def setup(self, fs):
+        self.data = _data(1024, 1)
+
+    def before_run(self, fs):
+        if fs.exists("small"):
+            fs.removedir("small", force=True)
+        fs.makedir("small")
+
+    def run(self, fs):
+        data = self.data
+        for i in xrange(_count(200, self.scale)):
+            fs.setcontents("small/f%i.dat" % i, data)
+
+
+class SmallRead(Case):
+    name = "small_read"
+
+    def setup(self, fs):
+        fs.makedir("small")
+        data = _data(1024, 1)
+        self.count = _count(200, self.scale)
+        for i in xrange(self.count):
+            fs.setcontents("small/f%i.dat" % i, data)
+
+    def run(self, fs):
+        for i in xrange(self.count):
+            fs.getcontents("small/f%i.dat" % i, "rb")
+
+
+class LargeWrite(Case):
+    name = "large_write"
+    writes = True
+
+    def setup(self, fs):
+        self.data = _data(64 * 1024, 2)
+        self.chunks = _count(128, self.scale)
+
+    def run(self, fs):
+        f = fs.open("large.dat", "wb")
+        try:
+            data = self.data
+            for _ in xrange(self.chunks):
+                f.write(data)
+        finally:
+            f.close()
+
+
+class LargeRead(Case):
+    name = "large_read"
+
+    def setup(self, fs):
+        data = _data(64 * 1024, 2)
+        f = fs.open("large.dat", "wb")
+        try:
+            for _ in xrange(_count(128, self.scale)):
+                f.write(data)
+        finally:
+            f.close()
+
+    def run(self, fs):
+        f = fs.open("large.dat", "rb")
+        try:
+            while f.read(64 * 1024):
+                pass
+        finally:
+            f.close()
+
+
+class CopyDir(Case):
+    name = "copydir"
+    writes = True
+
+    def setup(self, fs):
+        _make_tree(fs, "tree", _count(5, self.scale ** 0.5), 10, 1024)
+
+    def before_run(self, fs):
+        if fs.exists("copy"):
+            fs.removedir("copy", force=True)
+
+    def run(self, fs):
+        fs.copydir("tree", "copy")
+
+
+class FindDuplicates(Case):
+    name = "find_duplicates"
+
+    def setup(self, fs):
+        fs.makedir("dups")
+        count = _count(100, self.scale)
+        for i in xrange(count):
+            #  Every fourth file is a copy of the one before it, and the
+            #  rest are the same size with different contents
+            data = _data(32 * 1024, i - (i % 4 == 3))
+            fs.setcontents("dups/f%i.dat" % i, data)
+
+    def run(self, fs):
+        list(find_duplicates(fs, fs.listdir("dups", full=True)))
+
+
+#: All the cases, in the order they are run
+CASES = [ListDir,
+         ListDirInfo,
+         Walk,
+         GetInfo,
+         SmallWrite,
+         SmallRead,
+         LargeWrite,
+         LargeRead,
+         CopyDir,
+         FindDuplicates]
+
+
+def get_cases(names=None):
+    """Get the case classes with the given names, or all of them."""
+    if names is None:
+        return list(CASES)
+    by_name = dict((case.name, case) for case in CASES)
+    cases = []
+    for name in names:
+        if name not in by_name:
+            raise ValueError("unknown benchmark: %s" % name)
+        cases.append(by_name[name])
+    return cases
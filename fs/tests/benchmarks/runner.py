@@ -0,0 +1,181 @@
+"""
+
+  fs.tests.benchmarks.runner:  runs the benchmarks and compares results
+
+Results are saved as JSON of the form::
+
+    {"info": {"python": ..., "platform": ..., "scale": ..., "repeat": ...},
+     "results": {<backend>: {<case>: {"min": ..., "median": ...,
+                                      "times": [...]}}}}
+
+with times in seconds.  Comparing results against a baseline reports each
+case whose minimum time has grown by more than the threshold.
+
+"""
+
+import sys
+import json
+import platform
+import traceback
+from timeit import default_timer
+from optparse import OptionParser
+
+from fs.tests.benchmarks.backends import get_backends
+from fs.tests.benchmarks.cases import get_cases
+
+
+def time_case(backend, case, repeat=3):
+    """Time a case against a backend.
+
+    :returns: a list of the time taken by each run, in seconds
+
+    """
+    times = []
+    fs = backend.open(case.setup)
+    try:
+        for _ in xrange(repeat):
+            case.before_run(fs)
+            start = default_timer()
+            case.run(fs)
+            times.append(default_timer() - start)
+    finally:
+        backend.close(fs)
+    return times
+
+
+def run_benchmarks(backends=None, cases=None, scale=1.0, repeat=3, log=None):
+    """Run benchmarks and get the results.
+
+    :param backends: a list of backend names, or None for all of them
+    :param cases: a list of case names, or None for all of them
+    :param scale: multiplies the amount of data each case uses
+    :param repeat: the number of times to time each case
+    :param log: a callable that is given a line of progress, or None
+
+    :returns: a dictionary of results in the form saved by `save_results`
+
+    """
+    if log is None:
+        log = lambda line: None
+    results = {}
+    for backend in get_backends(backends):
+        reason = backend.unavailable()
+        if reason is not None:
+            log("%s: skipped (%s)" % (backend.name, reason))
+            continue
+        backend_results = results[backend.name] = {}
+        for case_class in get_cases(cases):
+            case = case_class(scale)
+            if case.writes and backend.read_only:
+                continue
+            try:
+                times = time_case(backend, case, repeat)
+            except Exception:
+                log("%s %s: failed\n%s" % (backend.name, case.name, traceback.format_exc()))
+                continue
+            ordered = sorted(times)
+            backend_results[case.name] = {"min": ordered[0],
+                                          "median": ordered[len(ordered) // 2],
+                                          "times": times}
+            log("%s %s: %.4fs" % (backend.name, case.name, ordered[0]))
+    return {"info": {"python": platform.python_version(),
+                     "platform": platform.platform(),
+                     "scale": scale,
+                     "repeat": repeat},
+            "results": results}
+
+
+def save_results(results, filename):
+    f = open(filename, "w")
+    try:
+        json.dump(results, f, indent=2, sort_keys=True)
+    finally:
+        f.close()
+
+
+def load_results(filename):
+    f = open(filename)
+    try:
+        return json.load(f)
+    finally:
+        f.close()
+
+
+def compare_results(baseline, results, threshold=0.1):
+    """Find the cases that have got slower.
+
+    Only cases present in both sets of results are compared, using the
+    minimum time of each.
+
+    :param baseline: results to compare against
+    :param results: the new results
+    :param threshold: the fraction a time may grow by before it counts as
+        a regression
+
+    :returns: a list of tuples of (backend, case, baseline time, new time),
+        for each case that is more than `threshold` slower
+
+    """
+    regressions = []
+    baseline_results = baseline["results"]
+    for backend, cases in sorted(results["results"].items()):
+        baseline_cases = baseline_results.get(backend, {})
+        for case, timing in sorted(cases.items()):
+            if case not in baseline_cases:
+                continue
+            old = baseline_cases[case]["min"]
+            new = timing["min"]
+            if new > old * (1 + threshold):
+                regressions.append((backend, case, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = OptionParser(usage="%prog [options]",
+                          description="Run the pyfilesystem benchmarks.")
+    parser.add_option("-b", "--backends", dest="backends", default=None,
+                      help="comma separated backends to run (default all)")
+    parser.add_option("-k", "--cases", dest="cases", default=None,
+                      help="comma separated benchmarks to run (default all)")
+    parser.add_option("-s", "--scale", dest="scale", type="float", default=1.0,
+                      help="multiply the amount of data by SCALE")
+    parser.add_option("-r", "--repeat", dest="repeat", type="int", default=3,
+                      help="time each benchmark REPEAT times")
+    parser.add_option("-o", "--output", dest="output", default=None,
+                      help="save the results as JSON to OUTPUT")
+    parser.add_option("-c", "--compare", dest="compare", default=None,
+                      help="compare the results with those saved in COMPARE")
+    parser.add_option("-t", "--threshold", dest="threshold", type="float", default=0.1,
+                      help="fraction of slowdown that counts as a regression (default 0.1)")
+    options, args = parser.parse_args(argv)
+    if args:
+        parser.error("unexpected arguments")
+
+    def split(names):
+        if names is None:
+            return None
+        return [name.strip() for name in names.split(",") if name.strip()]
+
+    def log(line):
+        sys.stderr.write(line + "\n")
+
+    results = run_benchmarks(split(options.backends),
+                             split(options.cases),
+                             options.scale,
+                             options.repeat,
+                             log)
+    if options.output:
+        save_results(results, options.output)
+    if options.compare:
+        regressions = compare_results(load_results(options.compare), results, options.threshold)
+        for backend, case, old, new in regressions:
+            sys.stdout.write("REGRESSION %s %s: %.4fs -> %.4fs (%+.0f%%)\n"
+                             % (backend, case, old, new, (new / old - 1) * 100))
+        if regressions:
+            return 1
+        sys.stdout.write("no regressions\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+
+  fs.tests.test_aio:  testcases for the fs.aio module
+
+"""
+
+import threading
+import unittest
+import BaseHTTPServer
+
+try:
+    import asyncio
+    from fs import aio
+except ImportError:
+    aio = None
+
+from fs.memoryfs import MemoryFS
+from fs.httpfs import HTTPFS
+from fs.errors import ResourceNotFoundError, UnsupportedError
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serves the files in the server's `files` dictionary"""
+
+    def do_HEAD(self):
+        self.respond(False)
+
+    def do_GET(self):
+        self.respond(True)
+
+    def respond(self, send_body):
+        if self.path.startswith("/redirect/"):
+            self.send_response(302)
+            self.send_header("Location", self.path[len("/redirect"):])
+            self.end_headers()
+            return
+        data = self.server.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _collect(loop, async_iterator):
+    items = []
+    async_iterator = async_iterator.__aiter__()
+    while True:
+        try:
+            items.append(loop.run_until_complete(async_iterator.__anext__()))
+        except StopAsyncIteration:
+            return items
+
+
+if aio:
+    class TestAsyncFS(unittest.TestCase):
+
+        def setUp(self):
+            self.loop = asyncio.new_event_loop()
+            self.fs = MemoryFS()
+            self.fs.async_workers = 2
+            self.async_fs = aio.wrap(self.fs, loop=self.loop)
+            self.run = self.loop.run_until_complete
+
+        def tearDown(self):
+            self.fs.close()
+            self.loop.close()
+
+        def test_calls(self):
+            run = self.run
+            async_fs = self.async_fs
+            run(async_fs.setcontents("a.txt", b"hello"))
+            self.assertEqual(run(async_fs.getcontents("a.txt")), b"hello")
+            run(async_fs.copy("a.txt", "b.txt"))
+            self.assertEqual(sorted(run(async_fs.listdir())), ["a.txt", "b.txt"])
+            self.assertEqual(run(async_fs.getinfo("b.txt"))["size"], 5)
+            self.assertEqual(dict(run(async_fs.listdirinfo()))["a.txt"]["size"], 5)
+            self.assertTrue(run(async_fs.exists("a.txt")))
+            self.assertRaises(ResourceNotFoundError, run, async_fs.getcontents("nope"))
+
+            f = run(async_fs.open("a.txt", "rb"))
+            self.assertEqual(run(f.read(2)), b"he")
+            self.assertEqual(run(f.read()), b"llo")
+            run(f.close())
+
+            futures = [async_fs.setcontents("f%i" % i, b"x" * i) for i in range(50)]
+            run(asyncio.gather(*futures))
+            self.assertEqual(self.fs.getsize("f49"), 49)
+
+        def test_walk(self):
+            self.fs.makedir("foo/bar", recursive=True)
+            self.fs.setcontents("foo/bar/a", b"a")
+            self.fs.setcontents("b", b"b")
+            self.assertEqual(_collect(self.loop, self.async_fs.walk()), list(self.fs.walk()))
+            self.assertEqual(sorted(_collect(self.loop, self.async_fs.walkfiles())),
+                             ["/b", "/foo/bar/a"])
+
+        def test_cancel(self):
+            release = threading.Event()
+            self.fs.setcontents("a", b"data")
+            blocking = [self.async_fs._call(lambda fs: release.wait()) for i in range(2)]
+            queued = self.async_fs.remove("a")
+            self.assertEqual(len(self.async_fs._pending), 1)
+            queued.cancel()
+            release.set()
+            self.run(asyncio.gather(*blocking))
+            self.run(self.async_fs.getinfo("a"))
+            self.assertTrue(self.fs.exists("a"))
+            self.assertEqual(self.async_fs._running, 0)
+
+
+    class TestAsyncHTTPFS(unittest.TestCase):
+
+        def setUp(self):
+            self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _Handler)
+            self.server.files = {"/a.txt": b"hello",
+                                 "/big": b"0123456789" * 100000,
+                                 "/text": u"caf\xe9".encode("utf-8")}
+            self.thread = threading.Thread(target=self.server.serve_forever)
+            self.thread.setDaemon(True)
+            self.thread.start()
+            self.loop = asyncio.new_event_loop()
+            self.fs = HTTPFS("http://127.0.0.1:%i" % self.server.server_address[1])
+            self.async_fs = aio.wrap(self.fs, loop=self.loop)
+            self.run = self.loop.run_until_complete
+
+        def tearDown(self):
+            self.server.shutdown()
+            self.server.server_close()
+            self.loop.close()
+
+        def test_read(self):
+            run = self.run
+            async_fs = self.async_fs
+            self.assertTrue(isinstance(async_fs, aio.AsyncHTTPFS))
+            self.assertEqual(run(async_fs.getcontents("a.txt")), b"hello")
+            self.assertEqual(run(async_fs.getcontents("big")), self.server.files["/big"])
+            self.assertEqual(run(async_fs.getcontents("redirect/a.txt")), b"hello")
+            self.assertEqual(run(async_fs.getcontents("text", "r")), u"caf\xe9")
+            self.assertRaises(ResourceNotFoundError, run, async_fs.getcontents("nope"))
+            self.assertRaises(UnsupportedError, run, async_fs.open("a.txt", "w"))
+
+            f = run(async_fs.open("big", "rb"))
+            data = []
+            chunk = run(f.read(4096))
+            while chunk:
+                self.assert_(len(chunk) <= 4096)
+                data.append(chunk)
+                chunk = run(f.read(4096))
+            run(f.close())
+            self.assertEqual(b"".join(data), self.server.files["/big"])
+
+        def test_info(self):
+            run = self.run
+            self.assertEqual(run(self.async_fs.getinfo("big"))["size"], 1000000)
+            self.assertTrue(run(self.async_fs.isfile("a.txt")))
+            self.assertFalse(run(self.async_fs.exists("nope")))
+            self.assertFalse(run(self.async_fs.isdir("a.txt")))
+            self.assertEqual(run(self.async_fs.listdir()), [])
+
+        def test_concurrent(self):
+            futures = [self.async_fs.getcontents("a.txt") for i in range(50)]
+            self.assertEqual(self.run(asyncio.gather(*futures)), [b"hello"] * 50)
@@ -0,0 +1,55 @@
+"""
+
+  fs.tests.test_benchmarks:  testcases for the benchmark suite
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fs.tests.benchmarks import runner
+from fs.tests.benchmarks.backends import get_backends
+from fs.tests.benchmarks.cases import get_cases, CASES
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(u"fstest")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_run(self):
+        failures = []
+        results = runner.run_benchmarks(["memory", "zipfs"], scale=0.01, repeat=2,
+                                        log=failures.append)
+        self.assertEqual(results["info"]["repeat"], 2)
+        memory = results["results"]["memory"]
+        self.assertEqual(sorted(memory), sorted(case.name for case in CASES))
+        for timing in memory.values():
+            self.assertEqual(len(timing["times"]), 2)
+            self.assertEqual(timing["min"], min(timing["times"]))
+        #  Cases that write aren't run against the read-only zip file
+        zipfs = results["results"]["zipfs"]
+        self.assertTrue("listdir" in zipfs)
+        self.assertFalse("small_write" in zipfs)
+        self.assertFalse([line for line in failures if "failed" in line])
+
+    def test_compare(self):
+        path = os.path.join(self.temp_dir, "results.json")
+        results = runner.run_benchmarks(["memory"], ["listdir", "getinfo"],
+                                        scale=0.01, repeat=1)
+        runner.save_results(results, path)
+        baseline = runner.load_results(path)
+        self.assertEqual(runner.compare_results(baseline, results), [])
+        timing = baseline["results"]["memory"]["getinfo"]
+        timing["min"] = results["results"]["memory"]["getinfo"]["min"] / 2.0
+        regressions = runner.compare_results(baseline, results, 0.5)
+        self.assertEqual([r[:2] for r in regressions], [("memory", "getinfo")])
+
+    def test_unknown_names(self):
+        self.assertRaises(ValueError, get_backends, ["nosuchfs"])
+        self.assertRaises(ValueError, get_cases, ["nosuchcase"])
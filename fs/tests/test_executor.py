@@ -0,0 +1,122 @@
+"""
+
+  fs.tests.test_executor:  testcases for the fs.executor module
+
+"""
+
+import gc
+import time
+import weakref
+import threading
+import unittest
+
+from fs.executor import FSExecutor, Future
+from fs.errors import FSClosedError, OperationCancelledError, OperationTimeoutError, RemoteConnectionError
+from fs.memoryfs import MemoryFS
+
+
+class TestFSExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.fs = MemoryFS()
+        self.executor = FSExecutor(self.fs, max_workers=2, max_queued=2)
+
+    def tearDown(self):
+        self.executor.shutdown(cancel_pending=True)
+        self.fs.close()
+
+    def test_submit(self):
+        future = self.executor.submit(lambda fs, a, b=0: (fs, a + b), 1, b=2)
+        self.assertEqual(future.result(), (self.fs, 3))
+        self.fs.setcontents("a", b"data")
+        self.assertEqual(self.executor.submit_call("getcontents", "a").result(), b"data")
+        self.assert_(len(self.executor._threads) <= 2)
+
+    def test_backpressure(self):
+        release = threading.Event()
+        for i in range(4):
+            #  Two calls block the workers and two fill the queue
+            self.executor.submit(lambda fs: release.wait())
+        submitted = threading.Event()
+
+        def submit():
+            self.executor.submit(lambda fs: None)
+            submitted.set()
+        thread = threading.Thread(target=submit)
+        thread.start()
+        time.sleep(0.1)
+        self.assertFalse(submitted.isSet())
+        release.set()
+        thread.join()
+        self.assertTrue(submitted.isSet())
+
+    def test_cancel(self):
+        release = threading.Event()
+        running = [self.executor.submit(lambda fs: release.wait()) for i in range(2)]
+        calls = []
+        queued = self.executor.submit(lambda fs: calls.append(1))
+        self.assertTrue(queued.cancel())
+        self.assertTrue(queued.cancelled())
+        self.assertTrue(queued.done())
+        self.assertRaises(OperationCancelledError, queued.result)
+        self.assertRaises(OperationTimeoutError, running[0].result, 0.01)
+        release.set()
+        for future in running:
+            future.result()
+            self.assertFalse(future.cancel())
+        self.executor.shutdown()
+        self.assertEqual(calls, [])
+        self.assertRaises(FSClosedError, self.executor.submit, lambda fs: None)
+
+    def test_done_callback(self):
+        done = []
+        called = threading.Event()
+        future = self.executor.submit(lambda fs: 42)
+        future.add_done_callback(lambda f: (done.append(f), called.set()))
+        future.result()
+        #  The worker runs the callback after waking result(), so wait for it
+        called.wait(5)
+        future.add_done_callback(done.append)
+        self.assertEqual(done, [future, future])
+
+    def test_fs_executor(self):
+        """Test the executor an FS creates for itself"""
+        fs = MemoryFS()
+        fs.async_workers = 1
+        executor = fs.getexecutor()
+        self.assert_(fs.getexecutor() is executor)
+        self.assertEqual(executor.max_workers, 1)
+        fs.setcontents_async("a", b"data").result()
+        fs.close()
+        self.assertRaises(FSClosedError, executor.submit, lambda fs: None)
+
+    def test_fs_collected(self):
+        """Test that workers don't keep an unused FS alive"""
+        threads = threading.activeCount()
+        fs_refs = []
+        for i in range(50):
+            fs = MemoryFS()
+            fs.setcontents_async("a", b"data").result()
+            fs_refs.append(weakref.ref(fs))
+        del fs
+        gc.collect()
+        self.assertEqual([fs_ref() for fs_ref in fs_refs], [None] * 50)
+        #  A worker may be the one to close the filesystem, and then it stops
+        #  on its own
+        for i in range(50):
+            if threading.activeCount() == threads:
+                break
+            time.sleep(0.1)
+        self.assertEqual(threading.activeCount(), threads)
+
+    def test_clone_error(self):
+        class FailingFS(MemoryFS):
+            def _worker_clone(self):
+                raise RemoteConnectionError("no connection")
+        fs = FailingFS()
+        executor = FSExecutor(fs, max_workers=1)
+        futures = [executor.submit(lambda fs: None) for i in range(3)]
+        for future in futures:
+            self.assertRaises(RemoteConnectionError, future.result, 5)
+        executor.shutdown()
+        fs.close()
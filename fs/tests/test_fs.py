@@ -9,11 +9,15 @@ from fs.path import *
 from fs import errors
 
 import unittest
+import threading
+
+from six import b
 
 import os
 import sys
 import shutil
 import tempfile
+import datetime
 
 
 from fs import osfs
@@ -38,6 +42,32 @@ class TestOSFS(unittest.TestCase,FSTestCases,ThreadingTestCases):
         self.assert_(self.fs.isvalidpath('validfile'))
         self.assert_(self.fs.isvalidpath('completely_valid/path/foo.bar'))
 
+    def test_listdirinfo_stats(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        self.fs.makedir("d")
+        info = dict(self.fs.listdirinfo())
+        self.assertEqual(info["a.txt"]["size"], 5)
+        self.assertEqual(info["a.txt"]["st_mode"], self.fs.getinfo("a.txt")["st_mode"])
+        self.assertEqual(info["a.txt"]["modified_time"], self.fs.getinfo("a.txt")["modified_time"])
+        self.assertEqual([p for p, _ in self.fs.ilistdirinfo(dirs_only=True)], ["d"])
+        self.assertEqual(self.fs.listdir(files_only=True, absolute=True), ["/a.txt"])
+
+    if osfs._scandir is not None:
+        def test_listdirinfo_errors(self):
+            #  A dangling symlink gets the info of the link
+            if hasattr(os, "symlink"):
+                os.symlink("nowhere", os.path.join(self.temp_dir, "link"))
+                link_size = os.lstat(os.path.join(self.temp_dir, "link")).st_size
+                self.assertEqual(dict(self.fs.listdirinfo())["link"]["size"], link_size)
+                _dirs, files = self.fs._listdir_split("/", info=True)
+                self.assertEqual(dict(files)["link"]["size"], link_size)
+                os.remove(os.path.join(self.temp_dir, "link"))
+            #  Other errors are raised, rather than giving empty info
+            self.fs.setcontents("gone.txt", b("hello"))
+            infos = self.fs.ilistdirinfo()
+            self.fs.remove("gone.txt")
+            self.assertRaises(errors.ResourceNotFoundError, list, infos)
+
 
 class TestSubFS(unittest.TestCase,FSTestCases,ThreadingTestCases):
 
@@ -63,6 +93,207 @@ class TestMemoryFS(unittest.TestCase,FSTestCases,ThreadingTestCases):
     def setUp(self):
         self.fs = memoryfs.MemoryFS()
 
+    def test_entry_size(self):
+        self.fs.setcontents("a", b("hello"))
+        self.assertEqual(self.fs.getsize("a"), 5)
+        f = self.fs.open("a", "r+b")
+        try:
+            f.seek(8)
+            f.write(b("world"))
+            self.assertEqual(self.fs.getsize("a"), 13)
+            f.truncate(10)
+            self.assertEqual(self.fs.getsize("a"), 10)
+        finally:
+            f.close()
+        self.assertEqual(self.fs.getcontents("a"), b("hello\0\0\0wo"))
+        f = self.fs.open("a", "rb")
+        try:
+            buf = bytearray(4)
+            self.assertEqual(f.readinto(buf), 4)
+            self.assertEqual(buf, bytearray(b("hell")))
+        finally:
+            f.close()
+
+    def test_entry_storage(self):
+        data = b("x") * 100
+        self.fs.setcontents("a", data)
+        entry = self.fs._get_dir_entry("a")
+        #  The contents are kept without a copy until they are written to
+        self.assertTrue(entry.data is data)
+        self.assertTrue(self.fs.getcontents("a") is data)
+        self.assertEqual(entry._lock, None)
+        self.assertEqual(entry._xattrs, None)
+        self.assertFalse(hasattr(entry, "__dict__"))
+        f = self.fs.open("a", "ab")
+        f.write(b("y"))
+        f.close()
+        self.assertEqual(data, b("x") * 100)
+        self.assertEqual(self.fs.getcontents("a"), data + b("y"))
+
+    def test_clone(self):
+        self.fs.makedir("dir")
+        self.fs.setcontents("dir/a", b("hello"))
+        self.fs.setcontents("b", b("world"))
+        f = self.fs.open("dir/a", "ab")
+        f.write(b("!"))
+        clone = self.fs.clone()
+        self.assertEqual(type(clone._lock), type(self.fs._lock))
+        #  The clone shares the entries until they're changed
+        self.assertTrue(clone.root is self.fs.root)
+        self.assertTrue(clone._get_dir_entry("dir/a") is self.fs._get_dir_entry("dir/a"))
+        clone.setcontents("dir/a", b("changed"))
+        clone.makedir("dir/sub")
+        clone.remove("b")
+        self.fs.setxattr("b", "key", "value")
+        f.write(b("?"))
+        f.close()
+        self.assertEqual(self.fs.getcontents("dir/a"), b("hello!?"))
+        self.assertEqual(sorted(self.fs.listdir()), ["b", "dir"])
+        self.assertEqual(self.fs.listdir("dir"), ["a"])
+        self.assertEqual(clone.getcontents("dir/a"), b("changed"))
+        self.assertEqual(clone.listdir(), ["dir"])
+        self.assertEqual(sorted(clone.listdir("dir")), ["a", "sub"])
+        #  Files written to after cloning are copied, not changed in place
+        clone2 = clone.clone()
+        f = clone2.open("dir/a", "r+b")
+        f.write(b("C"))
+        f.close()
+        self.assertEqual(clone.getcontents("dir/a"), b("changed"))
+        self.assertEqual(clone2.getcontents("dir/a"), b("Changed"))
+
+    def test_snapshot(self):
+        self.fs.setcontents("a", b("hello"))
+        f = self.fs.open("a", "r+b")
+        snapshot = self.fs.snapshot()
+        f.write(b("j"))
+        f.close()
+        self.fs.rename("a", "b")
+        self.assertEqual(self.fs.getcontents("b"), b("jello"))
+        self.assertEqual(snapshot.listdir(), ["a"])
+        self.assertEqual(snapshot.getcontents("a"), b("hello"))
+        self.assertRaises(errors.UnsupportedError, snapshot.setcontents, "a", b("x"))
+
+    def test_pread(self):
+        self.fs.setcontents("a", b("hello world"))
+        f = self.fs.open("a", "r+b")
+        try:
+            f.seek(2)
+            self.assertEqual(f.pread(5, 6), b("world"))
+            self.assertEqual(f.tell(), 2)
+            f.write(b("L"))
+            self.assertEqual(f.pread(4, 0), b("heLl"))
+            self.assertEqual(f.pread(4, 20), b(""))
+        finally:
+            f.close()
+
+    def test_reads_without_lock(self):
+        self.fs.makedir("dir")
+        self.fs.setcontents("dir/a", b("hello"))
+        results = []
+        def read():
+            results.append(self.fs.getinfo("dir/a")["size"])
+            results.append(self.fs.listdir("dir"))
+            results.append(self.fs.getcontents("dir/a"))
+            f = self.fs.open("dir/a", "rb")
+            results.append(f.pread(3, 1))
+            f.close()
+        self.fs._lock.acquire()
+        try:
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+            #  While the tree is being changed, readers wait for the lock
+            self.fs._changes += 1
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+            self.fs._changes += 1
+        finally:
+            self.fs._lock.release()
+        thread.join(10)
+        self.assertEqual(results, [5, ["a"], b("hello"), b("ell")] * 2)
+
+    def test_image(self):
+        self.fs.makedir("dir/sub", recursive=True)
+        self.fs.setcontents("dir/a", b("hello"))
+        self.fs.setcontents("dir/sub/b", b("world\nagain"))
+        self.fs.setcontents("empty", b(""))
+        self.fs.setxattr("dir/a", "key", "value")
+        self.fs.settimes("dir", modified_time=datetime.datetime(2010, 1, 1, 12, 30))
+        temp_dir = tempfile.mkdtemp(u"fstest")
+        try:
+            image_path = os.path.join(temp_dir, "cache.img")
+            self.fs.save_image(image_path)
+            image_fs = memoryfs.MemoryFS.load_image(image_path)
+            #  Contents are read from the image when they're first used
+            self.assertEqual(image_fs._get_dir_entry("dir/a").data, None)
+            self.assertEqual(image_fs.getsize("dir/sub/b"), 11)
+            self.assertEqual(sorted(image_fs.listdir()), ["dir", "empty"])
+            self.assertEqual(sorted(image_fs.listdir("dir")), ["a", "sub"])
+            self.assertEqual(image_fs.getcontents("dir/a"), b("hello"))
+            self.assertEqual(image_fs.getcontents("empty"), b(""))
+            self.assertEqual(image_fs.getxattr("dir/a", "key"), "value")
+            self.assertEqual(image_fs.getinfo("dir")["modified_time"], datetime.datetime(2010, 1, 1, 12, 30))
+            f = image_fs.open("dir/sub/b", "r+b")
+            self.assertEqual(f.readline(), b("world\n"))
+            f.write(b("A"))
+            f.close()
+            self.assertEqual(image_fs.getcontents("dir/sub/b"), b("world\nAgain"))
+            #  Saving over the image leaves FSs loaded from it unchanged
+            self.fs.remove("dir/a")
+            self.fs.save_image(image_path)
+            self.assertEqual(image_fs.getcontents("dir/sub/b"), b("world\nAgain"))
+            self.assertFalse(memoryfs.MemoryFS.load_image(image_path).exists("dir/a"))
+            open(os.path.join(temp_dir, "other"), "wb").close()
+            self.assertRaises(errors.ResourceInvalidError, memoryfs.MemoryFS.load_image, os.path.join(temp_dir, "other"))
+            #  Extended attributes that can't be marshalled are left out
+            self.fs.setxattr("dir/sub/b", "key", "value")
+            self.fs.setxattr("dir/sub/b", "object", object())
+            self.fs.save_image(image_path)
+            image_fs = memoryfs.MemoryFS.load_image(image_path)
+            self.assertEqual(image_fs.listxattrs("dir/sub/b"), ["key"])
+            #  Images saved by other versions of Python are rejected
+            with open(image_path, "r+b") as f:
+                header = list(memoryfs._IMAGE_HEADER.unpack(f.read(memoryfs._IMAGE_HEADER.size)))
+                header[3] += 1
+                f.seek(0)
+                f.write(memoryfs._IMAGE_HEADER.pack(*header))
+            self.assertRaises(errors.ResourceInvalidError, memoryfs.MemoryFS.load_image, image_path)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestMemoryFSImage(TestMemoryFS):
+
+    def setUp(self):
+        template = memoryfs.MemoryFS()
+        template.makedir("template")
+        template.setcontents("template/template.txt", b("template"))
+        self.temp_dir = tempfile.mkdtemp(u"fstest")
+        image_path = os.path.join(self.temp_dir, "template.img")
+        template.save_image(image_path)
+        self.fs = memoryfs.MemoryFS.load_image(image_path)
+        self.assertEqual(self.fs.getcontents("template/template.txt"), b("template"))
+        self.fs.removedir("template", force=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+
+class TestMemoryFSClone(TestMemoryFS):
+
+    def setUp(self):
+        self.template = memoryfs.MemoryFS()
+        self.template.setcontents("template.txt", b("template"))
+        self.fs = self.template.clone()
+        self.fs.remove("template.txt")
+
+    def tearDown(self):
+        self.assertEqual(self.template.listdir(), ["template.txt"])
+        self.assertEqual(self.template.getcontents("template.txt"), b("template"))
+
 
 from fs import mountfs
 class TestMountFS(unittest.TestCase,FSTestCases,ThreadingTestCases):
@@ -86,6 +86,17 @@ class TestFTPFS(unittest.TestCase, FSTestCases, ThreadingTestCases):
         check_path = self.temp_dir.rstrip(os.sep) + os.sep + p
         return os.path.exists(check_path.encode('utf-8'))
 
+    def test_parallel_walk(self):
+        from fs.utils import parallel_walk
+        for d in ("a/b", "a/c", "d/e/f"):
+            self.fs.makedir(d, recursive=True)
+            self.fs.setcontents(pathjoin(d, "x.txt"), "x")
+        worker_fs = self.fs._worker_clone()
+        self.assert_(worker_fs is not self.fs)
+        worker_fs.close()
+        self.assertEqual(sorted(parallel_walk(self.fs, workers=3)),
+                         sorted(self.fs.walk()))
+
 
 if __name__ == "__main__":
 
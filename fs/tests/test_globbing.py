@@ -0,0 +1,166 @@
+"""
+
+  fs.tests.test_globbing:  testcases for the fs.globbing module
+
+"""
+
+import os
+import unittest
+import tempfile
+import shutil
+
+from fs.base import FS
+from fs.globbing import GlobPattern, compile_glob, compile_wildcard
+from fs.memoryfs import MemoryFS
+from fs.zipfs import ZipFS
+try:
+    from fs.contrib.sqlitefs import SqliteFS
+except ImportError:
+    SqliteFS = None
+
+import six
+
+
+class CountingMemoryFS(MemoryFS):
+    """A MemoryFS that records the directories it has listed"""
+
+    def __init__(self):
+        super(CountingMemoryFS, self).__init__()
+        self.listed = []
+
+    def _listdir_split(self, path, info=False):
+        self.listed.append(path)
+        return super(CountingMemoryFS, self)._listdir_split(path, info=info)
+
+
+class TestGlobPattern(unittest.TestCase):
+
+    def test_match(self):
+        pattern = GlobPattern("src/**/test_*.py")
+        self.assertTrue(pattern.match("src/test_a.py"))
+        self.assertTrue(pattern.match("src/a/b/test_b.py"))
+        self.assertFalse(pattern.match("src/a/b/other.py"))
+        self.assertFalse(pattern.match("lib/test_a.py"))
+        self.assertFalse(pattern.match("src"))
+        self.assertTrue(GlobPattern("*").match("a"))
+        self.assertFalse(GlobPattern("*").match("a/b"))
+        self.assertTrue(GlobPattern("a/**").match("a"))
+        self.assertTrue(GlobPattern("a/**/**").match("a/b/c"))
+        self.assertFalse(GlobPattern("").match("a"))
+
+    def test_pruning(self):
+        pattern = GlobPattern("src/*/test_*.py")
+        states = pattern.start()
+        self.assertEqual(pattern.next_literal(states), "src")
+        self.assertFalse(pattern.advance(states, "lib"))
+        states = pattern.advance(states, "src")
+        self.assertEqual(pattern.next_literal(states), None)
+        states = pattern.advance(states, "a")
+        self.assertTrue(pattern.can_descend(states))
+        states = pattern.advance(states, "test_a.py")
+        self.assertTrue(pattern.is_match(states))
+        self.assertFalse(pattern.can_descend(states))
+
+    def test_prefix(self):
+        self.assertEqual(GlobPattern("src/**/test_*.py").prefix, "src")
+        self.assertEqual(GlobPattern("src/**").prefix, "src")
+        self.assertEqual(GlobPattern("src/test_*.py").prefix, "src/test_")
+        self.assertEqual(GlobPattern("*.py").prefix, "")
+        self.assertEqual(GlobPattern("/a/b").prefix, "a/b")
+
+    def test_cache(self):
+        self.assertTrue(compile_glob("a/*") is compile_glob("a/*"))
+        pattern = GlobPattern("a/*")
+        self.assertTrue(compile_glob(pattern) is pattern)
+        self.assertTrue(compile_wildcard("*.txt") is compile_wildcard("*.txt"))
+        self.assertTrue(compile_wildcard("*.txt")("a.txt"))
+        self.assertFalse(compile_wildcard("*.txt")("a.py"))
+        func = lambda name: True
+        self.assertTrue(compile_wildcard(func) is func)
+
+
+class TestGlob(unittest.TestCase):
+
+    def test_pruning(self):
+        fs = CountingMemoryFS()
+        for i in range(20):
+            fs.makedir("lib/d%i/sub" % i, recursive=True)
+            fs.makedir("src/d%i/sub" % i, recursive=True)
+            fs.setcontents("src/d%i/sub/test_%i.py" % (i, i), b"")
+        self.assertEqual(len(fs.glob("src/d1*/*/test_*.py")), 11)
+        #  Only src, the 11 directories in it that match d1*, and their
+        #  subdirectories are listed
+        self.assertEqual(sorted(fs.listed)[:2], ["/src", "/src/d1"])
+        self.assertEqual(len(fs.listed), 23)
+        self.assertFalse([p for p in fs.listed if p.startswith("/lib")])
+        del fs.listed[:]
+        self.assertEqual(fs.glob("src/d3/sub/test_3.py"), ["/src/d3/sub/test_3.py"])
+        self.assertEqual(fs.listed, [])
+
+
+class TestGlobPushDown(unittest.TestCase):
+    """Check that the filesystems that search by the prefix of a pattern
+    find the same paths as searching directory by directory"""
+
+    patterns = [("src/**", "/"),
+                ("**", "/"),
+                ("src/*", "/"),
+                ("s*/**", "/"),
+                ("src/**/test_*.py", "/"),
+                ("*/test_*.py", "/"),
+                ("**/b", "/"),
+                ("src/a", "/"),
+                ("src/a/b/other.py", "/"),
+                ("nope/*", "/"),
+                ("src/test_top.py/*", "/"),
+                ("**", "/src"),
+                ("a/**", "/src")]
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(u"fstest")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _make_tree(self, fs):
+        fs.makedir("src/a/b", recursive=True)
+        fs.makedir("docs")
+        fs.makedir("srcs")
+        fs.setcontents("srcs/c.txt", b"0")
+        fs.setcontents("src/test_top.py", b"1")
+        fs.setcontents("src/a/test_a.py", b"2")
+        fs.setcontents("src/a/b/test_b.py", b"3")
+        fs.setcontents("src/a/b/other.py", b"4")
+        fs.setcontents("docs/test_doc.py", b"5")
+
+    def _check(self, fs):
+        memory_fs = MemoryFS()
+        self._make_tree(memory_fs)
+        for pattern, path in self.patterns:
+            expected = sorted(memory_fs.glob(pattern, path))
+            searched = sorted(FS._iglob(fs, compile_glob(pattern), path))
+            pushed_down = sorted(fs.glob(pattern, path))
+            self.assertEqual(searched, expected, (pattern, path))
+            self.assertEqual(pushed_down, expected, (pattern, path))
+            for match in pushed_down + searched + expected:
+                self.assertTrue(isinstance(match, six.text_type), (pattern, match))
+
+    def test_zipfs(self):
+        zip_path = os.path.join(self.temp_dir, "test.zip")
+        zip_fs = ZipFS(zip_path, "w")
+        self._make_tree(zip_fs)
+        zip_fs.close()
+        zip_fs = ZipFS(zip_path)
+        try:
+            self._check(zip_fs)
+        finally:
+            zip_fs.close()
+
+    if SqliteFS:
+        def test_sqlitefs(self):
+            sqlite_fs = SqliteFS(os.path.join(self.temp_dir, "test.db"))
+            try:
+                self._make_tree(sqlite_fs)
+                self._check(sqlite_fs)
+            finally:
+                sqlite_fs.close()
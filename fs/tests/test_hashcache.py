@@ -0,0 +1,125 @@
+"""
+
+  fs.tests.test_hashcache:  testcases for the fs.hashcache module
+
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+from fs.hashcache import HashCache, SqliteHashCache
+from fs.memoryfs import MemoryFS
+
+
+class CountingMemoryFS(MemoryFS):
+    """A MemoryFS that counts how many files it has had to read"""
+
+    def __init__(self):
+        super(CountingMemoryFS, self).__init__()
+        self.reads = 0
+
+    def _gethash(self, path, algorithm):
+        self.reads += 1
+        return super(CountingMemoryFS, self)._gethash(path, algorithm)
+
+
+class HashCacheCases(object):
+    """Tests for any hash cache, in self.cache"""
+
+    def test_get_set(self):
+        cache = self.cache
+        self.assertEqual(cache.get("/a", "md5", 1, "t1"), None)
+        cache.set("/a", "md5", 1, "t1", "abc")
+        self.assertEqual(cache.get("/a", "md5", 1, "t1"), "abc")
+        self.assertEqual(cache.get("/a", "sha1", 1, "t1"), None)
+        self.assertEqual(cache.get("/a", "md5", 2, "t1"), None)
+        self.assertEqual(cache.get("/a", "md5", 1, "t2"), None)
+        cache.set("/a", "md5", 2, "t2", "def")
+        self.assertEqual(cache.get("/a", "md5", 2, "t2"), "def")
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(cache.get("/a", "md5", 2, "t2"), None)
+
+    def test_fs_cache(self):
+        fs = CountingMemoryFS()
+        fs.hash_cache = self.cache
+        fs.setcontents("a", b"data")
+        digest = hashlib.md5(b"data").hexdigest()
+        self.assertEqual(fs.gethash("a"), digest)
+        self.assertEqual(fs.gethash("a"), digest)
+        self.assertEqual(fs.reads, 1)
+        fs.setcontents("a", b"more data")
+        self.assertEqual(fs.gethash("a"), hashlib.md5(b"more data").hexdigest())
+        self.assertEqual(fs.reads, 2)
+
+
+class TestHashCache(unittest.TestCase, HashCacheCases):
+
+    def setUp(self):
+        self.cache = HashCache(max_entries=8)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_max_entries(self):
+        cache = self.cache
+        for i in range(8):
+            cache.set("/%i" % i, "md5", 1, "t", str(i))
+        #  Using the first entry makes it the most recently used
+        self.assertEqual(cache.get("/0", "md5", 1, "t"), "0")
+        cache.set("/8", "md5", 1, "t", "8")
+        self.assert_(len(cache) <= 8)
+        self.assertEqual(cache.get("/0", "md5", 1, "t"), "0")
+        self.assertEqual(cache.get("/8", "md5", 1, "t"), "8")
+        self.assertEqual(cache.get("/1", "md5", 1, "t"), None)
+
+
+class TestSqliteHashCache(unittest.TestCase, HashCacheCases):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(u"fstest")
+        self.cache = SqliteHashCache(os.path.join(self.temp_dir, "digests.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_persistence(self):
+        self.cache.set("/a", "md5", 1, "t1", "abc")
+        self.cache.close()
+        self.cache = SqliteHashCache(self.cache.filename)
+        self.assertEqual(self.cache.get("/a", "md5", 1, "t1"), "abc")
+
+    def test_batched_commits(self):
+        cache = self.cache
+        cache.commit_every = 3
+        other = SqliteHashCache(cache.filename)
+        try:
+            cache.set("/a", "md5", 1, "t1", "abc")
+            cache.set("/b", "md5", 1, "t1", "def")
+            self.assertEqual(len(other), 0)
+            cache.set("/c", "md5", 1, "t1", "ghi")
+            self.assertEqual(len(other), 3)
+            cache.set("/d", "md5", 1, "t1", "jkl")
+            self.assertEqual(len(other), 3)
+            cache.flush()
+            self.assertEqual(other.get("/d", "md5", 1, "t1"), "jkl")
+        finally:
+            other.close()
+
+    def test_find_duplicates_flush(self):
+        from fs.utils import find_duplicates
+        self.cache.commit_every = 1000
+        fs = MemoryFS()
+        fs.setcontents("a", b"data")
+        fs.setcontents("b", b"data")
+        self.assertEqual(sorted(map(sorted, find_duplicates(fs, index=self.cache))),
+                         [["/a", "/b"]])
+        other = SqliteHashCache(self.cache.filename)
+        try:
+            self.assertEqual(len(other), 2)
+        finally:
+            other.close()
@@ -0,0 +1,102 @@
+"""
+
+  fs.tests.test_info:  testcases for the fs.info module
+
+"""
+
+import os
+import stat
+import pickle
+import datetime
+import tempfile
+import unittest
+import zipfile
+
+from fs.info import StatInfo, ZipInfoInfo
+
+
+class TestStatInfo(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp()
+        os.write(fd, b"hello")
+        os.close(fd)
+        self.stats = os.stat(self.filename)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_values(self):
+        info = StatInfo(self.stats)
+        self.assertEqual(info["size"], 5)
+        self.assertEqual(info["st_size"], 5)
+        self.assertEqual(info["st_mode"], self.stats.st_mode)
+        self.assertEqual(info["modified_time"],
+                         datetime.datetime.fromtimestamp(self.stats.st_mtime))
+        self.assertTrue(isinstance(info["accessed_time"], datetime.datetime))
+        self.assertRaises(KeyError, lambda: info["nope"])
+        self.assertRaises(KeyError, lambda: info["st_nope"])
+        self.assertEqual(info.get("nope", 1), 1)
+        self.assertTrue("size" in info)
+        self.assertFalse("nope" in info)
+
+    def test_dict(self):
+        info = StatInfo(self.stats)
+        info_dict = dict(info)
+        self.assertEqual(sorted(info.keys()), sorted(info_dict))
+        self.assertEqual(len(info), len(info_dict))
+        self.assertEqual(info, info_dict)
+        self.assertEqual(dict(info.items()), info_dict)
+        self.assertEqual(info.copy(), info_dict)
+        for key in ("size", "modified_time", "st_mtime", "st_mode"):
+            self.assert_(key in info_dict)
+
+    def test_modify(self):
+        info = StatInfo(self.stats)
+        info["size"] = 10
+        info["extra"] = "x"
+        del info["st_mode"]
+        self.assertEqual(info["size"], 10)
+        self.assertEqual(info["extra"], "x")
+        self.assertFalse("st_mode" in info)
+        self.assertFalse("st_mode" in info.keys())
+        self.assertEqual(dict(info)["extra"], "x")
+        self.assertEqual(self.stats.st_size, 5)
+        self.assertRaises(KeyError, info.__delitem__, "st_mode")
+        self.assertEqual(info.pop("extra"), "x")
+        self.assertEqual(info.setdefault("extra", "y"), "y")
+
+    def test_attributes(self):
+        info = StatInfo(self.stats, ["st_size", "st_mtime"])
+        self.assertEqual(sorted(k for k in info if k.startswith("st_")),
+                         ["st_mtime", "st_size"])
+        self.assertRaises(KeyError, lambda: info["st_mode"])
+
+    def test_pickle(self):
+        info = StatInfo(self.stats)
+        unpickled = pickle.loads(pickle.dumps(info))
+        self.assertTrue(isinstance(unpickled, dict))
+        self.assertEqual(unpickled, dict(info))
+
+
+class TestZipInfoInfo(unittest.TestCase):
+
+    def test_values(self):
+        zi = zipfile.ZipInfo("a.txt", (2012, 2, 28, 13, 20, 10))
+        zi.file_size = 5
+        zi.external_attr = 0644 << 16
+        info = ZipInfoInfo(zi)
+        self.assertEqual(info["size"], 5)
+        self.assertEqual(info["file_size"], 5)
+        self.assertEqual(info["filename"], "a.txt")
+        self.assertEqual(info["created_time"], datetime.datetime(2012, 2, 28, 13, 20, 10))
+        self.assertEqual(info["st_mode"], 0644)
+        self.assertTrue("compress_type" in dict(info))
+        zi.external_attr = 0
+        self.assertFalse("st_mode" in ZipInfoInfo(zi))
+
+    def test_directory(self):
+        info = ZipInfoInfo(None)
+        self.assertEqual(info["size"], 0)
+        self.assertTrue(stat.S_ISDIR(info["st_mode"]))
+        self.assertEqual(dict(info), {"size": 0, "file_size": 0, "st_mode": info["st_mode"]})
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 from fs import iotools
+from fs.filelike import StringIO
 
 import io
 import unittest
@@ -54,3 +55,112 @@ class TestIOTools(unittest.TestCase):
         with o.open('file', 'rt') as f:
             text = f.read()
             self.assert_(isinstance(text, unicode))
+
+    def test_copyfile_syspath(self):
+        """Test copyfile_syspath with each copy method"""
+        import os
+        import shutil
+        import tempfile
+        temp_dir = tempfile.mkdtemp()
+        try:
+            src = join(temp_dir, 'src')
+            dst = join(temp_dir, 'dst')
+            data = os.urandom(300 * 1024)
+            with io.open(src, 'wb') as f:
+                f.write(data)
+            copiers = iotools._copiers
+            try:
+                for i in range(len(copiers), -1, -1):
+                    iotools._copiers = copiers[i:]
+                    with io.open(dst, 'wb') as f:
+                        f.write(b'stale data that is longer than nothing')
+                    iotools.copyfile_syspath(src, dst, chunk_size=1000)
+                    with io.open(dst, 'rb') as f:
+                        self.assertEqual(f.read(), data)
+            finally:
+                iotools._copiers = copiers
+            self.assertRaises(shutil.Error, iotools.copyfile_syspath, src, src)
+            #  The destination is left alone if src can't be copied
+            os.mkdir(join(temp_dir, 'dir'))
+            self.assertRaises(EnvironmentError, iotools.copyfile_syspath, join(temp_dir, 'dir'), dst)
+            with io.open(dst, 'rb') as f:
+                self.assertEqual(f.read(), data)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_copy_stream(self):
+        """Test copy_stream reuses its buffer safely"""
+        data = b''.join(bytes(bytearray([i % 256])) for i in range(10000))
+
+        class ListFile(object):
+            """A file that keeps whatever it is given"""
+            def __init__(self):
+                self.chunks = []
+
+            def write(self, chunk):
+                self.chunks.append(chunk)
+
+        dst = io.BytesIO()
+        progress = []
+        copied = iotools.copy_stream(io.BytesIO(data), dst, 1000, progress.append)
+        self.assertEqual(copied, len(data))
+        self.assertEqual(dst.getvalue(), data)
+        self.assertEqual(progress, list(range(1000, 10001, 1000)))
+
+        dst = ListFile()
+        iotools.copy_stream(io.BytesIO(data), dst, 999)
+        self.assertEqual(b''.join(dst.chunks), data)
+        self.assert_(max(len(chunk) for chunk in dst.chunks) <= 999)
+
+        #  Files without readinto are copied with read
+        class ReadFile(object):
+            def __init__(self, data):
+                self.f = io.BytesIO(data)
+
+            def read(self, size=-1):
+                return self.f.read(size)
+
+        dst = ListFile()
+        iotools.copy_stream(ReadFile(data), dst, 999)
+        self.assertEqual(b''.join(dst.chunks), data)
+
+        #  ...and wrappers read in to the buffer from what they wrap
+        dst = io.BytesIO()
+        iotools.copy_stream(iotools.RawWrapper(ReadFile(data)), dst, 999)
+        self.assertEqual(dst.getvalue(), data)
+        dst = io.BytesIO()
+        iotools.copy_stream(StringIO(data), dst, 999)
+        self.assertEqual(dst.getvalue(), data)
+
+    def test_stream_buffer_size(self):
+        """Test small files aren't read in to a whole chunk"""
+        buffer_sizes = []
+
+        class SizesFile(io.BytesIO):
+            def readinto(self, b):
+                buffer_sizes.append(len(b))
+                return io.BytesIO.readinto(self, b)
+
+        chunk_size = 8 * 1024 * 1024
+        iotools.copy_stream(SizesFile(b'x' * 10), io.BytesIO(), chunk_size)
+        self.assertEqual(buffer_sizes, [64 * 1024, 64 * 1024])
+        del buffer_sizes[:]
+        data = b'x' * 200000
+        dst = io.BytesIO()
+        iotools.copy_stream(SizesFile(data), dst, chunk_size)
+        self.assertEqual(dst.getvalue(), data)
+        self.assertEqual(buffer_sizes, [64 * 1024, chunk_size, chunk_size])
+        del buffer_sizes[:]
+        iotools.hash_stream(SizesFile(b'x' * 10), 'md5', chunk_size)
+        self.assertEqual(max(buffer_sizes), 64 * 1024)
+
+    def test_hash_stream(self):
+        """Test hash_stream with and without readinto"""
+        import hashlib
+        data = b'x' * 10000 + b'y'
+        expected = hashlib.sha1(data).hexdigest()
+        self.assertEqual(iotools.hash_stream(io.BytesIO(data), 'sha1', 999), expected)
+        self.assertEqual(iotools.hash_stream(StringIO(data), 'sha1', 999), expected)
+        self.assertEqual(iotools.hash_stream(io.BytesIO(b''), 'md5'),
+                         hashlib.md5().hexdigest())
+        self.assertRaises(ValueError, iotools.hash_stream, io.BytesIO(data), 'nosuchhash')
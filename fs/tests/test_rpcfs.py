@@ -98,3 +98,14 @@ class TestRPCFS(unittest.TestCase, FSTestCases, ThreadingTestCases):
             finally:
                 if sock is not None:
                     sock.close()
+
+    def test_multicall(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        self.fs.makedir("dir")
+        self.fs.multicall_size = 2
+        infos = self.fs.getinfo_many(["a.txt", "dir", "missing"])
+        self.assertTrue(self.fs._multicall_supported)
+        self.assertEqual(infos[0]["size"], 5)
+        self.assertEqual(infos[2], None)
+        self.assertEqual(self.fs.isdir_many(["a.txt", "dir", "missing"]),
+                         [False, True, False])
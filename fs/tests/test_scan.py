@@ -0,0 +1,49 @@
+"""
+
+  fs.tests.test_scan:  testcases for the fs.scan module
+
+"""
+
+import os
+import math
+import time
+import datetime
+import unittest
+
+from fs.scan import scan_batches, numpy
+from fs.info import StatInfo
+
+
+class TestScanBatches(unittest.TestCase):
+
+    def test_infos(self):
+        mtime = datetime.datetime(2012, 2, 28, 13, 20, 10)
+        items = [("/a", {"size": 10, "modified_time": mtime, "st_mode": 0644}),
+                 ("/b", {"size": 20}),
+                 ("/c", {})]
+        batch, = scan_batches(items, use_numpy=False)
+        self.assertEqual(batch.paths, ["/a", "/b", "/c"])
+        self.assertEqual(list(batch["size"]), [10, 20, -1])
+        self.assertEqual(list(batch["mode"]), [0644, -1, -1])
+        self.assertEqual(batch["mtime"][0], time.mktime(mtime.timetuple()))
+        self.assertTrue(math.isnan(batch["mtime"][1]))
+
+    def test_stat(self):
+        stats = os.stat(__file__)
+        batch, = scan_batches([("/f", StatInfo(stats))], ("size", "mtime", "ctime"), use_numpy=False)
+        self.assertEqual(list(batch.rows()),
+                         [("/f", stats.st_size, stats.st_mtime, stats.st_ctime)])
+
+    def test_batches(self):
+        items = (("/%i" % i, {"size": i}) for i in xrange(25))
+        batches = list(scan_batches(items, ("size",), batch_size=10, use_numpy=False))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual(sum(sum(batch["size"]) for batch in batches), sum(xrange(25)))
+        self.assertRaises(ValueError, scan_batches, [], ("nope",))
+        self.assertRaises(ValueError, scan_batches, [], batch_size=0)
+
+    if numpy is not None:
+        def test_numpy(self):
+            batch, = scan_batches([("/a", {"size": 10}), ("/b", {"size": 20})], use_numpy=True)
+            self.assertTrue(isinstance(batch["size"], numpy.ndarray))
+            self.assertEqual(batch["size"].sum(), 30)
@@ -0,0 +1,112 @@
+"""
+
+  fs.tests.test_sharedmemoryfs:  testcases for the SharedMemoryFS class
+
+"""
+
+import os
+import unittest
+import pickle
+import multiprocessing
+
+from fs.tests import FSTestCases, ThreadingTestCases
+from fs.sharedmemoryfs import SharedMemoryFS
+from fs.errors import *
+
+import six
+from six import b
+
+
+def _read_file(args):
+    fs, path = args
+    return fs.getcontents(path, "rb")
+
+
+def _write_file(args):
+    fs, path = args
+    fs.setcontents(path, b(path))
+    return fs.listdir("/")
+
+
+class TestSharedMemoryFS(unittest.TestCase, FSTestCases, ThreadingTestCases):
+
+    def setUp(self):
+        self.fs = SharedMemoryFS(size=64 * 1024 * 1024)
+
+    def tearDown(self):
+        self.fs.close()
+
+    def test_attach(self):
+        self.fs.makedir("dir")
+        self.fs.setcontents("dir/a.txt", b("hello"))
+        other = SharedMemoryFS(self.fs.arena_path)
+        try:
+            self.assertEqual(other.getcontents("dir/a.txt", "rb"), b("hello"))
+            other.setcontents("b.txt", b("world"))
+            other.rename("dir", "moved")
+        finally:
+            other.close()
+        #  The arena isn't removed by an FS that attached to it
+        self.assertTrue(os.path.exists(self.fs.arena_path))
+        self.assertEqual(sorted(self.fs.listdir()), [u"b.txt", u"moved"])
+        self.assertEqual(self.fs.getcontents("moved/a.txt", "rb"), b("hello"))
+
+    def test_read_only_arena(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        other = SharedMemoryFS(self.fs.arena_path, read_only=True)
+        try:
+            self.assertTrue(other.getmeta("read_only"))
+            self.assertEqual(other.getcontents("a.txt", "rb"), b("hello"))
+            self.assertRaises(UnsupportedError, other.setcontents, "b.txt", b("world"))
+            self.assertRaises(UnsupportedError, other.makedir, "dir")
+            self.fs.setcontents("b.txt", b("world"))
+            self.assertEqual(other.getcontents("b.txt", "rb"), b("world"))
+        finally:
+            other.close()
+
+    def test_getview(self):
+        self.fs.setcontents("a.txt", b("hello world"))
+        view = self.fs.getview("a.txt")
+        self.assertEqual(len(view), 11)
+        self.assertEqual(bytes(view[6:]) if six.PY3 else view[6:], b("world"))
+        #  Replacing the file doesn't change the view
+        self.fs.setcontents("a.txt", b("goodbye"))
+        self.assertEqual(bytes(view[:5]) if six.PY3 else view[:5], b("hello"))
+        del view
+        self.assertRaises(ResourceInvalidError, self.fs.getview, "/")
+
+    def test_arena_full(self):
+        fs = SharedMemoryFS(size=4096)
+        try:
+            self.assertRaises(StorageSpaceError, fs.setcontents, "big", b("x") * 8192)
+            self.assertFalse(fs.exists("big"))
+            fs.setcontents("small", b("x") * 100)
+            self.assertTrue(fs.arena_used < 4096)
+        finally:
+            fs.close()
+
+    def test_processes(self):
+        for i in range(8):
+            self.fs.setcontents("f%i" % i, b(str(i)) * 1000)
+        pool = multiprocessing.Pool(2)
+        try:
+            paths = ["f%i" % i for i in range(8)]
+            results = pool.map(_read_file, [(self.fs, path) for path in paths])
+            self.assertEqual(results, [b(str(i)) * 1000 for i in range(8)])
+            pool.map(_write_file, [(self.fs, "w%i" % i) for i in range(8)])
+        finally:
+            pool.close()
+            pool.join()
+        for i in range(8):
+            self.assertEqual(self.fs.getcontents("w%i" % i, "rb"), b("w%i" % i))
+
+    def test_pickle_attaches(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        other = pickle.loads(pickle.dumps(self.fs))
+        try:
+            self.assertEqual(other.arena_path, self.fs.arena_path)
+            other.setcontents("a.txt", b("world"))
+            self.assertEqual(self.fs.getcontents("a.txt", "rb"), b("world"))
+        finally:
+            other.close()
+        self.assertTrue(os.path.exists(self.fs.arena_path))
@@ -0,0 +1,117 @@
+"""
+
+  fs.tests.test_spooledmemoryfs:  testcases for the SpooledMemoryFS class
+
+"""
+
+import unittest
+import pickle
+
+from fs.tests import FSTestCases, ThreadingTestCases
+from fs.spooledmemoryfs import SpooledMemoryFS
+from fs.memoryfs import MemoryFS
+from fs.errors import *
+
+from six import b
+
+
+class TestSpooledMemoryFS(unittest.TestCase, FSTestCases, ThreadingTestCases):
+
+    def setUp(self):
+        #  Small enough that the standard tests move files in and out
+        self.fs = SpooledMemoryFS(memory_limit=64 * 1024, spill_size=1024)
+
+    def tearDown(self):
+        self.fs.close()
+
+    def test_spill(self):
+        for i in xrange(4):
+            self.fs.setcontents("f%i" % i, b(str(i)) * 20000)
+        self.fs.setcontents("small", b("small"))
+        #  The least recently used files were spilled to make room
+        self.assertEqual(self.fs.resident_bytes, 60000)
+        self.assertEqual(self.fs.spilled_bytes, 20000)
+        self.assertEqual(self.fs._get_dir_entry("f0").data, None)
+        self.assertEqual(self.fs.getsize("f0"), 20000)
+        #  Reading a spilled file moves it back, spilling another
+        self.assertEqual(self.fs.getcontents("f0"), b("0") * 20000)
+        self.assertEqual(self.fs._get_dir_entry("f1").data, None)
+        usage = self.fs.getusage()
+        self.assertEqual(usage["spills"], 2)
+        self.assertEqual(usage["page_ins"], 1)
+        self.assertEqual(usage["resident_bytes"] + usage["spilled_bytes"], 80000)
+        f = self.fs.open("f1", "r+b")
+        try:
+            f.seek(19999)
+            f.write(b("xy"))
+        finally:
+            f.close()
+        self.assertEqual(self.fs.getcontents("f1"), b("1") * 19999 + b("xy"))
+        self.assertEqual(self.fs.getcontents("small"), b("small"))
+
+    def test_spilled_remove(self):
+        for i in xrange(4):
+            self.fs.setcontents("f%i" % i, b("x") * 20000)
+        backing_fs = self.fs._spool.backing_fs
+        self.assertEqual(len(backing_fs.listdir()), 1)
+        self.fs.remove("f0")
+        self.fs.remove("f1")
+        self.assertEqual(self.fs.resident_bytes, 40000)
+        self.assertEqual(self.fs.spilled_bytes, 0)
+        self.assertEqual(backing_fs.listdir(), [])
+        self.fs.setcontents("f2", b("x"))
+        self.assertEqual(self.fs.resident_bytes, 20000)
+
+    def test_spilled_too_big(self):
+        #  A file bigger than the limit is read and written where it's spilled
+        f = self.fs.open("big", "wb")
+        try:
+            for i in xrange(10):
+                f.write(b(str(i)) * 10000)
+        finally:
+            f.close()
+        self.assertEqual(self.fs.resident_bytes, 0)
+        self.assertEqual(self.fs.spilled_bytes, 100000)
+        f = self.fs.open("big", "rb")
+        try:
+            f.seek(9999)
+            self.assertEqual(f.read(2), b("01"))
+            buf = bytearray(3)
+            self.assertEqual(f.readinto(buf), 3)
+            self.assertEqual(buf, bytearray(b("111")))
+        finally:
+            f.close()
+        self.assertEqual(self.fs.getusage()["page_ins"], 0)
+        f = self.fs.open("big", "r+b")
+        try:
+            f.truncate(1000)
+        finally:
+            f.close()
+        self.assertEqual(self.fs.getcontents("big"), b("0") * 1000)
+        self.assertEqual(self.fs.spilled_bytes, 0)
+
+    def test_spilled_too_big_alone(self):
+        #  Writing a file that can't fit doesn't spill the files that can
+        for i in xrange(3):
+            self.fs.setcontents("f%i" % i, b("x") * 20000)
+        self.fs.setcontents("big", b("x") * 100000)
+        self.assertEqual(self.fs.resident_bytes, 60000)
+        self.assertEqual(self.fs.spilled_bytes, 100000)
+        self.assertEqual(self.fs.getusage()["spills"], 1)
+
+    def test_spilled_backing_fs(self):
+        backing_fs = MemoryFS()
+        self.fs.close()
+        self.fs = SpooledMemoryFS(memory_limit=10000, spill_size=1000, backing_fs=backing_fs)
+        self.fs.setcontents("a", b("a") * 8000)
+        self.fs.setcontents("b", b("b") * 8000)
+        self.assertEqual(len(backing_fs.listdir()), 1)
+        fs2 = pickle.loads(pickle.dumps(self.fs))
+        self.assertEqual(fs2.getcontents("a"), b("a") * 8000)
+        self.assertEqual(fs2.resident_bytes + fs2.spilled_bytes, 16000)
+        self.fs.close()
+        self.assertEqual(backing_fs.listdir(), [])
+
+    def test_no_clone(self):
+        self.assertRaises(UnsupportedError, self.fs.clone)
+        self.assertRaises(UnsupportedError, SpooledMemoryFS.load_image, "image")
@@ -0,0 +1,152 @@
+"""
+
+  fs.tests.test_trace:  testcases for the fs.trace module
+
+"""
+
+import unittest
+
+from fs import trace
+from fs.tempfs import TempFS
+from fs.remote import RemoteFileBuffer
+
+from six import b
+
+
+class RecordingHook(trace.TraceHook):
+
+    def __init__(self):
+        self.events = []
+
+    def span_started(self, span):
+        self.events.append(("start", span.name, span.path))
+
+    def span_ended(self, span):
+        self.events.append(("end", span.name, span.path, span.bytes))
+
+    def ended(self, name):
+        return [event for event in self.events
+                if event[0] == "end" and event[1] == name]
+
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.fs = TempFS()
+        self.hook = RecordingHook()
+        trace.add_hook(self.hook)
+
+    def tearDown(self):
+        trace.remove_hook(self.hook)
+        self.fs.close()
+
+    def test_no_hooks(self):
+        trace.remove_hook(self.hook)
+        try:
+            span = trace.span(self.fs, "test")
+            self.assertFalse(isinstance(span, trace.Span))
+            with span:
+                with trace.phase("wait"):
+                    span.add_bytes(10)
+                    trace.add_bytes(10)
+            self.fs.setcontents("a.txt", b("hello"))
+        finally:
+            trace.add_hook(self.hook)
+        self.assertEqual(self.hook.events, [])
+
+    def test_nesting(self):
+        with trace.span(self.fs, "outer", "/a") as outer:
+            with trace.phase("transfer") as transfer:
+                self.assertTrue(transfer.parent is outer)
+                self.assertEqual(transfer.name, "TempFS.outer:transfer")
+                self.assertEqual(transfer.path, "/a")
+                trace.add_bytes(10)
+            with trace.span(None, "inner") as inner:
+                self.assertTrue(inner.parent is outer)
+                trace.add_bytes(5)
+        self.assertEqual(outer.bytes, 10)
+        self.assertEqual(transfer.bytes, 10)
+        self.assertEqual(inner.bytes, 5)
+        self.assertTrue(outer.duration >= outer.child_time >= transfer.duration)
+        self.assertEqual(self.hook.events,
+                         [("start", "TempFS.outer", "/a"),
+                          ("start", "TempFS.outer:transfer", "/a"),
+                          ("end", "TempFS.outer:transfer", "/a", 10),
+                          ("start", "inner", None),
+                          ("end", "inner", None, 5),
+                          ("end", "TempFS.outer", "/a", 10)])
+
+    def test_error(self):
+        try:
+            with trace.span(self.fs, "fail") as span:
+                raise ValueError("test")
+        except ValueError:
+            pass
+        self.assertEqual(span.error, ValueError)
+        #  A phase needs an operation to be part of
+        self.assertFalse(isinstance(trace.phase("outside"), trace.Span))
+
+    def test_fs_operations(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        self.assertEqual(self.fs.getcontents("a.txt", "rb"), b("hello"))
+        self.fs.makedir("dir")
+        self.fs.setcontents("dir/b.txt", b("world!"))
+        self.fs.copydir("dir", "copy")
+        self.assertEqual(self.hook.ended("TempFS.setcontents")[0], ("end", "TempFS.setcontents", "a.txt", 5))
+        self.assertEqual(self.hook.ended("TempFS.getcontents"), [("end", "TempFS.getcontents", "a.txt", 5)])
+        self.assertEqual(self.hook.ended("TempFS.copydir"), [("end", "TempFS.copydir", "dir", 0)])
+
+    def test_remote_file_buffer(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        f = RemoteFileBuffer(self.fs, "a.txt", "r+b", self.fs.open("a.txt", "rb"))
+        f.seek(0, 2)
+        f.write(b(" world"))
+        f.close()
+        self.assertEqual(self.fs.getcontents("a.txt", "rb"), b("hello world"))
+        self.assertEqual(self.hook.ended("TempFS.download"), [("end", "TempFS.download", "a.txt", 5)])
+        uploads = self.hook.ended("TempFS.upload")
+        self.assertTrue(uploads)
+        for upload in uploads:
+            self.assertEqual(upload, ("end", "TempFS.upload", "a.txt", 11))
+
+    def test_traced(self):
+        class Thing(object):
+            @trace.traced()
+            def method(self, path, value):
+                return value
+        self.assertEqual(Thing().method("/a", 1), 1)
+        self.assertEqual(self.hook.ended("Thing.method"), [("end", "Thing.method", "/a", 0)])
+
+
+class TestSlowSpanSampler(unittest.TestCase):
+
+    def run_spans(self, sampler):
+        trace.add_hook(sampler)
+        try:
+            with trace.span(None, "read", "/a"):
+                with trace.phase("connect"):
+                    pass
+                with trace.phase("transfer"):
+                    pass
+            with trace.span(None, "write", "/a"):
+                pass
+        finally:
+            trace.remove_hook(sampler)
+
+    def test_sampler(self):
+        sampler = trace.SlowSpanSampler(threshold=0)
+        self.run_spans(sampler)
+        self.assertEqual(sampler.samples, 2)
+        lines = sampler.folded().splitlines()
+        self.assertEqual([line.split(" ")[0] for line in lines],
+                         ["read", "read;read:connect", "read;read:transfer", "write"])
+        for line in lines:
+            self.assertTrue(int(line.split(" ")[1]) >= 0)
+        sampler.clear()
+        self.assertEqual(sampler.folded(), "")
+
+    def test_threshold(self):
+        sampler = trace.SlowSpanSampler(threshold=60)
+        self.run_spans(sampler)
+        self.assertEqual(sampler.samples, 0)
+        self.assertEqual(sampler.folded(), "")
@@ -1,8 +1,12 @@
 import unittest
+import datetime
+import socket
 
 from fs.tempfs import TempFS
 from fs.memoryfs import MemoryFS
 from fs import utils
+from fs.path import pathjoin
+from fs.errors import ResourceNotFoundError
 
 from six import b
 
@@ -113,3 +117,170 @@ class TestUtils(unittest.TestCase):
         self.assert_(fs.isdirempty('/'))
     
     
+
+    def test_parallel_walk(self):
+        """Test parallel_walk matches walk"""
+        fs = MemoryFS()
+        self._make_fs(fs)
+        fs.makedir("foo/baz/qux", recursive=True)
+        fs.setcontents("foo/baz/qux/a.txt", b("a"))
+        fs.setcontents("foo/baz/b.txt", b("b"))
+
+        walked = list(fs.walk())
+        self.assertEqual(list(utils.parallel_walk(fs, ordered=True)), walked)
+        self.assertEqual(sorted(utils.parallel_walk(fs, workers=3)), sorted(walked))
+        self.assertEqual(sorted(utils.parallel_walk(fs, "foo", wildcard="*.txt", dir_wildcard="*/baz*")),
+                         sorted(fs.walk("foo", wildcard="*.txt", dir_wildcard="*/baz*")))
+        for dir_path, files in utils.parallel_walk(fs, info=True):
+            for name, info in files:
+                self.assertEqual(info["size"], fs.getsize(pathjoin(dir_path, name)))
+        self.assertRaises(ResourceNotFoundError, list, utils.parallel_walk(fs, "nope"))
+
+        #  Failing to clone the filesystem is raised, not waited on
+        class NoCloneFS(MemoryFS):
+            def _worker_clone(self):
+                raise socket.error("no connection")
+        fs = NoCloneFS()
+        self._make_fs(fs)
+        self.assertRaises(socket.error, list, utils.parallel_walk(fs, workers=2))
+        self.assertRaises(socket.error, list, utils.parallel_walk(fs, ordered=True, ignore_errors=True))
+
+    def test_copydir_parallel(self):
+        """Test copydir_parallel between filesystems"""
+        fs1 = MemoryFS()
+        fs2 = TempFS()
+        self._make_fs(fs1)
+        progress = []
+        def report(files, bytes, rate):
+            progress.append((files, bytes))
+        errors = utils.copydir_parallel((fs1, "/"), (fs2, "copy"), workers=3, progress=report)
+        self.assertEqual(errors, [])
+        self._check_fs(fs2.opendir("copy"))
+        self.assertEqual(max(progress), (4, 23))
+
+        fs2.makedir("copy2")
+        fs2.setcontents("copy2/f1", b("existing"))
+        errors = utils.copydir_parallel(fs1, (fs2, "copy2"), overwrite=False)
+        self.assertEqual([path for path, e in errors], ["/f1"])
+        self.assertEqual(fs2.getcontents("copy2/f1"), b("existing"))
+        self.assertEqual(fs2.getcontents("copy2/foo/bar/fruit"), b("apple"))
+
+        #  Errors from the progress callback aren't taken for copy errors
+        def fail(files, bytes, rate):
+            raise ValueError("stop")
+        self.assertRaises(ValueError, utils.copydir_parallel, fs1, (fs2, "copy3"), workers=2, progress=fail)
+
+        utils.movedir((fs2, "copy"), fs1.makeopendir("moved"), workers=2)
+        self.assert_(not fs2.exists("copy"))
+        self._check_fs(fs1.opendir("moved"))
+        fs2.close()
+
+    def test_copydir_parallel_clone_error(self):
+        """Test copydir_parallel when workers can't clone the filesystem"""
+        class NoCloneFS(MemoryFS):
+            def _worker_clone(self):
+                raise socket.error("no connection")
+        fs1 = NoCloneFS()
+        fs2 = NoCloneFS()
+        self._make_fs(fs1)
+        errors = utils.copydir_parallel(fs1, fs2, workers=2)
+        self.assertEqual(errors, [])
+        self._check_fs(fs2)
+
+    def test_copydir_parallel_same_fs(self):
+        """Test copydir_parallel within a filesystem uses its copy and move"""
+        calls = []
+        class CountingFS(MemoryFS):
+            def copy(self, src, dst, **kwargs):
+                calls.append("copy")
+                return super(CountingFS, self).copy(src, dst, **kwargs)
+            def move(self, src, dst, **kwargs):
+                calls.append("move")
+                return super(CountingFS, self).move(src, dst, **kwargs)
+        fs = CountingFS()
+        self._make_fs(fs.makeopendir("src"))
+        utils.copydir((fs, "src"), (fs, "copy"), workers=2)
+        self._check_fs(fs.opendir("copy"))
+        self.assertEqual(calls, ["copy"] * 4)
+        del calls[:]
+        utils.movedir((fs, "copy"), (fs, "moved"), workers=2)
+        self._check_fs(fs.opendir("moved"))
+        self.assert_(not fs.exists("copy"))
+        self.assertEqual(calls.count("move"), 4)
+
+    def test_sync(self):
+        """Test sync and mirror"""
+        fs1 = MemoryFS()
+        fs2 = MemoryFS()
+        self._make_fs(fs1)
+        plan = utils.sync(fs1, fs2)
+        self._check_fs(fs2)
+        self.assertEqual(sorted(action for action, path in plan),
+                         ["copy", "copy", "copy", "copy", "makedir", "makedir"])
+        self.assertEqual(utils.sync(fs1, fs2), [])
+
+        fs1.setcontents("f1", b("changed"))
+        fs1.setcontents("foo/new", b("new"))
+        fs2.setcontents("extra", b("extra"))
+        plan = utils.sync(fs1, fs2, dry_run=True)
+        self.assertEqual(sorted(plan), [("copy", "/foo/new"), ("update", "/f1")])
+        self.assertEqual(fs2.getcontents("f1"), b("file 1"))
+
+        fs1.setcontents("f2", b("FILE 2"))
+        self.assertEqual(utils.sync(fs1, fs2, compare="size", workers=2),
+                         [("update", "/f1"), ("copy", "/foo/new")])
+        self.assertEqual(fs2.getcontents("f2"), b("file 2"))
+        self.assertEqual(utils.sync(fs1, fs2, compare="hash"), [("update", "/f2")])
+        self.assertEqual(fs2.getcontents("f2"), b("FILE 2"))
+        self.assert_(fs2.exists("extra"))
+
+        fs2.makedir("gone/deeper", recursive=True)
+        plan = utils.mirror(fs1, (fs2, "/"))
+        self.assertEqual(sorted(plan), [("remove", "/extra"), ("removedir", "/gone")])
+        self.assertEqual(sorted(fs2.listdir()), sorted(fs1.listdir()))
+
+        #  A destination file that is newer is still replaced if it differs
+        fs2.setcontents("f1", b("CHANGES"))
+        fs2.settimes("f1", modified_time=datetime.datetime.now() + datetime.timedelta(hours=1))
+        self.assertEqual(utils.sync(fs1, fs2), [("update", "/f1")])
+        self.assertEqual(fs2.getcontents("f1"), b("changed"))
+        self.assertEqual(fs2.getinfo("f1")["modified_time"], fs1.getinfo("f1")["modified_time"])
+        self.assertEqual(utils.sync(fs1, fs2), [])
+
+    def test_find_duplicates(self):
+        """Test find_duplicates with and without an index"""
+        from fs.hashcache import HashCache
+        fs = MemoryFS()
+        self._make_fs(fs)
+        fs.setcontents("f4", b("file 1"))
+        fs.setcontents("foo/f5", b("file 1"))
+        fs.setcontents("foo/f6", b("file 2"))
+        #  Same size and start as f1, but different contents
+        fs.setcontents("f7", b("file 7"))
+
+        def found(*args, **kwargs):
+            return sorted(sorted(dups) for dups in utils.find_duplicates(fs, *args, **kwargs))
+
+        expected = [["/f1", "/f4", "/foo/f5"], ["/f2", "/foo/f6"]]
+        self.assertEqual(found(), expected)
+        self.assertEqual(found(workers=3, signature_size=2, signature_chunk_size=1), expected)
+        self.assertEqual(found(["f1", "f4", "f7"]), [["f1", "f4"]])
+        self.assertEqual(found(["f1", "f7"], quick=True, signature_size=4, signature_chunk_size=4),
+                         [["f1", "f7"]])
+        self.assertRaises(ResourceNotFoundError, found, ["f1", "nope"])
+
+        index = HashCache()
+        self.assertEqual(found(index=index), expected)
+        #  f3 and f7 are told apart from the others by their signatures
+        self.assertEqual(len(index), 5)
+        fs.setcontents("f8", b("file 2"))
+        reads = []
+        gethash = fs.gethash
+        fs.gethash = lambda path, algorithm: reads.append(path) or gethash(path, algorithm)
+        expected = [["/f1", "/f4", "/foo/f5"], ["/f2", "/f8", "/foo/f6"]]
+        self.assertEqual(found(index=index, workers=2), expected)
+        self.assertEqual(sorted(reads), ["/f3", "/f7", "/f8"])
+        #  Files in the index aren't read again
+        del reads[:]
+        self.assertEqual(found(index=index), expected)
+        self.assertEqual(reads, [])
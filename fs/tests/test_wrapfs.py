@@ -11,12 +11,14 @@ import os
 import sys
 import shutil
 import tempfile
+import time
 
 from fs import osfs
 from fs.errors import * 
 from fs.path import *
-from fs.utils import remove_all
+from fs.utils import remove_all, copyfile
 from fs import wrapfs
+from fs.memoryfs import MemoryFS
 
 import six
 from six import PY3, b
@@ -37,6 +39,30 @@ class TestWrapFS(unittest.TestCase, FSTestCases, ThreadingTestCases):
         return os.path.exists(os.path.join(self.temp_dir, relpath(p)))
 
 
+class NativeHashFS(MemoryFS):
+    """A MemoryFS that gets digests without reading files, as S3FS does"""
+
+    def _gethash(self, path, algorithm):
+        return "native-" + algorithm
+
+
+class TestWrapFSHash(unittest.TestCase):
+
+    def test_native_digest(self):
+        fs = wrapfs.WrapFS(NativeHashFS())
+        fs.setcontents("a.txt", b("hello"))
+        self.assertEquals(fs.gethash("a.txt", "sha1"), "native-sha1")
+
+    def test_wrapped_contents(self):
+        #  A wrapper that may change the contents of files has to read them
+        class FileWrapFS(wrapfs.WrapFS):
+            def _file_wrap(self, f, mode):
+                return f
+        fs = FileWrapFS(NativeHashFS())
+        fs.setcontents("a.txt", b("hello"))
+        self.assertEquals(fs.gethash("a.txt"), "5d41402abc4b2a76b9719d911017c592")
+
+
 from fs.wrapfs.lazyfs import LazyFS
 class TestLazyFS(unittest.TestCase, FSTestCases, ThreadingTestCases):
     
@@ -78,7 +104,170 @@ class TestLimitSizeFS(TestWrapFS):
                 self.assertTrue(total_written < 1024*1024*2 + 1030)
                 break
         else:
-            self.assertTrue(False,"StorageSpaceError not raised")           
+            self.assertTrue(False,"StorageSpaceError not raised")
+
+    def test_open_file_size(self):
+        self.fs.setcontents("b", b("B")*10)
+        f = self.fs.open("a", "wb")
+        try:
+            f.write(b("A")*100)
+            #  Files open for writing count for what they have reserved
+            self.assertEquals(self.fs._get_cur_size(), 110)
+            self.assertEquals(self.fs._get_cur_size(), self.fs.cur_size)
+        finally:
+            f.close()
+
+
+from fs.wrapfs.metricsfs import MetricsFS, LatencyHistogram
+class TestMetricsFS(TestWrapFS):
+
+    def setUp(self):
+        super(TestMetricsFS,self).setUp()
+        self.fs = MetricsFS(self.fs, name="test")
+
+    def test_metrics(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        f = self.fs.open("a.txt", "rb")
+        try:
+            self.assertEquals(f.read(2), b("he"))
+            self.assertEquals(f.read(), b("llo"))
+        finally:
+            f.close()
+        self.assertRaises(ResourceNotFoundError, self.fs.getinfo, "missing")
+        self.fs.getinfo("a.txt")
+        metrics = self.fs.to_dict()
+        self.assertEquals(metrics["name"], "test")
+        self.assertEquals(metrics["bytes_written"], 5)
+        self.assertEquals(metrics["bytes_read"], 5)
+        self.assertEquals(metrics["files_opened"], 1)
+        getinfo = metrics["methods"]["getinfo"]
+        self.assertEquals(getinfo["calls"], 2)
+        self.assertEquals(getinfo["errors"], 1)
+        self.assertTrue(0 < getinfo["p50"] <= getinfo["p99"] <= getinfo["max_time"])
+        self.assertEquals(metrics["methods"]["setcontents"]["calls"], 1)
+        snapshot = self.fs.snapshot(reset=True)
+        self.assertEquals(snapshot.methods["open"].calls, 1)
+        self.assertEquals(self.fs.to_dict()["methods"], {})
+        self.assertEquals(self.fs.to_dict()["bytes_read"], 0)
+
+    def test_setcontents_file(self):
+        self.fs.setcontents("a.txt", six.BytesIO(b("x") * 1000))
+        self.assertEquals(self.fs.snapshot().bytes_written, 1000)
+
+    def test_read_streams(self):
+        self.fs.setcontents("a.txt", b("x") * 100000)
+        self.fs.reset()
+        self.fs.gethash("a.txt")
+        self.assertEquals(self.fs.snapshot(reset=True).bytes_read, 100000)
+        copyfile(self.fs, "a.txt", MemoryFS(), "b.txt")
+        self.assertEquals(self.fs.snapshot(reset=True).bytes_read, 100000)
+        f = self.fs.open("a.txt", "rb")
+        try:
+            self.assertEquals(f.next(), b("x") * 100000)
+        finally:
+            f.close()
+        self.assertEquals(self.fs.snapshot().bytes_read, 100000)
+
+    def test_prometheus(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        self.fs.getcontents("a.txt", "rb")
+        text = self.fs.to_prometheus()
+        lines = text.splitlines()
+        self.assertTrue('pyfs_calls_total{fs="test",method="getcontents"} 1' in lines)
+        self.assertTrue('pyfs_call_duration_seconds_bucket{fs="test",method="open",le="+Inf"} 1' in lines)
+        self.assertTrue('pyfs_call_duration_seconds_count{fs="test",method="open"} 1' in lines)
+        self.assertTrue('pyfs_read_bytes_total{fs="test"} 5' in lines)
+        self.assertTrue('# TYPE pyfs_call_duration_seconds histogram' in lines)
+
+    def test_histogram(self):
+        histogram = LatencyHistogram()
+        self.assertEquals(histogram.percentile(50), None)
+        for i in xrange(1, 101):
+            histogram.add(i / 1000.0)
+        self.assertEquals(histogram.count, 100)
+        self.assertEquals(histogram.max, 0.1)
+        for percent, expected in ((50, 0.05), (95, 0.095), (99, 0.099)):
+            value = histogram.percentile(percent)
+            self.assertTrue(expected <= value <= expected * 1.2, (percent, value))
+
+
+from fs.wrapfs.statcachefs import StatCacheFS
+from fs.watch import WatchableFS, OVERFLOW
+class TestStatCacheFS(TestWrapFS):
+
+    def setUp(self):
+        super(TestStatCacheFS,self).setUp()
+        self.fs = StatCacheFS(self.fs, ttl=60)
+
+    def test_stat_cache(self):
+        self.fs.setcontents("a.txt", b("hello"))
+        self.assertTrue(self.fs.exists("a.txt"))
+        self.assertTrue(self.fs.isfile("a.txt"))
+        self.assertFalse(self.fs.isdir("a.txt"))
+        self.assertEquals(self.fs.listdir(), ["a.txt"])
+        self.assertEquals(self.fs.listdir(), ["a.txt"])
+        stats = self.fs.getstats()
+        self.assertEquals((stats["hits"], stats["misses"]), (3, 2))
+        #  Changes made through the wrapper are seen straight away
+        f = self.fs.open("a.txt", "ab")
+        f.write(b(" world"))
+        f.flush()
+        self.assertEquals(self.fs.getsize("a.txt"), 11)
+        f.close()
+        self.fs.remove("a.txt")
+        self.assertFalse(self.fs.exists("a.txt"))
+        self.assertEquals(self.fs.listdir(), [])
+
+    def test_stat_cache_ttl(self):
+        memory_fs = MemoryFS()
+        cache_fs = StatCacheFS(memory_fs, ttl=0.1)
+        self.assertFalse(cache_fs.watched)
+        self.assertFalse(cache_fs.exists("a"))
+        memory_fs.setcontents("a", b("hello"))
+        self.assertFalse(cache_fs.exists("a"))
+        time.sleep(0.2)
+        self.assertTrue(cache_fs.exists("a"))
+
+
+class TestStatCacheFSWatched(TestWrapFS):
+
+    def setUp(self):
+        super(TestStatCacheFSWatched,self).setUp()
+        self.watched_fs = WatchableFS(self.fs)
+        self.fs = StatCacheFS(self.watched_fs)
+
+    def test_stat_cache_events(self):
+        self.assertTrue(self.fs.watched)
+        self.assertFalse(self.fs.exists("a.txt"))
+        self.assertEquals(self.fs.listdir(), [])
+        #  Changes made around the cache are seen through its watcher
+        self.watched_fs.setcontents("a.txt", b("hello"))
+        self.assertEquals(self.fs.getsize("a.txt"), 5)
+        self.assertEquals(self.fs.listdir(), ["a.txt"])
+        self.watched_fs.setcontents("a.txt", b("hello world"))
+        self.assertEquals(self.fs.getsize("a.txt"), 11)
+        self.watched_fs.makedir("dir")
+        self.watched_fs.rename("a.txt", "dir/b.txt")
+        self.assertFalse(self.fs.exists("a.txt"))
+        self.assertEquals(self.fs.listdir("dir"), ["b.txt"])
+        self.assertTrue(self.fs.getstats()["invalidations"] > 0)
+
+    def test_stat_cache_created(self):
+        self.fs.exists("new/a.txt")
+        self.fs.exists("new")
+        #  Creating a path only drops its own entry, not those below it
+        self.watched_fs.makedir("new")
+        self.assertTrue("/new/a.txt" in self.fs._infos)
+        self.assertFalse("/new" in self.fs._infos)
+        self.assertTrue(self.fs.isdir("new"))
+
+    def test_stat_cache_overflow(self):
+        self.fs.exists("a.txt")
+        self.watched_fs.notify_watchers(OVERFLOW)
+        stats = self.fs.getstats()
+        self.assertFalse(stats["watched"])
+        self.assertEquals(stats["overflows"], 1)
+        self.assertEquals(stats["entries"], 0)
 
 
 from fs.wrapfs.hidedotfilesfs import HideDotFilesFS
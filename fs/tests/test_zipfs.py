@@ -90,6 +90,13 @@ class TestReadZipFS(unittest.TestCase):
         check_listing('foo', ['second.txt', 'bar'])
         check_listing('foo/bar', ['baz.txt'])
 
+    def test_glob(self):
+        self.assertEqual(sorted(self.fs.glob('*.txt')), ['/1.txt', '/a.txt', '/b.txt'])
+        self.assertEqual(sorted(self.fs.glob('foo/**/*.txt')),
+                         ['/foo/bar/baz.txt', '/foo/second.txt'])
+        self.assertEqual(self.fs.glob('f*/b*'), ['/foo/bar'])
+        self.assertEqual(self.fs.glob('*.txt', 'foo/bar'), ['/foo/bar/baz.txt'])
+
 
 class TestWriteZipFS(unittest.TestCase):
 
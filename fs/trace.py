@@ -0,0 +1,328 @@
+"""
+fs.trace
+========
+
+Hooks for tracing the operations done by filesystems.
+
+The built-in filesystems mark out the work they do as *spans*: an operation
+such as `setcontents` on a path, divided into *phases* such as waiting for
+a connection and transferring data.  Each span records the filesystem class,
+the operation, the path, the amount of data transferred and how long it
+took.  Spans nest, so an operation that uses other operations is the parent
+of their spans.
+
+Objects registered with :func:`add_hook` are told when each span starts and
+ends.  While no hooks are registered, spans are not created at all and
+tracing costs next to nothing.  For example, to find slow FTP transfers::
+
+    >>> from fs import trace
+    >>> sampler = trace.SlowSpanSampler(threshold=0.5)
+    >>> trace.add_hook(sampler)
+    >>> ftp_fs.getcontents("big.iso")
+    >>> trace.remove_hook(sampler)
+    >>> sampler.dump(open("ftp.folded", "w"))
+
+The dumped stacks are in the "folded" format read by flamegraph.pl and
+speedscope.
+
+Filesystems add spans with :func:`span` and :func:`phase`::
+
+    def setcontents(self, path, data=b'', ...):
+        with trace.span(self, "setcontents", path) as span:
+            with trace.phase("connect"):
+                connection = self._connect()
+            with trace.phase("transfer"):
+                connection.send(data)
+            span.add_bytes(len(data))
+
+"""
+
+from __future__ import with_statement
+
+import threading
+from timeit import default_timer
+
+from fs.local_functools import wraps
+
+__all__ = ['TraceHook',
+           'Span',
+           'SlowSpanSampler',
+           'add_hook',
+           'remove_hook',
+           'span',
+           'phase',
+           'add_bytes',
+           'traced']
+
+
+#  The registered hooks.  This is replaced rather than modified, so that it
+#  can be read without a lock.
+_hooks = ()
+_hooks_lock = threading.Lock()
+
+_local = threading.local()
+
+
+class TraceHook(object):
+    """Base class for trace hooks.
+
+    Hooks may be called from any thread, and should be quick, as they are
+    called for every span.
+
+    """
+
+    def span_started(self, span):
+        """Called when a span starts."""
+        pass
+
+    def span_ended(self, span):
+        """Called when a span ends; its `duration` and `error` are set."""
+        pass
+
+
+def add_hook(hook):
+    """Start calling a `TraceHook` for each span."""
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook):
+    """Stop calling a hook added with `add_hook`."""
+    global _hooks
+    with _hooks_lock:
+        hooks = list(_hooks)
+        hooks.remove(hook)
+        _hooks = tuple(hooks)
+
+
+def _current_span():
+    stack = getattr(_local, "stack", None)
+    if stack:
+        return stack[-1]
+    return None
+
+
+class Span(object):
+    """An operation, or a phase of one, being traced.
+
+    :attr backend: the name of the FS class, or None
+    :attr operation: the name of the operation
+    :attr path: the path operated on, or None
+    :attr phase: the name of the phase, or None if the span is an operation
+    :attr parent: the span this one is nested in, or None
+    :attr bytes: the amount of data transferred
+    :attr start: the time the span started, from `timeit.default_timer`
+    :attr duration: the time the span took, in seconds, once it has ended
+    :attr child_time: the time spent in the spans nested in this one
+    :attr error: the type of exception the span ended with, or None
+
+    """
+
+    __slots__ = ('backend', 'operation', 'path', 'phase', 'parent', 'bytes',
+                 'start', 'duration', 'child_time', 'error', '_hooks')
+
+    def __init__(self, backend, operation, path=None, phase=None):
+        self.backend = backend
+        self.operation = operation
+        self.path = path
+        self.phase = phase
+        self.parent = None
+        self.bytes = 0
+        self.start = None
+        self.duration = None
+        self.child_time = 0.0
+        self.error = None
+
+    def __repr__(self):
+        return "<Span %s %r>" % (self.name, self.path)
+
+    @property
+    def name(self):
+        """The name of the span, e.g. "FTPFS.setcontents:connect"."""
+        if self.backend is None:
+            name = self.operation
+        else:
+            name = "%s.%s" % (self.backend, self.operation)
+        if self.phase is not None:
+            name = "%s:%s" % (name, self.phase)
+        return name
+
+    def add_bytes(self, count):
+        """Count data transferred by the span."""
+        self.bytes += count
+
+    def __enter__(self):
+        try:
+            stack = _local.stack
+        except AttributeError:
+            stack = _local.stack = []
+        if stack:
+            self.parent = stack[-1]
+        stack.append(self)
+        #  Call the hooks that were registered when the span was created,
+        #  so that a span never ends without having started
+        self._hooks = _hooks
+        for hook in self._hooks:
+            hook.span_started(self)
+        self.start = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = default_timer() - self.start
+        self.error = exc_type
+        _local.stack.pop()
+        if self.parent is not None:
+            self.parent.child_time += self.duration
+        for hook in self._hooks:
+            hook.span_ended(self)
+        return False
+
+
+class _NullSpan(object):
+    """Stands in for a span while there are no hooks."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def add_bytes(self, count):
+        pass
+
+_null_span = _NullSpan()
+
+
+def span(fs, operation, path=None):
+    """Get a span for an operation, to use in a with statement.
+
+    :param fs: the FS doing the operation, or None
+    :param operation: the name of the operation
+    :param path: the path operated on, if any
+
+    """
+    if not _hooks:
+        return _null_span
+    if fs is None:
+        return Span(None, operation, path)
+    return Span(fs.__class__.__name__, operation, path)
+
+
+def phase(name, path=None):
+    """Get a span for a phase of the current operation, to use in a with
+    statement.  The span has the backend, operation and (by default) the
+    path of the span it is in, and does nothing if there is none.
+
+    :param name: the name of the phase, e.g. "connect" or "transfer"
+
+    """
+    if not _hooks:
+        return _null_span
+    current = _current_span()
+    if current is None:
+        return _null_span
+    if path is None:
+        path = current.path
+    return Span(current.backend, current.operation, path, name)
+
+
+def add_bytes(count):
+    """Count data transferred by the current span, if there is one.  If the
+    span is a phase, the data is counted by its operation too."""
+    if _hooks:
+        current = _current_span()
+        while current is not None:
+            current.add_bytes(count)
+            if current.phase is None:
+                break
+            current = current.parent
+
+
+def traced(operation=None):
+    """Decorator that traces each call to an FS method as a span.
+
+    The first argument of the method is taken to be the path, if it's a
+    string.
+
+    :param operation: the name of the operation, defaults to the name of
+        the method
+
+    """
+    def decorator(func):
+        name = operation or func.__name__
+
+        @wraps(func)
+        def wrapper(self, *args, **kwds):
+            if not _hooks:
+                return func(self, *args, **kwds)
+            path = None
+            if args and isinstance(args[0], basestring):
+                path = args[0]
+            with span(self, name, path):
+                return func(self, *args, **kwds)
+        return wrapper
+    return decorator
+
+
+class SlowSpanSampler(TraceHook):
+    """Trace hook that records the stacks of slow operations, for drawing
+    flame graphs.
+
+    Only operations that aren't nested in another span are timed against
+    the threshold, and each of those records the stack of every span nested
+    in it, weighted by the time spent in that span itself (in microseconds).
+
+    :param threshold: the time, in seconds, an operation must take to be
+        recorded
+
+    """
+
+    def __init__(self, threshold=0.1):
+        self.threshold = threshold
+        self.stacks = {}
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span_started(self, span):
+        if span.parent is None:
+            self._local.pending = []
+
+    def span_ended(self, span):
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            #  The hook was added part way through the operation
+            return
+        names = []
+        s = span
+        while s is not None:
+            names.append(s.name.replace(";", ":").replace(" ", "_"))
+            s = s.parent
+        names.reverse()
+        self_time = max(span.duration - span.child_time, 0.0)
+        pending.append((";".join(names), int(self_time * 1000000)))
+        if span.parent is None:
+            self._local.pending = None
+            if span.duration >= self.threshold:
+                with self._lock:
+                    self.samples += 1
+                    stacks = self.stacks
+                    for stack, weight in pending:
+                        stacks[stack] = stacks.get(stack, 0) + weight
+
+    def clear(self):
+        """Forget the stacks recorded so far."""
+        with self._lock:
+            self.stacks = {}
+            self.samples = 0
+
+    def folded(self):
+        """Get the recorded stacks in the folded format, as a string."""
+        with self._lock:
+            stacks = sorted(self.stacks.items())
+        return "".join("%s %i\n" % (stack, weight) for stack, weight in stacks)
+
+    def dump(self, f):
+        """Write the recorded stacks to a file in the folded format."""
+        f.write(self.folded())
@@ -12,23 +12,42 @@ __all__ = ['copyfile',
            'movefile',
            'movedir',
            'copydir',
+           'copydir_parallel',
+           'sync',
+           'mirror',
            'countbytes',
            'isfile',
            'isdir',
+           'parallel_walk',
            'find_duplicates',
            'print_fs']
 
 import sys
 import stat
+import time
+import threading
+import Queue as queue
 import six
 
 from fs.mountfs import MountFS
-from fs.path import pathjoin
-from fs.errors import DestinationExistsError, RemoveRootError
+from fs.path import pathjoin, pathcombine, normpath, abspath, relpath, frombase
+from fs.errors import DestinationExistsError, RemoveRootError, ResourceNotFoundError, OperationFailedError, UnsupportedError
 from fs.base import FS
+from fs.globbing import compile_wildcard
+from fs.iotools import copy_stream
+from fs.executor import FSExecutor
+from fs.hashcache import SqliteHashCache, hash_stamp
 
 
-def copyfile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1024):
+def _copy_chunk_size(src_fs, dst_fs, chunk_size=None):
+    """Pick the chunk size for a copy between two filesystems, which is
+    the larger of their preferred sizes unless one was given explicitly."""
+    if chunk_size is not None:
+        return chunk_size
+    return max(src_fs.copy_chunk_size, dst_fs.copy_chunk_size)
+
+
+def copyfile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=None):
     """Copy a file from one filesystem to another. Will use system copyfile, if both files have a syspath.
     Otherwise file will be copied a chunk at a time.
 
@@ -36,15 +55,18 @@ def copyfile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1
     :param src_path: -- Source path
     :param dst_fs: Destination filesystem object
     :param dst_path: Destination filesystem object
-    :param chunk_size: Size of chunks to move if system copyfile is not available (default 64K)
+    :param chunk_size: Size of chunks to move if system copyfile is not available (defaults to
+        the larger `copy_chunk_size` of the two filesystems)
 
     """
 
     # If the src and dst fs objects are the same, then use a direct copy
     if src_fs is dst_fs:
-        src_fs.copy(src_path, dst_path, overwrite=overwrite)
+        src_fs.copy(src_path, dst_path, overwrite=overwrite, chunk_size=chunk_size)
         return
 
+    chunk_size = _copy_chunk_size(src_fs, dst_fs, chunk_size)
+
     src_syspath = src_fs.getsyspath(src_path, allow_none=True)
     dst_syspath = dst_fs.getsyspath(dst_path, allow_none=True)
 
@@ -74,14 +96,15 @@ def copyfile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1
             src_lock.release()
 
 
-def copyfile_non_atomic(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1024):
+def copyfile_non_atomic(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=None):
     """A non atomic version of copyfile (will not block other threads using src_fs or dst_fst)
 
     :param src_fs: Source filesystem object
     :param src_path: -- Source path
     :param dst_fs: Destination filesystem object
     :param dst_path: Destination filesystem object
-    :param chunk_size: Size of chunks to move if system copyfile is not available (default 64K)
+    :param chunk_size: Size of chunks to move if system copyfile is not available (defaults to
+        the larger `copy_chunk_size` of the two filesystems)
 
     """
 
@@ -93,12 +116,7 @@ def copyfile_non_atomic(src_fs, src_path, dst_fs, dst_path, overwrite=True, chun
     try:
         src = src_fs.open(src_path, 'rb')
         dst = dst_fs.open(dst_path, 'wb')
-        write = dst.write
-        read = src.read
-        chunk = read(chunk_size)
-        while chunk:
-            write(chunk)
-            chunk = read(chunk_size)
+        copy_stream(src, dst, _copy_chunk_size(src_fs, dst_fs, chunk_size))
     finally:
         if src is not None:
             src.close()
@@ -106,7 +124,7 @@ def copyfile_non_atomic(src_fs, src_path, dst_fs, dst_path, overwrite=True, chun
             dst.close()
 
 
-def movefile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1024):
+def movefile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=None):
     """Move a file from one filesystem to another. Will use system copyfile, if both files have a syspath.
     Otherwise file will be copied a chunk at a time.
 
@@ -114,7 +132,8 @@ def movefile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1
     :param src_path: Source path
     :param dst_fs: Destination filesystem object
     :param dst_path: Destination filesystem object
-    :param chunk_size: Size of chunks to move if system copyfile is not available (default 64K)
+    :param chunk_size: Size of chunks to move if system copyfile is not available (defaults to
+        the larger `copy_chunk_size` of the two filesystems)
 
     """
     src_syspath = src_fs.getsyspath(src_path, allow_none=True)
@@ -124,9 +143,11 @@ def movefile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1
         raise DestinationExistsError(dst_path)
 
     if src_fs is dst_fs:
-        src_fs.move(src_path, dst_path, overwrite=overwrite)
+        src_fs.move(src_path, dst_path, overwrite=overwrite, chunk_size=chunk_size)
         return
 
+    chunk_size = _copy_chunk_size(src_fs, dst_fs, chunk_size)
+
     # System copy if there are two sys paths
     if src_syspath is not None and dst_syspath is not None:
         FS._shutil_movefile(src_syspath, dst_syspath)
@@ -155,14 +176,15 @@ def movefile(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1
             src_lock.release()
 
 
-def movefile_non_atomic(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=64*1024):
+def movefile_non_atomic(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=None):
     """A non atomic version of movefile (wont block other threads using src_fs or dst_fs)
 
     :param src_fs: Source filesystem object
     :param src_path: Source path
     :param dst_fs: Destination filesystem object
     :param dst_path: Destination filesystem object
-    :param chunk_size: Size of chunks to move if system copyfile is not available (default 64K)
+    :param chunk_size: Size of chunks to move if system copyfile is not available (defaults to
+        the larger `copy_chunk_size` of the two filesystems)
 
     """
 
@@ -175,12 +197,7 @@ def movefile_non_atomic(src_fs, src_path, dst_fs, dst_path, overwrite=True, chun
         # Chunk copy
         src = src_fs.open(src_path, 'rb')
         dst = dst_fs.open(dst_path, 'wb')
-        write = dst.write
-        read = src.read
-        chunk = read(chunk_size)
-        while chunk:
-            write(chunk)
-            chunk = read(chunk_size)
+        copy_stream(src, dst, _copy_chunk_size(src_fs, dst_fs, chunk_size))
     except:
         raise
     else:
@@ -192,7 +209,7 @@ def movefile_non_atomic(src_fs, src_path, dst_fs, dst_path, overwrite=True, chun
             dst.close()
 
 
-def movedir(fs1, fs2, create_destination=True, ignore_errors=False, chunk_size=64*1024):
+def movedir(fs1, fs2, create_destination=True, ignore_errors=False, chunk_size=None, workers=1):
     """Moves contents of a directory from one filesystem to another.
 
     :param fs1: A tuple of (<filesystem>, <directory path>)
@@ -200,11 +217,24 @@ def movedir(fs1, fs2, create_destination=True, ignore_errors=False, chunk_size=6
     :param create_destination: If True, the destination will be created if it doesn't exist
     :param ignore_errors: If True, exceptions from file moves are ignored
     :param chunk_size: Size of chunks to move if a simple copy is used
+    :param workers: Number of files to move at once (see `copydir_parallel`)
 
     """
     if not isinstance(fs1, tuple):
         raise ValueError("first argument must be a tuple of (<filesystem>, <path>)")
 
+    if workers > 1:
+        if fs1[1] in ('', '/'):
+            raise RemoveRootError(fs1[1])
+        errors = copydir_parallel(fs1, fs2,
+                                  create_destination=create_destination,
+                                  workers=workers,
+                                  chunk_size=chunk_size,
+                                  move=True)
+        if errors and not ignore_errors:
+            raise errors[0][1]
+        return
+
     fs1, dir1 = fs1
     parent_fs1 = fs1
     parent_dir1 = dir1
@@ -230,7 +260,7 @@ def movedir(fs1, fs2, create_destination=True, ignore_errors=False, chunk_size=6
     parent_fs1.removedir(parent_dir1, force=True)
 
 
-def copydir(fs1, fs2, create_destination=True, ignore_errors=False, chunk_size=64*1024):
+def copydir(fs1, fs2, create_destination=True, ignore_errors=False, chunk_size=None, workers=1):
     """Copies contents of a directory from one filesystem to another.
 
     :param fs1: Source filesystem, or a tuple of (<filesystem>, <directory path>)
@@ -238,8 +268,18 @@ def copydir(fs1, fs2, create_destination=True, ignore_errors=False, chunk_size=6
     :param create_destination: If True, the destination will be created if it doesn't exist
     :param ignore_errors: If True, exceptions from file moves are ignored
     :param chunk_size: Size of chunks to move if a simple copy is used
+    :param workers: Number of files to copy at once (see `copydir_parallel`)
 
     """
+    if workers > 1:
+        errors = copydir_parallel(fs1, fs2,
+                                  create_destination=create_destination,
+                                  workers=workers,
+                                  chunk_size=chunk_size)
+        if errors and not ignore_errors:
+            raise errors[0][1]
+        return
+
     if isinstance(fs1, tuple):
         fs1, dir1 = fs1
         fs1 = fs1.opendir(dir1)
@@ -258,6 +298,399 @@ def copydir(fs1, fs2, create_destination=True, ignore_errors=False, chunk_size=6
                      chunk_size=chunk_size)
 
 
+def _transfer_file(src_fs, src_path, dst_fs, dst_path, overwrite=True, chunk_size=None, move=False):
+    """Copy or move a single file, without holding the lock of either
+    filesystem for the duration of the transfer.
+
+    Within a filesystem with no system paths, the filesystem's own copy or
+    move is used, so it may rename or copy on the server.
+    """
+    if not overwrite and dst_fs.exists(dst_path):
+        raise DestinationExistsError(dst_path)
+    src_syspath = src_fs.getsyspath(src_path, allow_none=True)
+    dst_syspath = dst_fs.getsyspath(dst_path, allow_none=True)
+    if src_syspath is not None and dst_syspath is not None:
+        if move:
+            FS._shutil_movefile(src_syspath, dst_syspath)
+        else:
+            FS._shutil_copyfile(src_syspath, dst_syspath)
+    elif src_fs is dst_fs:
+        if move:
+            src_fs.move(src_path, dst_path, overwrite=overwrite, chunk_size=chunk_size)
+        else:
+            src_fs.copy(src_path, dst_path, overwrite=overwrite, chunk_size=chunk_size)
+    elif move:
+        movefile_non_atomic(src_fs, src_path, dst_fs, dst_path, chunk_size=chunk_size)
+    else:
+        copyfile_non_atomic(src_fs, src_path, dst_fs, dst_path, chunk_size=chunk_size)
+
+
+def _transfer_files(fs1, fs2, transfers, workers=4, overwrite=True, chunk_size=None, progress=None, move=False):
+    """Copy or move files from `fs1` to `fs2` with a pool of worker threads.
+
+    `transfers` is an iterable of (<source path>, <destination path>, <size>)
+    tuples; it is consumed in the calling thread, so it may create any
+    directories the files need before producing them.  Returns a list of
+    (<source path>, <exception>) tuples for the files that failed.  An
+    exception raised by `progress` stops the transfers and is raised here.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    jobs = queue.Queue(maxsize=workers * 2)
+    errors = []
+    progress_errors = []
+    totals = {"files": 0, "bytes": 0}
+    totals_lock = threading.Lock()
+    start_time = time.time()
+
+    def worker():
+        #  A worker that can't get a connection of its own shares the
+        #  caller's, rather than leaving the queue of jobs undrained.
+        try:
+            src_fs = fs1._worker_clone()
+        except Exception:
+            src_fs = fs1
+        if fs2 is fs1:
+            dst_fs = src_fs
+        else:
+            try:
+                dst_fs = fs2._worker_clone()
+            except Exception:
+                dst_fs = fs2
+        try:
+            while True:
+                job = jobs.get()
+                if job is None:
+                    break
+                if progress_errors:
+                    continue
+                src_path, dst_path, size = job
+                try:
+                    _transfer_file(src_fs, src_path, dst_fs, dst_path,
+                                   overwrite=overwrite,
+                                   chunk_size=chunk_size,
+                                   move=move)
+                except Exception, e:
+                    with totals_lock:
+                        errors.append((src_path, e))
+                    continue
+                if progress is not None:
+                    with totals_lock:
+                        totals["files"] += 1
+                        totals["bytes"] += size
+                        elapsed = time.time() - start_time
+                        rate = totals["bytes"] / elapsed if elapsed > 0 else 0
+                        try:
+                            progress(totals["files"], totals["bytes"], rate)
+                        except Exception:
+                            progress_errors.append(sys.exc_info())
+        finally:
+            if src_fs is not fs1:
+                src_fs.close()
+            if dst_fs is not fs2 and dst_fs is not src_fs:
+                dst_fs.close()
+
+    threads = []
+    for _ in xrange(workers):
+        thread = threading.Thread(target=worker)
+        thread.setDaemon(True)
+        thread.start()
+        threads.append(thread)
+
+    try:
+        for transfer in transfers:
+            if progress_errors:
+                break
+            jobs.put(transfer)
+    finally:
+        for thread in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+    if progress_errors:
+        exc_type, exc_value, tb = progress_errors[0]
+        raise exc_type, exc_value, tb
+    return errors
+
+
+def copydir_parallel(fs1,
+                     fs2,
+                     create_destination=True,
+                     overwrite=True,
+                     workers=4,
+                     chunk_size=None,
+                     progress=None,
+                     move=False):
+    """Copies contents of a directory from one filesystem to another,
+    transferring several files at once.
+
+    The destination directories are created as the source is walked, before
+    any files are copied in to them.  Files are handed to a pool of worker
+    threads through a bounded queue; filesystems that can't service several
+    threads at once give each worker its own connection.  A failure to copy
+    one file doesn't stop the others from being copied.
+
+    :param fs1: Source filesystem, or a tuple of (<filesystem>, <directory path>)
+    :param fs2: Destination filesystem, or a tuple of (<filesystem>, <directory path>)
+    :param create_destination: If True, the destination will be created if it doesn't exist
+    :param overwrite: If True, existing files in the destination will be overwritten
+    :param workers: Number of worker threads
+    :param chunk_size: Size of chunks to copy if a simple copy is used
+    :param progress: A callable that is called with the number of files
+        copied, the number of bytes copied and the average bytes per second
+        each time a file has been copied.  It is called from the worker
+        threads; if it raises an exception, no more files are copied and the
+        exception is raised once the workers have stopped.
+    :param move: If True, files are moved rather than copied, and the
+        source directory is removed if everything was moved
+
+    :returns: a list of (<source path>, <exception>) tuples for the files
+        that could not be copied
+
+    """
+    if isinstance(fs1, tuple):
+        fs1, dir1 = fs1
+    else:
+        dir1 = "/"
+    if isinstance(fs2, tuple):
+        fs2, dir2 = fs2
+        if create_destination:
+            fs2.makedir(dir2, allow_recreate=True, recursive=True)
+    else:
+        dir2 = "/"
+    dir1 = abspath(normpath(dir1))
+    dir2 = abspath(normpath(dir2))
+    if not fs1.isdir(dir1):
+        raise ResourceNotFoundError(dir1)
+
+    def walk_jobs():
+        #  Walked like walkfilesinfo, but empty directories are copied too.
+        #  Sizes are only needed to report progress.
+        for dir_path, _dirs, files in fs1._walk(dir1, info=progress is not None):
+            dst_dir_path = pathjoin(dir2, relpath(frombase(dir1, abspath(dir_path))))
+            fs2.makedir(dst_dir_path, allow_recreate=True, recursive=True)
+            for name, info in files:
+                size = (info or {}).get("size", 0)
+                yield (pathjoin(dir_path, name), pathjoin(dst_dir_path, name), size)
+
+    errors = _transfer_files(fs1, fs2, walk_jobs(),
+                             workers=workers,
+                             overwrite=overwrite,
+                             chunk_size=chunk_size,
+                             progress=progress,
+                             move=move)
+
+    if move and not errors:
+        if dir1 == "/":
+            for name in fs1.listdir(dir1, dirs_only=True):
+                fs1.removedir(pathjoin(dir1, name), force=True)
+        else:
+            fs1.removedir(dir1, force=True)
+    return errors
+
+
+def _sync_changed(fs1, path1, info1, fs2, path2, info2, compare):
+    """Check whether a file needs to be copied over an existing file."""
+    size1 = info1.get("size")
+    size2 = info2.get("size")
+    if size1 is None or size2 is None or size1 != size2:
+        return True
+    if compare == "mtime":
+        mtime1 = info1.get("modified_time")
+        mtime2 = info2.get("modified_time")
+        if mtime1 is None or mtime2 is None:
+            return False
+        #  Not every filesystem can set times to less than a second
+        return mtime1.replace(microsecond=0) != mtime2.replace(microsecond=0)
+    if compare == "hash":
+        return fs1.gethash(path1) != fs2.gethash(path2)
+    return False
+
+
+def _sync_plan(fs1, dir1, fs2, dir2, compare, delete):
+    """Work out the actions needed to bring `dir2` in to line with `dir1`.
+
+    Returns the plan, and a dictionary of the info of each source file that
+    is to be copied.
+    """
+    plan = []
+    copied_infos = {}
+
+    def listdir(fs, path):
+        try:
+            return fs._listdir_split(path, info=True)
+        except ResourceNotFoundError:
+            return [], []
+
+    dirs = [("/", fs2.isdir(dir2))]
+    while dirs:
+        dir_path, dst_exists = dirs.pop()
+        src_path = pathjoin(dir1, relpath(dir_path))
+        dst_path = pathjoin(dir2, relpath(dir_path))
+        src_dirs, src_files = listdir(fs1, src_path)
+        if dst_exists:
+            dst_dirs, dst_files = listdir(fs2, dst_path)
+        else:
+            dst_dirs, dst_files = [], []
+        dst_dirs = dict(dst_dirs)
+        dst_files = dict(dst_files)
+
+        for name, info in src_files:
+            path = pathjoin(dir_path, name)
+            if name in dst_dirs:
+                #  Replacing a directory with a file means deleting it
+                if delete:
+                    plan.append(("removedir", path))
+                    plan.append(("copy", path))
+                    copied_infos[path] = info
+            elif name not in dst_files:
+                plan.append(("copy", path))
+                copied_infos[path] = info
+            elif _sync_changed(fs1, pathjoin(src_path, name), info,
+                               fs2, pathjoin(dst_path, name), dst_files[name],
+                               compare):
+                plan.append(("update", path))
+                copied_infos[path] = info
+
+        for name, info in src_dirs:
+            path = pathjoin(dir_path, name)
+            if name in dst_files:
+                if delete:
+                    plan.append(("remove", path))
+                    plan.append(("makedir", path))
+                    dirs.append((path, False))
+            elif name in dst_dirs:
+                dirs.append((path, True))
+            else:
+                plan.append(("makedir", path))
+                dirs.append((path, False))
+
+        if delete:
+            src_names = set(name for name, _info in src_files)
+            src_names.update(name for name, _info in src_dirs)
+            for name in sorted(dst_files):
+                if name not in src_names:
+                    plan.append(("remove", pathjoin(dir_path, name)))
+            for name in sorted(dst_dirs):
+                if name not in src_names:
+                    plan.append(("removedir", pathjoin(dir_path, name)))
+    return plan, copied_infos
+
+
+def _sync_times(fs2, dir2, copied_infos, failed):
+    """Give copied files the times of the files they were copied from, so
+    that the next sync sees them as unchanged."""
+    for path, info in copied_infos.iteritems():
+        modified_time = info.get("modified_time")
+        if modified_time is None or path in failed:
+            continue
+        try:
+            fs2.settimes(pathjoin(dir2, relpath(path)),
+                         info.get("accessed_time", modified_time),
+                         modified_time)
+        except UnsupportedError:
+            break
+
+
+def sync(fs1,
+         fs2,
+         compare="mtime",
+         delete=False,
+         dry_run=False,
+         workers=1,
+         chunk_size=None,
+         ignore_errors=False):
+    """Synchronises a directory with the contents of another, copying only
+    the files that are new or have changed.
+
+    Both trees are walked together, listing each directory once on either
+    side, and the resulting plan is carried out with directories created
+    before the files that go in them.  Anything that has to be deleted is
+    removed first.
+
+    :param fs1: Source filesystem, or a tuple of (<filesystem>, <directory path>)
+    :param fs2: Destination filesystem, or a tuple of (<filesystem>, <directory path>)
+    :param compare: How to decide if a file that exists in both has changed.
+        With "mtime" it has changed if the sizes or modification times
+        differ (copied files are given the times of the source, where the
+        destination can set them); "size" compares only the sizes, and "hash"
+        compares the sizes and then the contents
+    :param delete: If True, files and directories in the destination that
+        aren't in the source are removed.  Without it, files and directories
+        that would have to replace each other are left alone
+    :param dry_run: If True, nothing is changed and only the plan is returned
+    :param workers: Number of files to copy at once
+    :param chunk_size: Size of chunks to copy if a simple copy is used
+    :param ignore_errors: If True, files that can't be copied are skipped;
+        otherwise the first error is raised once every file has been tried
+
+    :returns: a list of (<action>, <path>) tuples, where the action is one of
+        "makedir", "copy", "update", "remove" or "removedir", and the path is
+        relative to the directories being synchronised
+
+    For example, the following copies any new or changed files from a local directory to an FTP server::
+
+        >>> from fs.utils import sync
+        >>> from fs.osfs import OSFS
+        >>> from fs.ftpfs import FTPFS
+        >>> sync(OSFS('~/www'), (FTPFS('ftp.example.org', 'user', 'pass'), 'public_html'))
+
+    """
+    if compare not in ("mtime", "size", "hash"):
+        raise ValueError("compare should be 'mtime', 'size' or 'hash'")
+    if isinstance(fs1, tuple):
+        fs1, dir1 = fs1
+    else:
+        dir1 = "/"
+    if isinstance(fs2, tuple):
+        fs2, dir2 = fs2
+    else:
+        dir2 = "/"
+    dir1 = abspath(normpath(dir1))
+    dir2 = abspath(normpath(dir2))
+    if not fs1.isdir(dir1):
+        raise ResourceNotFoundError(dir1)
+
+    plan, copied_infos = _sync_plan(fs1, dir1, fs2, dir2, compare, delete)
+    if dry_run:
+        return plan
+
+    for action, path in plan:
+        if action == "remove":
+            fs2.remove(pathjoin(dir2, relpath(path)))
+        elif action == "removedir":
+            fs2.removedir(pathjoin(dir2, relpath(path)), force=True)
+
+    fs2.makedir(dir2, allow_recreate=True, recursive=True)
+
+    def transfers():
+        for action, path in plan:
+            if action == "makedir":
+                fs2.makedir(pathjoin(dir2, relpath(path)), allow_recreate=True)
+            elif action in ("copy", "update"):
+                yield (pathjoin(dir1, relpath(path)), pathjoin(dir2, relpath(path)), 0)
+
+    errors = _transfer_files(fs1, fs2, transfers(),
+                             workers=workers,
+                             chunk_size=chunk_size)
+    failed = set(abspath(src_path[len(dir1):]) for src_path, _e in errors)
+    _sync_times(fs2, dir2, copied_infos, failed)
+    if errors and not ignore_errors:
+        raise errors[0][1]
+    return plan
+
+
+def mirror(fs1, fs2, **kwargs):
+    """Makes a directory an exact copy of another, by synchronising them and
+    deleting anything in the destination that isn't in the source.
+
+    Takes the same arguments as `sync`.
+
+    """
+    kwargs["delete"] = True
+    return sync(fs1, fs2, **kwargs)
+
+
 def remove_all(fs, path):
     """Remove everything in a directory. Returns True if successful.
 
@@ -336,20 +769,205 @@ def contains_files(fs, path='/'):
         return False
     return True
 
+def parallel_walk(fs,
+                  path="/",
+                  wildcard=None,
+                  dir_wildcard=None,
+                  ignore_errors=False,
+                  workers=4,
+                  ordered=False,
+                  info=False):
+    """Walk a directory tree, listing several directories at once.
+
+    This works like :meth:`~fs.base.FS.walk`, but directory listings are
+    requested from a pool of worker threads, so the round-trip latency of
+    network filesystems is overlapped.  Filesystems that can't service
+    several threads over one connection give each worker its own
+    connection (see :meth:`~fs.base.FS._worker_clone`).
+
+    :param fs: A filesystem object
+    :param path: Root path to start walking from
+    :param wildcard: If given, only return files that match this wildcard
+    :param dir_wildcard: If given, only walk directories whose path matches this wildcard
+    :param ignore_errors: If True, directories that can't be listed are treated as empty
+    :param workers: Number of worker threads
+    :param ordered: If True, directories are yielded in the same order as
+        a breadth-first `walk`; otherwise they are yielded as soon as they
+        have been listed
+    :param info: If True, files are given as (name, info) tuples rather than names
+
+    :returns: an iterator of (directory path, files) tuples
+
+    """
+    path = normpath(path)
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if not fs.exists(path):
+        raise ResourceNotFoundError(path)
+
+    if wildcard is None:
+        wildcard = lambda f: True
+    else:
+        wildcard = compile_wildcard(wildcard)
+
+    if dir_wildcard is None:
+        dir_wildcard = lambda f: True
+    else:
+        dir_wildcard = compile_wildcard(dir_wildcard)
+
+    jobs = queue.Queue()
+    results = queue.Queue()
+    stopped = threading.Event()
+
+    def worker():
+        #  A worker that can't get a connection of its own still takes
+        #  jobs, so the error is raised by the caller rather than leaving it
+        #  waiting on listings that will never come.
+        clone_exc_info = None
+        try:
+            worker_fs = fs._worker_clone()
+        except Exception:
+            worker_fs = fs
+            clone_exc_info = sys.exc_info()
+        try:
+            while True:
+                dir_path = jobs.get()
+                if dir_path is None or stopped.isSet():
+                    if dir_path is None:
+                        break
+                    continue
+                if clone_exc_info is not None:
+                    results.put((dir_path, clone_exc_info, [], []))
+                    continue
+                try:
+                    dirs, files = worker_fs._listdir_split(dir_path, info=info)
+                except ResourceNotFoundError:
+                    results.put((dir_path, None, [], []))
+                except Exception:
+                    if ignore_errors:
+                        results.put((dir_path, None, [], []))
+                    else:
+                        results.put((dir_path, sys.exc_info(), [], []))
+                else:
+                    results.put((dir_path, None, dirs, files))
+        finally:
+            if worker_fs is not fs:
+                worker_fs.close()
+
+    threads = []
+    for _ in xrange(workers):
+        thread = threading.Thread(target=worker)
+        thread.setDaemon(True)
+        thread.start()
+        threads.append(thread)
+
+    def visit(dir_path, dirs, files):
+        # Queue the sub-directories as soon as a listing arrives, so the
+        # workers are kept busy regardless of the order results are yielded
+        sub_dirs = [pathcombine(dir_path, name) for name, _name_info in dirs]
+        sub_dirs = [p for p in sub_dirs if dir_wildcard(p)]
+        for sub_dir in sub_dirs:
+            jobs.put(sub_dir)
+        if info:
+            files = [(name, name_info) for name, name_info in files if wildcard(name)]
+        else:
+            files = [name for name, _name_info in files if wildcard(name)]
+        return sub_dirs, (dir_path, files)
+
+    try:
+        jobs.put(path)
+        if ordered:
+            listed = {}
+            pending = [path]
+            while pending:
+                dir_path = pending.pop()
+                while dir_path not in listed:
+                    result_path, exc_info, dirs, files = results.get()
+                    if exc_info is None:
+                        listed[result_path] = (None, visit(result_path, dirs, files))
+                    else:
+                        listed[result_path] = (exc_info, None)
+                exc_info, visited = listed.pop(dir_path)
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                sub_dirs, walked = visited
+                pending.extend(sub_dirs)
+                yield walked
+        else:
+            outstanding = 1
+            while outstanding:
+                result_path, exc_info, dirs, files = results.get()
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                sub_dirs, walked = visit(result_path, dirs, files)
+                outstanding += len(sub_dirs) - 1
+                yield walked
+    finally:
+        stopped.set()
+        for thread in threads:
+            jobs.put(None)
+
+
+def _file_signature(fs, path, signature_chunk_size, signature_size):
+    """Get a tuple of CRC32s for each chunk at the start of a file."""
+    from zlib import crc32
+    signature = []
+    bytes_read = 0
+    f = fs.open(path, 'rb')
+    try:
+        while signature_size is None or bytes_read < signature_size:
+            data = f.read(signature_chunk_size)
+            if not data:
+                break
+            bytes_read += len(data)
+            signature.append(crc32(data))
+    finally:
+        f.close()
+    return tuple(signature)
+
+
+def _map_files(fs, func, paths, workers):
+    """Call ``func(fs, path)`` for each path, with `workers` threads, and
+    return a list of the results."""
+    if workers <= 1 or len(paths) <= 1:
+        return [func(fs, path) for path in paths]
+    executor = FSExecutor(fs, max_workers=workers)
+    try:
+        futures = [executor.submit(func, path) for path in paths]
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(cancel_pending=True)
+
+
 def find_duplicates(fs,
                     compare_paths=None,
                     quick=False,
                     signature_chunk_size=16*1024,
-                    signature_size=10*16*1024):
+                    signature_size=10*16*1024,
+                    workers=1,
+                    algorithm="md5",
+                    index=None):
     """A generator that yields the paths of duplicate files in an FS object.
     Files are considered identical if the contents are the same (dates or
     other attributes not take in to account).
 
+    Files are first grouped by size, using the info from the directory
+    listings.  Files in a group are then told apart by a signature made from
+    their first few blocks, and any that still match are confirmed by a
+    digest of their whole contents (see :meth:`~fs.base.FS.gethash`), so
+    each file is read at most once.  With an `index`, digests are kept
+    between runs, and only files that are new or have changed are read.
+
     :param fs: A filesystem object
     :param compare_paths: An iterable of paths within the FS object, or all files if omitted
     :param quick: If set to True, the quick method of finding duplicates will be used, which can potentially return false positives if the files have the same size and start with the same data. Do not use when deleting files!
     :param signature_chunk_size: The number of bytes to read before generating a signature checksum value
     :param signature_size: The total number of bytes read to generate a signature
+    :param workers: Number of files to read at once
+    :param algorithm: The hash algorithm used to compare whole files
+    :param index: A hash cache (see :mod:`fs.hashcache`) to keep digests
+        in, which is flushed when the search finishes, or the path of an
+        SQLite database in the local filesystem to use as one
 
     For example, the following will list all the duplicate .jpg files in "~/Pictures"::
 
@@ -362,88 +980,108 @@ def find_duplicates(fs,
     """
 
     from collections import defaultdict
-    from zlib import crc32
-
-    if compare_paths is None:
-        compare_paths = fs.walkfiles()
 
-    # Create a dictionary that maps file sizes on to the paths of files with
-    # that filesize. So we can find files of the same size with a quick lookup
-    file_sizes = defaultdict(list)
-    for path in compare_paths:
-        file_sizes[fs.getsize(path)].append(path)
-
-    size_duplicates = [paths for paths in file_sizes.itervalues() if len(paths) > 1]
-
-    signatures = defaultdict(list)
+    if isinstance(index, basestring):
+        index = SqliteHashCache(index)
+        close_index = True
+    else:
+        close_index = False
 
-    # A signature is a tuple of CRC32s for each 4x16K of the file
-    # This allows us to find potential duplicates with a dictionary lookup
-    for paths in size_duplicates:
-        for path in paths:
-            signature = []
-            fread = None
-            bytes_read = 0
-            try:
-                fread = fs.open(path, 'rb')
-                while signature_size is None or bytes_read < signature_size:
-                    data = fread.read(signature_chunk_size)
-                    if not data:
-                        break
-                    bytes_read += len(data)
-                    signature.append(crc32(data))
-            finally:
-                if fread is not None:
-                    fread.close()
-            signatures[tuple(signature)].append(path)
-
-    # If 'quick' is True then the signature comparison is adequate (although
-    # it may result in false positives)
-    if quick:
+    try:
+        if compare_paths is None:
+            file_infos = list(fs.walkfilesinfo())
+        else:
+            compare_paths = list(compare_paths)
+            file_infos = zip(compare_paths, fs.getinfo_many(compare_paths))
+
+        # Create a dictionary that maps file sizes on to the paths of files with
+        # that filesize. So we can find files of the same size with a quick lookup
+        file_sizes = defaultdict(list)
+        sizes = {}
+        stamps = {}
+        for path, info in file_infos:
+            if info is None:
+                raise ResourceNotFoundError(path)
+            size = info.get('size', None)
+            if size is None:
+                info = fs.getinfo(path)
+                size = info.get('size', None)
+                if size is None:
+                    raise OperationFailedError("get size of resource", path)
+            file_sizes[size].append(path)
+            sizes[path] = size
+            if index is not None:
+                stamps[path] = hash_stamp(info)
+
+        size_duplicates = [paths for paths in file_sizes.itervalues() if len(paths) > 1]
+
+        # Digests of unchanged files can be taken from the index
+        digests = {}
+        if index is not None:
+            for paths in size_duplicates:
+                for path in paths:
+                    stamp = stamps[path]
+                    if stamp is not None:
+                        digest = index.get(abspath(normpath(path)), algorithm, *stamp)
+                        if digest is not None:
+                            digests[path] = digest
+
+        # A signature is a tuple of CRC32s for each 16K at the start of the
+        # file.  Files only need signatures when there are other files of the
+        # same size to tell them apart from, and no digest of any of them.
+        need_signature = []
+        need_digest = []
+        for paths in size_duplicates:
+            if quick or not any(path in digests for path in paths):
+                need_signature.extend(paths)
+            else:
+                need_digest.extend(path for path in paths if path not in digests)
+
+        def get_signature(worker_fs, path):
+            return _file_signature(worker_fs, path, signature_chunk_size, signature_size)
+
+        signatures = defaultdict(list)
+        for path, signature in zip(need_signature,
+                                   _map_files(fs, get_signature, need_signature, workers)):
+            signatures[(sizes[path], signature)].append(path)
+
+        # If 'quick' is True then the signature comparison is adequate (although
+        # it may result in false positives)
+        if quick:
+            for paths in signatures.itervalues():
+                if len(paths) > 1:
+                    yield paths
+            return
+
+        # Files with the same size and signature are very likely to be
+        # identical; a digest of the whole file confirms it.
         for paths in signatures.itervalues():
             if len(paths) > 1:
-                yield paths
-        return
+                need_digest.extend(paths)
 
-    def identical(p1, p2):
-        """ Returns True if the contents of two files are identical. """
-        f1, f2 = None, None
-        try:
-            f1 = fs.open(p1, 'rb')
-            f2 = fs.open(p2, 'rb')
-            while True:
-                chunk1 = f1.read(16384)
-                if not chunk1:
-                    break
-                chunk2 = f2.read(16384)
-                if chunk1 != chunk2:
-                    return False
-            return True
-        finally:
-            if f1 is not None:
-                f1.close()
-            if f2 is not None:
-                f2.close()
-
-    # If we want to be accurate then we need to compare suspected duplicates
-    # byte by byte.
-    # All path groups in this loop have the same size and same signature, so are
-    # highly likely to be identical.
-    for paths in signatures.itervalues():
-
-        while len(paths) > 1:
+        def get_digest(worker_fs, path):
+            return worker_fs.gethash(path, algorithm)
 
-            test_p = paths.pop()
-            dups = [test_p]
+        for path, digest in zip(need_digest,
+                                _map_files(fs, get_digest, need_digest, workers)):
+            digests[path] = digest
+            if index is not None and stamps[path] is not None:
+                size, mtime = stamps[path]
+                index.set(abspath(normpath(path)), algorithm, size, mtime, digest)
 
+        for paths in size_duplicates:
+            groups = defaultdict(list)
             for path in paths:
-                if identical(test_p, path):
-                    dups.append(path)
-
-            if len(dups) > 1:
-                yield dups
-
-            paths = list(set(paths).difference(dups))
+                if path in digests:
+                    groups[digests[path]].append(path)
+            for dups in groups.itervalues():
+                if len(dups) > 1:
+                    yield dups
+    finally:
+        if close_index:
+            index.close()
+        elif index is not None:
+            index.flush()
 
 
 def print_fs(fs,
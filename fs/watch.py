@@ -313,7 +313,7 @@ class WatchableFS(WatchableFSMixin,WrapFS):
         self.notify_watchers(ACCESSED, path)
         return WatchedFile(f, self, path, mode)
 
-    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=64*1024):
+    def setcontents(self, path, data=b'', encoding=None, errors=None, chunk_size=None):
         existed = self.wrapped_fs.isfile(path)
         ret = super(WatchableFS, self).setcontents(path, data=data, encoding=encoding, errors=errors, chunk_size=chunk_size)
         if not existed:
@@ -542,11 +542,14 @@ class PollingWatchableFS(WatchableFS):
         #  We assume that if the file's data changes, something in its
         #  metadata will also change; don't want to read through each file!
         #  Subdirectories will be handled by the outer polling loop.
-        for filenm in self.wrapped_fs.listdir(dirnm,files_only=True):
+        fpaths = [pathjoin(dirnm,filenm) for filenm in
+                  self.wrapped_fs.listdir(dirnm,files_only=True)]
+        for (fpath,new_info) in zip(fpaths,self.wrapped_fs.getinfo_many(fpaths)):
             if self._poll_close_event.isSet():
                 return
-            fpath = pathjoin(dirnm,filenm)
-            new_info = self.wrapped_fs.getinfo(fpath)
+            if new_info is None:
+                #  Removed since listing; it will be noticed on the next run
+                continue
             try:
                 old_info = self._path_info[fpath]
             except KeyError:
@@ -574,11 +577,12 @@ class PollingWatchableFS(WatchableFS):
                 elif was_accessed:
                     self.notify_watchers(ACCESSED,fpath)
         #  Check for deletion of cached child entries.
-        for childnm in self._path_info.iternames(dirnm):
+        cpaths = [pathjoin(dirnm,childnm) for childnm in
+                  self._path_info.iternames(dirnm)]
+        for (cpath,exists) in zip(cpaths,self.wrapped_fs.exists_many(cpaths)):
             if self._poll_close_event.isSet():
                 return
-            cpath = pathjoin(dirnm,childnm)
-            if not self.wrapped_fs.exists(cpath):
+            if not exists:
                 self.notify_watchers(REMOVED,cpath)
 
 
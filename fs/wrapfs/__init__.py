@@ -15,15 +15,15 @@ standard unix shell functionality of hiding dot-files in directory listings.
 
 """
 
-import re
 import sys
-import fnmatch
+import copy
 import threading
 
-from fs.base import FS, threading, synchronize, NoDefaultMeta
+from fs.base import FS, threading, synchronize, NoDefaultMeta, _defining_class
 from fs.errors import *
 from fs.path import *
 from fs.local_functools import wraps
+from fs.globbing import compile_wildcard
 
 
 def rewrite_errors(func):
@@ -118,6 +118,32 @@ class WrapFS(FS):
         """
         return (mode, mode)
 
+    def _worker_clone(self):
+        return self._rewrap(self.wrapped_fs._worker_clone())
+
+    def _rewrap(self, wrapped_fs):
+        """Get a copy of this object that wraps `wrapped_fs` instead."""
+        if wrapped_fs is self.wrapped_fs:
+            return self
+        clone = copy.copy(self)
+        clone.wrapped_fs = wrapped_fs
+        clone._lock = wrapped_fs._lock
+        return clone
+
+    def getexecutor(self):
+        #  Wrappers share the worker threads of the filesystem they wrap
+        return self.wrapped_fs.getexecutor()
+
+    def _submit(self, func, *args, **kwargs):
+        def call(wrapped_fs, *args, **kwargs):
+            return func(self._rewrap(wrapped_fs), *args, **kwargs)
+        call.__name__ = getattr(func, "__name__", "call")
+        return self.wrapped_fs._submit(call, *args, **kwargs)
+
+    @property
+    def copy_chunk_size(self):
+        return self.wrapped_fs.copy_chunk_size
+
     def __unicode__(self):
         return u"<%s: %s>" % (self.__class__.__name__,self.wrapped_fs,)
 
@@ -156,7 +182,7 @@ class WrapFS(FS):
         return self._file_wrap(f, mode)
 
     @rewrite_errors
-    def setcontents(self, path, data, encoding=None, errors=None, chunk_size=64*1024):
+    def setcontents(self, path, data, encoding=None, errors=None, chunk_size=None):
         #  We can't pass setcontents() through to the wrapped FS if the
         #  wrapper has defined a _file_wrap method, as it would bypass
         #  the file contents wrapping.
@@ -178,6 +204,20 @@ class WrapFS(FS):
     def isdir(self, path):
         return self.wrapped_fs.isdir(self._encode(path))
 
+    @rewrite_errors
+    def exists_many(self, paths):
+        #  Only pass the batch through if subclasses haven't changed how
+        #  individual paths are checked.
+        if _defining_class(self.__class__, "exists") is not WrapFS:
+            return super(WrapFS, self).exists_many(paths)
+        return self.wrapped_fs.exists_many([self._encode(p) for p in paths])
+
+    @rewrite_errors
+    def isdir_many(self, paths):
+        if _defining_class(self.__class__, "isdir") is not WrapFS:
+            return super(WrapFS, self).isdir_many(paths)
+        return self.wrapped_fs.isdir_many([self._encode(p) for p in paths])
+
     @rewrite_errors
     def isfile(self, path):
         return self.wrapped_fs.isfile(self._encode(path))
@@ -194,9 +234,8 @@ class WrapFS(FS):
         wildcard = kwds.pop("wildcard",None)
         if wildcard is None:
             wildcard = lambda fn:True
-        elif not callable(wildcard):
-            wildcard_re = re.compile(fnmatch.translate(wildcard))
-            wildcard = lambda fn:bool (wildcard_re.match(fn))
+        else:
+            wildcard = compile_wildcard(wildcard)
         entries = []
         enc_path = self._encode(path)
         for e in self.wrapped_fs.listdir(enc_path,**kwds):
@@ -222,9 +261,8 @@ class WrapFS(FS):
         wildcard = kwds.pop("wildcard",None)
         if wildcard is None:
             wildcard = lambda fn:True
-        elif not callable(wildcard):
-            wildcard_re = re.compile(fnmatch.translate(wildcard))
-            wildcard = lambda fn:bool (wildcard_re.match(fn))
+        else:
+            wildcard = compile_wildcard(wildcard)
         enc_path = self._encode(path)
         for e in self.wrapped_fs.ilistdir(enc_path,**kwds):
             e = basename(self._decode(pathcombine(enc_path,e)))
@@ -248,9 +286,8 @@ class WrapFS(FS):
         wildcard = kwds.pop("wildcard",None)
         if wildcard is None:
             wildcard = lambda fn:True
-        elif not callable(wildcard):
-            wildcard_re = re.compile(fnmatch.translate(wildcard))
-            wildcard = lambda fn:bool (wildcard_re.match(fn))
+        else:
+            wildcard = compile_wildcard(wildcard)
         entries = []
         enc_path = self._encode(path)
         for (nm,info) in self.wrapped_fs.listdirinfo(enc_path,**kwds):
@@ -276,9 +313,8 @@ class WrapFS(FS):
         wildcard = kwds.pop("wildcard",None)
         if wildcard is None:
             wildcard = lambda fn:True
-        elif not callable(wildcard):
-            wildcard_re = re.compile(fnmatch.translate(wildcard))
-            wildcard = lambda fn:bool (wildcard_re.match(fn))
+        else:
+            wildcard = compile_wildcard(wildcard)
         enc_path = self._encode(path)
         for (nm,info) in self.wrapped_fs.ilistdirinfo(enc_path,**kwds):
             nm = basename(self._decode(pathcombine(enc_path,nm)))
@@ -301,9 +337,8 @@ class WrapFS(FS):
         #  Otherwise, the wrapped FS may provide a more efficient impl
         #  which we can use directly.
         else:
-            if wildcard is not None and not callable(wildcard):
-                wildcard_re = re.compile(fnmatch.translate(wildcard))
-                wildcard = lambda fn:bool (wildcard_re.match(fn))
+            if wildcard is not None:
+                wildcard = compile_wildcard(wildcard)
             for (dirpath,filepaths) in self.wrapped_fs.walk(self._encode(path),search=search,ignore_errors=ignore_errors):
                 filepaths = [basename(self._decode(pathcombine(dirpath,p)))
                                  for p in filepaths]
@@ -323,9 +358,8 @@ class WrapFS(FS):
         #  Otherwise, the wrapped FS may provide a more efficient impl
         #  which we can use directly.
         else:
-            if wildcard is not None and not callable(wildcard):
-                wildcard_re = re.compile(fnmatch.translate(wildcard))
-                wildcard = lambda fn:bool (wildcard_re.match(fn))
+            if wildcard is not None:
+                wildcard = compile_wildcard(wildcard)
             for filepath in self.wrapped_fs.walkfiles(self._encode(path),search=search,ignore_errors=ignore_errors):
                 filepath = abspath(self._decode(filepath))
                 if wildcard is not None:
@@ -333,6 +367,35 @@ class WrapFS(FS):
                         continue
                 yield filepath
 
+    @rewrite_errors
+    def walkinfo(self,path="/",wildcard=None,dir_wildcard=None,search="breadth",ignore_errors=False):
+        if wildcard is not None or dir_wildcard is not None:
+            #  The wildcard only applies to files, which we can't tell apart
+            #  from directories in the wrapped walk, so use the default impl.
+            for item in super(WrapFS,self).walkinfo(path,wildcard,dir_wildcard,search,ignore_errors):
+                yield item
+        else:
+            for (path,info) in self.wrapped_fs.walkinfo(self._encode(path),search=search,ignore_errors=ignore_errors):
+                yield (abspath(self._decode(path)),info)
+
+    @rewrite_errors
+    def walkfilesinfo(self,path="/",wildcard=None,dir_wildcard=None,search="breadth",ignore_errors=False):
+        if dir_wildcard is not None:
+            #  If there is a dir_wildcard, fall back to the default impl
+            #  that uses listdir().  Otherwise we run the risk of enumerating
+            #  lots of directories that will just be thrown away.
+            for item in super(WrapFS,self).walkfilesinfo(path,wildcard,dir_wildcard,search,ignore_errors):
+                yield item
+        else:
+            if wildcard is not None:
+                wildcard = compile_wildcard(wildcard)
+            for (filepath,info) in self.wrapped_fs.walkfilesinfo(self._encode(path),search=search,ignore_errors=ignore_errors):
+                filepath = abspath(self._decode(filepath))
+                if wildcard is not None:
+                    if not wildcard(basename(filepath)):
+                        continue
+                yield (filepath,info)
+
     @rewrite_errors
     def walkdirs(self,path="/",wildcard=None,search="breadth",ignore_errors=False):
         if wildcard is not None:
@@ -347,6 +410,18 @@ class WrapFS(FS):
             for dirpath in self.wrapped_fs.walkdirs(self._encode(path),search=search,ignore_errors=ignore_errors):
                 yield abspath(self._decode(dirpath))
 
+    @rewrite_errors
+    def _iglob(self, pattern, path):
+        #  The wrapped FS can only do the matching if names are passed
+        #  through unchanged and the listing isn't filtered.
+        cls = self.__class__
+        for name in ("_encode_name", "_decode_name", "listdir", "ilistdir", "isdir", "isfile"):
+            if _defining_class(cls, name) is not WrapFS:
+                for item in super(WrapFS, self)._iglob(pattern, path):
+                    yield item
+                return
+        for item in self.wrapped_fs._iglob(pattern, abspath(self._encode(path))):
+            yield abspath(self._decode(item))
 
     @rewrite_errors
     def makedir(self, path, *args, **kwds):
@@ -368,6 +443,20 @@ class WrapFS(FS):
     def getinfo(self, path):
         return self.wrapped_fs.getinfo(self._encode(path))
 
+    @rewrite_errors
+    def getinfo_many(self, paths):
+        if _defining_class(self.__class__, "getinfo") is not WrapFS:
+            return super(WrapFS, self).getinfo_many(paths)
+        return self.wrapped_fs.getinfo_many([self._encode(p) for p in paths])
+
+    @rewrite_errors
+    def _gethash(self, path, algorithm):
+        #  The digest is the same as in the wrapped FS unless the wrapper
+        #  changes the contents of files.
+        if _defining_class(self.__class__, '_file_wrap') is WrapFS:
+            return self.wrapped_fs.gethash(self._encode(path), algorithm)
+        return super(WrapFS, self)._gethash(path, algorithm)
+
     @rewrite_errors
     def settimes(self, path, *args, **kwds):
         return self.wrapped_fs.settimes(self._encode(path), *args,**kwds)
@@ -95,11 +95,37 @@ class LazyFS(WrapFS):
 
     wrapped_fs = property(_get_wrapped_fs,_set_wrapped_fs)
 
-    def setcontents(self, path, data, chunk_size=64*1024):
+    #  Asynchronous calls are run by workers of this object rather than
+    #  those of the wrapped FS, so that the wrapped FS is created (and any
+    #  errors from that are raised) by the calls themselves, not by the
+    #  thread that queued them.
+
+    def getexecutor(self):
+        return FS.getexecutor(self)
+
+    def _submit(self, func, *args, **kwargs):
+        return FS._submit(self, func, *args, **kwargs)
+
+    def _worker_clone(self):
+        if "wrapped_fs" not in self.__dict__:
+            return self
+        return super(LazyFS, self)._worker_clone()
+
+    @property
+    def copy_chunk_size(self):
+        if "wrapped_fs" not in self.__dict__:
+            return FS.copy_chunk_size
+        return self.wrapped_fs.copy_chunk_size
+
+    def setcontents(self, path, data, chunk_size=None):
         return self.wrapped_fs.setcontents(path, data, chunk_size=chunk_size)
 
     def close(self):
         if not self.closed:
+            #  Finish queued calls before the wrapped FS is closed
+            executor = self.__dict__.pop("_executor", None)
+            if executor is not None:
+                executor.shutdown()
             #  If it was never initialized, create a fake one to close.
             if "wrapped_fs" not in self.__dict__:
                 self.__dict__["wrapped_fs"] = FS()
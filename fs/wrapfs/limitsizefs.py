@@ -14,7 +14,7 @@ from __future__ import with_statement
 from fs.errors import *
 from fs.path import *
 from fs.base import FS, threading, synchronize
-from fs.wrapfs import WrapFS
+from fs.wrapfs import WrapFS, rewrite_errors
 from fs.filelike import FileWrapper
 
 
@@ -49,7 +49,17 @@ class LimitSizeFS(WrapFS):
         self.cur_size = self._get_cur_size()
 
     def _get_cur_size(self,path="/"):
-        return sum(self.getsize(f) for f in self.walkfiles(path))
+        #  Files open for writing count for the size they have reserved,
+        #  as in getsize.
+        cur_size = 0
+        for (file_path,info) in self.walkfilesinfo(path):
+            size = info.get("size",0)
+            try:
+                size = max(self._file_sizes[file_path][0],size)
+            except (KeyError,TypeError):
+                pass
+            cur_size += size
+        return cur_size
 
     def getsyspath(self, path, allow_none=False):
         #  If people could grab syspaths, they could route around our
@@ -99,6 +109,8 @@ class LimitSizeFS(WrapFS):
             self._file_sizes[path] = (size,count)
 
     def setcontents(self, path, data, chunk_size=64*1024):
+        if chunk_size is None:
+            chunk_size = self.copy_chunk_size
         f = None
         try:
             f = self.open(path, 'wb')
@@ -220,6 +232,17 @@ class LimitSizeFS(WrapFS):
             pass
         return info
 
+    @rewrite_errors
+    def getinfo_many(self, paths):
+        paths = list(paths)
+        infos = self.wrapped_fs.getinfo_many([self._encode(p) for p in paths])
+        for (path,info) in zip(paths,infos):
+            try:
+                info["size"] = max(self._file_sizes[path][0],info["size"])
+            except (KeyError,TypeError):
+                pass
+        return infos
+
     def getsize(self, path):
         size = super(LimitSizeFS,self).getsize(path)
         try:
@@ -0,0 +1,401 @@
+"""
+fs.wrapfs.metricsfs
+===================
+
+An FS wrapper class that records how an FS is used.
+
+This module provides the class MetricsFS, an FS wrapper that counts the calls
+made to each FS method along with the errors they raise, keeps a histogram of
+how long they took, and counts the data read and written through the files
+it opens.  For example::
+
+    >>> fs = MetricsFS(S3FS("mybucket"), name="s3")
+    >>> fs.setcontents("hello.txt", "Hello, World!")
+    >>> fs.getcontents("hello.txt")
+    >>> fs.to_dict()["methods"]["setcontents"]["p95"]
+    0.0391...
+
+Wrapping each layer of a stack of filesystems (e.g. the mounts of a MountFS
+and the FS behind a CacheFS) with a MetricsFS of a different name shows how
+much of the time is spent in each of them.  The metrics can be exported as
+Prometheus text with `to_prometheus`.
+
+Calls that other methods make are counted too, so the default implementation
+of `getcontents` counts a call to `open` as well.
+
+"""
+
+from __future__ import with_statement
+
+import threading
+from bisect import bisect_left
+from timeit import default_timer
+
+from fs.errors import *
+from fs.path import *
+from fs.local_functools import wraps
+from fs.wrapfs import WrapFS, wrap_fs_methods, rewrite_errors
+
+
+class LatencyHistogram(object):
+    """A histogram of durations, in seconds.
+
+    The buckets grow geometrically, four to each doubling, from a microsecond
+    to a couple of minutes, so percentiles are accurate to within about 20%.
+
+    """
+
+    #: The upper bound of each bucket; larger values go in a final bucket
+    bounds = [1e-6 * 2 ** (i / 4.0) for i in xrange(108)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def copy(self):
+        histogram = LatencyHistogram()
+        histogram.counts = self.counts[:]
+        histogram.count = self.count
+        histogram.sum = self.sum
+        histogram.max = self.max
+        return histogram
+
+    def percentile(self, percent):
+        """Get the duration that `percent` percent of the values are below.
+
+        :returns: the upper bound of the bucket the percentile falls in (or
+            the largest value, if that is smaller), or None if there are no
+            values
+
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100.0
+        total = 0
+        for i, count in enumerate(self.counts):
+            total += count
+            if total >= rank and count:
+                if i < len(self.bounds):
+                    return min(self.bounds[i], self.max)
+                break
+        return self.max
+
+
+class MethodMetrics(object):
+    """The metrics for one FS method."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.histogram = LatencyHistogram()
+
+    def copy(self):
+        metrics = MethodMetrics()
+        metrics.calls = self.calls
+        metrics.errors = self.errors
+        metrics.histogram = self.histogram.copy()
+        return metrics
+
+    def to_dict(self):
+        histogram = self.histogram
+        return {"calls": self.calls,
+                "errors": self.errors,
+                "total_time": histogram.sum,
+                "max_time": histogram.max,
+                "p50": histogram.percentile(50),
+                "p95": histogram.percentile(95),
+                "p99": histogram.percentile(99)}
+
+
+class Metrics(object):
+    """A snapshot of the metrics recorded by a MetricsFS.
+
+    :attr name: the name of the MetricsFS, or None
+    :attr methods: a dictionary mapping method names to `MethodMetrics`
+    :attr bytes_read: the amount of data read from files
+    :attr bytes_written: the amount of data written to files
+    :attr files_opened: the number of files opened
+
+    Data read and written in text mode is counted in characters.
+
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.methods = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.files_opened = 0
+
+    def copy(self):
+        metrics = Metrics(self.name)
+        for method_name, method_metrics in self.methods.items():
+            metrics.methods[method_name] = method_metrics.copy()
+        metrics.bytes_read = self.bytes_read
+        metrics.bytes_written = self.bytes_written
+        metrics.files_opened = self.files_opened
+        return metrics
+
+    def to_dict(self):
+        """Get the metrics as a dictionary of plain values."""
+        methods = {}
+        for method_name, method_metrics in self.methods.items():
+            methods[method_name] = method_metrics.to_dict()
+        return {"name": self.name,
+                "methods": methods,
+                "bytes_read": self.bytes_read,
+                "bytes_written": self.bytes_written,
+                "files_opened": self.files_opened}
+
+    def to_prometheus(self, prefix="pyfs"):
+        """Get the metrics in the Prometheus text exposition format.
+
+        The samples are labelled with the method name and, if the MetricsFS
+        has a name, with an "fs" label.
+
+        :param prefix: the prefix of the metric names
+
+        """
+        if self.name is None:
+            fs_label = ""
+        else:
+            fs_label = 'fs="%s",' % _escape_label(self.name)
+        lines = []
+
+        def add_metric(name, metric_type, help):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help))
+            lines.append("# TYPE %s_%s %s" % (prefix, name, metric_type))
+
+        def add_sample(name, labels, value):
+            labels = (fs_label + labels).rstrip(",")
+            if labels:
+                lines.append("%s_%s{%s} %s" % (prefix, name, labels, _format_value(value)))
+            else:
+                lines.append("%s_%s %s" % (prefix, name, _format_value(value)))
+
+        methods = sorted(self.methods.items())
+        add_metric("calls_total", "counter", "Calls to each FS method.")
+        for method_name, method_metrics in methods:
+            add_sample("calls_total", 'method="%s"' % method_name, method_metrics.calls)
+        add_metric("errors_total", "counter", "Calls to each FS method that raised an error.")
+        for method_name, method_metrics in methods:
+            add_sample("errors_total", 'method="%s"' % method_name, method_metrics.errors)
+        add_metric("call_duration_seconds", "histogram", "Time taken by each FS method.")
+        for method_name, method_metrics in methods:
+            histogram = method_metrics.histogram
+            method_label = 'method="%s",' % method_name
+            total = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                total += count
+                add_sample("call_duration_seconds_bucket",
+                           method_label + 'le="%r"' % bound,
+                           total)
+            add_sample("call_duration_seconds_bucket", method_label + 'le="+Inf"', histogram.count)
+            add_sample("call_duration_seconds_sum", method_label, histogram.sum)
+            add_sample("call_duration_seconds_count", method_label, histogram.count)
+        add_metric("read_bytes_total", "counter", "Data read from files.")
+        add_sample("read_bytes_total", "", self.bytes_read)
+        add_metric("written_bytes_total", "counter", "Data written to files.")
+        add_sample("written_bytes_total", "", self.bytes_written)
+        add_metric("files_opened_total", "counter", "Files opened.")
+        add_sample("files_opened_total", "", self.files_opened)
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class MetricsFS(WrapFS):
+    """FS wrapper class that records metrics for each FS method.
+
+    :param fs: the FS to wrap
+    :param name: a name for the metrics, used to tell apart the metrics of
+        several MetricsFS objects
+
+    """
+
+    def __init__(self, fs, name=None):
+        super(MetricsFS, self).__init__(fs)
+        self._metrics_lock = threading.Lock()
+        self._metrics = Metrics(name)
+
+    def __getstate__(self):
+        state = super(MetricsFS, self).__getstate__()
+        del state["_metrics_lock"]
+        return state
+
+    def __setstate__(self, state):
+        super(MetricsFS, self).__setstate__(state)
+        self._metrics_lock = threading.Lock()
+
+    def _record_call(self, method_name, duration, failed):
+        with self._metrics_lock:
+            try:
+                method_metrics = self._metrics.methods[method_name]
+            except KeyError:
+                method_metrics = self._metrics.methods[method_name] = MethodMetrics()
+            method_metrics.calls += 1
+            if failed:
+                method_metrics.errors += 1
+            method_metrics.histogram.add(duration)
+
+    def _record_read(self, size):
+        with self._metrics_lock:
+            self._metrics.bytes_read += size
+
+    def _record_write(self, size):
+        with self._metrics_lock:
+            self._metrics.bytes_written += size
+
+    def snapshot(self, reset=False):
+        """Get a copy of the metrics recorded so far.
+
+        :param reset: if True, reset the metrics at the same time
+        :rtype: `Metrics`
+
+        """
+        with self._metrics_lock:
+            if reset:
+                metrics = self._metrics
+                self._metrics = Metrics(metrics.name)
+                return metrics
+            return self._metrics.copy()
+
+    def reset(self):
+        """Discard the metrics recorded so far."""
+        self.snapshot(reset=True)
+
+    def to_dict(self):
+        """Get the metrics as a dictionary; see `Metrics.to_dict`."""
+        return self.snapshot().to_dict()
+
+    def to_prometheus(self, prefix="pyfs"):
+        """Get the metrics as Prometheus text; see `Metrics.to_prometheus`."""
+        return self.snapshot().to_prometheus(prefix)
+
+    def _file_wrap(self, f, mode):
+        with self._metrics_lock:
+            self._metrics.files_opened += 1
+        return MetricsFile(f, self._record_read, self._record_write)
+
+    @rewrite_errors
+    def setcontents(self, path, data, encoding=None, errors=None, chunk_size=None):
+        #  Pass the call through, so the wrapped FS can write the data in
+        #  the way that suits it, counting the data as it's read
+        if hasattr(data, "read"):
+            data = MetricsFile(data, self._record_write, None)
+        else:
+            self._record_write(len(data))
+        return self.wrapped_fs.setcontents(self._encode(path), data, encoding=encoding, errors=errors, chunk_size=chunk_size)
+
+
+class MetricsFile(object):
+    """Proxy for a file object that counts the data read and written.
+
+    :param f: the file to proxy
+    :param on_read: called with the size of each piece of data read
+    :param on_write: called with the size of each piece of data written
+
+    """
+
+    def __init__(self, f, on_read, on_write):
+        self.wrapped_file = f
+        self._on_read = on_read
+        self._on_write = on_write
+
+    def __getattr__(self, attr):
+        return getattr(self.wrapped_file, attr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wrapped_file.close()
+        return False
+
+    def __iter__(self):
+        on_read = self._on_read
+        for line in self.wrapped_file:
+            on_read(len(line))
+            yield line
+
+    def read(self, *args):
+        data = self.wrapped_file.read(*args)
+        self._on_read(len(data))
+        return data
+
+    def readline(self, *args):
+        line = self.wrapped_file.readline(*args)
+        self._on_read(len(line))
+        return line
+
+    def next(self):
+        line = self.wrapped_file.next()
+        self._on_read(len(line))
+        return line
+
+    def readinto(self, b):
+        readinto = getattr(self.wrapped_file, "readinto", None)
+        if readinto is None:
+            data = self.wrapped_file.read(len(b))
+            count = len(data)
+            b[:count] = data
+        else:
+            count = readinto(b)
+        if count:
+            self._on_read(count)
+        return count
+
+    def readlines(self, *args):
+        lines = self.wrapped_file.readlines(*args)
+        self._on_read(sum(len(line) for line in lines))
+        return lines
+
+    def write(self, data):
+        result = self.wrapped_file.write(data)
+        self._on_write(len(data))
+        return result
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+
+def _timed(method):
+    """Decorator recording the time taken by each call of a MetricsFS method."""
+    method_name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwds):
+        start = default_timer()
+        try:
+            result = method(self, *args, **kwds)
+        except Exception:
+            self._record_call(method_name, default_timer() - start, True)
+            raise
+        self._record_call(method_name, default_timer() - start, False)
+        return result
+    return wrapper
+
+#  The generator methods are left out, as they return before doing any work
+wrap_fs_methods(_timed, MetricsFS, exclude=["close", "ilistdir", "ilistdirinfo"])
+for _method_name in ("getsize", "getcontents", "exists_many", "isdir_many",
+                     "getinfo_many", "settimes"):
+    setattr(MetricsFS, _method_name, _timed(getattr(MetricsFS, _method_name)))
+del _method_name
@@ -0,0 +1,406 @@
+"""
+fs.wrapfs.statcachefs
+=====================
+
+An FS wrapper class that caches the info and directory listings of an FS.
+
+This module provides the class StatCacheFS, an FS wrapper that remembers what
+`getinfo` and `listdir` return, and answers `exists`, `isdir` and `isfile`
+from the info, so that looking at the same paths again doesn't go to the
+wrapped FS.  For example::
+
+    >>> fs = StatCacheFS(OSFS("/mnt/shared"))
+    >>> fs.exists("index/0001.dat")
+    >>> fs.getstats()["misses"]
+    1
+
+Entries are dropped when the FS is changed through the wrapper, and when the
+wrapped FS tells its watchers of a change (see `fs.watch`), as an OSFS does
+through inotify.  While the wrapped FS is watched, entries are kept until
+they're changed.  Events are delivered asynchronously, so a change made
+outside the wrapper may not be seen until its event has arrived.
+
+If the wrapped FS can't be watched, the cache can't know of changes made
+outside it, so entries expire `ttl` seconds after they're cached.  The same
+is true once the wrapped FS reports an `OVERFLOW` (when it has lost track of
+some changes) or is closed, at which point the cache is cleared.
+
+"""
+
+from __future__ import with_statement
+
+import time
+import weakref
+import threading
+
+from fs.base import FS
+from fs.errors import *
+from fs.path import *
+from fs import utils
+from fs.watch import CREATED, REMOVED, MODIFIED, MOVED_SRC, MOVED_DST, OVERFLOW, CLOSED
+from fs.wrapfs import WrapFS
+
+
+_WATCHED_EVENTS = (CREATED, REMOVED, MODIFIED, MOVED_SRC, MOVED_DST, OVERFLOW, CLOSED)
+
+
+def _watch(cache_fs):
+    """Watch the FS a StatCacheFS wraps for changes, or return None if it
+    can't be watched.  The watcher holds a weak reference to the StatCacheFS,
+    so that the two don't make a cycle."""
+    ref = weakref.ref(cache_fs)
+    def on_change(event):
+        cache_fs = ref()
+        if cache_fs is not None:
+            cache_fs._on_change(event)
+    try:
+        return cache_fs.wrapped_fs.add_watcher(on_change, "/", _WATCHED_EVENTS, recursive=True)
+    except (AttributeError, FSError):
+        return None
+
+
+class StatCacheFS(WrapFS):
+    """FS wrapper class that caches info and directory listings.
+
+    :param fs: the FS to wrap
+    :param ttl: how many seconds entries are kept for, if the wrapped FS
+        can't be watched for changes
+    :param max_entries: the number of entries the cache may hold; the cache
+        is cleared when it grows past this
+
+    """
+
+    def __init__(self, fs, ttl=1, max_entries=100000):
+        super(StatCacheFS, self).__init__(fs)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.overflows = 0
+        self._init_cache()
+
+    def _init_cache(self):
+        self._cache_lock = threading.Lock()
+        self._infos = {}
+        self._listings = {}
+        #  Incremented whenever entries are dropped, so that what was read
+        #  from the wrapped FS before then isn't cached
+        self._generation = 0
+        self._watcher = _watch(self)
+        self._expire = self._watcher is None
+
+    def __getstate__(self):
+        state = super(StatCacheFS, self).__getstate__()
+        for name in ("_cache_lock", "_infos", "_listings", "_generation", "_watcher", "_expire"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        super(StatCacheFS, self).__setstate__(state)
+        self._init_cache()
+
+    def __unicode__(self):
+        return u"<StatCacheFS: %s>" % (self.wrapped_fs,)
+
+    @property
+    def watched(self):
+        """True if the cache is told of changes to the wrapped FS, so its
+        entries don't expire."""
+        return not self._expire
+
+    def getstats(self):
+        """Get the counts of cache hits and misses, and of the times entries
+        were dropped because of a change (whether or not they were cached).
+
+        :rtype: dict
+
+        """
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "overflows": self.overflows,
+                "entries": len(self._infos) + len(self._listings),
+                "watched": self.watched}
+
+    def clear_cache(self):
+        """Drop all of the cached entries."""
+        with self._cache_lock:
+            self._generation += 1
+            self._infos.clear()
+            self._listings.clear()
+
+    def _lookup(self, cache, path):
+        """Get the (expiry time, value) of a path in one of the caches, or
+        None if it isn't cached."""
+        entry = cache.get(path)
+        if entry is not None and (entry[0] is None or entry[0] > time.time()):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def _store(self, cache, path, value, generation):
+        with self._cache_lock:
+            if generation != self._generation:
+                #  Something changed while the value was being read
+                return
+            if len(self._infos) + len(self._listings) >= self.max_entries:
+                self._infos.clear()
+                self._listings.clear()
+            if self._expire:
+                cache[path] = (time.time() + self.ttl, value)
+            else:
+                cache[path] = (None, value)
+
+    def _invalidate(self, path, listing=True, subtree=False):
+        """Drop the cached entries for a path.
+
+        :param listing: if True, drop the listing of the directory it's in
+            too, as the path was made or removed
+        :param subtree: if True, drop the entries of everything in the
+            path too, as it may be a directory that was moved or removed
+
+        """
+        path = abspath(normpath(path))
+        with self._cache_lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._infos.pop(path, None)
+            self._listings.pop(path, None)
+            if listing:
+                self._listings.pop(dirname(path), None)
+            if subtree:
+                prefix = path.rstrip("/") + "/"
+                for cache in (self._infos, self._listings):
+                    for cached_path in [p for p in cache if p.startswith(prefix)]:
+                        del cache[cached_path]
+
+    def _on_change(self, event):
+        if isinstance(event, (OVERFLOW, CLOSED)):
+            with self._cache_lock:
+                if isinstance(event, OVERFLOW):
+                    self.overflows += 1
+                self._expire = True
+            self.clear_cache()
+        elif isinstance(event, MODIFIED):
+            self._invalidate(event.path, listing=False)
+        elif isinstance(event, CREATED):
+            #  Nothing can be cached below a path that has just been created
+            self._invalidate(event.path)
+        else:
+            self._invalidate(event.path, subtree=True)
+            other_path = getattr(event, "source", None) or getattr(event, "destination", None)
+            if other_path is not None:
+                self._invalidate(other_path, subtree=True)
+
+    def _getinfo(self, path):
+        """Get the info for a path, or None if it doesn't exist."""
+        path = abspath(normpath(path))
+        entry = self._lookup(self._infos, path)
+        if entry is not None:
+            return entry[1]
+        generation = self._generation
+        try:
+            info = super(StatCacheFS, self).getinfo(path)
+        except ResourceNotFoundError:
+            info = None
+        self._store(self._infos, path, info, generation)
+        return info
+
+    def getinfo(self, path):
+        info = self._getinfo(path)
+        if info is None:
+            raise ResourceNotFoundError(path)
+        return info
+
+    def exists(self, path):
+        try:
+            return self._getinfo(path) is not None
+        except FSError:
+            return super(StatCacheFS, self).exists(path)
+
+    def isdir(self, path):
+        try:
+            info = self._getinfo(path)
+        except FSError:
+            return super(StatCacheFS, self).isdir(path)
+        return info is not None and utils.isdir(super(StatCacheFS, self), path, info)
+
+    def isfile(self, path):
+        try:
+            info = self._getinfo(path)
+        except FSError:
+            return super(StatCacheFS, self).isfile(path)
+        return info is not None and utils.isfile(super(StatCacheFS, self), path, info)
+
+    def listdir(self, path="", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        key = abspath(normpath(path))
+        entry = self._lookup(self._listings, key)
+        if entry is not None:
+            names = entry[1]
+        else:
+            generation = self._generation
+            names = tuple(super(StatCacheFS, self).listdir(path))
+            self._store(self._listings, key, names, generation)
+        return self._listdir_helper(path, list(names), wildcard, full, absolute, dirs_only, files_only)
+
+    def ilistdir(self, path="", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        return iter(self.listdir(path, wildcard, full, absolute, dirs_only, files_only))
+
+    def listdirinfo(self, path="", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        #  Made from the cached listing and info
+        return FS.listdirinfo(self, path, wildcard, full, absolute, dirs_only, files_only)
+
+    def ilistdirinfo(self, path="", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        return iter(self.listdirinfo(path, wildcard, full, absolute, dirs_only, files_only))
+
+    def open(self, path, mode='r', **kwargs):
+        if not any(c in mode for c in "wa+"):
+            return super(StatCacheFS, self).open(path, mode, **kwargs)
+        try:
+            f = super(StatCacheFS, self).open(path, mode, **kwargs)
+        finally:
+            self._invalidate(path)
+        return _InvalidatingFile(f, lambda: self._invalidate(path, listing=False))
+
+    def setcontents(self, path, data, encoding=None, errors=None, chunk_size=None):
+        try:
+            return super(StatCacheFS, self).setcontents(path, data, encoding=encoding, errors=errors, chunk_size=chunk_size)
+        finally:
+            self._invalidate(path)
+
+    def createfile(self, path, wipe=False):
+        try:
+            return super(StatCacheFS, self).createfile(path, wipe=wipe)
+        finally:
+            self._invalidate(path)
+
+    def makedir(self, path, recursive=False, allow_recreate=False):
+        try:
+            return super(StatCacheFS, self).makedir(path, recursive=recursive, allow_recreate=allow_recreate)
+        finally:
+            if recursive:
+                for dir_path in recursepath(path):
+                    self._invalidate(dir_path)
+            else:
+                self._invalidate(path)
+
+    def remove(self, path):
+        try:
+            return super(StatCacheFS, self).remove(path)
+        finally:
+            self._invalidate(path)
+
+    def removedir(self, path, recursive=False, force=False):
+        try:
+            return super(StatCacheFS, self).removedir(path, recursive=recursive, force=force)
+        finally:
+            if recursive:
+                #  Parent directories left empty are removed too
+                for dir_path in recursepath(path):
+                    self._invalidate(dir_path, subtree=True)
+            else:
+                self._invalidate(path, subtree=True)
+
+    def rename(self, src, dst):
+        try:
+            return super(StatCacheFS, self).rename(src, dst)
+        finally:
+            self._invalidate(src, subtree=True)
+            self._invalidate(dst, subtree=True)
+
+    def move(self, src, dst, **kwds):
+        try:
+            return super(StatCacheFS, self).move(src, dst, **kwds)
+        finally:
+            self._invalidate(src, subtree=True)
+            self._invalidate(dst, subtree=True)
+
+    def movedir(self, src, dst, **kwds):
+        try:
+            return super(StatCacheFS, self).movedir(src, dst, **kwds)
+        finally:
+            self._invalidate(src, subtree=True)
+            self._invalidate(dst, subtree=True)
+
+    def copy(self, src, dst, **kwds):
+        try:
+            return super(StatCacheFS, self).copy(src, dst, **kwds)
+        finally:
+            self._invalidate(dst, subtree=True)
+
+    def copydir(self, src, dst, **kwds):
+        try:
+            return super(StatCacheFS, self).copydir(src, dst, **kwds)
+        finally:
+            self._invalidate(dst, subtree=True)
+
+    def settimes(self, path, *args, **kwds):
+        try:
+            return super(StatCacheFS, self).settimes(path, *args, **kwds)
+        finally:
+            self._invalidate(path, listing=False)
+
+    def close(self):
+        if not self.closed:
+            watcher = getattr(self, "_watcher", None)
+            self._watcher = None
+            if watcher is not None:
+                try:
+                    self.wrapped_fs.del_watcher(watcher)
+                except FSError:
+                    pass
+        super(StatCacheFS, self).close()
+
+
+class _InvalidatingFile(object):
+    """Proxy for a file opened for writing through a StatCacheFS, which drops
+    the cached info of the file when it's changed."""
+
+    def __init__(self, f, invalidate):
+        self.wrapped_file = f
+        self._invalidate = invalidate
+
+    def __getattr__(self, attr):
+        return getattr(self.wrapped_file, attr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __iter__(self):
+        return iter(self.wrapped_file)
+
+    def write(self, data):
+        try:
+            return self.wrapped_file.write(data)
+        finally:
+            self._invalidate()
+
+    def writelines(self, lines):
+        try:
+            return self.wrapped_file.writelines(lines)
+        finally:
+            self._invalidate()
+
+    def truncate(self, *args):
+        try:
+            return self.wrapped_file.truncate(*args)
+        finally:
+            self._invalidate()
+
+    def flush(self):
+        try:
+            return self.wrapped_file.flush()
+        finally:
+            self._invalidate()
+
+    def close(self):
+        try:
+            return self.wrapped_file.close()
+        finally:
+            self._invalidate()
@@ -44,7 +44,7 @@ class SubFS(WrapFS):
             return self.wrapped_fs.desc(self.sub_dir)
         return '%s!%s' % (self.wrapped_fs.desc(self.sub_dir), path)
 
-    def setcontents(self, path, data, encoding=None, errors=None, chunk_size=64*1024):
+    def setcontents(self, path, data, encoding=None, errors=None, chunk_size=None):
         path = self._encode(path)
         return self.wrapped_fs.setcontents(path, data, chunk_size=chunk_size)
 
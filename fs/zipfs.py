@@ -6,12 +6,13 @@ A FS object that represents the contents of a Zip file
 
 """
 
-import datetime
 import os.path
+from bisect import bisect_left
 
 from fs.base import *
 from fs.path import *
 from fs.errors import *
+from fs.info import ZipInfoInfo
 from fs.filelike import StringIO
 from fs import iotools
 
@@ -142,6 +143,10 @@ class ZipFS(FS):
             self.temp_fs = tempfs.TempFS()
 
         self._path_fs = MemoryFS()
+        #  Every path in the zip, including implied directories, and a sorted
+        #  list of them made when needed for prefix searches
+        self._index = set()
+        self._sorted_index = None
         if mode in 'ra':
             self._parse_resource_list()
 
@@ -169,6 +174,11 @@ class ZipFS(FS):
             self._add_resource(self._decode_path(path))
 
     def _add_resource(self, path):
+        index_path = relpath(normpath(path))
+        while index_path and index_path not in self._index:
+            self._index.add(index_path)
+            index_path = dirname(index_path)
+        self._sorted_index = None
         if path.endswith('/'):
             path = path[:-1]
             if path:
@@ -272,6 +282,26 @@ class ZipFS(FS):
     def listdir(self, path="/", wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
         return self._path_fs.listdir(path, wildcard, full, absolute, dirs_only, files_only)
 
+    @synchronize
+    def _iglob(self, pattern, path):
+        #  Every match starts with the literal prefix of the pattern, so only
+        #  that range of the sorted index needs to be checked
+        if self._sorted_index is None:
+            self._sorted_index = sorted(self._index)
+        index = self._sorted_index
+        base = relpath(path)
+        if base:
+            base += '/'
+        prefix = base + pattern.prefix
+        matches = []
+        for i in xrange(bisect_left(index, prefix), len(index)):
+            index_path = index[i]
+            if not index_path.startswith(prefix):
+                break
+            if pattern.match(index_path[len(base):]):
+                matches.append('/' + index_path)
+        return iter(matches)
+
     @synchronize
     def getinfo(self, path):
         if not self.exists(path):
@@ -279,16 +309,7 @@ class ZipFS(FS):
         path = normpath(path).lstrip('/')
         try:
             zi = self.zf.getinfo(self._encode_path(path))
-            zinfo = dict((attrib, getattr(zi, attrib)) for attrib in dir(zi) if not attrib.startswith('_'))
-            for k, v in zinfo.iteritems():
-                if callable(v):
-                    zinfo[k] = v()
         except KeyError:
-            zinfo = {'file_size':0}
-        info = {'size' : zinfo['file_size']}
-        if 'date_time' in zinfo:
-            info['created_time'] = datetime.datetime(*zinfo['date_time'])
-        info.update(zinfo)
-        if 'FileHeader' in info:
-            del info['FileHeader']
-        return info
+            #  A directory without an entry of its own
+            zi = None
+        return ZipInfoInfo(zi)
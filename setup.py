@@ -16,6 +16,7 @@ COMMANDS = ['fscat',
             'fsmv',
             'fscp',
             'fsrm',
+            'fssync',
             'fsserve',
             'fstree',
             'fsmkdir',
@@ -60,6 +61,7 @@ setup(install_requires=['setuptools', 'six'],
                 'fs.expose.fuse',
                 'fs.expose.wsgi',
                 'fs.tests',
+                'fs.tests.benchmarks',
                 'fs.wrapfs',
                 'fs.osfs',
                 'fs.contrib',